@@ -15,6 +15,49 @@ class Settings(BaseSettings):
     host: str = "0.0.0.0"
     port: int = 8001
 
+    # Patch 应用后除增量检查外再做一次全量 key 唯一性扫描（调试用，大 schema 上开销明显）
+    strict_key_validation: bool = False
+    # 表格数据按 rowKey 维护行索引，update_list_item / remove_from_list 按 rowKey 定位行时不再逐行比较
+    table_row_index: bool = True
+
+    # field:change 合并窗口（毫秒），同一字段在窗口内的连续修改合并为一条历史和一次推送；0 表示不合并
+    field_change_coalesce_ms: int = 30
+
+    # Patch 历史（每个实例的环形缓冲区上限；max_bytes 按 JSON 长度估算，None 表示不限制）
+    patch_history_max_entries: int = 10000
+    patch_history_max_bytes: int | None = None
+
+    # 持久化（WAL + 快照），关闭时实例只保存在内存中
+    persistence_enabled: bool = False
+    persistence_dir: str = "data"
+    # 每次组提交后 fsync（关闭后只保证写入操作系统缓存）
+    persistence_fsync: bool = True
+    persistence_snapshot_interval: int = 10000
+    persistence_segment_max_bytes: int = 64 * 1024 * 1024
+
+    # WebSocket 每个连接的发送队列上限，以及队列满时的慢消费者策略：
+    # snapshot（丢弃积压，改发一次完整快照）/ disconnect（断开连接）/ coalesce（合并积压的增量）
+    ws_send_queue_size: int = 256
+    ws_slow_consumer_policy: str = "snapshot"
+    # 心跳：每 interval 秒发送 ping，超过 timeout 秒没有收到客户端消息的连接被关闭；interval 为 0 时关闭心跳
+    ws_heartbeat_interval: float = 20.0
+    ws_idle_timeout: float = 60.0
+    # 增量合并推送窗口（毫秒）：同一实例在窗口内的增量合并为一条消息推送（16-50 较合适），0 表示立即推送
+    ws_flush_interval_ms: float = 16.0
+    # 断线重连续传：每个实例保留最近的增量条数，客户端带 last_seen_version 重连时只补发缺失的增量
+    ws_resume_window: int = 256
+
+    # 多 worker 部署的 Backplane："none"（单进程）或 "unix"（本机 worker 通过 backplane_dir 下的 Unix socket 互连）
+    backplane: str = "none"
+    backplane_dir: str = "/tmp/schema-ui-backplane"
+
+    # 外部 API action 的 HTTP 连接池
+    external_api_max_connections: int = 100
+    external_api_max_keepalive: int = 20
+    external_api_keepalive_expiry: float = 30.0
+    # 同一主机的最大并发请求数
+    external_api_per_host_limit: int = 10
+
     class Config:
         env_file: str = ".env"
         case_sensitive: bool = False
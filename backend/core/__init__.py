@@ -3,9 +3,16 @@
 from .defaults import get_default_instances
 from .history import PatchHistoryManager
 from .manager import SchemaManager
+from .persistence import PersistenceEngine
+from .backplane import Backplane, InProcessBackplane, InProcessHub, UnixSocketBackplane
 
 __all__ = [
     "get_default_instances",
     "PatchHistoryManager",
-    "SchemaManager"
+    "SchemaManager",
+    "PersistenceEngine",
+    "Backplane",
+    "InProcessBackplane",
+    "InProcessHub",
+    "UnixSocketBackplane"
 ]
\ No newline at end of file
@@ -0,0 +1,322 @@
+"""Backplane - 多 worker / 多进程之间的发布订阅与请求转发
+
+uvicorn 以多个 worker 运行时，每个 worker 都有自己的 SchemaManager 和 WebSocket 连接。
+Backplane 把各个 worker（节点）连接起来：
+- publish：把消息发给除自己以外的所有节点（Schema 复制记录、WebSocket 推送）
+- request：向指定节点发送请求并等待回复（把写请求转发给实例的属主节点）
+- owner_of：按会合哈希（rendezvous hashing）确定实例的属主节点，每个实例只有一个写入者；
+  节点加入或退出时只有少量实例换属主
+
+实现：
+- InProcessBackplane：同一进程内的多个节点共用一个 InProcessHub（单进程部署、测试和基准）
+- UnixSocketBackplane：同一台机器上的 worker 通过目录下的 Unix socket 互连，
+  目录中的 <node_id>.sock 即成员列表；帧格式为 4 字节长度 + JSON
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import struct
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+# 收到消息时的回调：publish 的消息返回值被忽略，request 的消息返回值作为回复
+MessageHandler = Callable[[dict[str, Any]], Awaitable[dict[str, Any] | None]]
+
+_FRAME_HEADER = struct.Struct("!I")
+_SOCKET_SUFFIX = ".sock"
+# 成员列表缓存时间（秒）
+_MEMBERSHIP_TTL = 1.0
+
+
+def new_node_id() -> str:
+    """生成节点 ID（主机名-进程号-随机后缀）"""
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+def rendezvous_owner(key: str, members: list[str]) -> str:
+    """会合哈希：返回 key 的属主节点
+
+    Args:
+        key: 分片键（实例 ID）
+        members: 所有节点 ID
+
+    Returns:
+        权重最大的节点 ID
+    """
+    return max(members, key=lambda member: hashlib.sha1(f"{member}\0{key}".encode("utf-8")).digest())
+
+
+class Backplane(ABC):
+    """节点间通信接口
+
+    Attributes:
+        node_id: 本节点 ID
+    """
+
+    def __init__(self, node_id: str | None = None) -> None:
+        self.node_id: str = node_id or new_node_id()
+        self._handler: MessageHandler | None = None
+
+    async def start(self, handler: MessageHandler) -> None:
+        """开始接收其他节点的消息"""
+        self._handler = handler
+
+    @abstractmethod
+    async def publish(self, message: dict[str, Any]) -> None:
+        """向除自己以外的所有节点发送消息（每个节点按发送顺序收到）"""
+
+    @abstractmethod
+    async def request(self, node_id: str, message: dict[str, Any], timeout: float = 10.0) -> dict[str, Any]:
+        """向指定节点发送请求并等待回复"""
+
+    @abstractmethod
+    def members(self) -> list[str]:
+        """当前所有节点 ID（包括自己）"""
+
+    async def close(self) -> None:
+        """断开与其他节点的连接"""
+        self._handler = None
+
+    def owner_of(self, key: str) -> str:
+        """实例的属主节点"""
+        return rendezvous_owner(key, self.members())
+
+    def is_owner(self, key: str) -> bool:
+        """本节点是否为实例的属主"""
+        return self.owner_of(key) == self.node_id
+
+    async def _dispatch(self, message: dict[str, Any]) -> dict[str, Any] | None:
+        if self._handler is None:
+            return None
+        return await self._handler(message)
+
+
+class InProcessHub:
+    """同一进程内的节点注册表"""
+
+    def __init__(self) -> None:
+        self.nodes: dict[str, "InProcessBackplane"] = {}
+
+
+class InProcessBackplane(Backplane):
+    """进程内 Backplane：消息直接交给同一 hub 中其他节点的回调"""
+
+    def __init__(self, hub: InProcessHub | None = None, node_id: str | None = None) -> None:
+        super().__init__(node_id)
+        self.hub: InProcessHub = hub if hub is not None else InProcessHub()
+        self.hub.nodes[self.node_id] = self
+
+    async def publish(self, message: dict[str, Any]) -> None:
+        for node_id, node in list(self.hub.nodes.items()):
+            if node_id != self.node_id:
+                _ = await node._dispatch(message)
+
+    async def request(self, node_id: str, message: dict[str, Any], timeout: float = 10.0) -> dict[str, Any]:
+        node = self.hub.nodes.get(node_id)
+        if node is None:
+            raise ConnectionError(f"Unknown backplane node: {node_id}")
+        reply = await asyncio.wait_for(node._dispatch(message), timeout)
+        return reply or {}
+
+    def members(self) -> list[str]:
+        return sorted(self.hub.nodes)
+
+    async def close(self) -> None:
+        await super().close()
+        _ = self.hub.nodes.pop(self.node_id, None)
+
+
+async def _write_frame(writer: asyncio.StreamWriter, message: dict[str, Any]) -> None:
+    payload = json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    writer.write(_FRAME_HEADER.pack(len(payload)) + payload)
+    await writer.drain()
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> dict[str, Any]:
+    header = await reader.readexactly(_FRAME_HEADER.size)
+    (length,) = _FRAME_HEADER.unpack(header)
+    return json.loads(await reader.readexactly(length))
+
+
+class _PeerConnection:
+    """到一个节点的出站连接：发送 publish / request，读取 request 的回复"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader: asyncio.StreamReader = reader
+        self.writer: asyncio.StreamWriter = writer
+        self.pending: dict[int, asyncio.Future[dict[str, Any]]] = {}
+        self.next_id: int = 0
+        self.lock: asyncio.Lock = asyncio.Lock()
+        self.reader_task: asyncio.Task[None] = asyncio.create_task(self._read_replies())
+
+    async def _read_replies(self) -> None:
+        try:
+            while True:
+                frame = await _read_frame(self.reader)
+                future = self.pending.pop(frame.get("id", -1), None)
+                if future is not None and not future.done():
+                    future.set_result(frame.get("data") or {})
+        except (asyncio.IncompleteReadError, ConnectionError, OSError):
+            pass
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("backplane peer disconnected"))
+            self.pending.clear()
+
+    @property
+    def alive(self) -> bool:
+        return not self.reader_task.done() and not self.writer.is_closing()
+
+    async def send(self, frame: dict[str, Any]) -> None:
+        async with self.lock:
+            await _write_frame(self.writer, frame)
+
+    def close(self) -> None:
+        _ = self.reader_task.cancel()
+        self.writer.close()
+
+
+class UnixSocketBackplane(Backplane):
+    """基于 Unix socket 的本机多进程 Backplane
+
+    每个节点监听 <directory>/<node_id>.sock，目录中的 socket 文件即为成员列表。
+    到其他节点的连接按需建立并复用；连接被拒绝的 socket 文件视为已退出节点留下的残留并删除。
+    """
+
+    def __init__(self, directory: str | Path, node_id: str | None = None) -> None:
+        super().__init__(node_id)
+        self.directory: Path = Path(directory)
+        self.path: Path = self.directory / f"{self.node_id}{_SOCKET_SUFFIX}"
+        self._server: asyncio.AbstractServer | None = None
+        self._peers: dict[str, _PeerConnection] = {}
+        self._members: list[str] = [self.node_id]
+        self._members_checked: float = 0.0
+        self._inbound: set[asyncio.StreamWriter] = set()
+
+    async def start(self, handler: MessageHandler) -> None:
+        await super().start(handler)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._server = await asyncio.start_unix_server(self._handle_inbound, path=str(self.path))
+        self._members_checked = 0.0
+        # 通知已有节点刷新成员列表，避免在缓存过期前对实例属主的判断不一致
+        await self._broadcast_frame({"op": "hello", "node": self.node_id})
+        print(f"[Backplane] 节点 '{self.node_id}' 已加入，当前成员: {self.members()}")
+
+    async def close(self) -> None:
+        await super().close()
+        self.path.unlink(missing_ok=True)
+        await self._broadcast_frame({"op": "bye", "node": self.node_id}, log_errors=False)
+        for peer in self._peers.values():
+            peer.close()
+        self._peers.clear()
+        for writer in list(self._inbound):
+            writer.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def members(self) -> list[str]:
+        now = time.monotonic()
+        if now - self._members_checked >= _MEMBERSHIP_TTL:
+            self._members_checked = now
+            try:
+                found = {path.name.removesuffix(_SOCKET_SUFFIX) for path in self.directory.glob(f"*{_SOCKET_SUFFIX}")}
+            except OSError:
+                found = set()
+            found.add(self.node_id)
+            self._members = sorted(found)
+        return list(self._members)
+
+    def _forget(self, node_id: str) -> None:
+        """移除已退出的节点"""
+        peer = self._peers.pop(node_id, None)
+        if peer is not None:
+            peer.close()
+        if node_id in self._members:
+            self._members.remove(node_id)
+
+    async def _connect(self, node_id: str) -> _PeerConnection:
+        peer = self._peers.get(node_id)
+        if peer is not None and peer.alive:
+            return peer
+        path = self.directory / f"{node_id}{_SOCKET_SUFFIX}"
+        try:
+            reader, writer = await asyncio.open_unix_connection(str(path))
+        except (ConnectionRefusedError, FileNotFoundError):
+            # 进程已退出但 socket 文件还在
+            path.unlink(missing_ok=True)
+            self._forget(node_id)
+            raise
+        peer = _PeerConnection(reader, writer)
+        self._peers[node_id] = peer
+        return peer
+
+    async def publish(self, message: dict[str, Any]) -> None:
+        await self._broadcast_frame({"op": "pub", "data": message})
+
+    async def _broadcast_frame(self, frame: dict[str, Any], log_errors: bool = True) -> None:
+        for node_id in self.members():
+            if node_id == self.node_id:
+                continue
+            try:
+                peer = await self._connect(node_id)
+                await peer.send(frame)
+            except (ConnectionError, OSError) as e:
+                if log_errors:
+                    print(f"[Backplane] 向节点 '{node_id}' 发送失败: {e}")
+                self._forget(node_id)
+
+    async def request(self, node_id: str, message: dict[str, Any], timeout: float = 10.0) -> dict[str, Any]:
+        peer = await self._connect(node_id)
+        peer.next_id += 1
+        request_id = peer.next_id
+        future: asyncio.Future[dict[str, Any]] = asyncio.get_running_loop().create_future()
+        peer.pending[request_id] = future
+        try:
+            await peer.send({"op": "req", "id": request_id, "data": message})
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            _ = peer.pending.pop(request_id, None)
+
+    async def _handle_inbound(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """处理其他节点的入站连接：按顺序处理 publish，request 并发处理并回复"""
+        write_lock = asyncio.Lock()
+        self._inbound.add(writer)
+
+        async def reply(request_id: int, message: dict[str, Any]) -> None:
+            try:
+                data = await self._dispatch(message)
+            except Exception as e:
+                data = {"status": "error", "error": f"backplane request failed: {e}"}
+            async with write_lock:
+                await _write_frame(writer, {"op": "res", "id": request_id, "data": data})
+
+        try:
+            while True:
+                frame = await _read_frame(reader)
+                op = frame.get("op")
+                if op == "req":
+                    _ = asyncio.create_task(reply(frame["id"], frame["data"]))
+                elif op == "hello":
+                    self._members_checked = 0.0
+                elif op == "bye":
+                    self._forget(frame["node"])
+                else:
+                    try:
+                        _ = await self._dispatch(frame["data"])
+                    except Exception as e:
+                        print(f"[Backplane] 处理消息失败: {e}")
+        except (asyncio.IncompleteReadError, ConnectionError, OSError):
+            pass
+        finally:
+            self._inbound.discard(writer)
+            writer.close()
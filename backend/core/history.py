@@ -1,15 +1,119 @@
-"""Patch 历史管理器 - 管理和查询 Patch 历史记录"""
+"""Patch 历史管理器 - 管理和查询 Patch 历史记录
 
+每个实例的历史保存在固定容量的环形缓冲区中：
+- Patch ID 在实例内连续递增，记录所在槽位为 (id - 1) % capacity，
+  按 ID 查询只需一次取模运算（O(1)）
+- 超过 max_entries 条或 max_bytes 字节（按 JSON 序列化长度估算）时淘汰最旧的记录
+- 分页查询按 ID 游标切片，不复制整个历史
+"""
+
+import json
 from datetime import datetime
 from typing import cast
 
+# 默认每个实例保留的最大记录数
+DEFAULT_MAX_ENTRIES = 10000
+# 单页最大记录数
+MAX_PAGE_SIZE = 1000
+
+
+def _estimate_size(patch: "dict[str, object]") -> int:
+    """估算 Patch 占用的字节数（JSON 序列化长度）"""
+    try:
+        return len(json.dumps(patch, ensure_ascii=False, default=str))
+    except (TypeError, ValueError):
+        return len(str(patch))
+
+
+class _InstanceHistory:
+    """单个实例的环形缓冲区
+
+    Attributes:
+        capacity: 槽位数量
+        first_id: 最旧的保留记录 ID
+        next_id: 下一条记录的 ID（保留的记录为 [first_id, next_id)）
+        total_bytes: 保留记录的估算字节数（未启用 max_bytes 时为 0）
+        evicted: 累计淘汰的记录数
+    """
+
+    __slots__ = ("capacity", "slots", "sizes", "first_id", "next_id", "total_bytes", "evicted")
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity: int = capacity
+        self.slots: "list[dict[str, object] | None]" = [None] * capacity
+        self.sizes: list[int] = [0] * capacity
+        self.first_id: int = 1
+        self.next_id: int = 1
+        self.total_bytes: int = 0
+        self.evicted: int = 0
+
+    def __len__(self) -> int:
+        return self.next_id - self.first_id
+
+    def _slot(self, patch_id: int) -> int:
+        return (patch_id - 1) % self.capacity
+
+    def evict_oldest(self) -> None:
+        """淘汰最旧的一条记录"""
+        slot = self._slot(self.first_id)
+        self.slots[slot] = None
+        self.total_bytes -= self.sizes[slot]
+        self.sizes[slot] = 0
+        self.first_id += 1
+        self.evicted += 1
+
+    def append(self, record: "dict[str, object]", size: int) -> None:
+        """追加记录（槽位已满时覆盖最旧的记录）"""
+        if len(self) == self.capacity:
+            self.evict_oldest()
+        slot = self._slot(self.next_id)
+        self.slots[slot] = record
+        self.sizes[slot] = size
+        self.total_bytes += size
+        self.next_id += 1
+
+    def get(self, patch_id: int) -> "dict[str, object] | None":
+        """按 ID 获取记录（已淘汰或不存在时返回 None）"""
+        if patch_id < self.first_id or patch_id >= self.next_id:
+            return None
+        return self.slots[self._slot(patch_id)]
+
+    def range(self, start_id: int, end_id: int) -> "list[dict[str, object]]":
+        """获取 [start_id, end_id) 区间内的记录（区间会被截断到保留范围）"""
+        start_id = max(start_id, self.first_id)
+        end_id = min(end_id, self.next_id)
+        if start_id >= end_id:
+            return []
+        start_slot = self._slot(start_id)
+        end_slot = start_slot + (end_id - start_id)
+        if end_slot <= self.capacity:
+            records = self.slots[start_slot:end_slot]
+        else:
+            records = self.slots[start_slot:] + self.slots[:end_slot - self.capacity]
+        return cast("list[dict[str, object]]", records)
+
 
 class PatchHistoryManager:
-    """Patch 历史记录管理器"""
+    """Patch 历史记录管理器（每个实例一个有界环形缓冲区）"""
 
-    def __init__(self) -> None:
-        self._history: "dict[str, list[dict[str, object]]]" = {}
-        self._counters: "dict[str, int]" = {}
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int | None = None) -> None:
+        """
+        Args:
+            max_entries: 每个实例保留的最大记录数
+            max_bytes: 每个实例保留记录的最大字节数（按 JSON 长度估算），None 表示不限制
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries: int = max_entries
+        self.max_bytes: int | None = max_bytes
+        self._history: dict[str, _InstanceHistory] = {}
+
+    def _get_or_create(self, instance_name: str) -> _InstanceHistory:
+        history = self._history.get(instance_name)
+        if history is None:
+            history = _InstanceHistory(self.max_entries)
+            self._history[instance_name] = history
+        return history
 
     def save(self, instance_name: str, patch: "dict[str, object]") -> int:
         """保存 Patch 到历史记录
@@ -21,24 +125,25 @@ class PatchHistoryManager:
         Returns:
             Patch ID
         """
-        if instance_name not in self._history:
-            self._history[instance_name] = []
-        if instance_name not in self._counters:
-            self._counters[instance_name] = 0
-
-        self._counters[instance_name] += 1
-        patch_record = {
-            "id": self._counters[instance_name],
+        history = self._get_or_create(instance_name)
+        patch_id = history.next_id
+        patch_record: "dict[str, object]" = {
+            "id": patch_id,
             "timestamp": datetime.now().isoformat(),
             "patch": patch
         }
 
-        # 使用 cast 显式转换类型，解决 dict 类型参数的不变性问题
-        self._history[instance_name].append(cast("dict[str, object]", patch_record))
-        return self._counters[instance_name]
+        # 只有启用字节上限时才需要估算大小
+        size = _estimate_size(patch) if self.max_bytes is not None else 0
+        history.append(patch_record, size)
+        if self.max_bytes is not None:
+            # 至少保留刚写入的一条
+            while history.total_bytes > self.max_bytes and len(history) > 1:
+                history.evict_oldest()
+        return patch_id
 
     def get_all(self, instance_name: str) -> "list[dict[str, object]]":
-        """获取实例的所有 Patch 历史
+        """获取实例当前保留的所有 Patch 历史（按 ID 升序）
 
         Args:
             instance_name: 实例 ID
@@ -46,7 +151,45 @@ class PatchHistoryManager:
         Returns:
             Patch 历史记录列表
         """
-        return self._history.get(instance_name, [])
+        history = self._history.get(instance_name)
+        if history is None:
+            return []
+        return history.range(history.first_id, history.next_id)
+
+    def get_page(
+        self,
+        instance_name: str,
+        after: int | None = None,
+        before: int | None = None,
+        limit: int = 100
+    ) -> "list[dict[str, object]]":
+        """按 ID 游标分页获取 Patch 历史（结果按 ID 升序）
+
+        - 指定 after：返回 ID 大于 after 的最早 limit 条
+        - 指定 before：返回 ID 小于 before 的最近 limit 条
+        - 都不指定：返回最近的 limit 条
+
+        Args:
+            instance_name: 实例 ID
+            after: 起始游标（不包含）
+            before: 结束游标（不包含）
+            limit: 每页记录数（上限 MAX_PAGE_SIZE）
+
+        Returns:
+            Patch 历史记录列表
+        """
+        history = self._history.get(instance_name)
+        if history is None:
+            return []
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        if after is not None:
+            start_id = max(after + 1, history.first_id)
+            end_id = start_id + limit
+            if before is not None:
+                end_id = min(end_id, before)
+            return history.range(start_id, end_id)
+        end_id = history.next_id if before is None else min(before, history.next_id)
+        return history.range(end_id - limit, end_id)
 
     def get_by_id(self, instance_name: str, patch_id: int) -> "dict[str, object] | None":
         """根据 ID 获取特定 Patch
@@ -56,24 +199,61 @@ class PatchHistoryManager:
             patch_id: Patch ID
 
         Returns:
-            Patch 记录，如果不存在返回 None
+            Patch 记录，如果不存在或已被淘汰返回 None
         """
-        patches = self.get_all(instance_name)
-        return next((p for p in patches if p["id"] == patch_id), None)
+        history = self._history.get(instance_name)
+        if history is None:
+            return None
+        return history.get(patch_id)
+
+    def get_bounds(self, instance_name: str) -> tuple[int, int]:
+        """获取实例保留记录的 ID 范围
+
+        Args:
+            instance_name: 实例 ID
+
+        Returns:
+            (最旧记录 ID, 最新记录 ID)；没有记录时最新 ID 小于最旧 ID
+        """
+        history = self._history.get(instance_name)
+        if history is None:
+            return 1, 0
+        return history.first_id, history.next_id - 1
+
+    def get_stats(self, instance_name: str) -> "dict[str, int | None]":
+        """获取实例历史的统计信息
+
+        Args:
+            instance_name: 实例 ID
+
+        Returns:
+            包含 count、first_id、last_id、evicted、bytes 等字段的字典
+        """
+        history = self._history.get(instance_name)
+        if history is None:
+            return {"count": 0, "first_id": None, "last_id": None, "evicted": 0, "bytes": 0,
+                    "max_entries": self.max_entries, "max_bytes": self.max_bytes}
+        return {
+            "count": len(history),
+            "first_id": history.first_id if len(history) else None,
+            "last_id": history.next_id - 1 if len(history) else None,
+            "evicted": history.evicted,
+            "bytes": history.total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
 
     def clear(self, instance_name: str) -> None:
-        """清空实例的 Patch 历史
+        """清空实例的 Patch 历史（ID 重新从 1 开始）
 
         Args:
             instance_name: 实例 ID
         """
         if instance_name in self._history:
-            self._history[instance_name] = []
-        if instance_name in self._counters:
-            self._counters[instance_name] = 0
+            self._history[instance_name] = _InstanceHistory(self.max_entries)
 
     def count(self, instance_name: str) -> int:
-        """获取实例的 Patch 数量
+        """获取实例当前保留的 Patch 数量
 
         Args:
             instance_name: 实例 ID
@@ -81,4 +261,5 @@ class PatchHistoryManager:
         Returns:
             Patch 数量
         """
-        return len(self._history.get(instance_name, []))
+        history = self._history.get(instance_name)
+        return len(history) if history is not None else 0
@@ -1,34 +1,252 @@
 """Schema 实例管理器 - 管理所有 UI Schema 实例"""
 
+import asyncio
+from collections import deque
+from collections.abc import Callable
 from typing import Any
 from ..fastapi.models import UISchema
+from .persistence import PersistenceEngine, RECORD_PUT, RECORD_DELETE, RECORD_DELTA
+
+
+def _init_field_params(schema: UISchema) -> None:
+    """字段有 value 但 state.params 中没有对应的键时初始化它
+
+    字段定义保持原始的默认值，实际值存储在 state.params 中，因此不做反向同步。
+    在实例整体设置时完成（包含在同一个版本、WAL 和复制记录中）；之后新增的字段由 Patch 处理时初始化。
+    """
+    for block in schema.blocks:
+        if block.props and block.props.fields:
+            for field in block.props.fields:
+                field_key = getattr(field, 'key', None)
+                if not field_key:
+                    continue
+                field_value = getattr(field, 'value', None)
+                if field_key not in schema.state.params and field_value is not None:
+                    schema.state.params[field_key] = field_value
+                    print(f"[SchemaManager] 同步字段值到 params: {field_key} = {field_value}")
 
 
 class SchemaManager:
     """Schema 实例管理器"""
 
-    def __init__(self):
+    def __init__(self, delta_window: int = 256):
+        """
+        Args:
+            delta_window: 每个实例保留的最近增量条数（用于断线重连时补发，见 deltas_since）
+        """
         self._instances: dict[str, UISchema] = {}
+        # 每个实例已发布的 Schema 版本号（单调递增，删除实例后保留，避免重建时版本回退）
+        self._versions: dict[str, int] = {}
+        # 每个实例的修改锁（见 lock）
+        self._locks: dict[str, asyncio.Lock] = {}
+        # 可选的持久化引擎（见 attach_persistence）
+        self.persistence: PersistenceEngine | None = None
+        # 可选的复制回调：多 worker 部署时把与 WAL 相同的记录发给其他节点（见 services/cluster.py）
+        self.replicator: Callable[[dict[str, Any]], None] | None = None
+        # 每个实例最近发布的增量记录（版本号连续，整体替换时清空）
+        self.delta_window: int = delta_window
+        self._recent_deltas: dict[str, deque[dict[str, Any]]] = {}
 
     def get(self, instance_name: str) -> UISchema | None:
         """获取指定实例的 Schema"""
         return self._instances.get(instance_name)
 
     def set(self, instance_name: str, schema: UISchema) -> None:
-        """设置/更新实例的 Schema"""
+        """设置/更新实例的 Schema（整体替换视为一次新版本）"""
+        _init_field_params(schema)
         self._instances[instance_name] = schema
+        version = self.bump_version(instance_name)
+        # 整体替换无法用增量表示，之前的增量不能再用于补发
+        _ = self._recent_deltas.pop(instance_name, None)
+        if self.persistence is not None or self.replicator is not None:
+            record = {
+                "kind": RECORD_PUT,
+                "instance": instance_name,
+                "version": version,
+                "schema": schema.model_dump(by_alias=True, mode='json')
+            }
+            if self.replicator is not None:
+                self.replicator(record)
+            if self.persistence is not None:
+                _ = self.persistence.append(record)
+                self._maybe_snapshot()
 
     def delete(self, instance_name: str) -> bool:
-        """删除实例"""
+        """删除实例（实例锁未被持有时一并移除，避免删除过的实例的锁一直保留）"""
         if instance_name in self._instances:
             del self._instances[instance_name]
+            _ = self._recent_deltas.pop(instance_name, None)
+            instance_lock = self._locks.get(instance_name)
+            # 锁刚释放、等待者尚未恢复运行时 locked() 也为 False，有等待者时保留锁对象
+            if instance_lock is not None and not instance_lock.locked() and not instance_lock._waiters:
+                del self._locks[instance_name]
+            if self.replicator is not None:
+                self.replicator({"kind": RECORD_DELETE, "instance": instance_name})
+            if self.persistence is not None:
+                _ = self.persistence.append({"kind": RECORD_DELETE, "instance": instance_name})
+                self._maybe_snapshot()
             return True
         return False
 
+    def load_state(self, state: dict[str, Any]) -> None:
+        """加载持久化引擎恢复的状态（不写 WAL）
+
+        Args:
+            state: PersistenceEngine.recover() 的返回值
+        """
+        for instance_name, data in state.get("instances", {}).items():
+            self._instances[instance_name] = UISchema.model_validate(data)
+        self._versions.update(state.get("versions", {}))
+
+    def attach_persistence(self, engine: PersistenceEngine) -> None:
+        """启用持久化：之后的设置、删除和增量发布都会写入 WAL
+
+        挂载时立即写入一次快照，作为后续 WAL 重放的起点。
+        """
+        self.persistence = engine
+        engine.snapshot(self.export_state())
+
+    def log_delta(
+        self,
+        instance_name: str,
+        version: int,
+        ops: list[dict[str, Any]],
+        patch_id: int | None = None
+    ) -> "asyncio.Future[int] | None":
+        """记录一次已发布的增量
+
+        Args:
+            instance_name: 实例 ID
+            version: 发布后的版本号
+            ops: 增量操作列表
+            patch_id: 对应的 Patch 历史 ID
+
+        Returns:
+            记录落盘后完成的 Future；未启用持久化时返回 None
+        """
+        record: dict[str, Any] = {"kind": RECORD_DELTA, "instance": instance_name, "version": version, "ops": ops}
+        if patch_id is not None:
+            record["patch_id"] = patch_id
+        self._remember_delta(record)
+        if self.replicator is not None:
+            self.replicator(record)
+        if self.persistence is None:
+            return None
+        durable = self.persistence.append(record, wait=True)
+        self._maybe_snapshot()
+        return durable
+
+    def apply_replica(self, record: dict[str, Any]) -> None:
+        """应用其他节点复制过来的记录（不写 WAL，也不再复制）
+
+        Args:
+            record: put / delete / delta 记录（格式与 WAL 记录相同）
+        """
+        instance_name = record["instance"]
+        if record["kind"] == RECORD_PUT:
+            self._instances[instance_name] = UISchema.model_validate(record["schema"])
+            _ = self._recent_deltas.pop(instance_name, None)
+        elif record["kind"] == RECORD_DELETE:
+            _ = self._instances.pop(instance_name, None)
+            _ = self._recent_deltas.pop(instance_name, None)
+            return
+        elif record["kind"] == RECORD_DELTA:
+            schema = self._instances.get(instance_name)
+            if schema is None:
+                return
+            # 原地应用到当前对象（保留二级索引、列表记录和修订号的增量维护），不重新构造整个 schema
+            from ..fastapi.services.delta import apply_delta_ops
+            apply_delta_ops(schema, record["ops"])
+            self._remember_delta(record)
+        if "version" in record:
+            self._versions[instance_name] = record["version"]
+
+    def _remember_delta(self, record: dict[str, Any]) -> None:
+        if self.delta_window <= 0:
+            return
+        recent = self._recent_deltas.get(record["instance"])
+        if recent is None:
+            recent = deque(maxlen=self.delta_window)
+            self._recent_deltas[record["instance"]] = recent
+        elif recent and recent[-1]["version"] != record["version"] - 1:
+            # 版本不连续（中间有整体替换），丢弃旧的增量
+            recent.clear()
+        recent.append(record)
+
+    def deltas_since(
+        self,
+        instance_name: str,
+        version: int | None = None,
+        patch_id: int | None = None
+    ) -> list[dict[str, Any]] | None:
+        """获取从指定版本（或指定 Patch 之后）到当前版本的增量记录
+
+        Args:
+            instance_name: 实例 ID
+            version: 客户端已有的版本号
+            patch_id: 客户端最后收到的 Patch ID（未指定 version 时使用）
+
+        Returns:
+            按版本升序的增量记录（已是最新版本时为空列表）；
+            缺失的增量已不在保留窗口内、或无法确定客户端版本时返回 None
+        """
+        current = self.get_version(instance_name)
+        recent = self._recent_deltas.get(instance_name)
+        if version is None and patch_id is not None and recent:
+            version = next((record["version"] for record in reversed(recent) if record.get("patch_id") == patch_id), None)
+        if version is None or version > current:
+            return None
+        if version == current:
+            return []
+        if not recent or recent[-1]["version"] != current or recent[0]["version"] > version + 1:
+            return None
+        start = version + 1 - recent[0]["version"]
+        return [recent[i] for i in range(start, len(recent))]
+
+    def export_state(self) -> dict[str, Any]:
+        """导出全部实例的 JSON 与版本号（用于快照）"""
+        return {
+            "instances": {
+                name: schema.model_dump(by_alias=True, mode='json')
+                for name, schema in self._instances.items()
+            },
+            "versions": dict(self._versions)
+        }
+
+    def _maybe_snapshot(self) -> None:
+        if self.persistence is not None and self.persistence.snapshot_due():
+            self.persistence.snapshot(self.export_state())
+
+    def lock(self, instance_name: str) -> asyncio.Lock:
+        """获取实例的修改锁
+
+        同一实例的所有修改（应用 Patch + 发布增量）都应在该锁内完成，
+        不同实例使用不同的锁，互不阻塞。
+
+        用法：
+            async with schema_manager.lock(instance_name):
+                ...
+        """
+        instance_lock = self._locks.get(instance_name)
+        if instance_lock is None:
+            instance_lock = asyncio.Lock()
+            self._locks[instance_name] = instance_lock
+        return instance_lock
+
     def exists(self, instance_name: str) -> bool:
         """检查实例是否存在"""
         return instance_name in self._instances
 
+    def get_version(self, instance_name: str) -> int:
+        """获取实例当前已发布的 Schema 版本号"""
+        return self._versions.get(instance_name, 0)
+
+    def bump_version(self, instance_name: str) -> int:
+        """递增并返回实例的 Schema 版本号"""
+        version = self._versions.get(instance_name, 0) + 1
+        self._versions[instance_name] = version
+        return version
+
     def list_all(self) -> list[str]:
         """列出所有实例 ID"""
         return list(self._instances.keys())
@@ -46,6 +264,7 @@ class SchemaManager:
         return {
             "instance_name": instance_name,
             "page_key": schema.page_key,
+            "version": self.get_version(instance_name),
             "blocks_count": len(schema.blocks),
             "actions_count": len(schema.actions)
         }
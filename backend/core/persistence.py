@@ -0,0 +1,416 @@
+"""持久化引擎 - 预写日志（WAL）+ 快照
+
+SchemaManager 中的实例只存在于内存，进程重启后全部丢失。启用持久化后：
+
+WAL：
+- 每次发布的增量（SchemaSyncService.publish 的 ops）、实例的整体设置与删除
+  都作为一条记录追加到本地 WAL
+- 记录格式为一行 "<crc32 十六进制>\\t<JSON>\\n"，恢复时遇到校验失败或不完整的行即停止
+- WAL 按段存储（wal-<首条序号>.log），超过 segment_max_bytes 时切换到新段
+
+组提交（group commit）：
+- 记录由调用方线程分配序号后放入队列，由单独的写线程批量写入并 fsync
+- 同一批次内的所有记录共用一次 fsync，调用方可以 await 对应的 Future 等待落盘
+
+快照：
+- 每写入 snapshot_interval 条记录后，由 SchemaManager 导出全部实例的 JSON
+  交给写线程写入 snapshot-<序号>.json（临时文件 + rename，保证原子性）
+- 快照写入后切换 WAL 段，并删除快照之前的旧段和旧快照
+
+恢复：加载最新的有效快照，再按序重放序号大于快照的 WAL 记录。
+"""
+
+import asyncio
+import json
+import os
+import queue
+import threading
+import zlib
+from pathlib import Path
+from typing import Any
+
+# 记录类型
+RECORD_PUT = "put"
+RECORD_DELETE = "delete"
+RECORD_DELTA = "delta"
+
+_WAL_PREFIX = "wal-"
+_WAL_SUFFIX = ".log"
+_SNAPSHOT_PREFIX = "snapshot-"
+_SNAPSHOT_SUFFIX = ".json"
+
+# 写线程队列中的控制项
+_STOP = object()
+
+
+def _encode_record(record: dict[str, Any]) -> bytes:
+    """编码单条 WAL 记录（带 CRC32 校验）"""
+    payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return b"%08x\t%s\n" % (zlib.crc32(payload), payload)
+
+
+def _decode_line(line: bytes) -> dict[str, Any] | None:
+    """解码单行 WAL 记录，校验失败或不完整时返回 None"""
+    if not line.endswith(b"\n"):
+        return None
+    checksum, sep, payload = line.rstrip(b"\n").partition(b"\t")
+    if not sep:
+        return None
+    try:
+        if int(checksum, 16) != zlib.crc32(payload):
+            return None
+        record = json.loads(payload)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def _unescape_pointer_token(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def apply_json_ops(document: dict[str, Any], ops: list[dict[str, Any]]) -> None:
+    """将 RFC 6902 风格的增量（add / replace / remove）原地应用到 JSON 文档
+
+    Args:
+        document: Schema 的 JSON 表示
+        ops: 增量操作列表（见 services/delta.build_delta_ops）
+    """
+    for op in ops:
+        tokens = [_unescape_pointer_token(token) for token in op["path"].split("/")[1:]]
+        if not tokens:
+            continue
+        parent: Any = document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent.setdefault(token, {})
+        last = tokens[-1]
+
+        if op["op"] == "remove":
+            if isinstance(parent, list):
+                _ = parent.pop(int(last))
+            else:
+                _ = parent.pop(last, None)
+        elif isinstance(parent, list):
+            index = len(parent) if last == "-" else int(last)
+            if op["op"] == "add":
+                parent.insert(index, op["value"])
+            else:
+                parent[index] = op["value"]
+        else:
+            parent[last] = op["value"]
+
+
+class _PendingRecord:
+    """等待写线程落盘的记录"""
+
+    __slots__ = ("seq", "data", "future", "loop")
+
+    def __init__(
+        self,
+        seq: int,
+        data: bytes,
+        future: "asyncio.Future[int] | None",
+        loop: asyncio.AbstractEventLoop | None
+    ) -> None:
+        self.seq: int = seq
+        self.data: bytes = data
+        self.future: "asyncio.Future[int] | None" = future
+        self.loop: asyncio.AbstractEventLoop | None = loop
+
+
+class _PendingSnapshot:
+    """等待写线程写入的快照"""
+
+    __slots__ = ("seq", "state")
+
+    def __init__(self, seq: int, state: dict[str, Any]) -> None:
+        self.seq: int = seq
+        self.state: dict[str, Any] = state
+
+
+class PersistenceEngine:
+    """WAL + 快照持久化引擎
+
+    Attributes:
+        data_dir: 数据目录
+        segment_max_bytes: 单个 WAL 段的最大字节数
+        snapshot_interval: 每多少条记录触发一次快照
+        fsync: 是否在每次组提交后 fsync（关闭后只保证写入操作系统缓存）
+    """
+
+    def __init__(
+        self,
+        data_dir: str | Path,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        snapshot_interval: int = 10000,
+        fsync: bool = True
+    ) -> None:
+        self.data_dir: Path = Path(data_dir)
+        self.segment_max_bytes: int = segment_max_bytes
+        self.snapshot_interval: int = snapshot_interval
+        self.fsync: bool = fsync
+
+        self._lock: threading.Lock = threading.Lock()
+        self._queue: "queue.SimpleQueue[_PendingRecord | _PendingSnapshot | object]" = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._next_seq: int = 1
+        self._records_since_snapshot: int = 0
+        self._segment: Any = None
+        self._segment_size: int = 0
+
+        # 统计信息
+        self.records_written: int = 0
+        self.commits: int = 0
+        self.snapshots_written: int = 0
+
+    # ------------------------------------------------------------------
+    # 文件布局
+    # ------------------------------------------------------------------
+
+    def _list_files(self, prefix: str, suffix: str) -> list[tuple[int, Path]]:
+        """列出目录中 <prefix><序号><suffix> 格式的文件（按序号升序）"""
+        files: list[tuple[int, Path]] = []
+        if not self.data_dir.exists():
+            return files
+        for path in self.data_dir.iterdir():
+            name = path.name
+            if name.startswith(prefix) and name.endswith(suffix):
+                number = name[len(prefix):-len(suffix)]
+                if number.isdigit():
+                    files.append((int(number), path))
+        files.sort()
+        return files
+
+    def _fsync_dir(self) -> None:
+        """fsync 数据目录，保证新建 / 重命名的文件项落盘"""
+        if not self.fsync or os.name != "posix":
+            return
+        fd = os.open(self.data_dir, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    # ------------------------------------------------------------------
+    # 恢复
+    # ------------------------------------------------------------------
+
+    def recover(self) -> dict[str, Any]:
+        """从最新快照和 WAL 恢复状态（必须在 start 之前调用）
+
+        Returns:
+            {"instances": {实例名: schema JSON}, "versions": {实例名: 版本号}}
+        """
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        instances: dict[str, dict[str, Any]] = {}
+        versions: dict[str, int] = {}
+        last_seq = 0
+
+        # 从新到旧找到第一个可读的快照
+        for seq, path in reversed(self._list_files(_SNAPSHOT_PREFIX, _SNAPSHOT_SUFFIX)):
+            try:
+                snapshot = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                print(f"[Persistence] 快照 {path.name} 不可读，跳过: {e}")
+                continue
+            instances = snapshot.get("instances", {})
+            versions = {name: int(version) for name, version in snapshot.get("versions", {}).items()}
+            last_seq = seq
+            print(f"[Persistence] 已加载快照 {path.name}: {len(instances)} 个实例")
+            break
+
+        snapshot_seq = last_seq
+        replayed = 0
+        segments = self._list_files(_WAL_PREFIX, _WAL_SUFFIX)
+        for position, (_, path) in enumerate(segments):
+            valid_bytes = 0
+            corrupted = False
+            with open(path, "rb") as segment:
+                for line in segment:
+                    record = _decode_line(line)
+                    if record is None:
+                        corrupted = True
+                        break
+                    valid_bytes += len(line)
+                    seq = int(record["seq"])
+                    if seq <= snapshot_seq:
+                        continue
+                    self._replay(record, instances, versions)
+                    last_seq = seq
+                    replayed += 1
+            if corrupted:
+                # 截断损坏的尾部，后续写入从新段继续
+                print(f"[Persistence] WAL 段 {path.name} 在 {valid_bytes} 字节处损坏，已截断")
+                with open(path, "r+b") as segment:
+                    _ = segment.truncate(valid_bytes)
+                # 损坏点之后的记录无法按序重放，丢弃后续段
+                for _, later in segments[position + 1:]:
+                    later.unlink(missing_ok=True)
+                break
+
+        self._next_seq = last_seq + 1
+        self._records_since_snapshot = replayed
+        print(f"[Persistence] 恢复完成: {len(instances)} 个实例，重放 {replayed} 条 WAL 记录，下一序号 {self._next_seq}")
+        return {"instances": instances, "versions": versions}
+
+    @staticmethod
+    def _replay(record: dict[str, Any], instances: dict[str, dict[str, Any]], versions: dict[str, int]) -> None:
+        """重放单条 WAL 记录"""
+        kind = record.get("kind")
+        name = record["instance"]
+        if kind == RECORD_PUT:
+            instances[name] = record["schema"]
+        elif kind == RECORD_DELETE:
+            _ = instances.pop(name, None)
+        elif kind == RECORD_DELTA and name in instances:
+            apply_json_ops(instances[name], record["ops"])
+        if "version" in record:
+            versions[name] = int(record["version"])
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """启动写线程"""
+        if self._thread is not None:
+            return
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self._open_segment(self._next_seq)
+        self._thread = threading.Thread(target=self._writer_loop, name="wal-writer", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """写完队列中的所有记录后停止写线程"""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    def append(self, record: dict[str, Any], wait: bool = False) -> "asyncio.Future[int] | None":
+        """追加一条记录
+
+        Args:
+            record: 记录内容（kind / instance / version 及对应数据）
+            wait: 是否返回落盘 Future（需要在事件循环中调用）
+
+        Returns:
+            wait=True 时返回记录落盘后完成的 Future，否则返回 None
+        """
+        future: "asyncio.Future[int] | None" = None
+        loop: asyncio.AbstractEventLoop | None = None
+        if wait:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._records_since_snapshot += 1
+            record = {"seq": seq, **record}
+            self._queue.put(_PendingRecord(seq, _encode_record(record), future, loop))
+        return future
+
+    def snapshot_due(self) -> bool:
+        """是否达到快照间隔"""
+        return self._records_since_snapshot >= self.snapshot_interval
+
+    def snapshot(self, state: dict[str, Any]) -> None:
+        """提交快照（state 需与最近一条已追加记录的状态一致）
+
+        Args:
+            state: {"instances": {实例名: schema JSON}, "versions": {实例名: 版本号}}
+        """
+        with self._lock:
+            seq = self._next_seq - 1
+            self._records_since_snapshot = 0
+            self._queue.put(_PendingSnapshot(seq, state))
+
+    # ------------------------------------------------------------------
+    # 写线程
+    # ------------------------------------------------------------------
+
+    def _open_segment(self, first_seq: int) -> None:
+        if self._segment is not None:
+            self._segment.close()
+        path = self.data_dir / f"{_WAL_PREFIX}{first_seq:020d}{_WAL_SUFFIX}"
+        self._segment = open(path, "ab")
+        self._segment_size = self._segment.tell()
+        self._fsync_dir()
+
+    def _writer_loop(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            # 取出队列中已有的全部项，组成一个提交批次
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            batch: list[_PendingRecord] = []
+            stop = False
+            for item in items:
+                if isinstance(item, _PendingRecord):
+                    batch.append(item)
+                elif isinstance(item, _PendingSnapshot):
+                    self._commit(batch)
+                    batch = []
+                    self._write_snapshot(item)
+                elif item is _STOP:
+                    stop = True
+            self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch: list[_PendingRecord]) -> None:
+        """写入一批记录并 fsync，然后通知等待方"""
+        if not batch:
+            return
+        if self._segment_size >= self.segment_max_bytes:
+            self._open_segment(batch[0].seq)
+        data = b"".join(item.data for item in batch)
+        _ = self._segment.write(data)
+        self._segment.flush()
+        if self.fsync:
+            os.fsync(self._segment.fileno())
+        self._segment_size += len(data)
+        self.records_written += len(batch)
+        self.commits += 1
+
+        for item in batch:
+            if item.future is not None and item.loop is not None:
+                item.loop.call_soon_threadsafe(_resolve_future, item.future, item.seq)
+
+    def _write_snapshot(self, snapshot: _PendingSnapshot) -> None:
+        """原子写入快照，并清理被快照覆盖的 WAL 段和旧快照"""
+        path = self.data_dir / f"{_SNAPSHOT_PREFIX}{snapshot.seq:020d}{_SNAPSHOT_SUFFIX}"
+        temp_path = path.with_suffix(".tmp")
+        with open(temp_path, "wb") as file:
+            _ = file.write(json.dumps(snapshot.state, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            file.flush()
+            if self.fsync:
+                os.fsync(file.fileno())
+        os.replace(temp_path, path)
+
+        # 后续记录写入新段，快照之前的段全部可以删除
+        self._open_segment(snapshot.seq + 1)
+        current = self._segment.name
+        for _, old in self._list_files(_WAL_PREFIX, _WAL_SUFFIX):
+            if str(old) != current:
+                old.unlink(missing_ok=True)
+        for seq, old in self._list_files(_SNAPSHOT_PREFIX, _SNAPSHOT_SUFFIX):
+            if seq < snapshot.seq:
+                old.unlink(missing_ok=True)
+        self._fsync_dir()
+        self.snapshots_written += 1
+        print(f"[Persistence] 已写入快照 {path.name}")
+
+
+def _resolve_future(future: "asyncio.Future[int]", seq: int) -> None:
+    if not future.done():
+        future.set_result(seq)
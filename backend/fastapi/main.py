@@ -3,17 +3,46 @@
 from backend.fastapi.services.websocket.handlers.manager import WebSocketManager
 from backend.core.history import PatchHistoryManager
 from backend.fastapi.services.instance_service import InstanceService
+from backend.fastapi.services.http_client import ExternalApiClient
+from backend.fastapi.services.sync_service import SchemaSyncService
+from backend.fastapi.services.coalescer import FieldChangeCoalescer
+from backend.fastapi.services.cluster import ClusterSync, OwnershipMiddleware
+from backend.fastapi.services.table_window import TableWindowService
+from backend.core.backplane import UnixSocketBackplane
 from backend.core.manager import SchemaManager
+from backend.core.persistence import PersistenceEngine
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from ..config import settings
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """应用生命周期：启动 WebSocket 心跳并加入集群；关闭时发布待合并的字段修改和增量、释放外部 API 连接池并写完 WAL"""
+    ws_manager.start_heartbeat(settings.ws_heartbeat_interval, settings.ws_idle_timeout)
+    if cluster is not None:
+        await cluster.start()
+    yield
+    await ws_manager.stop_heartbeat()
+    await field_coalescer.flush_all()
+    await ws_manager.flush_pending()
+    if cluster is not None:
+        await cluster.close()
+    await http_client.aclose()
+    if persistence is not None:
+        persistence.close()
+
+
 # 创建 FastAPI 应用
 app: FastAPI = FastAPI(
     title="Agent Programmable UI Runtime",
     version="1.0.0",
     description="Schema-driven UI Runtime Backend",
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan
 )
 
 # 配置 CORS
@@ -30,15 +59,61 @@ from backend.core.defaults import get_default_instances
 
 
 # 创建服务实例
-schema_manager: SchemaManager = SchemaManager()
-instance_service: InstanceService = InstanceService(schema_manager)
-patch_history: PatchHistoryManager = PatchHistoryManager()
-ws_manager: WebSocketManager = WebSocketManager()
+schema_manager: SchemaManager = SchemaManager(delta_window=settings.ws_resume_window)
+http_client: ExternalApiClient = ExternalApiClient(
+    max_connections=settings.external_api_max_connections,
+    max_keepalive_connections=settings.external_api_max_keepalive,
+    keepalive_expiry=settings.external_api_keepalive_expiry,
+    per_host_limit=settings.external_api_per_host_limit
+)
+instance_service: InstanceService = InstanceService(schema_manager, http_client)
+patch_history: PatchHistoryManager = PatchHistoryManager(
+    max_entries=settings.patch_history_max_entries,
+    max_bytes=settings.patch_history_max_bytes
+)
+ws_manager: WebSocketManager = WebSocketManager(
+    send_queue_size=settings.ws_send_queue_size,
+    slow_consumer_policy=settings.ws_slow_consumer_policy,
+    flush_interval=settings.ws_flush_interval_ms / 1000
+)
+table_windows: TableWindowService = TableWindowService(schema_manager, ws_manager)
+schema_sync: SchemaSyncService = SchemaSyncService(schema_manager, ws_manager, table_windows)
+field_coalescer: FieldChangeCoalescer = FieldChangeCoalescer(
+    schema_manager, patch_history, schema_sync,
+    window=settings.field_change_coalesce_ms / 1000
+)
 default_instance_name = "demo"
 
-# 初始化默认实例
-for instance_name, schema in get_default_instances().items():
-    schema_manager.set(instance_name, schema)
+# 启用持久化时从快照 + WAL 恢复实例，否则（或没有已保存的实例时）加载默认实例
+persistence: PersistenceEngine | None = None
+recovered_state: dict[str, Any] | None = None
+if settings.persistence_enabled:
+    persistence = PersistenceEngine(
+        settings.persistence_dir,
+        segment_max_bytes=settings.persistence_segment_max_bytes,
+        snapshot_interval=settings.persistence_snapshot_interval,
+        fsync=settings.persistence_fsync
+    )
+    recovered_state = persistence.recover()
+
+if recovered_state and recovered_state["instances"]:
+    schema_manager.load_state(recovered_state)
+else:
+    # 初始化默认实例
+    for instance_name, schema in get_default_instances().items():
+        schema_manager.set(instance_name, schema)
+
+if persistence is not None:
+    persistence.start()
+    schema_manager.attach_persistence(persistence)
+
+# 多 worker 部署：通过 Backplane 复制状态、转发推送，并把写请求转发给实例的属主节点
+cluster: ClusterSync | None = None
+if settings.backplane == "unix":
+    if persistence is not None:
+        print("[Main] 警告：多个 worker 共用同一个持久化目录会互相覆盖 WAL，请只在单 worker 下启用持久化")
+    cluster = ClusterSync(UnixSocketBackplane(settings.backplane_dir), schema_manager, ws_manager, app, table_windows)
+    app.add_middleware(OwnershipMiddleware, cluster=cluster, default_instance_name=default_instance_name)
 
 # 将WebSocket管理器存储到应用状态中，以便在路由中访问
 app.state.ws_manager = ws_manager
@@ -49,10 +124,13 @@ from .routes.patch_routes import register_patch_routes
 from .routes.schema_routes import register_schema_routes
 from .routes.websocket_routes import register_websocket_routes
 
-register_event_routes(app, schema_manager, instance_service, patch_history, ws_manager, default_instance_name)
-register_patch_routes(app, schema_manager, patch_history, ws_manager, instance_service)
-register_schema_routes(app, schema_manager, default_instance_name, ws_manager)
-register_websocket_routes(app, ws_manager)
+event_handler = register_event_routes(app, schema_manager, instance_service, patch_history, ws_manager, default_instance_name, schema_sync, field_coalescer)
+if cluster is not None:
+    # WebSocket 上的事件不经过 OwnershipMiddleware，由包装后的处理函数转发给属主
+    event_handler = cluster.owned_event_handler(event_handler, default_instance_name)
+register_patch_routes(app, schema_manager, patch_history, ws_manager, instance_service, schema_sync)
+register_schema_routes(app, schema_manager, default_instance_name, ws_manager, table_windows)
+register_websocket_routes(app, ws_manager, schema_sync, event_handler, table_windows)
 
 
 # 基础端点
@@ -24,7 +24,10 @@ from .field_models import (
     ImageFieldConfig,
     TableFieldConfig,
     ComponentFieldConfig,
-    FieldConfig
+    FieldConfig,
+    FIELD_CONFIG_CLASSES,
+    FIELD_CONFIG_ADAPTER,
+    FIELD_CONFIG_LIST_ADAPTER
 )
 from .schema_models import (
     StateInfo,
@@ -74,6 +77,9 @@ __all__ = [
     "TableFieldConfig",
     "ComponentFieldConfig",
     "FieldConfig",
+    "FIELD_CONFIG_CLASSES",
+    "FIELD_CONFIG_ADAPTER",
+    "FIELD_CONFIG_LIST_ADAPTER",
     # Schema 模型
     "StateInfo",
     "LayoutInfo",
@@ -7,8 +7,8 @@
 3. 每个具体类型独立定义，避免类型警告
 """
 
-from typing import Any, Literal, TypeAlias, Union
-from pydantic import Field
+from typing import Annotated, Any, Literal, TypeAlias, Union
+from pydantic import Discriminator, Field, Tag, TypeAdapter
 
 from .base import BaseModelWithConfig
 from .enums import FieldType
@@ -117,6 +117,7 @@ class TableFieldConfig(_BaseFieldConfig):
     show_header: bool = Field(default=True, alias="showHeader", description="显示表头")
     show_pagination: bool = Field(default=False, alias="showPagination", description="显示分页")
     page_size: int = Field(default=10, alias="pageSize", description="每页显示条数")
+    server_window: bool = Field(default=False, alias="serverWindow", description="服务端窗口模式：数据只保留在服务端，客户端按行区间和排序订阅可见的行")
     max_height: str | None = Field(default=None, alias="maxHeight", description="最大高度")
     compact: bool = Field(default=False, description="紧凑模式")
     row_selection: bool = Field(default=False, description="行选择")
@@ -129,12 +130,66 @@ class ComponentFieldConfig(_BaseFieldConfig):
     block_config: "Block" = Field(default=..., alias="blockConfig", description="要渲染的嵌套Block配置")
 
 
-# 字段配置类型联合（使用判别式联合）
-FieldConfig: TypeAlias = Union[
-    BaseFieldConfig,
-    SelectableFieldConfig,
-    TagFieldConfig,
-    ImageFieldConfig,
-    TableFieldConfig,
-    ComponentFieldConfig
+# 判别式联合的标签：按 type 选择字段模型
+_FIELD_TAG_BY_TYPE: dict[str, str] = {
+    FieldType.SELECT: "selectable",
+    FieldType.RADIO: "selectable",
+    FieldType.MULTISELECT: "selectable",
+    FieldType.TAG: "tag",
+    FieldType.BADGE: "tag",
+    FieldType.PROGRESS: "tag",
+    FieldType.IMAGE: "image",
+    FieldType.TABLE: "table",
+    FieldType.COMPONENT: "component",
+}
+# 缺少这些必填字段时按通用字段验证（与原来的 smart union 回退到 BaseFieldConfig 的结果一致）
+_FIELD_TAG_REQUIRED_KEYS: dict[str, tuple[str, ...]] = {
+    "selectable": ("options",),
+    "table": ("columns",),
+    "component": ("block_config", "blockConfig"),
+}
+# 已构造的模型对象按类取标签
+_FIELD_TAG_BY_CLASS: dict[type, str] = {
+    BaseFieldConfig: "base",
+    SelectableFieldConfig: "selectable",
+    TagFieldConfig: "tag",
+    ImageFieldConfig: "image",
+    TableFieldConfig: "table",
+    ComponentFieldConfig: "component",
+}
+
+
+def _field_config_tag(value: Any) -> str:
+    """FieldConfig 的判别函数：字典按 type 取标签，已构造的模型按类取标签"""
+    if isinstance(value, dict):
+        field_type = value.get("type")
+        tag = _FIELD_TAG_BY_TYPE.get(field_type, "base") if isinstance(field_type, str) else "base"
+        required = _FIELD_TAG_REQUIRED_KEYS.get(tag)
+        if required is not None and not any(key in value for key in required):
+            return "base"
+        return tag
+    return _FIELD_TAG_BY_CLASS.get(type(value), "base")
+
+
+# 字段配置类型联合（判别式联合：按 type 直接选择模型，不再逐个尝试）
+FieldConfig: TypeAlias = Annotated[
+    Union[
+        Annotated[BaseFieldConfig, Tag("base")],
+        Annotated[SelectableFieldConfig, Tag("selectable")],
+        Annotated[TagFieldConfig, Tag("tag")],
+        Annotated[ImageFieldConfig, Tag("image")],
+        Annotated[TableFieldConfig, Tag("table")],
+        Annotated[ComponentFieldConfig, Tag("component")]
+    ],
+    Discriminator(_field_config_tag)
 ]
+
+# 所有字段模型类（isinstance 检查用；FieldConfig 是 Annotated 联合，不能直接用于 isinstance）
+FIELD_CONFIG_CLASSES: tuple[type[BaseModelWithConfig], ...] = (
+    BaseFieldConfig, SelectableFieldConfig, TagFieldConfig,
+    ImageFieldConfig, TableFieldConfig, ComponentFieldConfig
+)
+
+# 模块级 TypeAdapter（构建验证器的开销较大，只构建一次）
+FIELD_CONFIG_ADAPTER: TypeAdapter[FieldConfig] = TypeAdapter(FieldConfig)
+FIELD_CONFIG_LIST_ADAPTER: TypeAdapter[list[FieldConfig]] = TypeAdapter(list[FieldConfig])
@@ -2,13 +2,17 @@
 包含步骤信息、元数据、状态、布局、UISchema 等模型定义
 """
 
+from itertools import count
 from typing import Any
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 
 from .base import BaseModelWithConfig
 from .enums import LayoutType
 from .block_models import Block, ActionConfig
 
+# 全局递增的修订号来源：不同 schema 对象的修订号互不重复，可直接用作缓存键
+_revision_counter = count(1)
+
 
 class StateInfo(BaseModelWithConfig):
     """状态信息"""
@@ -30,3 +34,25 @@ class UISchema(BaseModelWithConfig):
     layout: LayoutInfo = Field(default_factory=lambda: LayoutInfo(), description="布局")
     blocks: list[Block] = Field(default_factory=list, description="Block列表")
     actions: list[ActionConfig] = Field(default_factory=list, description="操作列表")
+
+    # 内部修订号：每次修改 schema 内容后递增（不参与序列化），用于模板渲染等缓存失效
+    _revision: int = PrivateAttr(default_factory=lambda: next(_revision_counter))
+    # 二级索引（services.schema_index.SchemaIndex），首次查询时构建
+    _index: Any = PrivateAttr(default=None)
+    # state.params 列表的原地修改记录（services.list_journal.ListJournal），首次列表操作时创建
+    _list_journal: Any = PrivateAttr(default=None)
+
+    @property
+    def revision(self) -> int:
+        """当前内部修订号"""
+        # 直接读取私有属性存储，绕过 BaseModel.__getattr__（热路径）
+        return self.__pydantic_private__['_revision']  # type: ignore[index]
+
+    def touch(self) -> int:
+        """标记 schema 内容已修改，返回新的修订号
+
+        apply_patch_to_schema 会自动调用；绕过它直接修改 state/blocks 的代码需要手动调用。
+        """
+        revision = next(_revision_counter)
+        self.__pydantic_private__['_revision'] = revision  # type: ignore[index]
+        return revision
@@ -1,11 +1,18 @@
 """事件相关 API 路由"""
 
 from backend.fastapi.models.schema_models import UISchema
+from collections.abc import Awaitable, Callable
 from typing import Any
 from fastapi import FastAPI
 from backend.fastapi.services.websocket.handlers.manager import WebSocketManager
 from backend.core import SchemaManager, PatchHistoryManager
-from ..services import InstanceService,apply_patch_to_schema
+from ..services import InstanceService, SchemaSyncService, apply_patch_to_schema
+from ..services.delta import snapshot_param_keys
+from ..services.coalescer import FieldChangeCoalescer
+
+# 事件处理函数：接收与 POST /ui/event 相同的事件体，返回响应字典（WebSocket 上的事件复用同一个处理函数）
+EventHandler = Callable[[dict[Any, Any]], Awaitable[dict[str, Any]]]
+
 
 def register_event_routes(
     app: FastAPI,
@@ -13,8 +20,10 @@ def register_event_routes(
     instance_service: InstanceService,
     patch_history: PatchHistoryManager,
     ws_manager: WebSocketManager,
-    default_instance_name: str
-):
+    default_instance_name: str,
+    schema_sync: SchemaSyncService,
+    field_coalescer: FieldChangeCoalescer | None = None
+) -> EventHandler:
     """注册事件相关的路由
 
     Args:
@@ -24,6 +33,11 @@ def register_event_routes(
         patch_history: Patch 历史管理器
         ws_manager: WebSocket 管理器
         default_instance_name: 默认实例 ID
+        schema_sync: Schema 同步服务（负责版本化增量推送）
+        field_coalescer: field:change 合并器（可选，启用时高频字段修改合并为一条历史和一次推送）
+
+    Returns:
+        事件处理函数（供 WebSocket 连接上的事件复用）
     """
 
     @app.post("/ui/event")
@@ -40,117 +54,137 @@ def register_event_routes(
 
         print(f"[EventRoutes] 收到事件: {event_type}, actionId: {action_id}, instanceId: {instance_name}, params={params}, blockId={block_id}, payload={payload}")
 
-        # 获取当前实例的 Schema
-        schema: UISchema | None = schema_manager.get(instance_name)
-        if not schema:
-            return {
-                "status": "error",
-                "error": f"实例 '{instance_name}' 不存在"
-            }
-
-        # 处理字段变化事件
-        if event_type == "field:change":
-            # field:change 事件的 payload 直接包含 fieldKey 和 value
-            field_key = payload.get("fieldKey")
-            field_value = payload.get("value")
-
-            if field_key:
-                patch = {f"state.params.{field_key}": field_value}
-
-                # 保存到历史记录
-                patch_id = patch_history.save(instance_name, patch)
-                apply_patch_to_schema(schema, patch)
-
-                # WebSocket 推送
-                _ = await ws_manager.send_patch(instance_name, patch, patch_id)
-
-                return {
-                    "status": "success",
-                    "instance_name": instance_name,
-                    "patch_id": patch_id,
-                    "patch": {}
-                }
-
-        # 处理操作按钮点击事件
-        if event_type == "action:click":
-            # 调用 InstanceService 处理 action
-            # 注意：不再在这里同步前端传来的 params，让 InstanceService 来处理
-            print(f"[EventRoutes] 调用 instance_service.handle_action")
-            result = instance_service.handle_action(instance_name, action_id, params, block_id)
-            print(f"[EventRoutes] instance_service.handle_action 返回: {result}")
-
-            if result.get("status") == "success" and result.get("patch"):
-                patch = result["patch"]
-
-                # 注意：schema 已在 handle_action 中通过 apply_patch_to_schema 更新
-                # 由于 schema 是引用类型，schema_manager._instances[instance_name] 中的对象已被修改
-                # 因此不需要再调用 schema_manager.set()
-
-                # 保存到历史记录
-                patch_id = patch_history.save(instance_name, patch)
-
-                # WebSocket 推送（此时 schema.state.runtime 已更新）
-                _ = await ws_manager.send_patch(instance_name, patch, patch_id)
-
-                return {
-                    "status": "success",
-                    "instance_name": instance_name,
-                    "patch_id": patch_id,
-                    "patch": {}
-                }
-
-            return result
-
-        # 处理表格内按钮点击事件
-        if event_type == "table:button:click":
-            button_id = params.get("buttonId")
-            button_action_id = params.get("actionId") or params.get("_actionId")
-            table_field_key = params.get("fieldKey")
-
-            print(f"[EventRoutes] 处理 table:button:click: button_id={button_id}, actionId={button_action_id}, fieldKey={table_field_key}, params={params}")
-
-            # 调用 InstanceService 处理表格按钮（复用 action 处理逻辑）
-            result = instance_service.handle_table_button(
-                instance_name,
-                button_id,
-                button_action_id,
-                params,
-                block_id,
-                table_field_key
-            )
-            print(f"[EventRoutes] instance_service.handle_table_button 返回: {result}")
-
-            if result.get("status") == "success" and result.get("patch"):
-                patch = result["patch"]
-
-                # 注意：schema 已在 handle_table_button 中通过 apply_patch_to_schema 更新
-                # 保存到历史记录
-                patch_id = patch_history.save(instance_name, patch)
-
-                # WebSocket 推送
-                await ws_manager.send_patch(instance_name, patch, patch_id)
-
-                return {
-                    "status": "success",
-                    "instance_name": instance_name,
-                    "patch_id": patch_id,
-                    "patch": {},
-                    "message": result.get("message"),
-                    "navigate_to": result.get("navigate_to")
-                }
-
-            # 如果有错误信息，也返回
-            if result.get("error"):
+        # 同一实例的修改串行执行（不同实例互不阻塞），避免并发请求交错写入同一个 Schema
+        # asyncio.Lock.__aenter__ 返回 None，先取得锁对象再进入，action 等待外部 API 时需要用它临时释放
+        instance_lock = schema_manager.lock(instance_name)
+        async with instance_lock:
+            # 获取当前实例的 Schema
+            schema: UISchema | None = schema_manager.get(instance_name)
+            if not schema:
                 return {
                     "status": "error",
-                    "error": result.get("error")
+                    "error": f"实例 '{instance_name}' 不存在"
                 }
 
-            return result
+            # 处理字段变化事件
+            if event_type == "field:change":
+                # field:change 事件的 payload 直接包含 fieldKey 和 value
+                field_key = payload.get("fieldKey")
+                field_value = payload.get("value")
+
+                if field_key and field_coalescer is not None and field_coalescer.enabled:
+                    # 立即应用并返回，历史记录和推送在合并窗口结束时进行
+                    field_coalescer.submit(instance_name, field_key, field_value)
+                    return {
+                        "status": "success",
+                        "instance_name": instance_name,
+                        "patch_id": None,
+                        "patch": {}
+                    }
+
+                if field_key:
+                    patch = {f"state.params.{field_key}": field_value}
+
+                    # 保存到历史记录
+                    patch_id = patch_history.save(instance_name, patch)
+                    apply_patch_to_schema(schema, patch)
+
+                    # WebSocket 推送（版本化增量）
+                    _ = await schema_sync.publish(instance_name, patch.keys(), patch=patch, patch_id=patch_id)
+
+                    return {
+                        "status": "success",
+                        "instance_name": instance_name,
+                        "patch_id": patch_id,
+                        "patch": {}
+                    }
+
+            # 记录结构性副作用之前的 state.params 键集合，用于计算增量
+            params_before = snapshot_param_keys(schema)
+
+            # 处理操作按钮点击事件
+            if event_type == "action:click":
+                # 调用 InstanceService 处理 action
+                # 注意：不再在这里同步前端传来的 params，让 InstanceService 来处理
+                print(f"[EventRoutes] 调用 instance_service.handle_action")
+                result = await instance_service.handle_action(instance_name, action_id, params, block_id, lock=instance_lock)
+                print(f"[EventRoutes] instance_service.handle_action 返回: {result}")
+
+                if result.get("status") == "success" and result.get("patch"):
+                    patch = result["patch"]
+
+                    # 注意：schema 已在 handle_action 中通过 apply_patch_to_schema 更新
+                    # 由于 schema 是引用类型，schema_manager._instances[instance_name] 中的对象已被修改
+                    # 因此不需要再调用 schema_manager.set()
+
+                    # 保存到历史记录
+                    patch_id = patch_history.save(instance_name, patch)
+
+                    # WebSocket 推送（此时 schema.state.runtime 已更新）；用户在等待点击结果，不等待合并窗口
+                    _ = await schema_sync.publish(instance_name, patch.keys(), params_before, patch=patch, patch_id=patch_id, immediate=True)
+
+                    return {
+                        "status": "success",
+                        "instance_name": instance_name,
+                        "patch_id": patch_id,
+                        "patch": {}
+                    }
+
+                return result
+
+            # 处理表格内按钮点击事件
+            if event_type == "table:button:click":
+                button_id = params.get("buttonId")
+                button_action_id = params.get("actionId") or params.get("_actionId")
+                table_field_key = params.get("fieldKey")
+
+                print(f"[EventRoutes] 处理 table:button:click: button_id={button_id}, actionId={button_action_id}, fieldKey={table_field_key}, params={params}")
+
+                # 调用 InstanceService 处理表格按钮（复用 action 处理逻辑）
+                result = await instance_service.handle_table_button(
+                    instance_name,
+                    button_id,
+                    button_action_id,
+                    params,
+                    block_id,
+                    table_field_key,
+                    lock=instance_lock
+                )
+                print(f"[EventRoutes] instance_service.handle_table_button 返回: {result}")
+
+                if result.get("status") == "success" and result.get("patch"):
+                    patch = result["patch"]
+
+                    # 注意：schema 已在 handle_table_button 中通过 apply_patch_to_schema 更新
+                    # 保存到历史记录
+                    patch_id = patch_history.save(instance_name, patch)
+
+                    # WebSocket 推送（不等待合并窗口）
+                    _ = await schema_sync.publish(instance_name, patch.keys(), params_before, patch=patch, patch_id=patch_id, immediate=True)
+
+                    return {
+                        "status": "success",
+                        "instance_name": instance_name,
+                        "patch_id": patch_id,
+                        "patch": {},
+                        "message": result.get("message"),
+                        "navigate_to": result.get("navigate_to")
+                    }
+
+                # 如果有错误信息，也返回
+                if result.get("error"):
+                    return {
+                        "status": "error",
+                        "error": result.get("error")
+                    }
+
+                return result
+
+            return {
+                "status": "success",
+                "instance_name": instance_name,
+                "patch_id": None,
+                "patch": {}
+            }
 
-        return {
-            "status": "success",
-            "instance_name": instance_name,
-            "patch_id": None,
-            "patch": {}
-        }
+    return handle_event
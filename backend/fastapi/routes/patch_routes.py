@@ -3,43 +3,32 @@
 from backend.fastapi.models.schema_models import UISchema
 from backend.fastapi.models.enums import LayoutType
 from fastapi import FastAPI, Query
-from typing import Any
-from ...core.history import PatchHistoryManager
+from pydantic import ValidationError
+from typing import Any, cast
+from ...core.history import PatchHistoryManager, MAX_PAGE_SIZE
 from ...core.manager import SchemaManager
-from ..services.patch import apply_patch_to_schema
+from ..services.patch import IN_PLACE_LIST_OPERATIONS, apply_patch_to_schema, parse_field_config, parse_field_configs
 from ..models import (
-    UISchema, StateInfo, LayoutInfo,
-    Block, ActionConfig, LayoutType,
-    BaseFieldConfig, SelectableFieldConfig, ImageFieldConfig,
-    TableFieldConfig, ComponentFieldConfig
+    UISchema, StateInfo, LayoutInfo, SchemaPatch,
+    Block, ActionConfig, LayoutType
 )
 from backend.fastapi.services.websocket.handlers.manager import WebSocketManager
 from backend.fastapi.services.instance_service import InstanceService
+from backend.fastapi.services.sync_service import SchemaSyncService
+from backend.fastapi.services.delta import snapshot_param_keys
+from backend.fastapi.services.schema_index import get_schema_index
+from backend.fastapi.services.list_journal import get_list_journal
 
 
 def convert_field_config(value: dict[str, Any]) -> Any:
     """根据字段类型将字典转换为正确的 FieldConfig 模型对象"""
-    field_type = value.get("type", "text")
-    
-    # 根据字段类型处理可能为 None 的数组属性
-    if field_type == "table":
-        # 确保 columns 不是 None
-        if 'columns' not in value or value['columns'] is None:
-            value['columns'] = []
-            print(f"[PatchRoutes] Auto-initialized columns to empty array for table field")
-        return TableFieldConfig(**value)
-    elif field_type in ["select", "radio", "multiselect"]:
-        # 确保 options 不是 None
-        if 'options' not in value or value['options'] is None:
-            value['options'] = []
-            print(f"[PatchRoutes] Auto-initialized options to empty array for {field_type} field")
-        return SelectableFieldConfig(**value)
-    elif field_type == "image":
-        return ImageFieldConfig(**value)
-    elif field_type == "component":
-        return ComponentFieldConfig(**value)
-    else:
-        return BaseFieldConfig(**value)
+    return parse_field_config(value)
+
+
+def _reindex_touched_block(schema: UISchema, keys: list[str]) -> None:
+    """通用路径修改了 blocks.X 下的内容后，增量更新该 block 的索引"""
+    if len(keys) >= 2 and keys[0] == "blocks" and keys[1].isdigit():
+        get_schema_index(schema).reindex_block(int(keys[1]))
 
 
 def handle_remove_operation(schema: UISchema, path: str, value: Any):
@@ -64,35 +53,38 @@ def handle_remove_operation(schema: UISchema, path: str, value: Any):
             block_id = value.get("id") if isinstance(value, dict) else value
 
             # Find and remove the block with matching id
-            for i, block in enumerate(schema.blocks):
-                if hasattr(block, "id") and getattr(block, "id") == block_id:
-                    print(f"[PatchRoutes] Found block to remove: {block.id}")
-                    print(f"[PatchRoutes] Full block object: {block}")
-
-                    # Clean up related state FIRST, then remove the block
-                    # Check if block has props with fields (form block)
-                    if hasattr(block, "props") and block.props and hasattr(block.props, "fields") and block.props.fields:
-                        # For form blocks, delete state keys for each field
-                        print(f"[PatchRoutes] Form block detected, will clean up state for all fields")
-                        for field in block.props.fields:
-                            field_key = getattr(field, "key", None) if hasattr(field, "key") else (field.get("key") if isinstance(field, dict) else None)
-                            if field_key:
-                                # Try to delete from params and runtime
-                                try:
-                                    if field_key in schema.state.params:
-                                        del schema.state.params[field_key]
-                                        print(f"[PatchRoutes] ✓ Deleted state.params.{field_key}")
-                                    if field_key in schema.state.runtime:
-                                        del schema.state.runtime[field_key]
-                                        print(f"[PatchRoutes] ✓ Deleted state.runtime.{field_key}")
-                                except (KeyError, AttributeError) as e:
-                                    print(f"[PatchRoutes] Warning: Failed to delete state.{field_key}: {e}")
-
-                    # Remove the block AFTER state cleanup
-                    removed_block = schema.blocks.pop(i)
-                    print(f"[PatchRoutes] Removed block: {removed_block.id}")
-
-                    return {"success": True}
+            schema_index = get_schema_index(schema)
+            i = schema_index.find_block_index(block_id) if block_id else None
+            if i is not None:
+                block = schema.blocks[i]
+                print(f"[PatchRoutes] Found block to remove: {block.id}")
+                print(f"[PatchRoutes] Full block object: {block}")
+
+                # Clean up related state FIRST, then remove the block
+                # Check if block has props with fields (form block)
+                if hasattr(block, "props") and block.props and hasattr(block.props, "fields") and block.props.fields:
+                    # For form blocks, delete state keys for each field
+                    print(f"[PatchRoutes] Form block detected, will clean up state for all fields")
+                    for field in block.props.fields:
+                        field_key = getattr(field, "key", None) if hasattr(field, "key") else (field.get("key") if isinstance(field, dict) else None)
+                        if field_key:
+                            # Try to delete from params and runtime
+                            try:
+                                if field_key in schema.state.params:
+                                    del schema.state.params[field_key]
+                                    print(f"[PatchRoutes] ✓ Deleted state.params.{field_key}")
+                                if field_key in schema.state.runtime:
+                                    del schema.state.runtime[field_key]
+                                    print(f"[PatchRoutes] ✓ Deleted state.runtime.{field_key}")
+                            except (KeyError, AttributeError) as e:
+                                print(f"[PatchRoutes] Warning: Failed to delete state.{field_key}: {e}")
+
+                # Remove the block AFTER state cleanup
+                removed_block = schema.blocks.pop(i)
+                schema_index.block_removed(i)
+                print(f"[PatchRoutes] Removed block: {removed_block.id}")
+
+                return {"success": True}
 
             print(f"[PatchRoutes] Block with id '{block_id}' not found")
             return {"success": False, "reason": f"Block with id '{block_id}' not found"}
@@ -103,11 +95,13 @@ def handle_remove_operation(schema: UISchema, path: str, value: Any):
             action_id = value.get("id") if isinstance(value, dict) else value
 
             # Find and remove the action with matching id
-            for i, action in enumerate(schema.actions):
-                if hasattr(action, "id") and getattr(action, "id") == action_id:
-                    removed_action = schema.actions.pop(i)
-                    print(f"[PatchRoutes] Removed action: {removed_action.id}")
-                    return {"success": True}
+            schema_index = get_schema_index(schema)
+            i = schema_index.find_action_index(action_id) if action_id else None
+            if i is not None:
+                removed_action = schema.actions.pop(i)
+                schema_index.actions_changed()
+                print(f"[PatchRoutes] Removed action: {removed_action.id}")
+                return {"success": True}
 
             print(f"[PatchRoutes] Action with id '{action_id}' not found")
             return {"success": False, "reason": f"Action with id '{action_id}' not found"}
@@ -127,6 +121,7 @@ def handle_remove_operation(schema: UISchema, path: str, value: Any):
                         if field_key_check == field_key:
                             # Remove the field
                             getattr(block.props, "fields").pop(i)
+                            get_schema_index(schema).reindex_block(block_index)
                             print(f"[PatchRoutes] Removed field from form block: {field_key}")
 
                             # Clean up state for the removed field
@@ -161,6 +156,7 @@ def handle_remove_operation(schema: UISchema, path: str, value: Any):
                         if action_id_check == action_id:
                             # Remove action
                             getattr(block.props, "actions").pop(i)
+                            get_schema_index(schema).reindex_block(block_index)
                             print(f"[PatchRoutes] Removed action from block {block_index}: {action_id}")
                             return {"success": True}
 
@@ -210,6 +206,7 @@ def handle_remove_operation(schema: UISchema, path: str, value: Any):
 
             if item_to_remove is not None:
                 container.remove(item_to_remove)
+                _reindex_touched_block(schema, keys)
         elif hasattr(container, "fields"):
             # For form blocks, remove from fields
             if isinstance(container.fields, list):
@@ -224,6 +221,7 @@ def handle_remove_operation(schema: UISchema, path: str, value: Any):
 
                 if item_to_remove is not None:
                     container.fields.remove(item_to_remove)
+                    _reindex_touched_block(schema, keys)
 
         print(f"[PatchRoutes] Remove operation applied: path={path}, value={value}")
 
@@ -257,26 +255,23 @@ def handle_add_operation(schema: UISchema, path: str, value: Any):
             if isinstance(value, dict):
                 # Check if block with same id already exists
                 new_block_id = value.get("id")
-                if new_block_id:
-                    for existing_block in schema.blocks:
-                        if hasattr(existing_block, "id") and getattr(existing_block, "id") == new_block_id:
-                            print(f"[PatchRoutes] Block with id '{new_block_id}' already exists, skipping add")
-                            return {"success": False, "reason": f"Block with id '{new_block_id}' already exists"}
+                if new_block_id and get_schema_index(schema).has_block(new_block_id):
+                    print(f"[PatchRoutes] Block with id '{new_block_id}' already exists, skipping add")
+                    return {"success": False, "reason": f"Block with id '{new_block_id}' already exists"}
 
                 # Convert dict to Block object
                 block = Block(**value)
             else:
                 # Check if block with same id already exists
                 new_block_id = getattr(value, "id", None)
-                if new_block_id:
-                    for existing_block in schema.blocks:
-                        if hasattr(existing_block, "id") and getattr(existing_block, "id") == new_block_id:
-                            print(f"[PatchRoutes] Block with id '{new_block_id}' already exists, skipping add")
-                            return {"success": False, "reason": f"Block with id '{new_block_id}' already exists"}
+                if new_block_id and get_schema_index(schema).has_block(new_block_id):
+                    print(f"[PatchRoutes] Block with id '{new_block_id}' already exists, skipping add")
+                    return {"success": False, "reason": f"Block with id '{new_block_id}' already exists"}
                 block = value
 
             # Add block to schema
             schema.blocks.append(block)
+            get_schema_index(schema).block_inserted(len(schema.blocks) - 1)
             print(f"[PatchRoutes] Added new block: {block.id}")
 
             # Initialize state for the block
@@ -299,23 +294,20 @@ def handle_add_operation(schema: UISchema, path: str, value: Any):
             # Check if action with same id already exists
             if isinstance(value, dict):
                 new_action_id = value.get("id")
-                if new_action_id:
-                    for existing_action in schema.actions:
-                        if hasattr(existing_action, "id") and getattr(existing_action, "id") == new_action_id:
-                            print(f"[PatchRoutes] Action with id '{new_action_id}' already exists, skipping add")
-                            return {"success": False, "reason": f"Action with id '{new_action_id}' already exists"}
+                if new_action_id and get_schema_index(schema).find_action_index(new_action_id) is not None:
+                    print(f"[PatchRoutes] Action with id '{new_action_id}' already exists, skipping add")
+                    return {"success": False, "reason": f"Action with id '{new_action_id}' already exists"}
                 # Convert dict to ActionConfig object
                 action = ActionConfig(**value)
             else:
                 new_action_id = getattr(value, "id", None)
-                if new_action_id:
-                    for existing_action in schema.actions:
-                        if hasattr(existing_action, "id") and getattr(existing_action, "id") == new_action_id:
-                            print(f"[PatchRoutes] Action with id '{new_action_id}' already exists, skipping add")
-                            return {"success": False, "reason": f"Action with id '{new_action_id}' already exists"}
+                if new_action_id and get_schema_index(schema).find_action_index(new_action_id) is not None:
+                    print(f"[PatchRoutes] Action with id '{new_action_id}' already exists, skipping add")
+                    return {"success": False, "reason": f"Action with id '{new_action_id}' already exists"}
                 action = value
 
             schema.actions.append(action)
+            get_schema_index(schema).actions_changed()
             print(f"[PatchRoutes] Added new action: {action.id}")
             return {"success": True}
 
@@ -350,39 +342,7 @@ def handle_add_operation(schema: UISchema, path: str, value: Any):
 
                     # Convert the dict value to a FieldConfig object
                     if isinstance(value, dict):
-                        field_type = value.get("type", "text")
-                        
-                        # 根据字段类型处理可能为 None 的数组属性
-                        if field_type == "table":
-                            # 确保 columns 不是 None
-                            if 'columns' not in value or value['columns'] is None:
-                                value['columns'] = []
-                                print(f"[PatchRoutes] Auto-initialized columns to empty array for table field")
-                        elif field_type in ['select', 'radio', 'multiselect']:
-                            # 确保 options 不是 None
-                            if 'options' not in value or value['options'] is None:
-                                value['options'] = []
-                                print(f"[PatchRoutes] Auto-initialized options to empty array for {field_type} field")
-                        
-                        # 根据字段类型选择正确的模型类
-                        from ..models.field_models import (
-                            BaseFieldConfig,
-                            SelectableFieldConfig,
-                            ImageFieldConfig,
-                            TableFieldConfig,
-                            ComponentFieldConfig
-                        )
-
-                        if field_type == "table":
-                            field_config = TableFieldConfig(**value)
-                        elif field_type in ["select", "radio", "multiselect"]:
-                            field_config = SelectableFieldConfig(**value)
-                        elif field_type == "image":
-                            field_config = ImageFieldConfig(**value)
-                        elif field_type == "component":
-                            field_config = ComponentFieldConfig(**value)
-                        else:
-                            field_config = BaseFieldConfig(**value)
+                        field_config = parse_field_config(value)
                     else:
                         field_config = value
 
@@ -391,6 +351,7 @@ def handle_add_operation(schema: UISchema, path: str, value: Any):
 
                     # Update the fields property
                     setattr(block.props, "fields", current_fields)
+                    get_schema_index(schema).reindex_block(block_index)
 
                     print(f"[PatchRoutes] Added field to form block: {value.get('key')}")
 
@@ -444,6 +405,7 @@ def handle_add_operation(schema: UISchema, path: str, value: Any):
 
                     # Update actions property
                     setattr(block.props, "actions", current_actions)
+                    get_schema_index(schema).reindex_block(block_index)
 
                     print(f"[PatchRoutes] Added action to block {block_index}: {value.get('id')}")
 
@@ -472,6 +434,20 @@ def handle_add_operation(schema: UISchema, path: str, value: Any):
             if isinstance(container, list):
                 container.append(value)
                 print(f"[PatchRoutes] Added value to list {target_section}.{target_key}")
+            elif isinstance(container, dict) and target_section == "params":
+                # state.params 的列表由 ListJournal 持有（见 services/list_journal.py），
+                # 原地追加必须经过它，元素级增量和行索引才不会遗漏这一行
+                journal = get_list_journal(schema)
+                items = journal.writable(target_key)
+                if items is None:
+                    # Replace a non-list value with a new list
+                    container[target_key] = []
+                    items = journal.writable(target_key)
+                assert items is not None
+                items.append(value)
+                journal.record(target_key, [("add", "-", value)])
+                container[target_key] = items
+                print(f"[PatchRoutes] Added value to dict {target_section}.{target_key} (now has {len(items)} items)")
             elif isinstance(container, dict):
                 if target_key not in container or not isinstance(container[target_key], list):
                     # Create list if it doesn't exist or isn't a list
@@ -550,7 +526,8 @@ def register_patch_routes(
     schema_manager: SchemaManager,
     patch_history: PatchHistoryManager,
     ws_manager: WebSocketManager,
-    instance_service: InstanceService
+    instance_service: InstanceService,
+    schema_sync: SchemaSyncService
 ):
     """注册 Patch 相关的路由
 
@@ -559,6 +536,8 @@ def register_patch_routes(
         schema_manager: Schema 管理器
         patch_history: Patch 历史管理器
         ws_manager: WebSocket 管理器
+        instance_service: 实例服务
+        schema_sync: Schema 同步服务（负责版本化增量推送）
     """
 
     @app.post("/ui/patch")
@@ -645,8 +624,7 @@ def register_patch_routes(
                                 props_copy: dict[Any, Any] = dict(block_copy.get('props', {}))
                                 if 'fields' in props_copy and props_copy.get('fields') is not None:
                                     fields_data: Any | list[Any] = props_copy.get('fields', []) or []
-                                    converted_fields: list[BaseFieldConfig] = [BaseFieldConfig(**field) for field in fields_data]
-                                    props_copy['fields'] = converted_fields
+                                    props_copy['fields'] = parse_field_configs(list(fields_data))
                                 # Convert actions in props if present
                                 if 'actions' in props_copy and props_copy.get('actions') is not None:
                                     actions_data = props_copy.get('actions', []) or []
@@ -683,7 +661,10 @@ def register_patch_routes(
                         "error": f"Instance '{target_instance_name}' not found"
                     }
 
-                schema_manager.delete(target_instance_name)
+                # 等待该实例上进行中的修改完成后再删除（在锁外删除，锁对象随实例一起移除）
+                async with schema_manager.lock(target_instance_name):
+                    pass
+                _ = schema_manager.delete(target_instance_name)
                 print(f"[PatchRoutes] 实例 '{target_instance_name}' 删除成功")
                 return {
                     "status": "success",
@@ -697,236 +678,238 @@ def register_patch_routes(
                     "status": "error",
                     "error": "instance_name is required for normal operations"
                 }
-                
-            schema = schema_manager.get(instance_name)
-            if not schema:
-                return {
-                    "status": "error",
-                    "error": f"Instance '{instance_name}' not found",
-                    "available_instances": schema_manager.list_all()
-                }
 
-            patch_dict = {}
-
-            # Process patches
-            add_patches = []  # Track add operations separately
-            remove_patches = []  # Track remove operations separately
-            unified_patches = []  # Track unified patch operations (append_to_list, merge, etc.)
-            applied_patches = []  # Track successfully applied patches
-            skipped_patches = []  # Track skipped patches with reasons
-
-            for patch in patches:
-                op = patch.get("op")
-                path = patch.get("path")
-                value = patch.get("value")
-
-                # Convert structured patch operations to dict format
-                if op == "set":
-                    patch_dict[path] = value
-                    applied_patches.append(patch)
-                elif op == "add":
-                    # Handle add operation for arrays and objects
-                    original_blocks_count = len(schema.blocks)
-                    result = handle_add_operation(schema, path, value)
-                    # Track add operations for WebSocket notification
-                    add_patches.append(patch)
-                    # Check result and add to applied or skipped
-                    if result and result.get("success", True):
-                        applied_patches.append(patch)
-                    else:
-                        reason = result.get("reason", "Unknown reason") if result else "Unknown reason"
-                        skipped_patches.append({
-                            "patch": patch,
-                            "reason": reason
-                        })
-                elif op == "remove":
-                    # Handle remove operation for arrays and objects
-                    original_blocks_count = len(schema.blocks)
-                    result = handle_remove_operation(schema, path, value)
-                    # Track remove operations for WebSocket notification
-                    remove_patches.append(patch)
-                    # Check result and add to applied or skipped
-                    if result and result.get("success", True):
-                        applied_patches.append(patch)
-                    else:
-                        reason = result.get("reason", "Unknown reason") if result else "Unknown reason"
-                        skipped_patches.append({
-                            "patch": patch,
-                            "reason": reason
-                        })
-                else:
-                    # Handle unified patch operations (append_to_list, merge, increment, etc.)
-                    result = instance_service.apply_unified_patch(schema, patch)
-                    unified_patches.append(patch)
-                    # Check result and add to applied or skipped
-                    if result and result.get("success", True):
+
+            # 同一实例的修改串行执行（不同实例互不阻塞）
+            async with schema_manager.lock(instance_name):
+                schema = schema_manager.get(instance_name)
+                if not schema:
+                    return {
+                        "status": "error",
+                        "error": f"Instance '{instance_name}' not found",
+                        "available_instances": schema_manager.list_all()
+                    }
+
+                patch_dict = {}
+
+                # Snapshot state.params keys so implicit state init/cleanup can be published as delta
+                params_before = snapshot_param_keys(schema)
+
+                # Process patches
+                add_patches = []  # Track add operations separately
+                remove_patches = []  # Track remove operations separately
+                unified_patches = []  # Track unified patch operations (append_to_list, merge, etc.)
+                applied_patches = []  # Track successfully applied patches
+                skipped_patches = []  # Track skipped patches with reasons
+
+                for patch in patches:
+                    op = patch.get("op")
+                    path = patch.get("path")
+                    value = patch.get("value")
+
+                    # Convert structured patch operations to dict format
+                    if op == "set":
+                        patch_dict[path] = value
                         applied_patches.append(patch)
+                    elif op == "add":
+                        # Handle add operation for arrays and objects
+                        original_blocks_count = len(schema.blocks)
+                        result = handle_add_operation(schema, path, value)
+                        _ = schema.touch()
+                        # Track add operations for WebSocket notification
+                        add_patches.append(patch)
+                        # Check result and add to applied or skipped
+                        if result and result.get("success", True):
+                            applied_patches.append(patch)
+                        else:
+                            reason = result.get("reason", "Unknown reason") if result else "Unknown reason"
+                            skipped_patches.append({
+                                "patch": patch,
+                                "reason": reason
+                            })
+                    elif op == "remove":
+                        # Handle remove operation for arrays and objects
+                        original_blocks_count = len(schema.blocks)
+                        result = handle_remove_operation(schema, path, value)
+                        _ = schema.touch()
+                        # Track remove operations for WebSocket notification
+                        remove_patches.append(patch)
+                        # Check result and add to applied or skipped
+                        if result and result.get("success", True):
+                            applied_patches.append(patch)
+                        else:
+                            reason = result.get("reason", "Unknown reason") if result else "Unknown reason"
+                            skipped_patches.append({
+                                "patch": patch,
+                                "reason": reason
+                            })
                     else:
-                        reason = result.get("reason", "Unknown reason") if result else "Unknown reason"
-                        skipped_patches.append({
-                            "patch": patch,
-                            "reason": reason
-                        })
-
-            # Apply set patches to schema
-            if patch_dict:
-                apply_patch_to_schema(schema, patch_dict)
-
-            # If we have any patches (set, add, remove, or unified ops), save to history and notify frontend
-            if patch_dict or add_patches or remove_patches or unified_patches:
-                # For set operations, use the patch_dict
-                # For add/remove/unified operations, we need to create a special representation
-                all_patches = patch_dict.copy()
-
-                # 生成访问实例消息 - 在使用前定义
-                access_instance_message = None
-                if add_patches:
-                    # 对于添加字段的操作，生成访问实例的消息
-                    for patch in add_patches:
-                        if patch.get("path") == "blocks.0.props.fields" and isinstance(patch.get("value"), dict):
-                            field_key = patch.get("value", {}).get("key")
-                            if field_key:
-                                # 创建访问实例的消息，带有高亮字段的参数
-                                access_instance_message = {
-                                    "type": "access_instance",
-                                    "instance_name": instance_name,
-                                    "highlight": field_key
-                                }
-                                break
-
-                    # Create a representation of the add operations for history
-                    for add_patch in add_patches:
-                        # Store the add operation in a format that can be tracked
-                        all_patches[f"add:{add_patch['path']}"] = add_patch['value']
-
-                # Create a representation of the remove operations for history
-                for remove_patch in remove_patches:
-                    # Store the remove operation in a format that can be tracked
-                    all_patches[f"remove:{remove_patch['path']}"] = remove_patch['value']
-
-                # Create a representation of unified patch operations for history
-                for unified_patch in unified_patches:
-                    # Store the unified operation in a format that can be tracked
-                    all_patches[f"{unified_patch['op']}:{unified_patch['path']}"] = unified_patch.get('value')
-
-                # 保存到历史记录
-                patch_history.save(instance_name, all_patches)
-
-                # 生成访问实例消息
-                access_instance_message = {
-                    "type": "access_instance",
-                    "instance_name": instance_name
-                }
-
-                # For any operation that modifies schema (add/remove/set/unified), always send the entire schema
-                # This ensures the frontend receives the complete updated state and can trigger highlights
-                # This is more reliable than trying to distinguish between different operation types
-                has_any_patches = patch_dict or add_patches or remove_patches or unified_patches
-
-                if has_any_patches:
-                    # Send the entire updated schema
-                    # This ensures the frontend receives the complete updated state
-                    print(f"[PatchRoutes] Sending schema_update for instance: {instance_name}")
-                    print(f"[PatchRoutes] Current schema blocks count: {len(schema.blocks)}")
-                    print(f"[PatchRoutes] Current schema actions count: {len(schema.actions)}")
-
-                    # Determine what to highlight based on all patches
-                    highlight_info = None
-
-                    # Check add patches first (highest priority)
-                    for add_patch in add_patches:
-                        path = add_patch.get("path")
-                        value = add_patch.get("value")
-
-                        # Check if adding a field to a block
-                        if "blocks" in path and "props" in path and "fields" in path:
-                            if isinstance(value, dict):
-                                highlight_info = {
-                                    "type": "field",
-                                    "key": value.get("key")
-                                }
-                                break
-                        # Check if adding a block
-                        elif path == "blocks":
-                            if isinstance(value, dict):
-                                highlight_info = {
-                                    "type": "block",
-                                    "id": value.get("id")
-                                }
-                                break
-                        # Check if adding an action
-                        elif path == "actions":
-                            if isinstance(value, dict):
-                                highlight_info = {
-                                    "type": "action",
-                                    "id": value.get("id")
-                                }
-                                break
-
-                    # If no highlight from add patches, check set patches for field additions
-                    if not highlight_info and patch_dict:
-                        for path, value in patch_dict.items():
-                            # Check if setting a field array (could be adding/replacing fields)
-                            if "blocks" in path and "props" in path and "fields" in path:
-                                if isinstance(value, list) or isinstance(value, dict):
-                                    # Extract field key from the new field(s)
-                                    if isinstance(value, dict):
-                                        fields_list = list(value.values()) if not isinstance(value, list) else value
-                                    else:
-                                        fields_list = value
-                                    if fields_list and len(fields_list) > 0:
-                                        last_field = fields_list[-1]
-                                        if isinstance(last_field, dict) and "key" in last_field:
-                                            highlight_info = {
-                                                "type": "field",
-                                                "key": last_field["key"]
-                                            }
-                                            break
-
-                    # Use Pydantic's model_dump() method to properly serialize the entire schema
-                    # This handles datetime objects and nested Pydantic models automatically
-                    schema_patch = schema.model_dump(by_alias=True, mode='json')
-
-                    # Send a custom message directly using the dispatcher
-                    message = {
-                        "type": "schema_update",
-                        "instance_name": instance_name,
-                        "schema": schema_patch,
-                        "highlight": highlight_info
+                        # Handle unified patch operations (append_to_list, merge, increment, etc.)
+                        # apply_unified_patch 需要经过校验的 SchemaPatch，而请求中是原始字典
+                        try:
+                            result = instance_service.apply_unified_patch(schema, SchemaPatch.model_validate(patch))
+                        except ValidationError as e:
+                            result = {"success": False, "reason": f"Invalid patch: {e.errors()[0].get('msg')}"}
+                        unified_patches.append(patch)
+                        # Check result and add to applied or skipped
+                        if result and result.get("success", True):
+                            applied_patches.append(patch)
+                        else:
+                            reason = result.get("reason", "Unknown reason") if result else "Unknown reason"
+                            skipped_patches.append({
+                                "patch": patch,
+                                "reason": reason
+                            })
+
+                # Apply set patches to schema
+                if patch_dict:
+                    apply_patch_to_schema(schema, patch_dict)
+
+                # If we have any patches (set, add, remove, or unified ops), save to history and notify frontend
+                if patch_dict or add_patches or remove_patches or unified_patches:
+                    # For set operations, use the patch_dict
+                    # For add/remove/unified operations, we need to create a special representation
+                    all_patches = patch_dict.copy()
+
+                    # 生成访问实例消息 - 在使用前定义
+                    access_instance_message = None
+                    if add_patches:
+                        # 对于添加字段的操作，生成访问实例的消息
+                        for patch in add_patches:
+                            if patch.get("path") == "blocks.0.props.fields" and isinstance(patch.get("value"), dict):
+                                field_key = patch.get("value", {}).get("key")
+                                if field_key:
+                                    # 创建访问实例的消息，带有高亮字段的参数
+                                    access_instance_message = {
+                                        "type": "access_instance",
+                                        "instance_name": instance_name,
+                                        "highlight": field_key
+                                    }
+                                    break
+
+                        # Create a representation of the add operations for history
+                        for add_patch in add_patches:
+                            # Store the add operation in a format that can be tracked
+                            all_patches[f"add:{add_patch['path']}"] = add_patch['value']
+
+                    # Create a representation of the remove operations for history
+                    for remove_patch in remove_patches:
+                        # Store the remove operation in a format that can be tracked
+                        all_patches[f"remove:{remove_patch['path']}"] = remove_patch['value']
+
+                    # Create a representation of unified patch operations for history
+                    for unified_patch in unified_patches:
+                        # Store the unified operation in a format that can be tracked
+                        all_patches[f"{unified_patch['op']}:{unified_patch['path']}"] = unified_patch.get('value')
+
+                    # 保存到历史记录
+                    patch_id = patch_history.save(instance_name, all_patches)
+
+                    # 生成访问实例消息
+                    access_instance_message = {
+                        "type": "access_instance",
+                        "instance_name": instance_name
                     }
-                    await ws_manager._dispatcher.send_to_instance(instance_name, message)
 
-                print(f"[PatchRoutes] Patch 应用成功: {all_patches}")
-                print(f"[PatchRoutes] 实际应用的 patches: {applied_patches}")
-                print(f"[PatchRoutes] 跳过的 patches: {skipped_patches}")
+                    # For any operation that modifies schema (add/remove/set/unified), publish a versioned delta
+                    # covering every touched path so the frontend stays in sync and can trigger highlights
+                    has_any_patches = patch_dict or add_patches or remove_patches or unified_patches
+
+                    if has_any_patches:
+                        print(f"[PatchRoutes] Publishing schema delta for instance: {instance_name}")
+                        print(f"[PatchRoutes] Current schema blocks count: {len(schema.blocks)}")
+                        print(f"[PatchRoutes] Current schema actions count: {len(schema.actions)}")
+
+                        # Determine what to highlight based on all patches
+                        highlight_info = None
+
+                        # Check add patches first (highest priority)
+                        for add_patch in add_patches:
+                            path = add_patch.get("path")
+                            value = add_patch.get("value")
+
+                            # Check if adding a field to a block
+                            if "blocks" in path and "props" in path and "fields" in path:
+                                if isinstance(value, dict):
+                                    highlight_info = {
+                                        "type": "field",
+                                        "key": value.get("key")
+                                    }
+                                    break
+                            # Check if adding a block
+                            elif path == "blocks":
+                                if isinstance(value, dict):
+                                    highlight_info = {
+                                        "type": "block",
+                                        "id": value.get("id")
+                                    }
+                                    break
+                            # Check if adding an action
+                            elif path == "actions":
+                                if isinstance(value, dict):
+                                    highlight_info = {
+                                        "type": "action",
+                                        "id": value.get("id")
+                                    }
+                                    break
+
+                        # If no highlight from add patches, check set patches for field additions
+                        if not highlight_info and patch_dict:
+                            for path, value in patch_dict.items():
+                                # Check if setting a field array (could be adding/replacing fields)
+                                if "blocks" in path and "props" in path and "fields" in path:
+                                    if isinstance(value, list) or isinstance(value, dict):
+                                        # Extract field key from the new field(s)
+                                        if isinstance(value, dict):
+                                            fields_list = list(value.values()) if not isinstance(value, list) else value
+                                        else:
+                                            fields_list = value
+                                        if fields_list and len(fields_list) > 0:
+                                            last_field = fields_list[-1]
+                                            if isinstance(last_field, dict) and "key" in last_field:
+                                                highlight_info = {
+                                                    "type": "field",
+                                                    "key": last_field["key"]
+                                                }
+                                                break
+
+                        # Publish a versioned delta computed from the touched paths instead of the
+                        # whole schema; clients that missed a version request a snapshot via resync
+                        changed_paths = list(patch_dict.keys())
+                        changed_paths.extend(p.get("path", "") for p in add_patches + remove_patches + unified_patches)
+                        _ = await schema_sync.publish(instance_name, changed_paths, params_before, patch_id=patch_id, highlight=highlight_info)
+
+                    print(f"[PatchRoutes] Patch 应用成功: {all_patches}")
+                    print(f"[PatchRoutes] 实际应用的 patches: {applied_patches}")
+                    print(f"[PatchRoutes] 跳过的 patches: {skipped_patches}")
                 
-                if not applied_patches:
-                    return {
+                    if not applied_patches:
+                        return {
+                            "status": "success",
+                            "message": "No patches were applied (all operations were skipped)",
+                            "instance_name": instance_name,
+                            "patches_applied": [],
+                            "skipped_patches": skipped_patches
+                        }
+
+                    result = {
                         "status": "success",
-                        "message": "No patches were applied (all operations were skipped)",
+                        "message": "Patch applied successfully",
                         "instance_name": instance_name,
-                        "patches_applied": [],
-                        "skipped_patches": skipped_patches
+                        "patches_applied": applied_patches
                     }
 
-                result = {
-                    "status": "success",
-                    "message": "Patch applied successfully",
-                    "instance_name": instance_name,
-                    "patches_applied": applied_patches
-                }
+                    # Add skipped_patches to result if there are any skipped patches
+                    if skipped_patches:
+                        result["skipped_patches"] = skipped_patches
 
-                # Add skipped_patches to result if there are any skipped patches
-                if skipped_patches:
-                    result["skipped_patches"] = skipped_patches
+                    return result
 
-                return result
-
-            return {
-                "status": "success",
-                "message": "No patches to apply",
-                "instance_name": instance_name
-            }
+                return {
+                    "status": "success",
+                    "message": "No patches to apply",
+                    "instance_name": instance_name
+                }
 
         except Exception as e:
             import traceback
@@ -939,23 +922,39 @@ def register_patch_routes(
             }
 
     @app.get("/ui/patches")
-    async def get_patches(instance_name: str | None = Query(None, alias="instanceId")):
+    async def get_patches(
+        instance_name: str | None = Query(None, alias="instanceId"),
+        after: int | None = Query(None, description="返回 ID 大于该游标的记录"),
+        before: int | None = Query(None, description="返回 ID 小于该游标的记录"),
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="每页记录数")
+    ):
         """
-        获取所有 Patch 历史记录
+        分页获取 Patch 历史记录
         支持 Patch 重放
 
-        - /ui/patches              -> 返回默认实例的历史
-        - /ui/patches?instanceId=xxx -> 返回指定实例的历史
+        - /ui/patches                       -> 返回默认实例最近 limit 条历史
+        - /ui/patches?instanceId=xxx        -> 返回指定实例最近 limit 条历史
+        - /ui/patches?after=<next_cursor>   -> 向后翻页（更新的记录）
+        - /ui/patches?before=<prev_cursor>  -> 向前翻页（更早的记录）
+
+        历史为有界存储，超过上限的旧记录会被淘汰，first_id 为当前最早可查询的 ID。
         """
         if not instance_name:
             instance_name = "demo"
 
-        patches = patch_history.get_all(instance_name)
+        patches = patch_history.get_page(instance_name, after=after, before=before, limit=limit)
+        first_id, last_id = patch_history.get_bounds(instance_name)
+        page_first = cast(int, patches[0]["id"]) if patches else None
+        page_last = cast(int, patches[-1]["id"]) if patches else None
 
         return {
             "status": "success",
             "instance_name": instance_name,
-            "patches": patches
+            "patches": patches,
+            "first_id": first_id if last_id >= first_id else None,
+            "last_id": last_id if last_id >= first_id else None,
+            "prev_cursor": page_first if page_first is not None and page_first > first_id else None,
+            "next_cursor": page_last if page_last is not None and page_last < last_id else None
         }
 
     @app.get("/ui/patches/replay/{patch_id}")
@@ -983,16 +982,29 @@ def register_patch_routes(
 
         print(f"[PatchRoutes] 重放 Patch {patch_id} (instance: {instance_name}): {patch_record['patch']}")
 
-        # 应用到当前 Schema
-        schema = schema_manager.get(instance_name)
-        if schema:
-            patch_data = patch_record["patch"]
-            if not isinstance(patch_data, dict):
-                patch_data = {}
-            apply_patch_to_schema(schema, patch_data)
+        # 应用到当前 Schema（与其他修改串行执行）
+        async with schema_manager.lock(instance_name):
+            schema = schema_manager.get(instance_name)
+            if schema:
+                patch_data = patch_record["patch"]
+                if not isinstance(patch_data, dict):
+                    patch_data = {}
+                params_before = snapshot_param_keys(schema)
+                # "<op>:<path>" 形式的列表操作（action 与 /ui/patch 记录的操作本身）重新执行，其余按值覆盖
+                values: dict[str, Any] = {}
+                for key, value in patch_data.items():
+                    op, _, path = key.partition(":")
+                    if path and op in IN_PLACE_LIST_OPERATIONS:
+                        result = instance_service.apply_unified_patch(schema, SchemaPatch.model_validate({"op": op, "path": path, "value": value}))
+                        if not result["success"]:
+                            print(f"[PatchRoutes] 重放列表操作失败: {key}: {result.get('reason')}")
+                    else:
+                        values[key] = value
+                if values:
+                    apply_patch_to_schema(schema, values)
 
-            # WebSocket 推送
-            await ws_manager.send_patch(instance_name, patch_data, None)
+                # WebSocket 推送（版本化增量）
+                _ = await schema_sync.publish(instance_name, patch_data.keys(), params_before, patch=patch_data)
 
         return {
             "status": "success",
@@ -2,13 +2,23 @@
 
 from backend.fastapi.models.schema_models import UISchema
 from datetime import datetime
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Header, Query, Response
+from pydantic_core import to_json
 from typing import Any
 from ...core.manager import SchemaManager
-from backend.fastapi.services.websocket.handlers.manager import WebSocketManager
-
-
-def register_schema_routes(app:FastAPI, schema_manager: SchemaManager, default_instance_name: str, ws_manager:WebSocketManager | None = None) -> None:
+from backend.fastapi.services.websocket.handlers.manager import WebSocketManager, TOPIC_CONTROL
+from backend.fastapi.services.schema_index import get_schema_index
+from backend.fastapi.services.schema_cache import SchemaResponseCache, etag_matches
+from backend.fastapi.services.table_window import TableWindowService
+
+
+def register_schema_routes(
+    app: FastAPI,
+    schema_manager: SchemaManager,
+    default_instance_name: str,
+    ws_manager: WebSocketManager | None = None,
+    table_windows: TableWindowService | None = None
+) -> None:
     """注册 Schema 相关的路由
 
     Args:
@@ -16,10 +26,16 @@ def register_schema_routes(app:FastAPI, schema_manager: SchemaManager, default_i
         schema_manager: Schema 管理器
         default_instance_name: 默认实例 ID
         ws_manager: WebSocket管理器实例（可选）
+        table_windows: 窗口表格服务（可选，窗口模式表格的数据不随 Schema 返回）
     """
 
+    schema_cache = SchemaResponseCache(schema_manager, table_windows)
+
     @app.get("/ui/schema")
-    async def get_schema(instance_name: str | None = Query(None, alias="instanceId")):
+    async def get_schema(
+        instance_name: str | None = Query(None, alias="instanceId"),
+        if_none_match: str | None = Header(None)
+    ):
         """
         获取当前 Schema
 
@@ -27,75 +43,41 @@ def register_schema_routes(app:FastAPI, schema_manager: SchemaManager, default_i
         - /ui/schema              -> 返回默认实例 (demo)
         - /ui/schema?instanceId=counter -> 返回 counter 实例
         - /ui/schema?instanceId=form    -> 返回 form 实例
-        """
-        print(f"[SchemaRoutes] get_schema 收到 instance_name: '{instance_name}'")
 
+        schema 按 (修订号, 版本号) 缓存编码后的 JSON，响应带 ETag；
+        请求头 If-None-Match 与当前 ETag 相同时返回 304。
+        当前时间（runtime.timestamp）放在响应外层的 timestamp 字段，不进入缓存。
+        """
         # 如果没有指定 instanceId，使用默认值
         if not instance_name:
             instance_name = default_instance_name
-            print(f"[SchemaRoutes] 使用默认实例: '{instance_name}'")
 
         # 查找实例
         schema: UISchema | None = schema_manager.get(instance_name)
 
         if not schema:
             print(f"[SchemaRoutes] 实例 '{instance_name}' 不存在")
+            schema_cache.discard(instance_name)
             return {
                 "status": "error",
                 "error": f"实例 '{instance_name}' 不存在",
                 "available_instances": schema_manager.list_all()
             }
 
-        print(f"[SchemaRoutes] 找到实例 '{instance_name}'")
-
-        # 动态更新 runtime.timestamp 为当前时间
-        if schema.state:
-            schema.state.runtime["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"[SchemaRoutes] 已更新 runtime.timestamp 为当前时间")
-
-        # 确保字段和 state.params 的一致性
-        # 1. 如果字段有 value 但 params 中没有，初始化它
-        # 2. 如果 params 中有值但字段没有 value，反向同步
-        for block in schema.blocks:
-            if block.props and block.props.fields:
-                for field in block.props.fields:
-                    field_key = getattr(field, 'key', None)
-                    if not field_key:
-                        continue
-
-                    field_value = getattr(field, 'value', None)
-
-                    # 情况1：字段有 value 但 params 中没有，初始化它
-                    if field_key not in schema.state.params and field_value is not None:
-                        schema.state.params[field_key] = field_value
-                        print(f"[SchemaRoutes] 同步字段值到 params: {field_key} = {field_value}")
-
-                    # 情况2：params 中有值，但字段 value 是 None 或空，可以选择反向同步
-                    # 注意：这里我们只记录日志，不修改字段定义
-                    # 因为字段定义应该保持原始的默认值，而实际值存储在 state.params 中
-                    if field_key in schema.state.params:
-                        param_value = schema.state.params[field_key]
-                        if param_value != field_value:
-                            print(f"[SchemaRoutes] 字段 {field_key}: field.value={field_value}, state.params.{field_key}={param_value}")
-
-        dumped_schema: dict[str, Any] = schema.model_dump(by_alias=True)
-        # 调试：检查 columns 的 renderType 字段
-        if dumped_schema.get('blocks'):
-            first_block = dumped_schema['blocks'][0]
-            if 'props' in first_block and 'fields' in first_block['props']:
-                fields_list = first_block['props']['fields']
-                if fields_list and len(fields_list) > 0:
-                    first_field = fields_list[0]
-                    if 'columns' in first_field:
-                        print(f"[SchemaRoutes] columns 数据: {first_field['columns'][2]}")  # 打印第3列（avatar）
-                else:
-                    print(f"[SchemaRoutes] fields 为空，跳过检查 columns")
-
-        return {
-            "status": "success",
-            "instance_name": instance_name,
-            "schema": dumped_schema
-        }
+        cached = schema_cache.get(instance_name, schema)
+        headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, cached.etag):
+            return Response(status_code=304, headers=headers)
+
+        # 外层字段每次请求生成，schema 部分直接拼接缓存的字节
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        content = b"".join((
+            b'{"status":"success","instance_name":', to_json(instance_name),
+            b',"version":', str(cached.version).encode(),
+            b',"timestamp":', to_json(timestamp),
+            b',"schema":', cached.body, b'}'
+        ))
+        return Response(content=content, media_type="application/json", headers=headers)
 
     @app.get("/ui/instances")
     async def list_instances():
@@ -134,13 +116,13 @@ def register_schema_routes(app:FastAPI, schema_manager: SchemaManager, default_i
 
             print(f"[SchemaRoutes] 切换实例: '{instance_name}'")
 
-            # 如果WebSocket管理器可用，通知前端切换到指定实例
+            # 如果WebSocket管理器可用，通知订阅了控制频道、且不在该实例上的前端切换实例
             if ws_manager:
-                _ = await ws_manager.broadcast(message={
+                notified = ws_manager.send_to_topic(TOPIC_CONTROL, {
                     "type": "switch_instance",
                     "instance_name": instance_name
-                })
-                print(f"[SchemaRoutes] 已通知前端切换到实例: '{instance_name}'")
+                }, exclude_instance=instance_name)
+                print(f"[SchemaRoutes] 已通知 {notified} 个前端切换到实例: '{instance_name}'")
 
         # 如果提供了 block_id，切换到指定block
         if block_id:
@@ -158,20 +140,25 @@ def register_schema_routes(app:FastAPI, schema_manager: SchemaManager, default_i
                 }
 
             # 检查 block 是否存在
-            block_ids = [block.id for block in target_schema.blocks if hasattr(block, 'id')]
-            if block_id not in block_ids:
+            schema_index = get_schema_index(target_schema)
+            if not schema_index.has_block(block_id):
                 return {
                     "status": "error",
                     "error": f"block_id '{block_id}' 在实例 '{target_instance_name}' 中不存在",
-                    "available_blocks": block_ids
+                    "available_blocks": schema_index.list_block_ids()
                 }
 
-            # 如果WebSocket管理器可用，通知前端切换到指定block
+            # 如果WebSocket管理器可用，通知该实例的前端定位到指定block；
+            # 同时切换了实例时，正在切换过来的控制频道订阅者也需要收到
             if ws_manager:
-                _ = await ws_manager.broadcast(message={
+                highlight_message = {
                     "type": "highlight_block",
                     "block_id": block_id
-                })
+                }
+                if ws_manager.get_connection_count(target_instance_name) > 0:
+                    _ = await ws_manager.send_message(target_instance_name, highlight_message)
+                if instance_name:
+                    _ = ws_manager.send_to_topic(TOPIC_CONTROL, highlight_message, exclude_instance=instance_name)
                 print(f"[SchemaRoutes] 已通知前端切换到block: '{block_id}'")
 
         return {
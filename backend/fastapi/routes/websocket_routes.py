@@ -1,30 +1,168 @@
 """WebSocket 相关 API 路由"""
 
+import asyncio
 from typing import Any
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Query, WebSocket, WebSocketDisconnect
 from backend.fastapi.services.websocket.handlers.manager import WebSocketManager
+from backend.fastapi.services.websocket.encoding import negotiate_format, available_formats
+from backend.fastapi.services.sync_service import SchemaSyncService
+from backend.fastapi.services.table_window import TableWindowService
+from .event_routes import EventHandler
 
 
-def register_websocket_routes(app:FastAPI, ws_manager: WebSocketManager) -> None:
+def _int_or(value: Any, default: int) -> int:
+    """把客户端传来的数字转换为 int，无效时使用默认值"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def register_websocket_routes(
+    app: FastAPI,
+    ws_manager: WebSocketManager,
+    schema_sync: SchemaSyncService,
+    event_handler: EventHandler | None = None,
+    table_windows: TableWindowService | None = None
+) -> None:
     """注册 WebSocket 相关的路由
 
     Args:
         app: FastAPI 应用实例
         ws_manager: WebSocket 管理器
+        schema_sync: Schema 同步服务
+        event_handler: 事件处理函数（与 POST /ui/event 相同），为 None 时不接受连接上的事件
+        table_windows: 窗口表格服务，为 None 时不接受表格订阅
     """
+
+    # 事件处理任务的强引用：连接断开后仍在处理剩余事件的任务不会被回收
+    event_workers: set[asyncio.Task[None]] = set()
+
+    async def run_event(envelope: dict[str, Any]) -> dict[str, Any]:
+        """执行连接上收到的事件，返回 ack 消息"""
+        event = envelope.get("event")
+        if event_handler is None:
+            result: dict[str, Any] = {"status": "error", "error": "events over WebSocket are not enabled"}
+        elif not isinstance(event, dict):
+            result = {"status": "error", "error": "event must be an object"}
+        else:
+            try:
+                result = await event_handler(event)
+            except Exception as e:
+                print(f"[WebSocketRoutes] 处理事件失败: {e}")
+                result = {"status": "error", "error": str(e)}
+            # 事件发布的增量可能还在合并推送的积压中（非 immediate 发布），先发出去再排入 ack
+            page_key = event.get("pageKey")
+            await ws_manager.flush_pending(page_key if isinstance(page_key, str) else None)
+        return {"type": "ack", "id": envelope.get("id"), "result": result}
     @app.websocket("/ui/ws/{instance_name}")
-    async def websocket_endpoint(websocket: WebSocket, instance_name: str):
-        """WebSocket 连接端点"""
-        await ws_manager.connect(websocket, instance_name)
+    async def websocket_endpoint(
+        websocket: WebSocket,
+        instance_name: str,
+        wire_format: str | None = Query(default=None, alias="format"),
+        subscribe: str | None = Query(default=None),
+        last_seen_version: int | None = Query(default=None),
+        last_patch_id: int | None = Query(default=None)
+    ):
+        """WebSocket 连接端点
+
+        线路格式通过 ?format=json|deflate|msgpack 或子协议 ui-<format> 选择，默认 json。
+        ?subscribe=control（逗号分隔）订阅主题，也可以在连接后发送 subscribe / unsubscribe 消息。
+        断线重连时携带 ?last_seen_version=N（或 ?last_patch_id=N），服务端先补发缺失的增量，
+        缺失的增量已不在保留窗口内时发送完整快照。
+
+        事件：{"type": "event", "id": 请求 ID, "event": <与 POST /ui/event 相同的事件体>}，
+        处理完成后回复 {"type": "ack", "id": 请求 ID, "result": <与 HTTP 响应相同>}。
+        同一连接上的事件按收到的顺序依次处理（与其他消息的读取互不阻塞）。
+        事件处理期间发布的增量在 ack 之前到达（回复 ack 前先发送该实例积压的合并推送）；
+        启用 field:change 合并时，被合并的字段修改在窗口结束时才发布，其增量在 ack 之后到达。
+
+        窗口表格：{"type": "table_subscribe", "fieldKey", "offset", "limit", "sortBy", "sortOrder"}
+        订阅（或调整）可见的行，{"type": "table_unsubscribe", "fieldKey"} 取消订阅。
+        """
+        negotiated = negotiate_format(wire_format, websocket.scope.get("subprotocols", []))
+        if negotiated is None:
+            # 握手前关闭：拒绝连接（HTTP 403）
+            await websocket.close(code=1003, reason=f"unsupported format, available: {available_formats()}")
+            return
+        fmt, subprotocol = negotiated
+        await ws_manager.connect(
+            websocket, instance_name, wire_format=fmt, subprotocol=subprotocol,
+            initial_messages=lambda: schema_sync.resume_messages(instance_name, last_seen_version, last_patch_id)
+        )
+        if subscribe:
+            ws_manager.subscribe(websocket, [topic.strip() for topic in subscribe.split(",") if topic.strip()])
+
+        # 事件队列和处理任务（收到第一个事件时创建）；None 为结束标记
+        events: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+        event_worker: asyncio.Task[None] | None = None
+
+        async def process_events() -> None:
+            while (envelope := await events.get()) is not None:
+                _ = ws_manager.send_to_connection(websocket, await run_event(envelope))
+
         try:
             while True:
                 # 等待客户端消息
                 data = await websocket.receive_json()
-                
-                # 这里可以添加消息处理逻辑
-                # 例如：处理客户端发送的特定指令或状态更新
-                
+                if ws_manager.record_client_message(websocket, data):
+                    continue
+
+                # 客户端检测到版本缺口时请求完整快照，只回复给该连接
+                if isinstance(data, dict) and data.get("type") == "resync":
+                    # 经由发送队列回复，快照不会越过队列中更早的增量
+                    message = schema_sync.snapshot_message(instance_name)
+                    if message:
+                        _ = ws_manager.send_to_connection(websocket, message)
+                    continue
+
+                # 订阅 / 取消订阅主题：{"type": "subscribe", "topics": ["control"]}
+                if isinstance(data, dict) and data.get("type") in ("subscribe", "unsubscribe"):
+                    topics = [topic for topic in data.get("topics", []) if isinstance(topic, str)]
+                    if data["type"] == "subscribe":
+                        ws_manager.subscribe(websocket, topics)
+                    else:
+                        ws_manager.unsubscribe(websocket, topics)
+                    continue
+
+                if isinstance(data, dict) and data.get("type") == "table_subscribe" and table_windows is not None:
+                    field_key = data.get("fieldKey")
+                    if isinstance(field_key, str):
+                        sort_by = data.get("sortBy")
+                        window = table_windows.subscribe(
+                            websocket, instance_name, field_key,
+                            offset=_int_or(data.get("offset"), 0),
+                            limit=_int_or(data.get("limit"), 20),
+                            sort_by=sort_by if isinstance(sort_by, str) and sort_by else None,
+                            sort_order="desc" if data.get("sortOrder") == "desc" else "asc"
+                        )
+                        _ = ws_manager.send_to_connection(websocket, window)
+                    continue
+
+                if isinstance(data, dict) and data.get("type") == "table_unsubscribe" and table_windows is not None:
+                    field_key = data.get("fieldKey")
+                    table_windows.unsubscribe(websocket, instance_name, field_key if isinstance(field_key, str) else None)
+                    continue
+
+                if isinstance(data, dict) and data.get("type") == "event":
+                    if event_worker is None:
+                        event_worker = asyncio.create_task(process_events())
+                        event_workers.add(event_worker)
+                        event_worker.add_done_callback(event_workers.discard)
+                    events.put_nowait(data)
+                    continue
+
+                # 这里可以添加其他消息处理逻辑
+
         except WebSocketDisconnect:
+            pass
+        finally:
+            # 已收到的事件照常处理完（不在修改中途取消），之后的 ack 不再发送
+            if event_worker is not None:
+                events.put_nowait(None)
+            if table_windows is not None:
+                table_windows.unsubscribe(websocket, instance_name)
+            # 同时停止该连接的发送任务
             ws_manager.disconnect(websocket, instance_name)
 
     @app.get("/ui/ws/stats")
@@ -2,11 +2,13 @@
 
 from .instance_service import InstanceService
 from .patch import apply_patch_to_schema
+from .sync_service import SchemaSyncService
 from .websocket import manager as websocket_manager
 
 __all__ = [
     "InstanceService",
     "apply_patch_to_schema",
+    "SchemaSyncService",
     "websocket_manager",
 ]
 
@@ -0,0 +1,298 @@
+"""多 worker 集群同步 - 在 Backplane 上复制 Schema 状态并转发 WebSocket 推送
+
+以多个 uvicorn worker（或同一台机器上的多个进程）运行时：
+- 实例属主：每个实例按会合哈希归属一个节点，只有属主执行写操作（单写入者）。
+  其他节点收到该实例的写请求（/ui/patch、/ui/event、/ui/patches*）时，
+  由 OwnershipMiddleware 通过 Backplane 转发给属主，在属主上执行后把响应原样返回；
+  WebSocket 连接上收到的事件同样转发（见 owned_event_handler）
+- 状态复制：属主上 SchemaManager 的 put / delete / delta 记录（与 WAL 记录格式相同）
+  通过 Backplane 发给所有节点，其他节点用 apply_replica 更新本地副本（读请求和 resync 快照可在任意节点完成）
+- 推送转发：任意节点发出的 WebSocket 推送同时转发给其他节点，由各节点发给自己的连接
+
+同一节点发出的复制记录和推送走同一个队列，其他节点总是先更新副本再收到对应的推送。
+Patch 历史只保存在属主节点上，历史查询同样转发给属主。
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+from urllib.parse import parse_qs
+
+import httpx
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.core import SchemaManager
+from backend.core.backplane import Backplane
+from backend.core.persistence import RECORD_PUT, RECORD_DELTA
+from .table_window import TableWindowService
+from .websocket.handlers.manager import WebSocketManager
+
+logger = logging.getLogger(__name__)
+
+# 标记已转发的请求，属主节点上不再转发
+FORWARDED_HEADER = "x-backplane-forwarded"
+
+# 需要在属主节点上执行的路由：路径（前缀） -> (方法, 实例 ID 所在位置, 字段名)
+OWNED_ROUTES: dict[str, tuple[str, str, str]] = {
+    "/ui/patch": ("POST", "body", "instance_name"),
+    "/ui/event": ("POST", "body", "pageKey"),
+    "/ui/patches": ("GET", "query", "instanceId"),
+}
+
+EventHandler = Callable[[dict[Any, Any]], Awaitable[dict[str, Any]]]
+
+
+class ClusterSync:
+    """通过 Backplane 同步本节点与其他节点
+
+    Attributes:
+        backplane: 节点间通信
+        forwarded: 转发给属主节点的请求数
+    """
+
+    def __init__(
+        self,
+        backplane: Backplane,
+        schema_manager: SchemaManager,
+        ws_manager: WebSocketManager,
+        app: ASGIApp,
+        table_windows: TableWindowService | None = None
+    ) -> None:
+        self.backplane: Backplane = backplane
+        self.schema_manager: SchemaManager = schema_manager
+        self.ws_manager: WebSocketManager = ws_manager
+        self.app: ASGIApp = app
+        # 本节点连接的窗口表格订阅在副本更新后推送变化的行
+        self.table_windows: TableWindowService | None = table_windows
+        self.forwarded: int = 0
+        self._outgoing: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
+        self._pump_task: asyncio.Task[None] | None = None
+        self._local_client: httpx.AsyncClient | None = None
+
+    async def start(self) -> None:
+        """加入集群：从已有节点同步状态，然后开始复制和转发"""
+        await self.backplane.start(self._handle)
+        await self._bootstrap()
+        self.schema_manager.replicator = self._enqueue_replica
+        self.ws_manager.set_relay(self._enqueue_push)
+        self._pump_task = asyncio.create_task(self._pump())
+
+    async def close(self) -> None:
+        """退出集群"""
+        self.schema_manager.replicator = None
+        self.ws_manager.set_relay(None)
+        if self._pump_task is not None:
+            # 发完已排队的消息
+            while not self._outgoing.empty():
+                await asyncio.sleep(0.01)
+            _ = self._pump_task.cancel()
+            self._pump_task = None
+        if self._local_client is not None:
+            await self._local_client.aclose()
+            self._local_client = None
+        await self.backplane.close()
+
+    def is_owner(self, instance_name: str) -> bool:
+        """本节点是否为实例的属主"""
+        return self.backplane.is_owner(instance_name)
+
+    async def _bootstrap(self) -> None:
+        """从任一已有节点拉取完整状态"""
+        for node_id in self.backplane.members():
+            if node_id == self.backplane.node_id:
+                continue
+            try:
+                reply = await self.backplane.request(node_id, {"kind": "state"})
+            except (ConnectionError, OSError, asyncio.TimeoutError):
+                continue
+            if "state" in reply:
+                self.schema_manager.load_state(reply["state"])
+                logger.info(f"[Cluster] 从节点 '{node_id}' 同步了 {self.schema_manager.count()} 个实例")
+                return
+
+    def _enqueue_replica(self, record: dict[str, Any]) -> None:
+        self._outgoing.put_nowait({"kind": "replica", "record": record})
+
+    def _enqueue_push(self, envelope: dict[str, Any]) -> None:
+        self._outgoing.put_nowait({"kind": "push", "envelope": envelope})
+
+    async def _pump(self) -> None:
+        """按顺序把复制记录和推送发给其他节点"""
+        while True:
+            message = await self._outgoing.get()
+            try:
+                await self.backplane.publish(message)
+            except Exception as e:
+                logger.error(f"[Cluster] 发布失败: {e}")
+            finally:
+                self._outgoing.task_done()
+
+    async def _handle(self, message: dict[str, Any]) -> dict[str, Any] | None:
+        """处理其他节点的消息"""
+        kind = message.get("kind")
+        if kind == "replica":
+            record = message["record"]
+            self.schema_manager.apply_replica(record)
+            if self.table_windows is not None and record["kind"] in (RECORD_PUT, RECORD_DELTA):
+                _ = self.table_windows.notify_ops(record["instance"], record.get("ops"))
+        elif kind == "push":
+            self.ws_manager.deliver_relayed(message["envelope"])
+        elif kind == "state":
+            return {"state": self.schema_manager.export_state()}
+        elif kind == "forward":
+            return await self._execute_forwarded(message)
+        return None
+
+    async def forward(
+        self,
+        owner: str,
+        method: str,
+        path: str,
+        query_string: str,
+        body: bytes
+    ) -> dict[str, Any]:
+        """把请求转发给属主节点执行
+
+        Returns:
+            {"status": HTTP 状态码, "body": 响应文本, "content_type": 内容类型}
+        """
+        self.forwarded += 1
+        return await self.backplane.request(owner, {
+            "kind": "forward",
+            "method": method,
+            "path": path,
+            "query": query_string,
+            "body": body.decode("utf-8")
+        })
+
+    def owned_event_handler(self, handler: EventHandler, default_instance_name: str) -> EventHandler:
+        """包装事件处理函数：属于其他节点的实例的事件转发给属主执行
+
+        Args:
+            handler: 本节点的事件处理函数（POST /ui/event 的处理函数）
+            default_instance_name: 事件未指定实例时使用的实例
+
+        Returns:
+            包装后的事件处理函数
+        """
+        async def handle(event: dict[Any, Any]) -> dict[str, Any]:
+            instance_name = event.get("pageKey") or default_instance_name
+            owner = self.backplane.owner_of(instance_name)
+            if owner == self.backplane.node_id:
+                return await handler(event)
+            reply = await self.forward(owner, "POST", "/ui/event", "", json.dumps(event).encode("utf-8"))
+            try:
+                return json.loads(reply.get("body") or "{}")
+            except ValueError:
+                return {"status": "error", "error": f"属主节点 '{owner}' 返回了无效的响应"}
+
+        return handle
+
+    async def _execute_forwarded(self, message: dict[str, Any]) -> dict[str, Any]:
+        """在本节点（属主）执行转发来的请求"""
+        if self._local_client is None:
+            self._local_client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=self.app), base_url="http://backplane"
+            )
+        url = message["path"] + (f"?{message['query']}" if message["query"] else "")
+        response = await self._local_client.request(
+            message["method"], url,
+            content=message["body"].encode("utf-8"),
+            headers={FORWARDED_HEADER: self.backplane.node_id, "content-type": "application/json"}
+        )
+        return {
+            "status": response.status_code,
+            "body": response.text,
+            "content_type": response.headers.get("content-type", "application/json")
+        }
+
+
+class OwnershipMiddleware:
+    """把非属主节点收到的写请求转发给实例的属主节点
+
+    Args:
+        app: 下游 ASGI 应用
+        cluster: 集群同步服务；为 None 时（单进程部署）直接放行
+        default_instance_name: 请求未指定实例时使用的实例
+    """
+
+    def __init__(self, app: ASGIApp, cluster: ClusterSync | None, default_instance_name: str) -> None:
+        self.app: ASGIApp = app
+        self.cluster: ClusterSync | None = cluster
+        self.default_instance_name: str = default_instance_name
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        route = self._owned_route(scope)
+        if route is None or self.cluster is None:
+            await self.app(scope, receive, send)
+            return
+
+        # 读取完整请求体，之后原样回放给下游
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        instance_name = self._instance_name(scope, body, route) or self.default_instance_name
+        owner = self.cluster.backplane.owner_of(instance_name)
+        if owner == self.cluster.backplane.node_id:
+            replayed = False
+
+            async def replay() -> Message:
+                nonlocal replayed
+                if replayed:
+                    return await receive()
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            await self.app(scope, replay, send)
+            return
+
+        try:
+            reply = await self.cluster.forward(
+                owner, scope["method"], scope["path"], scope["query_string"].decode("latin-1"), body
+            )
+            status = int(reply.get("status", 502))
+            content = str(reply.get("body", "")).encode("utf-8")
+            content_type = str(reply.get("content_type", "application/json"))
+        except Exception as e:
+            logger.error(f"[Cluster] 转发到属主节点 '{owner}' 失败: {e}")
+            status = 503
+            content = json.dumps({"status": "error", "error": f"实例 '{instance_name}' 的属主节点不可用"}).encode("utf-8")
+            content_type = "application/json"
+
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type.encode("latin-1")), (b"content-length", str(len(content)).encode())],
+        })
+        await send({"type": "http.response.body", "body": content})
+
+    def _owned_route(self, scope: Scope) -> tuple[str, str, str] | None:
+        if scope["type"] != "http":
+            return None
+        headers = dict(scope.get("headers", []))
+        if FORWARDED_HEADER.encode("latin-1") in headers:
+            return None
+        path: str = scope["path"]
+        for prefix, route in OWNED_ROUTES.items():
+            if scope["method"] == route[0] and (path == prefix or path.startswith(prefix + "/")):
+                return route
+        return None
+
+    @staticmethod
+    def _instance_name(scope: Scope, body: bytes, route: tuple[str, str, str]) -> str | None:
+        _, location, field = route
+        if location == "query":
+            values = parse_qs(scope["query_string"].decode("latin-1")).get(field)
+            return values[0] if values else None
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            return None
+        value = data.get(field) if isinstance(data, dict) else None
+        return value if isinstance(value, str) and value else None
@@ -0,0 +1,96 @@
+"""field:change 合并器 - 合并高频字段修改的历史记录和推送
+
+用户输入时每次按键都会发送一个 field:change 事件。原实现对每个事件都写一条
+历史记录并推送一次增量。合并器的处理方式：
+- 修改立即应用到 Schema（后续读取和 action 看到的都是最新值），HTTP 请求立即返回
+- 同一 (实例, fieldKey) 在窗口期内的后续修改只更新待发布的值
+- 窗口结束时在实例锁内写一条历史记录，并发布一次增量（携带最终值）
+"""
+
+import asyncio
+from typing import Any
+
+from backend.core import SchemaManager, PatchHistoryManager
+from .patch import apply_patch_to_schema
+from .sync_service import SchemaSyncService
+
+
+class FieldChangeCoalescer:
+    """按 (实例, fieldKey) 合并 field:change 事件
+
+    Attributes:
+        window: 合并窗口（秒），0 表示不合并
+        coalesced: 被合并（未单独发布）的事件数
+    """
+
+    def __init__(
+        self,
+        schema_manager: SchemaManager,
+        patch_history: PatchHistoryManager,
+        schema_sync: SchemaSyncService,
+        window: float = 0.03
+    ) -> None:
+        self.schema_manager: SchemaManager = schema_manager
+        self.patch_history: PatchHistoryManager = patch_history
+        self.schema_sync: SchemaSyncService = schema_sync
+        self.window: float = window
+        self.coalesced: int = 0
+        # (实例, fieldKey) -> 最新值
+        self._pending: dict[tuple[str, str], Any] = {}
+        # (实例, fieldKey) -> 延迟发布任务
+        self._timers: dict[tuple[str, str], asyncio.Task[None]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def submit(self, instance_name: str, field_key: str, value: Any) -> None:
+        """应用一次字段修改，并安排在窗口结束时发布
+
+        调用方需持有实例锁（应用修改与其他写操作串行）。
+
+        Args:
+            instance_name: 实例 ID
+            field_key: 字段 key
+            value: 新值
+        """
+        schema = self.schema_manager.get(instance_name)
+        if not schema:
+            return
+        apply_patch_to_schema(schema, {f"state.params.{field_key}": value})
+
+        key = (instance_name, field_key)
+        if key in self._pending:
+            self.coalesced += 1
+        self._pending[key] = value
+        if key not in self._timers:
+            self._timers[key] = asyncio.create_task(self._flush_later(key))
+
+    async def _flush_later(self, key: tuple[str, str]) -> None:
+        try:
+            await asyncio.sleep(self.window)
+        except asyncio.CancelledError:
+            return
+        _ = self._timers.pop(key, None)
+        await self._flush(key)
+
+    async def _flush(self, key: tuple[str, str]) -> None:
+        """写入历史并发布合并后的修改"""
+        instance_name, field_key = key
+        async with self.schema_manager.lock(instance_name):
+            if key not in self._pending:
+                return
+            value = self._pending.pop(key)
+            if not self.schema_manager.exists(instance_name):
+                return
+            patch: dict[str, Any] = {f"state.params.{field_key}": value}
+            patch_id = self.patch_history.save(instance_name, patch)
+            _ = await self.schema_sync.publish(instance_name, patch.keys(), patch=patch, patch_id=patch_id)
+
+    async def flush_all(self) -> None:
+        """立即发布所有待发布的修改（用于关闭应用）"""
+        for key in list(self._timers):
+            task = self._timers.pop(key)
+            _ = task.cancel()
+        for key in list(self._pending):
+            await self._flush(key)
@@ -0,0 +1,268 @@
+"""Schema 增量计算 - 将已应用 Patch 的路径转换为 RFC 6902 风格的增量操作
+
+后端在应用 Patch 后只知道「哪些路径被修改过」，本模块负责：
+1. 把点分隔路径（如 blocks.0.props.fields.1.label）归并到可独立序列化的粒度
+2. 从当前 Schema 中读取这些节点的最新值
+3. 生成 {"op": "add" | "replace" | "remove", "path": "/json/pointer", "value": ...} 列表
+
+归并粒度：
+- state.params.<key> / state.runtime.<key>：精确到单个键；
+  原地修改的列表下发元素级操作 /state/params/<key>/<index>（见 list_journal.py）
+- blocks.<index>.*：整个 block（字段、actions 的增删都在 block 内完成）
+- blocks / actions（增删元素导致索引变化）：整个数组
+- actions.<index>.*：整个 action
+- layout.*：整个 layout 对象
+
+apply_delta_ops 是反方向的操作：把其他节点发布的增量原地应用到本地 schema（集群副本使用）。
+"""
+
+from collections.abc import Iterable
+from typing import Any
+
+from pydantic_core import to_jsonable_python
+
+from ..models import UISchema, Block, ActionConfig, LayoutInfo, StateInfo
+from .list_journal import ListOp, get_list_journal, peek_list_journal
+from .patch import apply_patch_to_schema
+from .schema_index import peek_schema_index
+
+# 以 Dict 存储、可以按键精确同步的 state 分区
+_STATE_SECTIONS = ("params", "runtime")
+
+
+def escape_pointer_token(token: str) -> str:
+    """按 RFC 6901 转义 JSON Pointer 片段"""
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def unescape_pointer_token(token: str) -> str:
+    """escape_pointer_token 的逆操作"""
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def to_json_pointer(tokens: Iterable[str]) -> str:
+    """将路径片段转换为 JSON Pointer，例如 ("state", "params", "a") -> "/state/params/a" """
+    return "".join(f"/{escape_pointer_token(str(token))}" for token in tokens)
+
+
+def snapshot_param_keys(schema: UISchema) -> set[str]:
+    """记录当前 state.params 的键集合，用于在应用 Patch 后识别被隐式新增/删除的参数
+
+    添加/删除 block、修改字段 key 等结构操作会顺带初始化或清理 state.params，
+    这些副作用不会出现在 Patch 路径中，需要通过前后键集合的差异补齐。
+    """
+    return set(schema.state.params.keys()) if schema.state and schema.state.params is not None else set()
+
+
+def _coarsen_path(path: str) -> tuple[str, ...] | None:
+    """将 Patch 路径归并为增量同步的最小单元
+
+    Returns:
+        路径片段元组；历史记录键 "<op>:<path>"（如 "append_to_list:state.params.tasks"）按其中的路径归并；
+        空路径返回 None
+    """
+    path = path.split(":", 1)[-1]
+    if not path:
+        return None
+
+    keys = path.split(".")
+    root = keys[0]
+
+    if root == "state":
+        if len(keys) >= 2 and keys[1] in _STATE_SECTIONS:
+            return ("state", keys[1], keys[2]) if len(keys) >= 3 else ("state", keys[1])
+        return ("state",)
+
+    if root in ("blocks", "actions"):
+        if len(keys) >= 2 and keys[1].isdigit():
+            return (root, keys[1])
+        return (root,)
+
+    return (root,)
+
+
+def _dedupe_paths(paths: Iterable[tuple[str, ...]]) -> list[tuple[str, ...]]:
+    """去除已被父路径覆盖的子路径，保持首次出现的顺序"""
+    unique: list[tuple[str, ...]] = list(dict.fromkeys(paths))
+    covered: set[tuple[str, ...]] = set(unique)
+    result: list[tuple[str, ...]] = []
+    for tokens in unique:
+        if any(tokens[:i] in covered for i in range(1, len(tokens))):
+            continue
+        result.append(tokens)
+    return result
+
+
+def _resolve(schema: UISchema, tokens: tuple[str, ...]) -> tuple[bool, Any]:
+    """读取归并路径对应的当前值
+
+    Returns:
+        (是否存在, 值)
+    """
+    root = tokens[0]
+
+    if root == "state":
+        if len(tokens) == 1:
+            return True, schema.state
+        section: dict[str, Any] | None = getattr(schema.state, tokens[1], None)
+        if len(tokens) == 2:
+            return True, section or {}
+        if section is None or tokens[2] not in section:
+            return False, None
+        return True, section[tokens[2]]
+
+    if root in ("blocks", "actions"):
+        items = getattr(schema, root)
+        if len(tokens) == 1:
+            return True, items
+        index = int(tokens[1])
+        if 0 <= index < len(items):
+            return True, items[index]
+        return False, None
+
+    if hasattr(schema, root):
+        return True, getattr(schema, root)
+    return False, None
+
+
+def _list_delta_ops(pointer: str, list_ops: list[ListOp]) -> list[dict[str, Any]]:
+    """将列表的元素级操作转换为增量操作"""
+    ops: list[dict[str, Any]] = []
+    for op, index, value in list_ops:
+        if op == "remove":
+            ops.append({"op": "remove", "path": f"{pointer}/{index}"})
+        else:
+            ops.append({"op": op, "path": f"{pointer}/{index}", "value": to_jsonable_python(value, by_alias=True)})
+    return ops
+
+
+def build_delta_ops(
+    schema: UISchema,
+    changed_paths: Iterable[str],
+    params_before: set[str] | None = None
+) -> list[dict[str, Any]]:
+    """根据被修改的路径生成增量操作列表
+
+    Args:
+        schema: 已应用 Patch 后的 schema
+        changed_paths: 本次修改涉及的点分隔路径
+        params_before: 应用 Patch 前 state.params 的键集合（见 snapshot_param_keys）
+
+    Returns:
+        RFC 6902 风格的操作列表，路径使用序列化后的字段别名
+
+    注意：会取出 state.params 列表未发布的元素级操作，只应在发布增量时调用。
+    """
+    candidates: list[tuple[str, ...]] = []
+    for path in changed_paths:
+        tokens = _coarsen_path(path)
+        if tokens is not None:
+            candidates.append(tokens)
+
+    # 补齐结构操作对 state.params 的隐式修改
+    if params_before is not None:
+        params_after = snapshot_param_keys(schema)
+        for key in sorted(params_before - params_after):
+            candidates.append(("state", "params", key))
+        for key in sorted(params_after - params_before):
+            candidates.append(("state", "params", key))
+
+    # 数组元素越界（数组长度已改变）时退化为整个数组
+    normalized: list[tuple[str, ...]] = []
+    for tokens in candidates:
+        if tokens[0] in ("blocks", "actions") and len(tokens) == 2:
+            exists, _ = _resolve(schema, tokens)
+            if not exists:
+                tokens = (tokens[0],)
+        normalized.append(tokens)
+
+    journal = peek_list_journal(schema)
+    ops: list[dict[str, Any]] = []
+    for tokens in _dedupe_paths(normalized):
+        exists, value = _resolve(schema, tokens)
+        pointer = to_json_pointer(tokens)
+        is_member = tokens[0] == "state" and len(tokens) == 3
+
+        if journal is not None and tokens[0] == "state":
+            if len(tokens) < 3:
+                journal.clear()
+            elif tokens[1] == "params":
+                list_ops = journal.take(tokens[2], value if exists else None)
+                if list_ops is not None:
+                    ops.extend(_list_delta_ops(pointer, list_ops))
+                    continue
+
+        if not exists:
+            if is_member:
+                ops.append({"op": "remove", "path": pointer})
+            continue
+
+        ops.append({
+            "op": "add" if is_member else "replace",
+            "path": pointer,
+            "value": to_jsonable_python(value, by_alias=True)
+        })
+
+    return ops
+
+
+def apply_delta_ops(schema: UISchema, ops: list[dict[str, Any]]) -> None:
+    """将 build_delta_ops 生成的增量原地应用到 schema（集群副本使用）
+
+    不重新构造整个 schema，每条操作只修改对应的归并单元：
+    - /state/params/<key>/<index>：经 ListJournal 原地修改持有的列表，行索引随之增量维护
+    - /state/<section>/<key>：直接写入或删除字典键
+    - blocks / actions / layout：先验证为模型对象，再经 apply_patch_to_schema 写入（同步二级索引）
+    每条操作应用后推进修订号。
+
+    Args:
+        schema: 本地 schema
+        ops: 增量操作列表（值为 JSON 形式）
+
+    Raises:
+        ValueError: 增量与本地 schema 不一致（如元素级操作的目标不是列表）
+    """
+    for op in ops:
+        tokens = [unescape_pointer_token(token) for token in op["path"].split("/")[1:]]
+        if not tokens:
+            continue
+        value = op.get("value")
+        root = tokens[0]
+
+        if root == "state" and len(tokens) == 4 and tokens[1] == "params":
+            index = tokens[3] if tokens[3] == "-" else int(tokens[3])
+            list_op: ListOp = (op["op"], index, None if op["op"] == "remove" else value)
+            if not get_list_journal(schema).replay(tokens[2], [list_op]):
+                raise ValueError(f"state.params.{tokens[2]} 不是列表，无法应用元素级增量: {op['path']}")
+        elif root == "state" and len(tokens) == 3 and tokens[1] in _STATE_SECTIONS:
+            section: dict[str, Any] = getattr(schema.state, tokens[1])
+            if op["op"] == "remove":
+                _ = section.pop(tokens[2], None)
+            else:
+                section[tokens[2]] = value
+        elif root == "state":
+            # 整个 state 或整个分区
+            if len(tokens) == 1:
+                schema.state = StateInfo.model_validate(value)
+            else:
+                setattr(schema.state, tokens[1], value)
+        elif root == "blocks":
+            if len(tokens) == 1:
+                blocks = [Block.model_validate(block) for block in value]
+                apply_patch_to_schema(schema, {"blocks": blocks})
+            else:
+                apply_patch_to_schema(schema, {f"blocks.{tokens[1]}": Block.model_validate(value)})
+        elif root == "actions":
+            if len(tokens) == 1:
+                schema.actions = [ActionConfig.model_validate(action) for action in value]
+                schema_index = peek_schema_index(schema)
+                if schema_index is not None:
+                    schema_index.actions_changed()
+            else:
+                apply_patch_to_schema(schema, {f"actions.{tokens[1]}": ActionConfig.model_validate(value)})
+        elif root == "layout":
+            apply_patch_to_schema(schema, {"layout": LayoutInfo.model_validate(value)})
+        else:
+            # 其他顶层字段（如 page_key）
+            setattr(schema, root, value)
+        _ = schema.touch()
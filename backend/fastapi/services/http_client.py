@@ -0,0 +1,112 @@
+"""外部 API 客户端 - 共享连接池的异步 HTTP 客户端
+
+action_type=api 的 action 在 /ui/event 处理过程中调用外部接口。
+原实现每次调用都创建同步 httpx.Client，慢接口会阻塞整个事件循环
+（所有实例和 WebSocket 都无法响应）。这里改为：
+- 进程内共享一个 httpx.AsyncClient，复用连接（keep-alive）
+- 连接池总量由 httpx.Limits 限制
+- 按目标主机限制并发请求数，单个慢主机不会占满连接池
+
+客户端在首次请求时按当前事件循环创建；事件循环变化（如测试中多次启动应用）
+时自动重建，避免复用绑定到旧循环的连接。
+"""
+
+import asyncio
+from typing import Any
+
+import httpx
+
+
+class ExternalApiClient:
+    """共享的异步 HTTP 客户端
+
+    Attributes:
+        limits: 连接池限制
+        per_host_limit: 同一主机的最大并发请求数
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        per_host_limit: int = 10
+    ) -> None:
+        self.limits: httpx.Limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.per_host_limit: int = per_host_limit
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._host_semaphores: dict[tuple[str, str, int | None], asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """获取绑定到当前事件循环的客户端（必要时创建）"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            # 旧客户端的连接属于其他事件循环，直接丢弃
+            self._client = httpx.AsyncClient(limits=self.limits)
+            self._loop = loop
+            self._host_semaphores.clear()
+        return self._client
+
+    def _host_semaphore(self, url: httpx.URL) -> asyncio.Semaphore:
+        """获取目标主机的并发信号量"""
+        host_key = (url.scheme, url.host, url.port)
+        semaphore = self._host_semaphores.get(host_key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            self._host_semaphores[host_key] = semaphore
+        return semaphore
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        headers: dict[str, str] | None = None,
+        timeout: float | None = None,
+        json: Any = None,
+        data: Any = None
+    ) -> httpx.Response:
+        """发起请求
+
+        Args:
+            method: HTTP 方法
+            url: 请求地址
+            headers: 请求头
+            timeout: 超时时间（秒），包含等待主机并发名额的时间
+            json: JSON 请求体
+            data: 表单请求体
+
+        Returns:
+            httpx.Response
+
+        Raises:
+            httpx.TimeoutException: 请求或等待并发名额超时
+            httpx.HTTPError: 其他请求错误
+        """
+        client = self._get_client()
+        target = httpx.URL(url)
+        semaphore = self._host_semaphore(target)
+
+        try:
+            _ = await asyncio.wait_for(semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise httpx.PoolTimeout(f"Too many concurrent requests to {target.host}") from None
+        try:
+            return await client.request(
+                method, target, headers=headers, json=json, data=data, timeout=timeout
+            )
+        finally:
+            semaphore.release()
+
+    async def aclose(self) -> None:
+        """关闭客户端并释放连接"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+        self._host_semaphores.clear()
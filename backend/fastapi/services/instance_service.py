@@ -1,18 +1,41 @@
 """实例服务 - 处理实例的创建、删除和操作"""
 
+import asyncio
 from re import Match
-from backend.fastapi.models import ActionConfig, UISchema, PatchOperationType, StateInfo, LayoutInfo, Block, FieldConfig, LayoutType, SchemaPatch
+from backend.fastapi.models import ActionConfig, UISchema, PatchOperationType, StateInfo, LayoutInfo, Block, LayoutType, SchemaPatch
 import httpx
 from typing import Any, Callable
 from backend.core.manager import SchemaManager
-from .patch import apply_patch_to_schema
+from .patch import IN_PLACE_LIST_OPERATIONS, apply_patch_to_schema, parse_field_configs, render_list_operation_value
+from .schema_index import get_schema_index
+from .table_window import windowed_table_keys
+from .http_client import ExternalApiClient
+
+
+async def _reacquire(lock: asyncio.Lock) -> None:
+    """重新获取等待外部 API 期间释放的实例锁
+
+    调用方的 async with 退出时会释放这把锁，因此即使等待期间被取消，也要先拿到锁再抛出 CancelledError，
+    否则 __aexit__ 会释放一把未持有的锁（RuntimeError）。
+    """
+    acquire = asyncio.ensure_future(lock.acquire())
+    cancelled = False
+    while not acquire.done():
+        try:
+            _ = await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            cancelled = True
+    if cancelled:
+        raise asyncio.CancelledError
 
 
 class InstanceService:
     """实例服务"""
 
-    def __init__(self, schema_manager: SchemaManager) -> None:
+    def __init__(self, schema_manager: SchemaManager, http_client: ExternalApiClient | None = None) -> None:
         self.schema_manager: SchemaManager = schema_manager
+        # 外部 API action 共用的异步 HTTP 客户端（连接池 + 按主机限流）
+        self.http_client: ExternalApiClient = http_client or ExternalApiClient()
 
     def create_instance(
         self,
@@ -63,16 +86,8 @@ class InstanceService:
                         props_copy = dict(block_copy.get('props', {}))
                         if 'fields' in props_copy and props_copy.get('fields') is not None:
                             fields_data: Any | list[Any] = props_copy.get('fields', []) or []
-                            # FieldConfig 是 Union 类型，使用 TypeAdapter 进行转换
-                            converted_fields: list[Any] = []
-                            from pydantic import TypeAdapter
-                            field_adapter: TypeAdapter[Any] = TypeAdapter(FieldConfig)
-                            for field in fields_data:
-                                if isinstance(field, dict):
-                                    converted_fields.append(field_adapter.validate_python(field))
-                                else:
-                                    converted_fields.append(field)
-                            props_copy['fields'] = converted_fields
+                            # FieldConfig 是按 type 判别的联合类型，整个列表一次验证
+                            props_copy['fields'] = parse_field_configs(list(fields_data))
                         # Convert actions in props if present
                         if 'actions' in props_copy and props_copy.get('actions') is not None:
                             actions_data: Any | list[Any] = props_copy.get('actions', []) or []
@@ -104,12 +119,13 @@ class InstanceService:
         _ = self.schema_manager.delete(instance_name)
         return True, f"Instance '{instance_name}' deleted successfully"
 
-    def handle_action(
+    async def handle_action(
         self,
         instance_name: str,
         action_id: str,
         params: dict[str, Any],
-        block_id: str | None = None
+        block_id: str | None = None,
+        lock: asyncio.Lock | None = None
     ) -> dict[str, Any]:
         """
         处理实例的 action 操作（通用化处理）
@@ -119,6 +135,7 @@ class InstanceService:
             action_id: 操作 ID
             params: 参数
             block_id: Block ID（可选，用于 block 级别的 actions）
+            lock: 调用方持有的实例锁（可选），等待外部 API 响应期间临时释放
 
         返回: Patch 数据字典
         """
@@ -141,45 +158,40 @@ class InstanceService:
         # 将前端传来的 params 同步到 schema.state.params
         # 这样模板表达式 ${state.params.xxx} 就能获取到最新的用户输入
         if params and schema.state and schema.state.params is not None:
+            # 窗口模式表格的数据不在客户端（客户端的值是空列表），不能用来覆盖
+            windowed = windowed_table_keys(schema)
             for key, value in params.items():
                 # 对于 rowData，临时存储到 temp_rowData，供模板使用
                 if key == "rowData":
                     schema.state.params["temp_rowData"] = value
                     print(f"[InstanceService] 已同步 temp_rowData: {value}")
-                # 只同步在 state.params 中已存在的字段，避免添加未知字段
-                elif key in schema.state.params:
+                # 只同步在 state.params 中已存在且值有变化的字段，避免添加未知字段；
+                # 值相同时保留原对象，原地修改的列表不会因此退回整体下发（见 list_journal.py）
+                elif key in schema.state.params and key not in windowed and schema.state.params[key] != value:
                     schema.state.params[key] = value
                     print(f"[InstanceService] 已同步 params: {key} = {value}")
 
+        # 上面直接修改了 state，推进修订号使模板渲染缓存失效
+        _ = schema.touch()
+
         # 查找对应的 action 配置
         action_config: ActionConfig | None = None
 
         # 优先在指定的 block 中查找 action
+        schema_index = get_schema_index(schema)
         if block_id:
-            for block in schema.blocks:
-                if block.id == block_id and block.props and block.props.actions:
-                    for action in block.props.actions:
-                        if action.id == action_id:
-                            action_config = action
-                            print(f"[InstanceService] 在 block '{block_id}' 中找到 action: {action_id}")
-                            break
-                if action_config:
-                    break
+            action_config = schema_index.find_action(action_id, block_id)
+            if action_config:
+                print(f"[InstanceService] 在 block '{block_id}' 中找到 action: {action_id}")
 
         # 如果在 block 中没找到，从全局 actions 中查找
         if not action_config:
-            for action in schema.actions:
-                if action.id == action_id:
-                    action_config = action
-                    print(f"[InstanceService] 在全局 actions 中找到 action: {action_id}")
-                    break
+            action_config = schema_index.find_action(action_id)
+            if action_config:
+                print(f"[InstanceService] 在全局 actions 中找到 action: {action_id}")
 
         if not action_config:
-            available_actions: list[str] = [a.id for a in schema.actions]
-            for block in schema.blocks:
-                if block.props and block.props.actions:
-                    for action in block.props.actions:
-                        available_actions.append(f"{block.id}.{action.id}")
+            available_actions: list[str] = schema_index.list_action_ids()
             print(f"[InstanceService] Action '{action_id}' 不存在，可用的 actions: {available_actions}")
             return {
                 "status": "success",
@@ -202,7 +214,24 @@ class InstanceService:
         # 处理 api 类型的 action
         if action_config.action_type == "api" and action_config.api:
             print(f"[InstanceService] Action 是 api 类型，调用外部 API")
-            api_patch = self._handle_external_api(schema, action_config.api.model_dump())
+            # 等待外部响应期间让出事件循环并释放实例锁，其他请求不受影响
+            if lock is not None:
+                lock.release()
+            try:
+                api_patch = await self._handle_external_api(schema, action_config.api.model_dump())
+            finally:
+                if lock is not None:
+                    await _reacquire(lock)
+            # 等待期间实例可能已被删除或替换
+            schema = self.schema_manager.get(instance_name)
+            if not schema:
+                return {
+                    "status": "error",
+                    "error": f"Instance '{instance_name}' not found"
+                }
+            # 响应映射写回 schema，保证服务端状态与推送的增量一致
+            if api_patch:
+                apply_patch_to_schema(schema, api_patch)
             return {
                 "status": "success",
                 "patch": api_patch
@@ -306,7 +335,6 @@ class InstanceService:
                                     print(f"[InstanceService] 过滤后的列表: {len(filtered_list)} 个元素")
 
                                     # 生成 patch 并应用到 schema
-                                    from .patch import apply_patch_to_schema
                                     operation_patch: dict[str, object] = self._execute_operation(schema, operation=PatchOperationType.SET, params={"value": filtered_list}, target_path=list_path)
                                     print(f"[InstanceService] 已在服务端执行过滤: {len(current_list)} -> {len(filtered_list)}, 操作结果: {operation_patch}")
 
@@ -365,7 +393,6 @@ class InstanceService:
                                     print(f"[InstanceService] 过滤后的列表: {len(filtered_list)} 个元素")
 
                                     # 生成 patch 并应用到 schema
-                                    from .patch import apply_patch_to_schema
                                     operation_result = self._execute_operation(schema, PatchOperationType.SET, {"value": filtered_list}, list_path)
                                     print(f"[InstanceService] 已在服务端执行过滤: {len(current_list)} -> {len(filtered_list)}, 操作结果: {operation_result}")
 
@@ -388,10 +415,16 @@ class InstanceService:
         # 应用统一格式的 patches
         # 注意：skip_indices 中的 patch 已经通过自定义逻辑处理并应用到 schema
         # 我们不需要再调用 apply_unified_patch，但需要将它们的值加入 patch_dict 用于前端更新
+        # 原地修改列表的操作在执行前渲染 value，渲染结果（而不是模板）写入历史记录，保证可以重放
+        rendered_list_values: dict[int, Any] = {}
         for idx, patch_item in enumerate(unified_patches):
             if idx in skip_indices:
                 print(f"[InstanceService] 跳过已处理的 patch（但值已在schema中）: {patch_item}")
                 continue
+            if patch_item.op in IN_PLACE_LIST_OPERATIONS:
+                rendered_value = render_list_operation_value(schema, patch_item.op, patch_item.value)
+                rendered_list_values[idx] = rendered_value
+                patch_item = patch_item.model_copy(update={"value": rendered_value})
             result = self.apply_unified_patch(schema, patch_item)
             print(f"[InstanceService] 应用 patch {patch_item}: {result}")
 
@@ -402,6 +435,11 @@ class InstanceService:
         patch_dict = {}
         for idx, patch_item in enumerate(unified_patches):
             path = patch_item.path
+            if idx in rendered_list_values:
+                # 原地修改的列表只记录渲染后的操作（与 /ui/patch 的历史记录格式相同，重放时重新执行），
+                # 不复制整个列表；推送给客户端的是元素级增量
+                patch_dict[f"{PatchOperationType(patch_item.op).value}:{path}"] = rendered_list_values[idx]
+                continue
             # 从 schema 中获取更新后的值（无论这个 patch 是通过哪种方式处理的）
             updated_value = get_nested_value(schema, path)
             patch_dict[path] = updated_value
@@ -618,13 +656,13 @@ class InstanceService:
         from .patch import render_template
         return render_template(schema, template)
 
-    def _handle_external_api(
+    async def _handle_external_api(
         self,
         schema: UISchema,
         config: dict[str, Any]
     ) -> dict[str, Any]:
         """
-        处理外部 API 调用
+        处理外部 API 调用（异步，使用共享连接池）
 
         支持两种配置格式：
         1. 旧格式（兼容）：
@@ -700,23 +738,19 @@ class InstanceService:
                             request_data[key] = value
 
             # 发起 HTTP 请求
-            with httpx.Client(timeout=timeout) as client:
-                if method == "GET":
-                    response = client.get(url, headers=headers)
-                elif method == "POST":
-                    if body_template_type == "json":
-                        response = client.post(url, headers=headers, json=request_data)
-                    else:
-                        response = client.post(url, headers=headers, data=request_data)
-                elif method == "PUT":
-                    if body_template_type == "json":
-                        response = client.put(url, headers=headers, json=request_data)
-                    else:
-                        response = client.put(url, headers=headers, data=request_data)
-                elif method == "DELETE":
-                    response = client.delete(url, headers=headers)
+            if method in ("GET", "DELETE"):
+                response = await self.http_client.request(method, url, headers=headers, timeout=timeout)
+            elif method in ("POST", "PUT"):
+                if body_template_type == "json":
+                    response = await self.http_client.request(
+                        method, url, headers=headers, timeout=timeout, json=request_data
+                    )
                 else:
-                    raise ValueError(f"Unsupported HTTP method: {method}")
+                    response = await self.http_client.request(
+                        method, url, headers=headers, timeout=timeout, data=request_data
+                    )
+            else:
+                raise ValueError(f"Unsupported HTTP method: {method}")
 
             # 处理响应
             if response.status_code >= 200 and response.status_code < 300:
@@ -844,14 +878,15 @@ class InstanceService:
 
         return current
 
-    def handle_table_button(
+    async def handle_table_button(
         self,
         instance_name: str,
         button_id: str,
         action_id: str | None,
         params: dict[str, Any],
         block_id: str | None = None,
-        field_key: str | None = None
+        field_key: str | None = None,
+        lock: asyncio.Lock | None = None
     ) -> dict[str, Any]:
         """
         处理表格内按钮点击事件
@@ -865,6 +900,7 @@ class InstanceService:
             params: 参数（包含 rowData, rowIndex 等）
             block_id: Block ID（可选）
             field_key: 字段 key（用于标识是哪个表格）
+            lock: 调用方持有的实例锁（可选，见 handle_action）
 
         Returns:
             处理结果字典（包含 status 和 patch）
@@ -881,7 +917,7 @@ class InstanceService:
 
         # 复用 handle_action 的逻辑
         # 表格按钮本质上就是一个 action，只是触发源不同
-        result: dict[str, Any] = self.handle_action(instance_name, action_id, params, block_id)
+        result: dict[str, Any] = await self.handle_action(instance_name, action_id, params, block_id, lock=lock)
 
         print(f"[InstanceService] handle_table_button 返回: {result}")
         return result
@@ -0,0 +1,287 @@
+"""列表原地修改 - state.params 中的列表按元素修改，并记录元素级增量
+
+append_to_list / remove_last / update_list_item 等操作原本每次都构造一个新列表，
+发布增量时再把整个列表发给客户端，单次修改的开销与列表长度成正比。现在：
+- 列表由 ListJournal 持有（写时复制）：第一次修改时复制一次，之后在实例锁内原地修改，
+  字段定义的默认值、客户端同步来的值等外部引用不受影响
+- 每次修改记录元素级操作（"-" 追加、下标插入 / 替换 / 删除），发布增量时转换为
+  /state/params/<key>/<index> 形式的 JSON Pointer，代替整个列表
+- 列表被整体替换（set、filter_list、客户端同步）或记录的操作多于列表长度时，退回整体下发；
+  原地修改持有的列表都必须经过 writable / record，发布时发现长度与记录不符（绕过记录的修改）也退回整体下发
+- 元素本身不原地修改（update_list_item 替换为新字典），历史记录、窗口表格中保存的行不受影响
+
+表格数据（字段类型为 table 的 state.params 列表）还可以按 rowKey 建立行索引（RowIndex），
+update_list_item / remove_from_list 按 rowKey 定位行时不再逐行比较。索引在首次按 rowKey 查找时构建，
+之后随记录的元素级操作（追加、开头插入、替换、删除）增量维护；列表被整体替换（filter_list 等）后
+在下次查找时重建。
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from typing import Any
+
+from ..models import UISchema
+
+# 元素级操作：(op, 下标或 "-", 值)；remove 的值为 None
+ListOp = tuple[str, int | str, Any]
+
+
+# 行索引中空洞（已删除行的逻辑位置）的上限，超过后丢弃索引，下次查找时重建
+MAX_ROW_INDEX_HOLES = 1024
+
+
+def _row_id(row: Any, row_key: str) -> str | None:
+    """行的索引键（与 update_list_item 的比较方式一致，按字符串比较）"""
+    return str(row.get(row_key)) if isinstance(row, dict) else None
+
+
+class RowIndex:
+    """列表按 rowKey 的哈希索引：str(row[row_key]) -> 行下标
+
+    每行有一个逻辑位置：追加的行取 next，插入到开头的行取 first - 1，删除的行在 holes 中留下空洞。
+    行下标 = 逻辑位置 - first - 小于它的空洞数，因此追加、开头插入和删除都不需要调整其他行。
+
+    Attributes:
+        row_key: 索引的行字段
+    """
+
+    __slots__ = ("row_key", "_positions", "_keys", "_first", "_next", "_holes")
+
+    def __init__(self, row_key: str, items: list[Any]) -> None:
+        self.row_key: str = row_key
+        # 索引键 -> 逻辑位置（同一个键可能对应多行）
+        self._positions: dict[str, list[int]] = {}
+        # 逻辑位置 -> 索引键
+        self._keys: dict[int, str] = {}
+        self._first: int = 0
+        self._next: int = 0
+        # 已删除行的逻辑位置（升序）
+        self._holes: list[int] = []
+        for row in items:
+            self._add(self._next, row)
+            self._next += 1
+
+    def _add(self, position: int, row: Any) -> None:
+        row_id = _row_id(row, self.row_key)
+        if row_id is not None:
+            self._keys[position] = row_id
+            self._positions.setdefault(row_id, []).append(position)
+
+    def _discard(self, position: int) -> None:
+        row_id = self._keys.pop(position, None)
+        if row_id is not None:
+            positions = self._positions[row_id]
+            positions.remove(position)
+            if not positions:
+                del self._positions[row_id]
+
+    def _position_of(self, index: int) -> int:
+        """行下标 -> 逻辑位置"""
+        # 第 j 个空洞之前有 holes[j] - first - j 行，行下标不小于它的空洞都位于该行之前
+        holes, first = self._holes, self._first
+        skipped = bisect_right(range(len(holes)), index, key=lambda j: holes[j] - first - j)
+        return index + first + skipped
+
+    def __len__(self) -> int:
+        """索引覆盖的行数"""
+        return self._next - self._first - len(self._holes)
+
+    def find(self, value: Any) -> list[int]:
+        """查找索引键等于 str(value) 的行下标（升序）"""
+        positions = self._positions.get(str(value))
+        if not positions:
+            return []
+        return sorted(position - self._first - bisect_left(self._holes, position) for position in positions)
+
+    def apply(self, op: str, index: int | str, value: Any) -> bool:
+        """按一条元素级操作更新索引
+
+        Returns:
+            是否仍然有效（不支持的插入位置或空洞过多时返回 False，调用方应丢弃索引）
+        """
+        if op == "add":
+            if index == "-":
+                self._add(self._next, value)
+                self._next += 1
+                return True
+            if index == 0:
+                self._first -= 1
+                self._add(self._first, value)
+                return True
+            return False
+
+        position = self._position_of(int(index))
+        self._discard(position)
+        if op == "replace":
+            self._add(position, value)
+            return True
+
+        insort(self._holes, position)
+        # 两端的空洞直接收缩
+        while self._holes and self._holes[-1] == self._next - 1:
+            _ = self._holes.pop()
+            self._next -= 1
+        while self._holes and self._holes[0] == self._first:
+            _ = self._holes.pop(0)
+            self._first += 1
+        return len(self._holes) <= MAX_ROW_INDEX_HOLES
+
+
+class ListJournal:
+    """一个 schema 的 state.params 列表的持有关系及未发布的元素级操作"""
+
+    __slots__ = ("schema", "_owned", "_lengths", "_pending", "_indexes")
+
+    def __init__(self, schema: UISchema) -> None:
+        self.schema: UISchema = schema
+        # key -> 由本对象复制、可以原地修改的列表
+        self._owned: dict[str, list[Any]] = {}
+        # key -> 最近一次记录修改后的列表长度，用于发现绕过记录的修改
+        self._lengths: dict[str, int] = {}
+        # key -> 上次发布之后的元素级操作；None 表示需要整体下发
+        self._pending: dict[str, list[ListOp] | None] = {}
+        # key -> 行索引（只为持有的列表维护）
+        self._indexes: dict[str, RowIndex] = {}
+
+    def writable(self, key: str) -> list[Any] | None:
+        """获取 state.params.<key> 可以原地修改的列表
+
+        当前值不是本对象持有的列表时先复制一份（之后需要整体下发一次）。
+
+        Args:
+            key: state.params 的键
+
+        Returns:
+            列表；当前值存在（不为 None）但不是列表时返回 None
+        """
+        current = self.schema.state.params.get(key)
+        if current is None:
+            # 不存在或值为 None 时视为空列表（与 get_nested_value(schema, path, []) 一致）
+            current = []
+        if not isinstance(current, list):
+            return None
+        if self._owned.get(key) is current:
+            return current
+        items = list(current)
+        self._owned[key] = items
+        self._lengths[key] = len(items)
+        self._pending[key] = None
+        _ = self._indexes.pop(key, None)
+        return items
+
+    def row_index(self, key: str, row_key: str) -> RowIndex | None:
+        """state.params.<key> 按 row_key 的行索引（首次查找时构建）
+
+        Args:
+            key: state.params 的键
+            row_key: 行字段（表格的 rowKey）
+
+        Returns:
+            行索引；列表不是由本对象持有（未经 writable 获取或已被整体替换）时返回 None
+        """
+        items = self._owned.get(key)
+        if items is None or self.schema.state.params.get(key) is not items:
+            return None
+        index = self._indexes.get(key)
+        if index is None or index.row_key != row_key:
+            index = RowIndex(row_key, items)
+            self._indexes[key] = index
+        return index
+
+    def drop_row_index(self, key: str) -> None:
+        """丢弃行索引（下次查找时重建）"""
+        _ = self._indexes.pop(key, None)
+
+    def record(self, key: str, ops: list[ListOp]) -> None:
+        """记录对 writable(key) 返回的列表所做的修改（同时更新行索引）"""
+        index = self._indexes.get(key)
+        if index is not None and not all(index.apply(*op) for op in ops):
+            del self._indexes[key]
+
+        owned = self._owned.get(key)
+        if owned is not None:
+            self._lengths[key] = len(owned)
+        pending = self._pending.get(key, [])
+        if pending is None:
+            return
+        pending.extend(ops)
+        # 操作比列表本身还多时整体下发更省
+        self._pending[key] = pending if owned is not None and len(pending) <= len(owned) else None
+
+    def replay(self, key: str, ops: list[ListOp]) -> bool:
+        """把其他节点已发布的元素级操作应用到 state.params.<key>（集群副本使用）
+
+        与本节点的列表操作一样原地修改持有的列表并增量维护行索引，
+        但这些操作已由属主发布，不记入未发布的操作。
+
+        Args:
+            key: state.params 的键
+            ops: 元素级操作
+
+        Returns:
+            是否已应用；当前值存在但不是列表时返回 False
+        """
+        items = self.writable(key)
+        if items is None:
+            return False
+        for op, index, value in ops:
+            if op == "remove":
+                del items[int(index)]
+            elif index == "-":
+                items.append(value)
+            elif op == "add":
+                items.insert(int(index), value)
+            else:
+                items[int(index)] = value
+        row_index = self._indexes.get(key)
+        if row_index is not None and not all(row_index.apply(*op) for op in ops):
+            del self._indexes[key]
+        self._lengths[key] = len(items)
+        self.schema.state.params[key] = items
+        return True
+
+    def take(self, key: str, value: Any) -> list[ListOp] | None:
+        """取出 state.params.<key> 上次发布之后的元素级操作（发布增量时调用）
+
+        Args:
+            key: state.params 的键
+            value: 当前值
+
+        Returns:
+            元素级操作；需要整体下发时返回 None
+        """
+        pending = self._pending.pop(key, None)
+        owned = self._owned.get(key)
+        if owned is None or owned is not value:
+            # 列表已被整体替换或删除
+            _ = self._owned.pop(key, None)
+            _ = self._lengths.pop(key, None)
+            _ = self._indexes.pop(key, None)
+            return None
+        if len(value) != self._lengths.get(key):
+            # 持有的列表被绕过记录修改过，记录的操作不完整
+            print(f"[ListJournal] state.params.{key} 被绕过记录修改，整体下发")
+            self._lengths[key] = len(value)
+            _ = self._indexes.pop(key, None)
+            return None
+        return pending
+
+    def clear(self) -> None:
+        """整个 state / state.params 已整体下发，丢弃未发布的操作"""
+        self._pending.clear()
+
+
+def get_list_journal(schema: UISchema) -> ListJournal:
+    """获取 schema 的列表修改记录（首次访问时创建）"""
+    private = schema.__pydantic_private__
+    journal = private.get('_list_journal')  # type: ignore[union-attr]
+    if journal is None or journal.schema is not schema:
+        # 首次访问，或 schema 经 model_copy 复制后私有属性仍指向原 schema
+        journal = ListJournal(schema)
+        private['_list_journal'] = journal  # type: ignore[index]
+    return journal
+
+
+def peek_list_journal(schema: UISchema) -> ListJournal | None:
+    """获取已创建的列表修改记录，尚未创建时返回 None（不触发创建）"""
+    journal = schema.__pydantic_private__.get('_list_journal')  # type: ignore[union-attr]
+    return journal if journal is not None and journal.schema is schema else None
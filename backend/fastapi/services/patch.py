@@ -1,9 +1,18 @@
 """Patch 应用器 - 应用 Patch 到 Schema"""
 
-import re
+from collections.abc import Callable
 from typing import Any
 
+from backend.config import settings
 from backend.fastapi.models.schema_models import LayoutInfo
+from .path_accessor import (
+    CompiledPath, compile_path,
+    KIND_BLOCKS, KIND_BLOCK, KIND_BLOCK_PROPS, KIND_FIELD, KIND_FIELD_ATTR,
+    KIND_ACTION, KIND_ACTION_PATCHES, KIND_STATE_MEMBER, KIND_LAYOUT, KIND_LAYOUT_ATTR
+)
+from .template import compile_template, compile_structure, MODE_DICT, MODE_BLOCK, MODE_FIELD
+from .schema_index import get_schema_index, peek_schema_index
+from .list_journal import ListOp, get_list_journal
 from ..models import (
     # 枚举定义
     FieldType, PatchOperationType,
@@ -13,12 +22,23 @@ from ..models import (
     Block, BlockProps, ActionConfig,
     # 字段相关
     BaseFieldConfig, SelectableFieldConfig, TagFieldConfig, ImageFieldConfig,
-    TableFieldConfig, ComponentFieldConfig, FieldConfig
+    TableFieldConfig, ComponentFieldConfig, FieldConfig,
+    FIELD_CONFIG_ADAPTER, FIELD_CONFIG_LIST_ADAPTER
 )
 
 
+# 缺失或为 None 时补为空 options 的字段类型
+_OPTION_FIELD_TYPES = frozenset({
+    FieldType.SELECT, FieldType.RADIO, FieldType.MULTISELECT,
+    FieldType.TAG, FieldType.BADGE, FieldType.PROGRESS
+})
+
+
 def validate_key_uniqueness(schema: UISchema, error_message: str = "") -> None:
-    """验证 schema 中的 key 唯一性
+    """验证 schema 中的 key 唯一性（全量扫描）
+
+    常规 Patch 流程使用 validate_touched_keys 只检查被修改的部分；
+    全量扫描仅在 settings.strict_key_validation 开启时作为交叉校验执行。
 
     检查：
     1. Block 的 id 必须在所有 block 中唯一
@@ -36,16 +56,16 @@ def validate_key_uniqueness(schema: UISchema, error_message: str = "") -> None:
     prefix = error_message if error_message else "Key uniqueness validation failed"
 
     # 检查 Block id 唯一性
-    block_ids = []
+    block_ids: set[str] = set()
     for block in schema.blocks:
         block_id = getattr(block, 'id', None)
         if block_id:
             if block_id in block_ids:
                 raise ValueError(f"{prefix}: Duplicate block id '{block_id}'")
-            block_ids.append(block_id)
+            block_ids.add(block_id)
 
     # 检查 Field key 唯一性（跨所有 blocks）
-    field_keys = []
+    field_keys: set[str] = set()
     for block in schema.blocks:
         if block.props and block.props.fields:
             for field in block.props.fields:
@@ -53,10 +73,10 @@ def validate_key_uniqueness(schema: UISchema, error_message: str = "") -> None:
                 if field_key:
                     if field_key in field_keys:
                         raise ValueError(f"{prefix}: Duplicate field key '{field_key}'")
-                    field_keys.append(field_key)
+                    field_keys.add(field_key)
 
     # 检查 Block Action id 唯一性（跨所有 blocks）
-    action_ids = []
+    action_ids: set[str] = set()
     for block in schema.blocks:
         if block.props and block.props.actions:
             for action in block.props.actions:
@@ -64,21 +84,91 @@ def validate_key_uniqueness(schema: UISchema, error_message: str = "") -> None:
                 if action_id:
                     if action_id in action_ids:
                         raise ValueError(f"{prefix}: Duplicate action id '{action_id}'")
-                    action_ids.append(action_id)
+                    action_ids.add(action_id)
 
     # 检查 Schema Action id 唯一性
-    schema_action_ids = []
+    schema_action_ids: set[str] = set()
     for action in schema.actions:
         action_id = getattr(action, 'id', None)
         if action_id:
             if action_id in schema_action_ids:
                 raise ValueError(f"{prefix}: Duplicate schema action id '{action_id}'")
-            schema_action_ids.append(action_id)
+            schema_action_ids.add(action_id)
+
+
+_DUPLICATE_LABELS: dict[str, str] = {
+    "block": "Duplicate block id",
+    "field": "Duplicate field key",
+    "action": "Duplicate action id",
+}
+
+
+def validate_touched_keys(
+    schema: UISchema,
+    block_indexes: set[int] | None,
+    check_actions: bool,
+    error_message: str = ""
+) -> None:
+    """增量验证 key 唯一性：只检查被修改的 block 和全局 actions
+
+    依赖 SchemaIndex 维护的 id/key 计数，单个 block 的检查代价与该 block 的
+    字段数成正比，与 schema 总大小无关。
+
+    Args:
+        schema: 当前 schema（修改已应用）
+        block_indexes: 被修改的 block 下标；None 表示 blocks 整体被替换，检查全部
+        check_actions: 全局 actions 是否被修改
+        error_message: 错误消息前缀
+
+    Raises:
+        ValueError: 如果发现重复的 key（消息格式与 validate_key_uniqueness 一致）
+    """
+    prefix = error_message if error_message else "Key uniqueness validation failed"
+    index = get_schema_index(schema)
+
+    if block_indexes is None or block_indexes:
+        duplicate = index.find_duplicate_in_blocks(block_indexes)
+        if duplicate is not None:
+            category, value = duplicate
+            raise ValueError(f"{prefix}: {_DUPLICATE_LABELS[category]} '{value}'")
+
+    if check_actions:
+        action_id = index.find_duplicate_in_actions()
+        if action_id is not None:
+            raise ValueError(f"{prefix}: Duplicate schema action id '{action_id}'")
+
+
+def validate_new_blocks(schema: UISchema, new_blocks: list[Block], error_message: str = "") -> None:
+    """在追加 block 之前验证其 id/key 不与现有 schema 或彼此重复
+
+    Args:
+        schema: 当前 schema（尚未追加）
+        new_blocks: 待追加的 block
+        error_message: 错误消息前缀
+
+    Raises:
+        ValueError: 如果发现重复的 key
+    """
+    prefix = error_message if error_message else "Key uniqueness validation failed"
+    duplicate = get_schema_index(schema).find_duplicate_for_new_blocks(new_blocks)
+    if duplicate is not None:
+        category, value = duplicate
+        raise ValueError(f"{prefix}: {_DUPLICATE_LABELS[category]} '{value}'")
+
+    if settings.strict_key_validation:
+        original_blocks = schema.blocks
+        schema.blocks = original_blocks + new_blocks  # type: ignore
+        try:
+            validate_key_uniqueness(schema, error_message=prefix)
+        finally:
+            schema.blocks = original_blocks  # type: ignore
 
 
 def get_nested_value(schema: UISchema, path: str, default: Any = None) -> Any:
     """获取嵌套值
 
+    路径经 compile_path 编译并缓存，重复查询不再重新解析字符串。
+
     Args:
         schema: 当前 schema
         path: 路径，如 "state.params.name"
@@ -87,28 +177,7 @@ def get_nested_value(schema: UISchema, path: str, default: Any = None) -> Any:
     Returns:
         获取到的值
     """
-    keys: list[str] = path.split(sep='.')
-    current: Any = schema
-
-    try:
-        for key in keys:
-            if key.isdigit():
-                # 处理数组索引
-                if isinstance(current, (list, tuple)):
-                    current = current[int(key)]
-                elif hasattr(current, '__getitem__'):
-                    current = current[int(key)]  # type: ignore
-                else:
-                    return default
-            elif hasattr(current, key):
-                current = getattr(current, key)
-            elif isinstance(current, dict):
-                current = current.get(key)
-            else:
-                return default
-        return current if current is not None else default
-    except (AttributeError, KeyError, IndexError, TypeError):
-        return default
+    return compile_path(path).get(schema, default)
 
 
 def render_template(schema: UISchema, template: str) -> str:
@@ -116,6 +185,8 @@ def render_template(schema: UISchema, template: str) -> str:
 
     示例: "表单已提交！姓名: ${state.params.name}"
 
+    模板经 compile_template 编译并缓存，schema 未修改时直接返回上次的渲染结果。
+
     Args:
         schema: 当前 schema
         template: 模板字符串
@@ -123,22 +194,7 @@ def render_template(schema: UISchema, template: str) -> str:
     Returns:
         渲染后的字符串
     """
-    result = template
-    print(f"[PatchService] render_template 开始: template='{template}'")
-
-    # 匹配 ${path} 格式的占位符
-    pattern = r'\$\{([^}]+)\}'
-
-    def replace_match(match):
-        path = match.group(1)
-        print(f"[PatchService] 替换占位符: path='{path}'")
-        value = get_nested_value(schema, path, "")
-        print(f"[PatchService] 获取到的值: value='{value}'")
-        return str(value)
-
-    result = re.sub(pattern, replace_match, result)
-    print(f"[PatchService] render_template 完成: result='{result}'")
-    return result
+    return compile_template(template).render(schema)
 
 
 def render_dict_template(schema: UISchema, template_dict: dict[str, Any]) -> dict[str, Any]:
@@ -151,22 +207,7 @@ def render_dict_template(schema: UISchema, template_dict: dict[str, Any]) -> dic
     Returns:
         渲染后的字典
     """
-    result: dict[str, Any] = {}
-    for key, value in template_dict.items():
-        if isinstance(value, str):
-            result[key] = render_template(schema, value)
-        elif isinstance(value, dict):
-            result[key] = render_dict_template(schema, value)
-        elif isinstance(value, list):
-            result[key] = [
-                render_template(schema, item) if isinstance(item, str)
-                else render_dict_template(schema, item) if isinstance(item, dict)
-                else item
-                for item in value
-            ]
-        else:
-            result[key] = value
-    return result
+    return compile_structure(template_dict, MODE_DICT).render(schema)
 
 
 def render_block_template(schema: UISchema, block_dict: dict[str, Any]) -> dict[str, Any]:
@@ -179,33 +220,7 @@ def render_block_template(schema: UISchema, block_dict: dict[str, Any]) -> dict[
     Returns:
         渲染后的 block 配置
     """
-    result: dict[str, Any] = {}
-    for key, value in block_dict.items():
-        if key == "value":
-            # field 的 value 不渲染，保留模板表达式
-            result[key] = value
-        elif isinstance(value, str):
-            result[key] = render_template(schema, value)
-        elif isinstance(value, dict):
-            # 如果是 fields，使用特殊的处理
-            if key == "fields":
-                result[key] = [
-                    render_field_template(schema, field) if isinstance(field, dict)
-                    else field
-                    for field in value
-                ]
-            else:
-                result[key] = render_dict_template(schema, value)
-        elif isinstance(value, list):
-            result[key] = [
-                render_block_template(schema, item) if isinstance(item, dict)
-                else render_template(schema, item) if isinstance(item, str)
-                else item
-                for item in value
-            ]
-        else:
-            result[key] = value
-    return result
+    return compile_structure(block_dict, MODE_BLOCK).render(schema)
 
 
 def render_field_template(schema: UISchema, field_dict: dict[str, Any]) -> dict[str, Any]:
@@ -218,25 +233,18 @@ def render_field_template(schema: UISchema, field_dict: dict[str, Any]) -> dict[
     Returns:
         渲染后的 field 配置
     """
-    result: dict[str, Any] = {}
-    for key, value in field_dict.items():
-        if key == "value":
-            # field 的 value 不渲染，保留模板表达式
-            result[key] = value
-        elif isinstance(value, str):
-            result[key] = render_template(schema, value)
-        elif isinstance(value, dict):
-            result[key] = render_dict_template(schema, value)
-        elif isinstance(value, list):
-            result[key] = [
-                render_template(schema, item) if isinstance(item, str)
-                else render_dict_template(schema, item) if isinstance(item, dict)
-                else item
-                for item in value
-            ]
-        else:
-            result[key] = value
-    return result
+    return compile_structure(field_dict, MODE_FIELD).render(schema)
+
+
+def _fill_field_defaults(field_data: dict[str, Any]) -> None:
+    """把表格的 columns、选择类字段的 options 为 None 或缺失时补为空列表（原地修改）"""
+    field_type = field_data.get('type', 'text')
+    if field_type == FieldType.TABLE:
+        if field_data.get('columns') is None:
+            field_data['columns'] = []
+    elif field_type in _OPTION_FIELD_TYPES:
+        if field_data.get('options') is None:
+            field_data['options'] = []
 
 
 def parse_field_config(field_data: dict[str, Any]) -> (
@@ -249,6 +257,8 @@ def parse_field_config(field_data: dict[str, Any]) -> (
 ):
     """根据字段类型解析为对应的 FieldConfig 模型
 
+    FieldConfig 是按 type 判别的联合类型，由模块级 TypeAdapter 一次验证完成。
+
     Args:
         field_data: 字段数据字典
 
@@ -258,33 +268,34 @@ def parse_field_config(field_data: dict[str, Any]) -> (
     Raises:
         ValueError: 如果字段类型无效
     """
-    field_type = field_data.get('type', 'text')
+    _fill_field_defaults(field_data)
+    return FIELD_CONFIG_ADAPTER.validate_python(field_data)
 
-    # 根据字段类型处理可能为 None 的数组属性
-    if field_type == FieldType.TABLE:
-        if 'columns' not in field_data or field_data['columns'] is None:
-            field_data['columns'] = []
-        return TableFieldConfig(**field_data)
-
-    elif field_type in [FieldType.SELECT, FieldType.RADIO, FieldType.MULTISELECT]:
-        if 'options' not in field_data or field_data['options'] is None:
-            field_data['options'] = []
-        return SelectableFieldConfig(**field_data)
 
-    elif field_type in [FieldType.TAG, FieldType.BADGE, FieldType.PROGRESS]:
-        # tag/badge/progress 类型可能需要 options 属性
-        if 'options' not in field_data or field_data['options'] is None:
-            field_data['options'] = []
-        return TagFieldConfig(**field_data)
+def parse_field_configs(fields_data: list[Any]) -> list[Any]:
+    """批量解析字段列表：所有字典在一次 TypeAdapter 调用中验证，已是模型对象的元素保持不变
 
-    elif field_type == FieldType.IMAGE:
-        return ImageFieldConfig(**field_data)
+    Args:
+        fields_data: 字段字典 / 模型对象列表
 
-    elif field_type == FieldType.COMPONENT:
-        return ComponentFieldConfig(**field_data)
+    Returns:
+        顺序不变的字段列表
 
-    else:
-        return BaseFieldConfig(**field_data)
+    Raises:
+        ValueError: 如果某个字段无效
+    """
+    positions: list[int] = []
+    pending: list[dict[str, Any]] = []
+    for position, field_data in enumerate(fields_data):
+        if isinstance(field_data, dict):
+            _fill_field_defaults(field_data)
+            positions.append(position)
+            pending.append(field_data)
+    fields = list(fields_data)
+    if pending:
+        for position, field in zip(positions, FIELD_CONFIG_LIST_ADAPTER.validate_python(pending)):
+            fields[position] = field
+    return fields
 
 
 def init_field_state(
@@ -318,6 +329,129 @@ def init_field_state(
                     print(f"[PatchService] Cleaned up state.params.{old_field_key}")
 
 
+# 原地修改 state.params 列表并记录元素级增量的操作（filter_list 整体替换列表）
+IN_PLACE_LIST_OPERATIONS = frozenset({
+    PatchOperationType.APPEND_TO_LIST,
+    PatchOperationType.PREPEND_TO_LIST,
+    PatchOperationType.REMOVE_FROM_LIST,
+    PatchOperationType.REMOVE_LAST,
+    PatchOperationType.UPDATE_LIST_ITEM,
+})
+
+
+def render_list_operation_value(schema: UISchema, operation: PatchOperationType, value: Any) -> Any:
+    """按 execute_operation 的方式渲染列表操作的 value 中的模板变量
+
+    渲染后的 value 不再依赖执行时的 state（如 ${state.params.next_id}），
+    写入历史记录后可以原样重放。
+
+    Args:
+        schema: 当前 schema
+        operation: 列表操作（IN_PLACE_LIST_OPERATIONS 之一）
+        value: 操作的 value
+
+    Returns:
+        渲染后的 value
+    """
+    if operation in (PatchOperationType.APPEND_TO_LIST, PatchOperationType.PREPEND_TO_LIST):
+        if isinstance(value, list):
+            return [render_dict_template(schema, item) if isinstance(item, dict) else item for item in value]
+    if isinstance(value, dict):
+        return render_dict_template(schema, value)
+    return value
+
+# 单次删除的元素超过该数量时整体重建列表（逐个删除每次都要移动后面的元素）
+_BULK_REMOVE_THRESHOLD = 32
+
+
+def _writable_list(schema: UISchema, target_path: str) -> tuple[list[Any] | None, str | None]:
+    """获取列表操作的目标列表（可以原地修改）
+
+    Args:
+        schema: 当前 schema
+        target_path: 目标路径
+
+    Returns:
+        (列表, state.params 的键)：state.params.<key> 的列表由 ListJournal 持有并记录元素级增量；
+        其他路径返回复制的列表和 None；目标存在但不是列表时返回 (None, None)
+    """
+    compiled = compile_path(target_path)
+    if compiled.kind == KIND_STATE_MEMBER and compiled.section == 'params' and compiled.attr:
+        items = get_list_journal(schema).writable(compiled.attr)
+        return items, (compiled.attr if items is not None else None)
+    current = get_nested_value(schema, target_path, [])
+    return (list(current), None) if isinstance(current, list) else (None, None)
+
+
+def _record_list_ops(schema: UISchema, journal_key: str | None, list_ops: list[ListOp]) -> None:
+    """记录 state.params 列表的元素级修改（其他路径的列表整体下发，不需要记录）"""
+    if journal_key is not None and list_ops:
+        get_list_journal(schema).record(journal_key, list_ops)
+
+
+def _table_row_key(schema: UISchema, field_key: str) -> str | None:
+    """state.params.<field_key> 对应表格字段的 rowKey，不是表格时返回 None"""
+    position = get_schema_index(schema).find_field(field_key)
+    if position is None:
+        return None
+    block_index, field_index = position
+    field = schema.blocks[block_index].props.fields[field_index]  # type: ignore[union-attr]
+    if isinstance(field, dict):
+        field_type, row_key = field.get("type"), field.get("row_key", field.get("rowKey", "id"))
+    else:
+        field_type, row_key = getattr(field, "type", None), getattr(field, "row_key", None)
+    return row_key if field_type == FieldType.TABLE and isinstance(row_key, str) else None
+
+
+def _matching_rows(
+    schema: UISchema,
+    journal_key: str | None,
+    items: list[Any],
+    item_key: str,
+    item_value: Any
+) -> list[int]:
+    """查找 item_key 的字符串形式等于 item_value 的行
+
+    item_key 是表格的 rowKey 时通过行索引（ListJournal.row_index）直接定位，否则逐行比较。
+    索引只用来确认命中：命中的行逐一校验，未命中（可能是索引遗漏了绕过记录追加的行）仍逐行比较。
+
+    Returns:
+        行下标（升序）
+    """
+    target = str(item_value)
+    row_index = None
+    if journal_key is not None and settings.table_row_index and _table_row_key(schema, journal_key) == item_key:
+        row_index = get_list_journal(schema).row_index(journal_key, item_key)
+        if row_index is not None and len(row_index) == len(items):
+            indices = row_index.find(target)
+            if indices and all(
+                index < len(items) and isinstance(items[index], dict) and str(items[index].get(item_key)) == target
+                for index in indices
+            ):
+                return indices
+
+    matched = [index for index, item in enumerate(items) if isinstance(item, dict) and str(item.get(item_key)) == target]
+    if row_index is not None and (matched or len(row_index) != len(items)):
+        # 索引与列表不一致（列表被绕过 patch 引擎修改），丢弃后下次查找时重建
+        print(f"[PatchService] 行索引已失效，重建: state.params.{journal_key}")
+        get_list_journal(schema).drop_row_index(journal_key)  # type: ignore[arg-type]
+    return matched
+
+
+def _remove_list_items(schema: UISchema, journal_key: str | None, items: list[Any], indices: list[int]) -> None:
+    """原地删除列表中指定下标（升序）的元素"""
+    if not indices:
+        return
+    if len(indices) > _BULK_REMOVE_THRESHOLD:
+        removed = set(indices)
+        items[:] = [item for index, item in enumerate(items) if index not in removed]
+    else:
+        for index in reversed(indices):
+            del items[index]
+    # 从后往前记录，下标在依次应用时仍然有效
+    _record_list_ops(schema, journal_key, [("remove", index, None) for index in reversed(indices)])
+
+
 def execute_operation(
     schema: UISchema,
     operation: PatchOperationType,
@@ -357,48 +491,34 @@ def execute_operation(
 
     patch: dict[Any, Any] = {}
 
-    if operation == PatchOperationType.APPEND_TO_LIST:
-        # 向列表添加元素
-        current_list = get_nested_value(schema, target_path, [])
-        items = params.get("items", [])
-        # 渲染 items 中的模板变量
-        if isinstance(items, list):
-            items_to_add = []
-            for single_item in items:
-                if isinstance(single_item, dict):
-                    items_to_add.append(render_dict_template(schema, single_item))
-                else:
-                    items_to_add.append(single_item)
-            patch[target_path] = current_list + items_to_add
-        else:
-            # 兼容单个元素的情况（向后兼容）
-            if isinstance(items, dict):
-                items = render_dict_template(schema, items)
-            patch[target_path] = current_list + [items]
-
-    elif operation == PatchOperationType.PREPEND_TO_LIST:
-        # 向列表开头添加元素
-        current_list = get_nested_value(schema, target_path, [])
-        items = params.get("items", [])
-        # 渲染 items 中的模板变量
-        if isinstance(items, list):
-            items_to_add = []
-            for single_item in items:
-                if isinstance(single_item, dict):
-                    items_to_add.append(render_dict_template(schema, single_item))
-                else:
-                    items_to_add.append(single_item)
-            patch[target_path] = items_to_add + current_list
-        else:
-            # 兼容单个元素的情况（向后兼容）
-            if isinstance(items, dict):
-                items = render_dict_template(schema, items)
-            patch[target_path] = [items] + current_list
+    if operation in (PatchOperationType.APPEND_TO_LIST, PatchOperationType.PREPEND_TO_LIST):
+        # 向列表末尾 / 开头添加元素
+        current_list, journal_key = _writable_list(schema, target_path)
+        if current_list is not None:
+            items = params.get("items", [])
+            # 渲染 items 中的模板变量
+            if isinstance(items, list):
+                items_to_add = [
+                    render_dict_template(schema, single_item) if isinstance(single_item, dict) else single_item
+                    for single_item in items
+                ]
+            else:
+                # 兼容单个元素的情况（向后兼容）
+                items_to_add = [render_dict_template(schema, items) if isinstance(items, dict) else items]
+            if operation == PatchOperationType.APPEND_TO_LIST:
+                current_list.extend(items_to_add)
+                list_ops: list[ListOp] = [("add", "-", item) for item in items_to_add]
+            else:
+                current_list[0:0] = items_to_add
+                # 逆序插入到开头，依次应用后顺序与 items_to_add 一致
+                list_ops = [("add", 0, item) for item in reversed(items_to_add)]
+            _record_list_ops(schema, journal_key, list_ops)
+            patch[target_path] = current_list
 
     elif operation == PatchOperationType.REMOVE_FROM_LIST:
         # 从列表中删除元素
-        current_list = get_nested_value(schema, target_path, [])
-        if isinstance(current_list, list):
+        current_list, journal_key = _writable_list(schema, target_path)
+        if current_list is not None:
             # 渲染 params 中的模板变量
             rendered_params = render_dict_template(schema, params)
             item_key = rendered_params.get("key", "id")
@@ -406,29 +526,30 @@ def execute_operation(
 
             print(f"[PatchService] remove_from_list: key={item_key}, value={item_value}")
 
-            # 支持 index: -1 表示删除所有满足条件的项
-            if rendered_params.get("index") == -1 and item_value:
-                # 删除所有满足条件的项（例如：删除所有 completed=True 的项）
-                new_list = [item for item in current_list if not (item.get(item_key) == item_value)]
-            elif item_value:
-                # 删除单个匹配项
-                new_list = [item for item in current_list if str(item.get(item_key)) != str(item_value)]
-            else:
-                # 没有指定删除条件，不做任何操作
-                new_list = current_list
+            if item_value:
+                # 支持 index: -1 表示删除所有满足条件的项（例如：删除所有 completed=True 的项），
+                # 否则删除 key 的字符串形式等于 value 的项
+                if rendered_params.get("index") == -1:
+                    matched = [index for index, item in enumerate(current_list) if isinstance(item, dict) and item.get(item_key) == item_value]
+                else:
+                    matched = _matching_rows(schema, journal_key, current_list, item_key, item_value)
+                _remove_list_items(schema, journal_key, current_list, matched)
+            # 没有指定删除条件时不做任何操作
 
-            patch[target_path] = new_list
+            patch[target_path] = current_list
 
     elif operation == PatchOperationType.REMOVE_LAST:
         # 删除列表最后一项
-        current_list = get_nested_value(schema, target_path, [])
-        if isinstance(current_list, list) and len(current_list) > 0:
-            patch[target_path] = current_list[:-1]
+        current_list, journal_key = _writable_list(schema, target_path)
+        if current_list:
+            _ = current_list.pop()
+            _record_list_ops(schema, journal_key, [("remove", len(current_list), None)])
+            patch[target_path] = current_list
 
     elif operation == PatchOperationType.UPDATE_LIST_ITEM:
         # 更新列表中的某个元素
-        current_list = get_nested_value(schema, target_path, [])
-        if isinstance(current_list, list):
+        current_list, journal_key = _writable_list(schema, target_path)
+        if current_list is not None:
             # 渲染 params 中的模板变量
             rendered_params = render_dict_template(schema, params)
             item_key = rendered_params.get("key", "id")
@@ -437,15 +558,14 @@ def execute_operation(
 
             print(f"[PatchService] update_list_item: key={item_key}, value={item_value}, updates={updates}")
 
-            new_list = []
-            for item in current_list:
-                if str(item.get(item_key)) == str(item_value):
-                    # 合并更新
-                    new_item = {**item, **updates}
-                    new_list.append(new_item)
-                else:
-                    new_list.append(item)
-            patch[target_path] = new_list
+            # 合并更新：替换为新字典，不修改原元素（历史记录等可能仍引用它）
+            list_ops = []
+            for index in _matching_rows(schema, journal_key, current_list, item_key, item_value):
+                new_item = {**current_list[index], **updates}
+                current_list[index] = new_item
+                list_ops.append(("replace", index, new_item))
+            _record_list_ops(schema, journal_key, list_ops)
+            patch[target_path] = current_list
 
     elif operation == PatchOperationType.CLEAR_ALL_PARAMS:
         # 清空所有 params 字段
@@ -465,16 +585,8 @@ def execute_operation(
             # 使用 Block 模型验证和规范化（自动类型检查和转换）
             new_block = Block(**rendered_value)
 
-            # 验证 key 唯一性（在添加到列表之前）
-            temp_blocks = current_blocks + [new_block]
-            # 临时修改 schema 以便验证
-            original_blocks = schema.blocks
-            schema.blocks = temp_blocks  # type: ignore
-            try:
-                validate_key_uniqueness(schema, error_message="ADD operation validation failed")
-            finally:
-                # 恢复原始 blocks
-                schema.blocks = original_blocks  # type: ignore
+            # 验证 key 唯一性（在添加到列表之前，只检查新 block）
+            validate_new_blocks(schema, [new_block], error_message="ADD operation validation failed")
 
             # 初始化新 block 中 fields 的 state.params
             if (new_block.props is not None and
@@ -512,16 +624,8 @@ def execute_operation(
                 else:
                     new_blocks.append(item)
 
-            # 验证 key 唯一性（在批量添加之前）
-            temp_blocks = current_blocks + new_blocks
-            # 临时修改 schema 以便验证
-            original_blocks = schema.blocks
-            schema.blocks = temp_blocks  # type: ignore
-            try:
-                validate_key_uniqueness(schema, error_message="ADD operation validation failed")
-            finally:
-                # 恢复原始 blocks
-                schema.blocks = original_blocks  # type: ignore
+            # 验证 key 唯一性（在批量添加之前，只检查新 block）
+            validate_new_blocks(schema, new_blocks, error_message="ADD operation validation failed")
 
             patch[target_path] = current_blocks + new_blocks
 
@@ -625,6 +729,346 @@ def execute_operation(
     return patch
 
 
+def _apply_blocks(schema: UISchema, compiled: CompiledPath, value: Any) -> None:
+    """blocks - 替换整个 blocks 数组（add 操作使用）"""
+    print(f"[PatchService] 匹配到 blocks 路径（替换整个数组）")
+    try:
+        if isinstance(value, list):
+            # 确保所有元素都是 Block 对象
+            blocks_list = []
+            for block_data in value:
+                if isinstance(block_data, Block):
+                    # 已经是 Block 对象（已在 execute_operation 中验证）
+                    blocks_list.append(block_data)
+                elif isinstance(block_data, dict):
+                    # 字典转换为 Block（兜底处理）
+                    rendered_block_data = render_dict_template(schema, block_data)
+                    new_block = Block(**rendered_block_data)
+                    blocks_list.append(new_block)
+
+                    # 初始化 state.params（兜底处理）
+                    if (new_block.props is not None and
+                        new_block.props.fields is not None):
+                        for field in new_block.props.fields:
+                            field_key = getattr(field, 'key', None)
+                            if field_key and field_key not in schema.state.params:
+                                schema.state.params[field_key] = field.value if hasattr(field, 'value') else ""
+                                print(f"[PatchService] Initialized state.params.{field_key}")
+
+            schema.blocks = blocks_list
+            print(f"[PatchService] Replaced blocks array, total: {len(blocks_list)}")
+        else:
+            print(f"[PatchService] blocks value must be a list, got: {type(value)}")
+    except Exception as e:
+        print(f"[PatchService] Error applying blocks operation: {e}")
+
+
+def _apply_action_patches(schema: UISchema, compiled: CompiledPath, value: Any) -> None:
+    """actions.X.patches - 更新 action 的 patches"""
+    action_index = compiled.action_index
+    try:
+        if action_index < len(schema.actions):
+            action = schema.actions[action_index]
+            setattr(action, 'patches', value)
+            print(f"[PatchService] Updated patches for action at actions[{action_index}]: {getattr(action, 'id', 'unknown')}")
+        else:
+            print(f"[PatchService] Action index {action_index} out of range (total: {len(schema.actions)})")
+    except (ValueError, AttributeError, IndexError) as e:
+        print(f"[PatchService] Error applying set operation for path '{compiled.path}': {e}")
+
+
+def _apply_action(schema: UISchema, compiled: CompiledPath, value: Any) -> None:
+    """actions.X - 替换整个 action"""
+    action_index = compiled.action_index
+    try:
+        if action_index < len(schema.actions):
+            # 如果是 dict，转换为 ActionConfig 对象
+            if isinstance(value, dict):
+                new_action = ActionConfig(**value)
+            elif isinstance(value, ActionConfig):
+                new_action = value
+            else:
+                # 忽略不支持的类型
+                print(f"[PatchService] Unsupported value type for action: {type(value)}")
+                return
+
+            schema.actions[action_index] = new_action
+            print(f"[PatchService] Replaced action at actions[{action_index}]: {getattr(new_action, 'id', 'unknown')}")
+        else:
+            print(f"[PatchService] Action index {action_index} out of range (total: {len(schema.actions)})")
+    except (ValueError, AttributeError, IndexError) as e:
+        print(f"[PatchService] Error applying set operation for path '{compiled.path}': {e}")
+
+
+def _apply_state_member(schema: UISchema, compiled: CompiledPath, value: Any) -> None:
+    """state.params.key 或 state.runtime.key"""
+    # 确保字典存在
+    if compiled.section == 'params':
+        if schema.state.params is None:
+            schema.state.params = {}
+        schema.state.params[compiled.attr] = value
+    elif compiled.section == 'runtime':
+        if schema.state.runtime is None:
+            schema.state.runtime = {}
+        schema.state.runtime[compiled.attr] = value
+
+
+def _apply_layout(schema: UISchema, compiled: CompiledPath, value: Any) -> None:
+    """layout - 替换整个 layout 对象"""
+    print(f"[PatchService] 匹配到 layout 路径（替换整个对象）")
+    try:
+        if isinstance(value, dict):
+            new_layout = LayoutInfo(**value)
+        elif isinstance(value, LayoutInfo):
+            new_layout = value
+        else:
+            print(f"[PatchService] Unsupported value type for layout: {type(value)}")
+            return
+
+        schema.layout = new_layout
+        print(f"[PatchService] Replaced layout: type={new_layout.type}, columns={new_layout.columns}, gap={new_layout.gap}")
+    except (ValueError, AttributeError) as e:
+        print(f"[PatchService] Error applying set operation for path '{compiled.path}': {e}")
+
+
+def _apply_layout_attr(schema: UISchema, compiled: CompiledPath, value: Any) -> None:
+    """layout.type, layout.columns, layout.gap 等"""
+    try:
+        setattr(schema.layout, compiled.attr, value)
+        print(f"[PatchService] Updated layout.{compiled.attr} = {value}")
+    except (ValueError, AttributeError) as e:
+        print(f"[PatchService] Error applying set operation for path '{compiled.path}': {e}")
+
+
+def _apply_block(schema: UISchema, compiled: CompiledPath, value: Any) -> None:
+    """blocks.X（替换整个 block）或 blocks.X.id 等（修改 block 属性）"""
+    block_index = compiled.block_index
+    block_attr = compiled.attr
+    try:
+        if block_index < len(schema.blocks):
+            block = schema.blocks[block_index]
+
+            if block_attr:
+                # 修改 block 的属性（id, type 等）
+                setattr(block, block_attr, value)
+                print(f"[PatchService] Updated block[{block_index}].{block_attr} = {value}")
+            else:
+                # 替换整个 block
+                if isinstance(value, dict):
+                    new_block = Block(**value)
+                elif isinstance(value, Block):
+                    new_block = value
+                else:
+                    # 忽略不支持的类型
+                    print(f"[PatchService] Unsupported value type for block: {type(value)}")
+                    return
+                schema.blocks[block_index] = new_block
+                print(f"[PatchService] Replaced block at blocks[{block_index}]")
+        else:
+            print(f"[PatchService] Block index {block_index} out of range (total: {len(schema.blocks)})")
+    except (ValueError, AttributeError, IndexError) as e:
+        print(f"[PatchService] Error applying set operation for path '{compiled.path}': {e}")
+
+
+def _apply_block_props(schema: UISchema, compiled: CompiledPath, value: Any) -> None:
+    """blocks.X.props（替换整个 props）或 blocks.X.props.cols / tabs / fields / actions 等"""
+    block_index = compiled.block_index
+    props_attr = compiled.attr
+    try:
+        print(f"[PatchService] >>> Processing blocks.X.props path: block_index={block_index}, props_attr={props_attr}, total_blocks={len(schema.blocks)}")
+
+        if block_index >= len(schema.blocks):
+            print(f"[PatchService] Block index {block_index} out of range (total: {len(schema.blocks)})")
+            return
+
+        block = schema.blocks[block_index]
+        if not (hasattr(block, 'props') and block.props):
+            return
+
+        if props_attr:
+            # 特殊处理 fields 属性（整个字段数组）
+            if props_attr == 'fields':
+                if isinstance(value, list):
+                    # 获取旧字段列表（用于清理 state）
+                    old_fields = getattr(block.props, 'fields', None)
+
+                    # 转换为 FieldConfig 列表（字典字段一次批量验证）
+                    fields_list: list[FieldConfig] = parse_field_configs(value)
+
+                    # 清理旧字段 state 并初始化新字段 state
+                    for new_field in fields_list:
+                        init_field_state(schema, new_field, old_fields)
+
+                    setattr(block.props, 'fields', fields_list)
+                else:
+                    print(f"[PatchService] fields value must be a list, got: {type(value)}")
+            # 特殊处理 actions 属性
+            elif props_attr == 'actions':
+                if isinstance(value, list):
+                    # 转换为 ActionConfig 列表
+                    actions_list = []
+                    for action_data in value:
+                        if isinstance(action_data, dict):
+                            actions_list.append(ActionConfig(**action_data))
+                        else:
+                            actions_list.append(action_data)
+                    setattr(block.props, 'actions', actions_list)
+                    print(f"[PatchService] Updated block[{block_index}].props.actions (converted {len(actions_list)} actions)")
+                else:
+                    print(f"[PatchService] actions value must be a list, got: {type(value)}")
+            else:
+                # 修改 props 的属性（cols, gap, tabs, panels, title 等）
+                setattr(block.props, props_attr, value)
+                print(f"[PatchService] Updated block[{block_index}].props.{props_attr} = {value}")
+        else:
+            # 替换整个 props
+            if isinstance(value, dict):
+                # 确保 fields 中的表格字段有 columns
+                if 'fields' in value and isinstance(value['fields'], list):
+                    for field in value['fields']:
+                        if isinstance(field, dict):
+                            field_type = field.get('type', 'text')
+                            if field_type == 'table' and ('columns' not in field or field['columns'] is None):
+                                field['columns'] = []
+                            elif field_type in ['select', 'radio', 'multiselect'] and ('options' not in field or field['options'] is None):
+                                field['options'] = []
+                new_props = BlockProps(**value)
+            elif isinstance(value, BlockProps):
+                new_props = value
+            else:
+                # 忽略不支持的类型
+                print(f"[PatchService] Unsupported value type for props: {type(value)}")
+                return
+            block.props = new_props
+            print(f"[PatchService] Replaced props at blocks[{block_index}].props")
+    except (ValueError, AttributeError, IndexError) as e:
+        print(f"[PatchService] Error applying set operation for path '{compiled.path}': {e}")
+
+
+def _get_block_fields(schema: UISchema, block_index: int) -> list[Any] | None:
+    """获取 blocks[block_index].props.fields（确保为列表），不存在时返回 None"""
+    if block_index >= len(schema.blocks):
+        return None
+    block = schema.blocks[block_index]
+    if not (hasattr(block, 'props') and block.props and hasattr(block.props, 'fields')):
+        return None
+
+    current_fields = getattr(block.props, 'fields')
+    if current_fields is None:
+        return None
+
+    # 确保 fields 是列表
+    if not isinstance(current_fields, list):
+        current_fields = list(current_fields.values())
+        setattr(block.props, 'fields', current_fields)
+    return current_fields
+
+
+def _apply_field(schema: UISchema, compiled: CompiledPath, value: Any) -> None:
+    """blocks.X.props.fields.Y - 替换指定索引的字段"""
+    block_index = compiled.block_index
+    field_index = compiled.field_index
+    try:
+        current_fields = _get_block_fields(schema, block_index)
+        # 检查 field_index 是否有效
+        if current_fields is None or not 0 <= field_index < len(current_fields):
+            return
+
+        # 如果是 dict，转换为 FieldConfig 对象
+        if isinstance(value, dict):
+            new_field = parse_field_config(value)
+        else:
+            new_field = value
+
+        # 获取旧字段 key，用于更新 state（如果 key 改变了）
+        old_field = current_fields[field_index]
+        old_field_key = getattr(old_field, 'key', None)
+        new_field_key = getattr(new_field, 'key', None)
+
+        # 替换字段
+        current_fields[field_index] = new_field
+
+        # 如果 key 改变了，更新 state
+        if old_field_key and new_field_key and old_field_key != new_field_key:
+            # 删除旧 key 的 state
+            if old_field_key in schema.state.params:
+                del schema.state.params[old_field_key]
+            if old_field_key in schema.state.runtime:
+                del schema.state.runtime[old_field_key]
+            # 添加新 key 的 state（如果不存在）
+            if new_field_key not in schema.state.params:
+                schema.state.params[new_field_key] = ""
+
+        print(f"[PatchService] Replaced field at blocks[{block_index}].props.fields[{field_index}]: {new_field_key}")
+    except (ValueError, AttributeError, IndexError) as e:
+        print(f"[PatchService] Error applying set operation for path '{compiled.path}': {e}")
+
+
+def _apply_field_attr(schema: UISchema, compiled: CompiledPath, value: Any) -> None:
+    """blocks.X.props.fields.Y.key 或 blocks.X.props.fields.Y.label 等 - 修改字段属性"""
+    block_index = compiled.block_index
+    field_index = compiled.field_index
+    field_attr = compiled.attr
+    try:
+        current_fields = _get_block_fields(schema, block_index)
+        # 检查 field_index 是否有效
+        if current_fields is None or not 0 <= field_index < len(current_fields):
+            return
+
+        field = current_fields[field_index]
+
+        # 如果修改的是 'key' 属性，需要更新 state
+        if field_attr == 'key':
+            old_key = getattr(field, 'key', None)
+            new_key = value
+
+            # 更新字段属性
+            setattr(field, field_attr, new_key)
+
+            # 更新 state（确保键是字符串）
+            if isinstance(old_key, str) and isinstance(new_key, str) and old_key != new_key:
+                if old_key in (schema.state.params or {}):
+                    (schema.state.params or {})[new_key] = (schema.state.params or {}).pop(old_key)
+                if old_key in (schema.state.runtime or {}):
+                    (schema.state.runtime or {})[new_key] = (schema.state.runtime or {}).pop(old_key)
+        else:
+            # 修改其他属性
+            setattr(field, field_attr, value)
+
+        print(f"[PatchService] Updated field attribute: blocks[{block_index}].props.fields[{field_index}].{field_attr} = {value}")
+    except (ValueError, AttributeError, IndexError) as e:
+        print(f"[PatchService] Error applying set operation for path '{compiled.path}': {e}")
+
+
+def _sync_schema_index(schema: UISchema, compiled: CompiledPath) -> None:
+    """处理器修改 schema 后增量更新二级索引（索引尚未构建时跳过）"""
+    index = peek_schema_index(schema)
+    if index is None:
+        return
+    kind = compiled.kind
+    if kind == KIND_BLOCKS:
+        index.rebuild()
+    elif kind in (KIND_BLOCK, KIND_BLOCK_PROPS, KIND_FIELD, KIND_FIELD_ATTR):
+        index.reindex_block(compiled.block_index)
+    elif kind == KIND_ACTION:
+        index.actions_changed()
+
+
+# 路径类别 -> 处理器（路径在 compile_path 中一次性分类，这里只做常数时间分派）
+_PATCH_HANDLERS: dict[str, Callable[[UISchema, CompiledPath, Any], None]] = {
+    KIND_BLOCKS: _apply_blocks,
+    KIND_BLOCK: _apply_block,
+    KIND_BLOCK_PROPS: _apply_block_props,
+    KIND_FIELD: _apply_field,
+    KIND_FIELD_ATTR: _apply_field_attr,
+    KIND_ACTION: _apply_action,
+    KIND_ACTION_PATCHES: _apply_action_patches,
+    KIND_STATE_MEMBER: _apply_state_member,
+    KIND_LAYOUT: _apply_layout,
+    KIND_LAYOUT_ATTR: _apply_layout_attr,
+}
+
+
 def apply_patch_to_schema(schema: UISchema, patch: dict[str, object]) -> None:
     """将 Patch 应用到 Schema
 
@@ -636,357 +1080,54 @@ def apply_patch_to_schema(schema: UISchema, patch: dict[str, object]) -> None:
     3. execute_operation 返回：{"path": value} (简化格式)
     4. apply_patch_to_schema 将 {"path": value} 应用到 schema
 
+    路径通过 compile_path 编译（LRU 缓存），按路径类别分派到对应处理器。
+
     Args:
         schema: 目标 Schema
         patch: 操作结果字典，格式为 {"path": value}，例如 {"state.params.name": "value"}
     """
     print(f"[PatchService] apply_patch_to_schema 被调用，patch keys: {list(patch.keys())}")
 
-    # 先收集所有需要验证的路径
+    # 收集被修改的 block 下标 / 全局 actions，应用完成后只验证这些部分
     needs_validation = False
+    touched_blocks: set[int] | None = set()
+    touched_actions = False
 
     # 处理直接赋值类型的 patches
     for path, value in patch.items():
-        keys = path.split('.')
-        print(f"[PatchService] 处理路径: {path}, keys: {keys}")
+        compiled = compile_path(path)
+        print(f"[PatchService] 处理路径: {path}, kind: {compiled.kind}")
 
         # 判断是否需要验证唯一性（修改 blocks、fields、actions 相关的路径）
-        if keys[0] in ('blocks', 'actions') or (keys[0] == 'state' and keys[1] == 'params'):
+        if compiled.affects_keys:
             needs_validation = True
-
-        # 路径格式：blocks - 替换整个 blocks 数组（add 操作使用）
-        if len(keys) == 1 and keys[0] == 'blocks':
-            print(f"[PatchService] 匹配到 blocks 路径（替换整个数组）")
-            try:
-                if isinstance(value, list):
-                    # 确保所有元素都是 Block 对象
-                    blocks_list = []
-                    for block_data in value:
-                        if isinstance(block_data, Block):
-                            # 已经是 Block 对象（已在 execute_operation 中验证）
-                            blocks_list.append(block_data)
-                        elif isinstance(block_data, dict):
-                            # 字典转换为 Block（兜底处理）
-                            rendered_block_data = render_dict_template(schema, block_data)
-                            new_block = Block(**rendered_block_data)
-                            blocks_list.append(new_block)
-
-                            # 初始化 state.params（兜底处理）
-                            if (new_block.props is not None and
-                                new_block.props.fields is not None):
-                                for field in new_block.props.fields:
-                                    field_key = getattr(field, 'key', None)
-                                    if field_key and field_key not in schema.state.params:
-                                        schema.state.params[field_key] = field.value if hasattr(field, 'value') else ""
-                                        print(f"[PatchService] Initialized state.params.{field_key}")
-
-                    schema.blocks = blocks_list
-                    print(f"[PatchService] Replaced blocks array, total: {len(blocks_list)}")
-                else:
-                    print(f"[PatchService] blocks value must be a list, got: {type(value)}")
-            except Exception as e:
-                print(f"[PatchService] Error applying blocks operation: {e}")
-
-        # 路径格式：actions.X.patches - 更新 action 的 patches（必须先匹配，因为比 actions.X 更具体）
-        if len(keys) >= 3 and keys[0] == 'actions' and keys[2] == 'patches':
-            print(f"[PatchService] 匹配到 actions.X.patches 路径")
-            try:
-                action_index = int(keys[1])
-
-                if action_index < len(schema.actions):
-                    action = schema.actions[action_index]
-
-                    # 更新 patches 属性
-                    if hasattr(action, '__dict__'):
-                        setattr(action, 'patches', value)
-                    else:
-                        # Pydantic 模型，使用 setattr 更新
-                        setattr(action, 'patches', value)
-
-                    print(f"[PatchService] Updated patches for action at actions[{action_index}]: {getattr(action, 'id', 'unknown')}")
-                else:
-                    print(f"[PatchService] Action index {action_index} out of range (total: {len(schema.actions)})")
-            except (ValueError, AttributeError, IndexError) as e:
-                print(f"[PatchService] Error applying set operation for path '{path}': {e}")
-
-        # 路径格式：actions.X - 替换整个 action
-        elif len(keys) >= 2 and keys[0] == 'actions':
-            print(f"[PatchService] 匹配到 actions.X 路径")
-            try:
-                action_index = int(keys[1])
-
-                if action_index < len(schema.actions):
-                    # 如果是 dict，转换为 ActionConfig 对象
-                    if isinstance(value, dict):
-                        new_action = ActionConfig(**value)
-                    elif isinstance(value, ActionConfig):
-                        new_action = value
-                    else:
-                        # 忽略不支持的类型
-                        print(f"[PatchService] Unsupported value type for action: {type(value)}")
-                        return
-
-                    # 替换 action
-                    schema.actions[action_index] = new_action
-
-                    print(f"[PatchService] Replaced action at actions[{action_index}]: {getattr(new_action, 'id', 'unknown')}")
-                else:
-                    print(f"[PatchService] Action index {action_index} out of range (total: {len(schema.actions)})")
-            except (ValueError, AttributeError, IndexError) as e:
-                print(f"[PatchService] Error applying set operation for path '{path}': {e}")
-
-        # 路径格式：state.params.key 或 state.runtime.key
-        elif len(keys) >= 3 and keys[0] == 'state':
-            target_section = keys[1]  # 'params' 或 'runtime'
-            target_key = keys[2]         # 具体键名
-
-            # 确保字典存在
-            if target_section == 'params':
-                if schema.state.params is None:
-                    schema.state.params = {}
-                schema.state.params[target_key] = value
-            elif target_section == 'runtime':
-                if schema.state.runtime is None:
-                    schema.state.runtime = {}
-                schema.state.runtime[target_key] = value
-
-        # 路径格式：layout - 替换整个 layout 对象
-        elif len(keys) == 1 and keys[0] == 'layout':
-            print(f"[PatchService] 匹配到 layout 路径（替换整个对象）")
-            try:
-                if isinstance(value, dict):
-                    new_layout = LayoutInfo(**value)
-                elif isinstance(value, LayoutInfo):
-                    new_layout = value
-                else:
-                    print(f"[PatchService] Unsupported value type for layout: {type(value)}")
-                    return
-
-                schema.layout = new_layout
-                print(f"[PatchService] Replaced layout: type={new_layout.type}, columns={new_layout.columns}, gap={new_layout.gap}")
-            except (ValueError, AttributeError) as e:
-                print(f"[PatchService] Error applying set operation for path '{path}': {e}")
-
-        # 路径格式：layout.type, layout.columns, layout.gap 等
-        elif len(keys) >= 2 and keys[0] == 'layout':
-            layout_attr = keys[1]
-            try:
-                setattr(schema.layout, layout_attr, value)
-                print(f"[PatchService] Updated layout.{layout_attr} = {value}")
-            except (ValueError, AttributeError) as e:
-                print(f"[PatchService] Error applying set operation for path '{path}': {e}")
-
-        # 路径格式：blocks.X.id, blocks.X.type 等 - 修改 block 属性
-        # 注意：这个分支不处理 blocks.X.props.Y，由下一个分支处理
-        elif len(keys) >= 2 and keys[0] == 'blocks' and (len(keys) < 3 or keys[2] != 'props'):
-            block_index = int(keys[1])
-            block_attr = keys[2] if len(keys) >= 3 else None
-
-            try:
-                if block_index < len(schema.blocks):
-                    block = schema.blocks[block_index]
-
-                    if block_attr:
-                        # 修改 block 的属性（id, type 等）
-                        setattr(block, block_attr, value)
-                        print(f"[PatchService] Updated block[{block_index}].{block_attr} = {value}")
-                    else:
-                        # 替换整个 block
-                        if isinstance(value, dict):
-                            new_block = Block(**value)
-                        elif isinstance(value, Block):
-                            new_block = value
-                        else:
-                            # 忽略不支持的类型
-                            print(f"[PatchService] Unsupported value type for block: {type(value)}")
-                            return
-                        schema.blocks[block_index] = new_block
-                        print(f"[PatchService] Replaced block at blocks[{block_index}]")
-                else:
-                    print(f"[PatchService] Block index {block_index} out of range (total: {len(schema.blocks)})")
-            except (ValueError, AttributeError, IndexError) as e:
-                print(f"[PatchService] Error applying set operation for path '{path}': {e}")
-
-        # 路径格式：blocks.X.props.id, blocks.X.props.cols, blocks.X.props.tabs 等 - 修改 block props 属性
-        elif len(keys) >= 3 and keys[0] == 'blocks' and keys[2] == 'props':
-            try:
-                block_index = int(keys[1])
-                props_attr = keys[3] if len(keys) >= 4 else None
-
-                print(f"[PatchService] >>> Processing blocks.X.props path: block_index={block_index}, props_attr={props_attr}, total_blocks={len(schema.blocks)}")
-
-                if block_index < len(schema.blocks):
-                    block = schema.blocks[block_index]
-                    if hasattr(block.props, 'actions'):
-                        print(f"[PatchService] >>> Block props.actions value: {getattr(block.props, 'actions', 'NOT_SET')}")
-
-                    if hasattr(block, 'props') and block.props:
-                        if props_attr:
-                            # 特殊处理 fields 属性（整个字段数组）
-                            if props_attr == 'fields':
-                                if isinstance(value, list):
-                                    # 转换为 FieldConfig 列表
-                                    fields_list: list[FieldConfig] = []
-
-                                    # 获取旧字段列表（用于清理 state）
-                                    old_fields = getattr(block.props, 'fields', None)
-
-                                    for field_data in value:
-                                        if isinstance(field_data, dict):
-                                            new_field = parse_field_config(field_data)
-                                            fields_list.append(new_field)
-                                        else:
-                                            fields_list.append(field_data)
-
-                                    # 清理旧字段 state 并初始化新字段 state
-                                    for new_field in fields_list:
-                                        init_field_state(schema, new_field, old_fields)
-
-                                    setattr(block.props, 'fields', fields_list)
-                                else:
-                                    print(f"[PatchService] fields value must be a list, got: {type(value)}")
-                            # 特殊处理 actions 属性
-                            elif props_attr == 'actions':
-                                if isinstance(value, list):
-                                    # 转换为 ActionConfig 列表
-                                    actions_list = []
-                                    for action_data in value:
-                                        if isinstance(action_data, dict):
-                                            actions_list.append(ActionConfig(**action_data))
-                                        else:
-                                            actions_list.append(action_data)
-                                    setattr(block.props, 'actions', actions_list)
-                                    print(f"[PatchService] Updated block[{block_index}].props.actions (converted {len(actions_list)} actions)")
-                                    print(f"[PatchService] Actions after set: {getattr(block.props, 'actions', 'NOT_SET')}")
-                                else:
-                                    print(f"[PatchService] actions value must be a list, got: {type(value)}")
-                            else:
-                                # 修改 props 的属性（cols, gap, tabs, panels, title 等）
-                                setattr(block.props, props_attr, value)
-                                print(f"[PatchService] Updated block[{block_index}].props.{props_attr} = {value}")
-                        else:
-                            # 替换整个 props
-                            if isinstance(value, dict):
-                                # 确保 fields 中的表格字段有 columns
-                                if 'fields' in value and isinstance(value['fields'], list):
-                                    for field in value['fields']:
-                                        if isinstance(field, dict):
-                                            field_type = field.get('type', 'text')
-                                            if field_type == 'table' and ('columns' not in field or field['columns'] is None):
-                                                field['columns'] = []
-                                            elif field_type in ['select', 'radio', 'multiselect'] and ('options' not in field or field['options'] is None):
-                                                field['options'] = []
-                                new_props = BlockProps(**value)
-                            elif isinstance(value, BlockProps):
-                                new_props = value
-                            else:
-                                # 忽略不支持的类型
-                                print(f"[PatchService] Unsupported value type for props: {type(value)}")
-                                return
-                            block.props = new_props
-                            print(f"[PatchService] Replaced props at blocks[{block_index}].props")
-                else:
-                    print(f"[PatchService] Block index {block_index} out of range (total: {len(schema.blocks)})")
-            except (ValueError, AttributeError, IndexError) as e:
-                print(f"[PatchService] Error applying set operation for path '{path}': {e}")
-
-        # 路径格式：blocks.X.props.fields.Y - 替换指定索引的字段
-        elif len(keys) >= 5 and keys[0] == 'blocks' and keys[2] == 'props' and keys[3] == 'fields':
-            try:
-                block_index = int(keys[1])
-                field_index = int(keys[4])
-
-                if block_index < len(schema.blocks):
-                    block = schema.blocks[block_index]
-                    if hasattr(block, 'props') and block.props and hasattr(block.props, 'fields'):
-                        current_fields = getattr(block.props, 'fields')
-
-                        # 确保 fields 是列表
-                        if not isinstance(current_fields, list):
-                            current_fields = list(current_fields.values())
-                            setattr(block.props, 'fields', current_fields)
-
-                        # 检查 field_index 是否有效
-                        if 0 <= field_index < len(current_fields):
-                            # 如果是 dict，转换为 FieldConfig 对象
-                            if isinstance(value, dict):
-                                new_field = parse_field_config(value)
-                            else:
-                                new_field = value
-
-                            # 获取旧字段 key，用于更新 state（如果 key 改变了）
-                            old_field = current_fields[field_index]
-                            old_field_key = getattr(old_field, 'key', None)
-                            new_field_key = getattr(new_field, 'key', None)
-
-                            # 替换字段
-                            current_fields[field_index] = new_field
-
-                            # 如果 key 改变了，更新 state
-                            if old_field_key and new_field_key and old_field_key != new_field_key:
-                                # 删除旧 key 的 state
-                                if old_field_key in schema.state.params:
-                                    del schema.state.params[old_field_key]
-                                if old_field_key in schema.state.runtime:
-                                    del schema.state.runtime[old_field_key]
-                                # 添加新 key 的 state（如果不存在）
-                                if new_field_key not in schema.state.params:
-                                    schema.state.params[new_field_key] = ""
-
-                            print(f"[PatchService] Replaced field at blocks[{block_index}].props.fields[{field_index}]: {new_field_key}")
-            except (ValueError, AttributeError, IndexError) as e:
-                print(f"[PatchService] Error applying set operation for path '{path}': {e}")
-
-        # 路径格式：blocks.X.props.fields.Y.key 或 blocks.X.props.fields.Y.label 等 - 修改字段属性
-        elif len(keys) >= 6 and keys[0] == 'blocks' and keys[2] == 'props' and keys[3] == 'fields':
-            try:
-                block_index = int(keys[1])
-                field_index = int(keys[4])
-                field_attr = keys[5]
-
-                if block_index < len(schema.blocks):
-                    block = schema.blocks[block_index]
-                    if hasattr(block, 'props') and block.props and hasattr(block.props, 'fields'):
-                        current_fields = getattr(block.props, 'fields')
-
-                        # 确保 fields 是列表
-                        if not isinstance(current_fields, list):
-                            current_fields = list(current_fields.values())
-                            setattr(block.props, 'fields', current_fields)
-
-                        # 检查 field_index 是否有效
-                        if 0 <= field_index < len(current_fields):
-                            field = current_fields[field_index]
-
-                            # 如果修改的是 'key' 属性，需要更新 state
-                            if field_attr == 'key':
-                                old_key = getattr(field, 'key', None)
-                                new_key = value
-
-                                # 更新字段属性
-                                setattr(field, field_attr, new_key)
-
-                                # 更新 state（确保键是字符串）
-                                if isinstance(old_key, str) and isinstance(new_key, str) and old_key != new_key:
-                                    if old_key in (schema.state.params or {}):
-                                        (schema.state.params or {})[new_key] = (schema.state.params or {}).pop(old_key)
-                                    if old_key in (schema.state.runtime or {}):
-                                        (schema.state.runtime or {})[new_key] = (schema.state.runtime or {}).pop(old_key)
-                            else:
-                                # 修改其他属性
-                                setattr(field, field_attr, value)
-
-                            print(f"[PatchService] Updated field attribute: blocks[{block_index}].props.fields[{field_index}].{field_attr} = {value}")
-            except (ValueError, AttributeError, IndexError) as e:
-                print(f"[PatchService] Error applying set operation for path '{path}': {e}")
+            if compiled.kind == KIND_BLOCKS:
+                touched_blocks = None
+            elif compiled.kind == KIND_ACTION:
+                touched_actions = True
+            elif touched_blocks is not None and compiled.block_index is not None:
+                touched_blocks.add(compiled.block_index)
+
+        handler = _PATCH_HANDLERS.get(compiled.kind)
+        if handler is None:
+            print(f"[PatchService] 无法识别的路径，已忽略: {path}")
+            continue
+        handler(schema, compiled, value)
+        _sync_schema_index(schema, compiled)
+        # 每条路径应用后推进修订号，后续处理器渲染模板时不会命中旧结果
+        _ = schema.touch()
 
     # 如果修改了相关的内容，进行唯一性验证
     if needs_validation:
         try:
-            validate_key_uniqueness(schema, error_message="SET operation validation failed")
+            validate_touched_keys(
+                schema, touched_blocks, touched_actions,
+                error_message="SET operation validation failed"
+            )
+            if settings.strict_key_validation:
+                validate_key_uniqueness(schema, error_message="SET operation validation failed")
             print(f"[PatchService] Key uniqueness validation passed")
         except ValueError as e:
             # 验证失败，抛出异常
             print(f"[PatchService] Key uniqueness validation failed: {e}")
             raise ValueError(str(e))
-     
\ No newline at end of file
@@ -0,0 +1,195 @@
+"""路径编译器 - 将点分隔路径编译为可复用的访问器
+
+get_nested_value、模板渲染和 apply_patch_to_schema 都会对同一批路径
+（如 "state.params.name"、"blocks.0.props.fields"）反复求值。每次求值都
+split('.')、isdigit() 并逐段匹配分支的开销与路径条数成正比。
+
+本模块把路径一次性编译为 CompiledPath：
+- steps：预先解析好的访问步骤（数组下标已转换为 int）
+- kind：路径所属的处理器类别，apply_patch_to_schema 按 kind 直接分派
+- 索引/属性名等参数在编译期提取，应用 Patch 时无需再解析字符串
+
+编译结果缓存在有界 LRU 中（按路径字符串），路径集合通常很小且高度重复。
+"""
+
+from functools import lru_cache
+from typing import Any
+
+# 编译缓存容量（按不同路径字符串计）
+PATH_CACHE_SIZE = 4096
+
+# 路径类别（与 apply_patch_to_schema 的处理器一一对应）
+KIND_BLOCKS = "blocks"                  # blocks - 替换整个 blocks 数组
+KIND_BLOCK = "block"                    # blocks.X / blocks.X.attr - 替换 block 或修改 block 属性
+KIND_BLOCK_PROPS = "block_props"        # blocks.X.props / blocks.X.props.attr
+KIND_FIELD = "field"                    # blocks.X.props.fields.Y - 替换指定索引的字段
+KIND_FIELD_ATTR = "field_attr"          # blocks.X.props.fields.Y.attr - 修改字段属性
+KIND_ACTION = "action"                  # actions.X - 替换整个 action
+KIND_ACTION_PATCHES = "action_patches"  # actions.X.patches - 更新 action 的 patches
+KIND_STATE_MEMBER = "state_member"      # state.params.key / state.runtime.key
+KIND_LAYOUT = "layout"                  # layout - 替换整个 layout 对象
+KIND_LAYOUT_ATTR = "layout_attr"        # layout.type / layout.columns 等
+KIND_UNKNOWN = "unknown"                # 无法识别的路径（忽略）
+
+# 取值时未命中的哨兵
+_MISSING = object()
+
+
+class CompiledPath:
+    """已编译的路径
+
+    Attributes:
+        path: 原始路径字符串
+        keys: 按 '.' 拆分后的片段
+        steps: 访问步骤，(True, int) 表示数组下标，(False, str) 表示属性/字典键
+        kind: 路径类别（KIND_*）
+        block_index: blocks.X 中的 X
+        field_index: blocks.X.props.fields.Y 中的 Y
+        action_index: actions.X 中的 X
+        section: state.<section>.key 中的 section
+        attr: 末级属性名（block 属性、props 属性、字段属性、layout 属性或 state 键）
+        affects_keys: 修改该路径后是否需要进行 key 唯一性验证
+    """
+
+    __slots__ = (
+        "path", "keys", "steps", "kind",
+        "block_index", "field_index", "action_index",
+        "section", "attr", "affects_keys", "_state_fast",
+    )
+
+    def __init__(self, path: str) -> None:
+        self.path: str = path
+        self.keys: tuple[str, ...] = tuple(path.split('.'))
+        self.steps: tuple[tuple[bool, int | str], ...] = tuple(
+            (True, int(key)) if key.isdigit() else (False, key)
+            for key in self.keys
+        )
+        self.kind: str = KIND_UNKNOWN
+        self.block_index: int | None = None
+        self.field_index: int | None = None
+        self.action_index: int | None = None
+        self.section: str | None = None
+        self.attr: str | None = None
+        self.affects_keys: bool = False
+        self._state_fast: bool = False
+        self._classify()
+
+    def __repr__(self) -> str:
+        return f"CompiledPath({self.path!r}, kind={self.kind!r})"
+
+    def _classify(self) -> None:
+        """根据路径片段确定类别和参数
+
+        与原 apply_patch_to_schema 的 if/elif 链不同，这里先按根片段分派（blocks → actions → state → layout），
+        再在各自分支内区分层级：
+        - blocks.X.props.fields.Y(.attr) 先于 blocks.X.props 判断（原链中 props 分支在前，会先匹配这些路径）
+        - 下标不是数字的 blocks.X / actions.X 归为 KIND_UNKNOWN（忽略）；原链中 blocks.X 抛出 ValueError，actions.X 打印错误后跳过
+        - affects_keys 只对 blocks 和全局 actions（actions.N.patches 除外）为真，
+          原链对 state.params 和 actions.N.patches 也做唯一性验证
+        """
+        keys = self.keys
+        n = len(keys)
+        root = keys[0]
+
+        # 只有 blocks / 全局 actions 携带 id/key；actions.N.patches 与 state 不影响唯一性
+        self.affects_keys = root == 'blocks' or (root == 'actions' and not (n >= 3 and keys[2] == 'patches'))
+
+        if root == 'blocks':
+            if n == 1:
+                self.kind = KIND_BLOCKS
+                return
+            if not keys[1].isdigit():
+                return
+            self.block_index = int(keys[1])
+            if n < 3 or keys[2] != 'props':
+                self.kind = KIND_BLOCK
+                self.attr = keys[2] if n >= 3 else None
+                return
+            if n >= 5 and keys[3] == 'fields' and keys[4].isdigit():
+                self.field_index = int(keys[4])
+                if n == 5:
+                    self.kind = KIND_FIELD
+                else:
+                    self.kind = KIND_FIELD_ATTR
+                    self.attr = keys[5]
+                return
+            self.kind = KIND_BLOCK_PROPS
+            self.attr = keys[3] if n >= 4 else None
+            return
+
+        if root == 'actions':
+            if n >= 2 and keys[1].isdigit():
+                self.action_index = int(keys[1])
+                self.kind = KIND_ACTION_PATCHES if n >= 3 and keys[2] == 'patches' else KIND_ACTION
+            return
+
+        if root == 'state':
+            if n >= 3:
+                self.kind = KIND_STATE_MEMBER
+                self.section = keys[1]
+                self.attr = keys[2]
+                # state.<section>.<key> 且 key 不会与 dict 自身属性冲突时可直接查字典
+                self._state_fast = (
+                    n == 3 and keys[1] in ('params', 'runtime')
+                    and not keys[2].isdigit() and not hasattr(dict, keys[2])
+                )
+            return
+
+        if root == 'layout':
+            if n == 1:
+                self.kind = KIND_LAYOUT
+            else:
+                self.kind = KIND_LAYOUT_ATTR
+                self.attr = keys[1]
+
+    def get(self, obj: Any, default: Any = None) -> Any:
+        """按已编译的步骤读取值，语义与逐段解析完全一致
+
+        Args:
+            obj: 根对象（通常为 UISchema）
+            default: 路径不存在或值为 None 时返回的默认值
+
+        Returns:
+            获取到的值
+        """
+        if self._state_fast:
+            try:
+                section = getattr(obj.state, self.section)  # type: ignore[arg-type]
+            except AttributeError:
+                section = None
+            if isinstance(section, dict):
+                value = section.get(self.attr)
+                return value if value is not None else default
+
+        current: Any = obj
+        try:
+            for is_index, key in self.steps:
+                if is_index:
+                    if isinstance(current, (list, tuple)) or hasattr(current, '__getitem__'):
+                        current = current[key]
+                    else:
+                        return default
+                else:
+                    value = getattr(current, key, _MISSING)  # type: ignore[arg-type]
+                    if value is not _MISSING:
+                        current = value
+                    elif isinstance(current, dict):
+                        current = current.get(key)
+                    else:
+                        return default
+            return current if current is not None else default
+        except (AttributeError, KeyError, IndexError, TypeError):
+            return default
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def compile_path(path: str) -> CompiledPath:
+    """编译路径（带 LRU 缓存）
+
+    Args:
+        path: 点分隔路径，如 "state.params.name"
+
+    Returns:
+        CompiledPath 对象（同一路径字符串返回同一对象，调用方不得修改）
+    """
+    return CompiledPath(path)
@@ -0,0 +1,106 @@
+"""Schema 序列化缓存 - GET /ui/schema 直接返回预先编码的 JSON
+
+前端每次加载页面、切换实例都会请求 /ui/schema，而两次请求之间 schema 往往没有变化。
+缓存按实例保存最近一次序列化结果：
+- 缓存键为 (schema 修订号, 实例版本号)：修订号在任何修改后变化（UISchema.touch），
+  版本号在发布增量后变化，两者都没变时直接复用编码好的字节
+- ETag 由版本号和内容摘要组成，多个 worker 对相同内容给出相同的 ETag，
+  客户端带 If-None-Match 请求且内容未变时返回 304
+- 缓存的只是 schema 本身；每次请求都不同的值（如 runtime.timestamp）放在响应外层，不进入缓存
+"""
+
+import hashlib
+from typing import Any
+
+from pydantic_core import to_json
+
+from backend.core.manager import SchemaManager
+from ..models import UISchema
+from .table_window import TableWindowService, windowed_table_keys
+
+
+class CachedSchema:
+    """一个实例的序列化结果
+
+    Attributes:
+        revision: 序列化时的 schema 修订号
+        version: 序列化时的实例版本号
+        body: schema 的 JSON 字节（by_alias，窗口表格的数据已去掉）
+        etag: 强 ETag（带引号）
+    """
+
+    __slots__ = ("revision", "version", "body", "etag")
+
+    def __init__(self, revision: int, version: int, body: bytes) -> None:
+        self.revision: int = revision
+        self.version: int = version
+        self.body: bytes = body
+        self.etag: str = f'"v{version}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match 是否命中（支持 *、多个值和弱 ETag 前缀 W/）"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class SchemaResponseCache:
+    """按实例缓存 /ui/schema 的序列化结果
+
+    Attributes:
+        hits: 命中次数
+        misses: 重新序列化次数
+    """
+
+    def __init__(self, schema_manager: SchemaManager, table_windows: TableWindowService | None = None) -> None:
+        self.schema_manager: SchemaManager = schema_manager
+        self.table_windows: TableWindowService | None = table_windows
+        self.hits: int = 0
+        self.misses: int = 0
+        self._entries: dict[str, CachedSchema] = {}
+
+    def is_fresh(self, instance_name: str, schema: UISchema) -> bool:
+        """缓存是否对应实例当前的内容"""
+        entry = self._entries.get(instance_name)
+        return (
+            entry is not None
+            and entry.revision == schema.revision
+            and entry.version == self.schema_manager.get_version(instance_name)
+        )
+
+    def get(self, instance_name: str, schema: UISchema) -> CachedSchema:
+        """获取实例当前内容的序列化结果
+
+        Args:
+            instance_name: 实例 ID
+            schema: 实例当前的 schema（调用方已完成 state.params 与字段值的同步）
+
+        Returns:
+            CachedSchema；内容未变化时为上一次的结果
+        """
+        if self.is_fresh(instance_name, schema):
+            self.hits += 1
+            return self._entries[instance_name]
+
+        self.misses += 1
+        version = self.schema_manager.get_version(instance_name)
+        if self.table_windows is not None and windowed_table_keys(schema):
+            # 窗口模式表格的行通过 WebSocket 按订阅下发
+            document: dict[str, Any] = self.table_windows.strip_document(
+                instance_name, schema.model_dump(by_alias=True, mode='json')
+            )
+            body = to_json(document)
+        else:
+            body = schema.model_dump_json(by_alias=True).encode("utf-8")
+        entry = CachedSchema(schema.revision, version, body)
+        self._entries[instance_name] = entry
+        return entry
+
+    def discard(self, instance_name: str) -> None:
+        """丢弃实例的缓存（实例被删除时）"""
+        _ = self._entries.pop(instance_name, None)
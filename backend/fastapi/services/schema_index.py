@@ -0,0 +1,413 @@
+"""Schema 二级索引 - 按 id/key 直接定位 block、field 和 action
+
+handle_action、/ui/switch、按 id 删除 block 等操作原本需要线性扫描
+schema.blocks 及其 props.fields / props.actions。SchemaIndex 维护：
+- block id -> block 下标
+- field key -> (block 下标, field 下标)
+- 全局 action id -> actions 下标
+- (block id, action id) -> (block 下标, action 下标)
+
+同时维护 id/key 的出现次数（唯一性登记表），key 唯一性验证只需检查
+被修改的 block / action 的条目计数是否为 1，见 find_duplicate_in_blocks 等。
+
+索引挂在 UISchema 的私有属性上（get_schema_index 惰性构建），由 patch 引擎在
+add / remove / set 后按 block 粒度增量更新。为了容忍遗漏的更新：
+- 命中时校验目标位置上的对象 id 是否一致，不一致则重建后重试
+- 未命中时检查 blocks / actions 列表是否被整体替换或长度变化，变化则重建后重试
+"""
+
+from collections.abc import Iterable
+from typing import Any
+
+from ..models import UISchema, Block, ActionConfig
+
+
+def _item_id(item: Any, attr: str) -> str | None:
+    """读取模型对象或字典的 id / key"""
+    if isinstance(item, dict):
+        return item.get(attr)
+    return getattr(item, attr, None)
+
+
+def _decrement(counts: dict[str, int], key: str) -> None:
+    """计数减一，减到 0 时移除"""
+    count = counts.get(key, 0) - 1
+    if count > 0:
+        counts[key] = count
+    else:
+        _ = counts.pop(key, None)
+
+
+class SchemaIndex:
+    """Schema 二级索引（见模块说明）"""
+
+    def __init__(self, schema: UISchema) -> None:
+        self.schema: UISchema = schema
+        self.block_ids: dict[str, int] = {}
+        self.field_keys: dict[str, tuple[int, int]] = {}
+        self.action_ids: dict[str, int] = {}
+        self.block_action_ids: dict[tuple[str, str], tuple[int, int]] = {}
+        # 唯一性登记表：id/key -> 出现次数（block 内 action id 跨所有 block 计数）
+        self.block_id_counts: dict[str, int] = {}
+        self.field_key_counts: dict[str, int] = {}
+        self.block_action_id_counts: dict[str, int] = {}
+        self.action_id_counts: dict[str, int] = {}
+        # 每个 block 下标登记过的条目：(block id, field keys, action ids)，用于增量移除
+        self._block_entries: list[tuple[str | None, tuple[str, ...], tuple[str, ...]]] = []
+        # 构建时 blocks / actions 列表的标识和长度，用于发现未通知的整体替换
+        self._fingerprint: tuple[int, int, int, int] = (0, 0, 0, 0)
+        self.rebuild()
+
+    # ------------------------------------------------------------------
+    # 构建与增量更新
+    # ------------------------------------------------------------------
+
+    def _current_fingerprint(self) -> tuple[int, int, int, int]:
+        schema = self.schema
+        return (id(schema.blocks), len(schema.blocks), id(schema.actions), len(schema.actions))
+
+    def rebuild(self) -> None:
+        """全量重建索引"""
+        self.block_ids.clear()
+        self.field_keys.clear()
+        self.action_ids.clear()
+        self.block_action_ids.clear()
+        self.block_id_counts.clear()
+        self.field_key_counts.clear()
+        self.block_action_id_counts.clear()
+        self.action_id_counts.clear()
+        self._block_entries = []
+        for block_index in range(len(self.schema.blocks)):
+            self._block_entries.append((None, (), ()))
+            self._register_block(block_index)
+        for action_index in range(len(self.schema.actions)):
+            self._register_action(action_index)
+        self._fingerprint = self._current_fingerprint()
+
+    def _register_block(self, block_index: int) -> None:
+        """登记 blocks[block_index] 及其 fields / actions（首次出现优先，与线性查找一致）"""
+        block = self.schema.blocks[block_index]
+        block_id = _item_id(block, 'id')
+        field_keys: list[str] = []
+        action_ids: list[str] = []
+
+        if block_id is not None:
+            _ = self.block_ids.setdefault(block_id, block_index)
+            self.block_id_counts[block_id] = self.block_id_counts.get(block_id, 0) + 1
+
+        props = getattr(block, 'props', None)
+        if props is not None:
+            for field_index, field in enumerate(getattr(props, 'fields', None) or ()):
+                field_key = _item_id(field, 'key')
+                if field_key:
+                    field_keys.append(field_key)
+                    _ = self.field_keys.setdefault(field_key, (block_index, field_index))
+                    self.field_key_counts[field_key] = self.field_key_counts.get(field_key, 0) + 1
+            for action_index, action in enumerate(getattr(props, 'actions', None) or ()):
+                action_id = _item_id(action, 'id')
+                if action_id:
+                    action_ids.append(action_id)
+                    self.block_action_id_counts[action_id] = self.block_action_id_counts.get(action_id, 0) + 1
+                    if block_id is not None:
+                        _ = self.block_action_ids.setdefault((block_id, action_id), (block_index, action_index))
+
+        self._block_entries[block_index] = (block_id, tuple(field_keys), tuple(action_ids))
+
+    def _unregister_block(self, block_index: int) -> None:
+        """移除 blocks[block_index] 先前登记的条目（只移除仍指向该下标的条目）"""
+        block_id, field_keys, action_ids = self._block_entries[block_index]
+        if block_id is not None:
+            _decrement(self.block_id_counts, block_id)
+            if self.block_ids.get(block_id) == block_index:
+                del self.block_ids[block_id]
+        for field_key in field_keys:
+            _decrement(self.field_key_counts, field_key)
+            position = self.field_keys.get(field_key)
+            if position is not None and position[0] == block_index:
+                del self.field_keys[field_key]
+        for action_id in action_ids:
+            _decrement(self.block_action_id_counts, action_id)
+            position = self.block_action_ids.get((block_id, action_id))  # type: ignore[arg-type]
+            if position is not None and position[0] == block_index:
+                del self.block_action_ids[(block_id, action_id)]  # type: ignore[index]
+        self._block_entries[block_index] = (None, (), ())
+
+    def _register_action(self, action_index: int) -> None:
+        action_id = _item_id(self.schema.actions[action_index], 'id')
+        if action_id:
+            _ = self.action_ids.setdefault(action_id, action_index)
+            self.action_id_counts[action_id] = self.action_id_counts.get(action_id, 0) + 1
+
+    def reindex_block(self, block_index: int) -> None:
+        """blocks[block_index] 被替换或其 id / fields / actions 被修改后调用"""
+        if len(self._block_entries) != len(self.schema.blocks) or block_index >= len(self.schema.blocks):
+            self.rebuild()
+            return
+        self._unregister_block(block_index)
+        self._register_block(block_index)
+
+    def block_inserted(self, block_index: int) -> None:
+        """schema.blocks 在 block_index 处插入（含追加）了一个 block 后调用"""
+        if len(self._block_entries) + 1 != len(self.schema.blocks):
+            self.rebuild()
+            return
+        if block_index == len(self._block_entries):
+            # 追加：只需登记新 block
+            self._block_entries.append((None, (), ()))
+            self._register_block(block_index)
+        else:
+            # 中间插入：后续 block 的下标整体后移
+            for index in range(block_index, len(self._block_entries)):
+                self._unregister_block(index)
+            self._block_entries.append((None, (), ()))
+            for index in range(block_index, len(self.schema.blocks)):
+                self._register_block(index)
+        self._fingerprint = self._current_fingerprint()
+
+    def block_removed(self, block_index: int) -> None:
+        """schema.blocks 中下标为 block_index 的 block 被移除后调用"""
+        if len(self._block_entries) - 1 != len(self.schema.blocks):
+            self.rebuild()
+            return
+        # 被移除的 block 及其后的 block 下标整体前移
+        for index in range(block_index, len(self._block_entries)):
+            self._unregister_block(index)
+        _ = self._block_entries.pop()
+        for index in range(block_index, len(self.schema.blocks)):
+            self._register_block(index)
+        self._fingerprint = self._current_fingerprint()
+
+    def actions_changed(self) -> None:
+        """schema.actions 被修改（替换、追加或删除）后调用"""
+        self.action_ids.clear()
+        self.action_id_counts.clear()
+        for action_index in range(len(self.schema.actions)):
+            self._register_action(action_index)
+        self._fingerprint = self._current_fingerprint()
+
+    # ------------------------------------------------------------------
+    # 唯一性检查
+    # ------------------------------------------------------------------
+
+    def _sync_if_stale(self) -> None:
+        if self._stale() or len(self._block_entries) != len(self.schema.blocks):
+            self.rebuild()
+
+    def find_duplicate_in_blocks(self, block_indexes: Iterable[int] | None = None) -> tuple[str, str] | None:
+        """检查指定 block（默认全部）的 id、field key 和 action id 是否在整个 schema 中唯一
+
+        Args:
+            block_indexes: 被修改的 block 下标；None 表示检查全部 block
+
+        Returns:
+            第一个重复项 (类别, 值)，类别为 "block" / "field" / "action"；没有重复时返回 None
+        """
+        self._sync_if_stale()
+        if block_indexes is None:
+            for category, counts in (
+                ("block", self.block_id_counts),
+                ("field", self.field_key_counts),
+                ("action", self.block_action_id_counts),
+            ):
+                for key, count in counts.items():
+                    if count > 1:
+                        return category, key
+            return None
+
+        entries = [self._block_entries[i] for i in sorted(set(block_indexes)) if i < len(self._block_entries)]
+        for block_id, _, _ in entries:
+            if block_id is not None and self.block_id_counts.get(block_id, 0) > 1:
+                return "block", block_id
+        for _, field_keys, _ in entries:
+            for field_key in field_keys:
+                if self.field_key_counts.get(field_key, 0) > 1:
+                    return "field", field_key
+        for _, _, action_ids in entries:
+            for action_id in action_ids:
+                if self.block_action_id_counts.get(action_id, 0) > 1:
+                    return "action", action_id
+        return None
+
+    def find_duplicate_in_actions(self) -> str | None:
+        """检查全局 actions 的 id 是否唯一，返回第一个重复的 id"""
+        self._sync_if_stale()
+        for action_id, count in self.action_id_counts.items():
+            if count > 1:
+                return action_id
+        return None
+
+    def find_duplicate_for_new_blocks(self, new_blocks: Iterable[Any]) -> tuple[str, str] | None:
+        """检查即将追加的 block 是否与现有 schema 或彼此之间存在重复的 id/key
+
+        Returns:
+            第一个重复项 (类别, 值)；没有重复时返回 None
+        """
+        self._sync_if_stale()
+        seen: dict[str, set[str]] = {"block": set(), "field": set(), "action": set()}
+        existing = {"block": self.block_id_counts, "field": self.field_key_counts, "action": self.block_action_id_counts}
+        candidates: list[tuple[str, str]] = []
+        for block in new_blocks:
+            block_id = _item_id(block, 'id')
+            if block_id:
+                candidates.append(("block", block_id))
+            props = block.get('props') if isinstance(block, dict) else getattr(block, 'props', None)
+            if props is None:
+                continue
+            fields = props.get('fields') if isinstance(props, dict) else getattr(props, 'fields', None)
+            actions = props.get('actions') if isinstance(props, dict) else getattr(props, 'actions', None)
+            candidates.extend(("field", key) for key in (_item_id(f, 'key') for f in fields or ()) if key)
+            candidates.extend(("action", aid) for aid in (_item_id(a, 'id') for a in actions or ()) if aid)
+
+        # 与 validate_key_uniqueness 相同的类别顺序
+        for category in ("block", "field", "action"):
+            for candidate_category, value in candidates:
+                if candidate_category != category:
+                    continue
+                if existing[category].get(value, 0) > 0 or value in seen[category]:
+                    return category, value
+                seen[category].add(value)
+        return None
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def _stale(self) -> bool:
+        """blocks / actions 列表是否在未通知索引的情况下被整体替换或改变长度"""
+        return self._fingerprint != self._current_fingerprint()
+
+    def _valid_block(self, block_id: str, block_index: int) -> bool:
+        blocks = self.schema.blocks
+        return block_index < len(blocks) and _item_id(blocks[block_index], 'id') == block_id
+
+    def find_block_index(self, block_id: str) -> int | None:
+        """按 id 查找 block 下标"""
+        block_index = self.block_ids.get(block_id)
+        if block_index is not None:
+            if self._valid_block(block_id, block_index):
+                return block_index
+            self.rebuild()
+        elif self._stale():
+            self.rebuild()
+        else:
+            return None
+        block_index = self.block_ids.get(block_id)
+        return block_index if block_index is not None and self._valid_block(block_id, block_index) else None
+
+    def find_block(self, block_id: str) -> Block | None:
+        """按 id 查找 block"""
+        block_index = self.find_block_index(block_id)
+        return self.schema.blocks[block_index] if block_index is not None else None
+
+    def has_block(self, block_id: str) -> bool:
+        """block id 是否存在"""
+        return self.find_block_index(block_id) is not None
+
+    def _field_at(self, position: tuple[int, int]) -> Any:
+        block_index, field_index = position
+        blocks = self.schema.blocks
+        if block_index >= len(blocks):
+            return None
+        props = getattr(blocks[block_index], 'props', None)
+        fields = getattr(props, 'fields', None) if props is not None else None
+        if not isinstance(fields, list) or field_index >= len(fields):
+            return None
+        return fields[field_index]
+
+    def find_field(self, field_key: str) -> tuple[int, int] | None:
+        """按 key 查找字段位置 (block 下标, field 下标)"""
+        for attempt in range(2):
+            position = self.field_keys.get(field_key)
+            if position is not None and _item_id(self._field_at(position), 'key') == field_key:
+                return position
+            if attempt == 0 and (position is not None or self._stale()):
+                self.rebuild()
+                continue
+            return None
+        return None
+
+    def find_action_index(self, action_id: str) -> int | None:
+        """按 id 查找全局 action 的下标"""
+        for attempt in range(2):
+            action_index = self.action_ids.get(action_id)
+            if action_index is not None and _item_id(self._action_at(action_index), 'id') == action_id:
+                return action_index
+            if attempt == 0 and (action_index is not None or self._stale()):
+                self.rebuild()
+                continue
+            return None
+        return None
+
+    def _action_at(self, action_index: int) -> ActionConfig | None:
+        actions = self.schema.actions
+        return actions[action_index] if action_index < len(actions) else None
+
+    def _block_action_at(self, position: tuple[int, int]) -> ActionConfig | None:
+        block_index, action_index = position
+        blocks = self.schema.blocks
+        if block_index >= len(blocks):
+            return None
+        props = getattr(blocks[block_index], 'props', None)
+        actions = getattr(props, 'actions', None) if props is not None else None
+        if not actions or action_index >= len(actions):
+            return None
+        return actions[action_index]
+
+    def find_action(self, action_id: str, block_id: str | None = None) -> ActionConfig | None:
+        """查找 action：指定 block_id 时只在该 block 内查找，否则在全局 actions 中查找"""
+        if block_id is None:
+            action_index = self.find_action_index(action_id)
+            return self.schema.actions[action_index] if action_index is not None else None
+
+        for attempt in range(2):
+            position = self.block_action_ids.get((block_id, action_id))
+            if position is not None and self._valid_block(block_id, position[0]):
+                action = self._block_action_at(position)
+                if action is not None and _item_id(action, 'id') == action_id:
+                    return action
+            if attempt == 0 and (position is not None or self._stale()):
+                self.rebuild()
+                continue
+            return None
+        return None
+
+    def list_block_ids(self) -> list[str]:
+        """按顺序列出所有 block id"""
+        if self._stale():
+            self.rebuild()
+        return [block_id for block_id, _, _ in self._block_entries if block_id is not None]
+
+    def list_action_ids(self) -> list[str]:
+        """列出所有 action（全局 id 以及 "block_id.action_id" 形式的 block 内 action）"""
+        if self._stale():
+            self.rebuild()
+        result: list[str] = [action_id for action_id in (_item_id(a, 'id') for a in self.schema.actions) if action_id]
+        for block_id, _, action_ids in self._block_entries:
+            result.extend(f"{block_id}.{action_id}" for action_id in action_ids)
+        return result
+
+
+def get_schema_index(schema: UISchema) -> SchemaIndex:
+    """获取 schema 的二级索引（首次访问时构建）
+
+    Args:
+        schema: 目标 schema
+
+    Returns:
+        与该 schema 绑定的 SchemaIndex
+    """
+    private = schema.__pydantic_private__
+    index = private.get('_index')  # type: ignore[union-attr]
+    if index is None or index.schema is not schema:
+        # 首次访问，或 schema 经 model_copy 复制后私有属性仍指向原 schema
+        index = SchemaIndex(schema)
+        private['_index'] = index  # type: ignore[index]
+    return index
+
+
+def peek_schema_index(schema: UISchema) -> SchemaIndex | None:
+    """获取已构建的索引，尚未构建时返回 None（供 patch 引擎增量更新使用，不触发构建）"""
+    index = schema.__pydantic_private__.get('_index')  # type: ignore[union-attr]
+    if index is None or index.schema is not schema:
+        return None
+    return index
@@ -0,0 +1,167 @@
+"""Schema 同步服务 - 负责将 Schema 变更以版本化增量推送给前端"""
+
+from collections.abc import Iterable
+from typing import Any
+
+from backend.core.manager import SchemaManager
+from .delta import build_delta_ops
+from .table_window import TableWindowService
+from .websocket.handlers.manager import WebSocketManager
+
+
+class SchemaSyncService:
+    """Schema 同步服务
+
+    协议：
+    - 每次发布变更时实例版本号 +1，推送 {"type": "patch", "baseVersion", "version", "ops"}
+    - 客户端本地版本等于 baseVersion 时直接应用 ops，否则发送 {"type": "resync"}
+    - 收到 resync 后服务端只向该连接回复完整快照 {"type": "schema_update", "version", "schema"}
+    - 客户端重连时携带 last_seen_version（或 last_patch_id），服务端只补发缺失的增量，
+      缺失的增量已超出保留窗口时才发送完整快照（见 resume_messages）
+    - 窗口模式表格的数据不随快照和增量下发，改为按订阅推送可见的行（见 table_window.py）
+    """
+
+    def __init__(
+        self,
+        schema_manager: SchemaManager,
+        ws_manager: WebSocketManager,
+        table_windows: TableWindowService | None = None
+    ) -> None:
+        self.schema_manager: SchemaManager = schema_manager
+        self.ws_manager: WebSocketManager = ws_manager
+        self.table_windows: TableWindowService | None = table_windows
+        # 慢连接的发送队列溢出时以完整快照代替积压的增量
+        ws_manager.set_snapshot_provider(self.snapshot_message)
+
+    def snapshot_message(
+        self,
+        instance_name: str,
+        highlight: dict[str, Any] | None = None
+    ) -> dict[str, Any] | None:
+        """构造完整快照消息
+
+        Args:
+            instance_name: 实例 ID
+            highlight: 高亮提示信息
+
+        Returns:
+            schema_update 消息；实例不存在时返回 None
+        """
+        schema = self.schema_manager.get(instance_name)
+        if not schema:
+            return None
+
+        document = schema.model_dump(by_alias=True, mode='json')
+        if self.table_windows is not None:
+            document = self.table_windows.strip_document(instance_name, document)
+        return {
+            "type": "schema_update",
+            "instance_name": instance_name,
+            "version": self.schema_manager.get_version(instance_name),
+            "schema": document,
+            "highlight": highlight
+        }
+
+    def resume_messages(
+        self,
+        instance_name: str,
+        last_seen_version: int | None = None,
+        last_patch_id: int | None = None
+    ) -> list[dict[str, Any]]:
+        """构造断线重连时需要补发的消息
+
+        Args:
+            instance_name: 实例 ID
+            last_seen_version: 客户端已有的版本号
+            last_patch_id: 客户端最后收到的 Patch ID
+
+        Returns:
+            缺失增量对应的 patch 消息；已是最新版本时为空列表；无法补发时为一条完整快照
+        """
+        if last_seen_version is None and last_patch_id is None:
+            return []
+        records = self.schema_manager.deltas_since(instance_name, last_seen_version, last_patch_id)
+        if records is None:
+            snapshot = self.snapshot_message(instance_name)
+            return [snapshot] if snapshot else []
+        return [
+            {
+                "type": "patch",
+                "instance_name": instance_name,
+                "patch_id": record.get("patch_id"),
+                "baseVersion": record["version"] - 1,
+                "version": record["version"],
+                "patch": None,
+                "ops": self._client_ops(instance_name, record["ops"]),
+                "highlight": None
+            }
+            for record in records
+        ]
+
+    def _client_ops(self, instance_name: str, ops: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """发给客户端的增量（去掉窗口表格的数据）"""
+        if self.table_windows is None:
+            return ops
+        return self.table_windows.filter_ops(instance_name, ops)[0]
+
+    async def publish(
+        self,
+        instance_name: str,
+        changed_paths: Iterable[str],
+        params_before: set[str] | None = None,
+        patch: dict[str, Any] | None = None,
+        patch_id: int | None = None,
+        highlight: dict[str, Any] | None = None,
+        immediate: bool = False
+    ) -> int:
+        """发布一次 Schema 变更
+
+        启用合并推送（ws_flush_interval_ms）时推送会在窗口结束时与同一实例的其他增量合并；
+        版本号、WAL 和断线续传记录仍然立即更新。
+
+        Args:
+            instance_name: 实例 ID
+            changed_paths: 本次修改涉及的路径
+            params_before: 修改前 state.params 的键集合
+            patch: 原始 Patch 数据（随消息下发，兼容旧客户端）
+            patch_id: Patch 历史 ID
+            highlight: 高亮提示信息
+            immediate: 立即推送（延迟敏感的修改，如按钮点击的结果）
+
+        Returns:
+            发布后的版本号；没有可发布的变更时返回当前版本号
+        """
+        schema = self.schema_manager.get(instance_name)
+        if not schema:
+            return self.schema_manager.get_version(instance_name)
+
+        ops = build_delta_ops(schema, changed_paths, params_before)
+        if not ops:
+            return self.schema_manager.get_version(instance_name)
+
+        base_version = self.schema_manager.get_version(instance_name)
+        version = self.schema_manager.bump_version(instance_name)
+        print(f"[SchemaSync] 发布实例 '{instance_name}' 增量: v{base_version} -> v{version}, ops={len(ops)}")
+
+        # 启用持久化时先等待增量落盘（组提交，并发的发布共用一次 fsync）
+        durable = self.schema_manager.log_delta(instance_name, version, ops, patch_id)
+        if durable is not None:
+            _ = await durable
+
+        # 窗口表格的数据只推送给订阅了可见行的连接
+        client_ops, windowed = ops, set[str]()
+        if self.table_windows is not None:
+            client_ops, windowed = self.table_windows.filter_ops(instance_name, ops)
+            if windowed and patch is not None:
+                patch = {
+                    key: value for key, value in patch.items()
+                    if key.split(":", 1)[-1].removeprefix("state.params.") not in windowed
+                }
+
+        _ = await self.ws_manager.send_delta(
+            instance_name, client_ops, version, base_version,
+            patch=patch, patch_id=patch_id, highlight=highlight, immediate=immediate
+        )
+        if windowed and self.table_windows is not None:
+            _ = self.table_windows.notify(instance_name, windowed)
+        return version
@@ -0,0 +1,318 @@
+"""服务端窗口表格 - 大表格的数据只保留在服务端，客户端只接收可见的行
+
+tasks、dynamic_users 这类表格数据存放在 state.params 中，原本每次 Schema 快照和
+每次列表修改（append_to_list / update_list_item / remove_from_list 等）都会下发整个列表。
+TableFieldConfig.server_window 为 True 的表格改为窗口模式：
+- 发给客户端的 Schema 快照和增量中，该表格对应的 state.params 值替换为空列表
+  （WAL、多 worker 复制和断线续传记录仍然保存完整数据）
+- 客户端按连接订阅行区间和排序：{"type": "table_subscribe", "fieldKey", "offset", "limit", "sortBy", "sortOrder"}，
+  服务端回复当前窗口 {"type": "table_window", "total", "rows", ...}
+- 列表被修改后（整体替换或元素级增量），服务端为每个订阅重新计算窗口，只发送变化的行
+  {"type": "table_rows", "total", "length", "rows": [{"index": 窗口内下标, "row": 行数据}]}
+"""
+
+from collections.abc import Iterable
+from typing import Any
+
+from fastapi import WebSocket
+from pydantic_core import to_jsonable_python
+
+from backend.core.manager import SchemaManager
+from ..models import UISchema
+from .websocket.handlers.manager import WebSocketManager
+
+# 单个窗口的最大行数
+MAX_WINDOW_ROWS = 500
+
+_PARAMS_POINTER = "/state/params/"
+
+
+def _attr(item: Any, name: str, alias: str | None = None) -> Any:
+    """读取模型对象或字典的属性（字典同时尝试别名）"""
+    if isinstance(item, dict):
+        if name in item:
+            return item[name]
+        return item.get(alias) if alias else None
+    return getattr(item, name, None)
+
+
+def windowed_table_keys(schema: UISchema) -> set[str]:
+    """找出 Schema 中所有启用窗口模式的表格字段 key（包括嵌套在组件字段中的 block）"""
+    keys: set[str] = set()
+    pending: list[Any] = list(schema.blocks)
+    while pending:
+        block = pending.pop()
+        props = _attr(block, "props")
+        for field in (_attr(props, "fields") or []) if props is not None else []:
+            field_type = _attr(field, "type")
+            if field_type == "table" and _attr(field, "server_window", "serverWindow"):
+                key = _attr(field, "key")
+                if isinstance(key, str):
+                    keys.add(key)
+            nested = _attr(field, "block_config", "blockConfig")
+            if nested is not None:
+                pending.append(nested)
+    return keys
+
+
+def _sort_value(value: Any) -> tuple[int, Any]:
+    """排序键：数字、字符串、其他类型分组，避免不同类型之间无法比较"""
+    if isinstance(value, bool) or value is None:
+        return (2, str(value))
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, str):
+        return (1, value)
+    return (2, str(value))
+
+
+class _Window:
+    """一个连接对一个表格的订阅及最近一次发送的行"""
+
+    __slots__ = ("offset", "limit", "sort_by", "descending", "total", "rows")
+
+    def __init__(self, offset: int, limit: int, sort_by: str | None, descending: bool) -> None:
+        self.offset: int = offset
+        self.limit: int = limit
+        self.sort_by: str | None = sort_by
+        self.descending: bool = descending
+        self.total: int = 0
+        self.rows: list[Any] = []
+
+
+class TableWindowService:
+    """管理窗口表格的订阅，并在列表修改后推送行级增量
+
+    Attributes:
+        row_messages: 已发送的 table_rows 消息数
+    """
+
+    def __init__(self, schema_manager: SchemaManager, ws_manager: WebSocketManager) -> None:
+        self.schema_manager: SchemaManager = schema_manager
+        self.ws_manager: WebSocketManager = ws_manager
+        self.row_messages: int = 0
+        # 实例 ID -> 连接 -> 表格字段 key -> 窗口
+        self._windows: dict[str, dict[WebSocket, dict[str, _Window]]] = {}
+
+    def subscribe(
+        self,
+        websocket: WebSocket,
+        instance_name: str,
+        field_key: str,
+        offset: int = 0,
+        limit: int = 20,
+        sort_by: str | None = None,
+        sort_order: str = "asc"
+    ) -> dict[str, Any]:
+        """订阅（或调整）表格窗口
+
+        Args:
+            websocket: 连接
+            instance_name: 连接所属实例
+            field_key: 表格字段 key（数据位于 state.params.<field_key>）
+            offset: 起始行（排序之后）
+            limit: 行数（上限 MAX_WINDOW_ROWS）
+            sort_by: 排序列，None 表示保持列表原有顺序
+            sort_order: asc / desc
+
+        Returns:
+            需要回复给该连接的 table_window 消息
+        """
+        rows = self._rows(instance_name, field_key)
+        if rows is None:
+            return {
+                "type": "table_window",
+                "instance_name": instance_name,
+                "fieldKey": field_key,
+                "error": f"state.params.{field_key} 不是列表"
+            }
+        window = _Window(max(0, offset), max(1, min(limit, MAX_WINDOW_ROWS)), sort_by, sort_order == "desc")
+        self._fill(window, self._ordered(rows, window.sort_by, window.descending))
+        self._windows.setdefault(instance_name, {}).setdefault(websocket, {})[field_key] = window
+        return {
+            "type": "table_window",
+            "instance_name": instance_name,
+            "fieldKey": field_key,
+            "offset": window.offset,
+            "limit": window.limit,
+            "sortBy": window.sort_by,
+            "sortOrder": "desc" if window.descending else "asc",
+            "total": window.total,
+            "rows": window.rows,
+            "version": self.schema_manager.get_version(instance_name)
+        }
+
+    def unsubscribe(self, websocket: WebSocket, instance_name: str, field_key: str | None = None) -> None:
+        """取消订阅
+
+        Args:
+            websocket: 连接
+            instance_name: 连接所属实例
+            field_key: 表格字段 key，None 表示该连接的所有订阅（连接断开时）
+        """
+        connections = self._windows.get(instance_name)
+        if connections is None or websocket not in connections:
+            return
+        if field_key is None:
+            del connections[websocket]
+        else:
+            _ = connections[websocket].pop(field_key, None)
+            if not connections[websocket]:
+                del connections[websocket]
+        if not connections:
+            del self._windows[instance_name]
+
+    def strip_document(self, instance_name: str, document: dict[str, Any]) -> dict[str, Any]:
+        """把发给客户端的 Schema 文档中窗口表格的数据替换为空列表（原地修改）
+
+        Args:
+            instance_name: 实例 ID
+            document: model_dump(by_alias=True) 得到的 Schema 文档
+
+        Returns:
+            document 本身
+        """
+        schema = self.schema_manager.get(instance_name)
+        params = (document.get("state") or {}).get("params")
+        if schema is None or not isinstance(params, dict):
+            return document
+        for key in windowed_table_keys(schema):
+            if key in params:
+                params[key] = []
+        return document
+
+    def filter_ops(self, instance_name: str, ops: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], set[str]]:
+        """去掉增量中窗口表格的数据
+
+        Args:
+            instance_name: 实例 ID
+            ops: 完整的增量操作列表
+
+        Returns:
+            (发给客户端的增量操作列表, 被修改的窗口表格 key)
+        """
+        schema = self.schema_manager.get(instance_name)
+        keys = windowed_table_keys(schema) if schema is not None else set()
+        if not keys:
+            return ops, set()
+        filtered: list[dict[str, Any]] = []
+        changed: set[str] = set()
+        for op in ops:
+            path: str = op.get("path", "")
+            key, _, element = path[len(_PARAMS_POINTER):].partition("/") if path.startswith(_PARAMS_POINTER) else ("", "", "")
+            if key in keys:
+                changed.add(key)
+                # 删除整个键不携带数据，照常下发；元素级增量（/state/params/<key>/<index>）不下发
+                if op.get("op") == "remove" and not element:
+                    filtered.append(op)
+                continue
+            if path in ("/state", "/state/params") and isinstance(op.get("value"), dict):
+                value = dict(op["value"])
+                params = value.get("params") if path == "/state" else value
+                if isinstance(params, dict):
+                    params = {k: ([] if k in keys else v) for k, v in params.items()}
+                    changed.update(keys & params.keys())
+                    if path == "/state":
+                        value["params"] = params
+                    else:
+                        value = params
+                op = {**op, "value": value}
+            filtered.append(op)
+        return filtered, changed
+
+    def notify(self, instance_name: str, field_keys: Iterable[str]) -> int:
+        """列表被修改后向订阅者推送变化的行
+
+        Args:
+            instance_name: 实例 ID
+            field_keys: 被修改的表格字段 key
+
+        Returns:
+            发送的 table_rows 消息数
+        """
+        connections = self._windows.get(instance_name)
+        if not connections:
+            return 0
+        keys = set(field_keys)
+        version = self.schema_manager.get_version(instance_name)
+        # 同一次修改中相同排序的订阅共用一次排序结果
+        ordered_cache: dict[tuple[str, str | None, bool], list[Any] | None] = {}
+        sent = 0
+        for websocket, windows in list(connections.items()):
+            for field_key, window in windows.items():
+                if field_key not in keys:
+                    continue
+                cache_key = (field_key, window.sort_by, window.descending)
+                if cache_key not in ordered_cache:
+                    rows = self._rows(instance_name, field_key)
+                    ordered_cache[cache_key] = None if rows is None else self._ordered(rows, window.sort_by, window.descending)
+                ordered = ordered_cache[cache_key]
+                message = self._diff(instance_name, field_key, window, ordered or [], version)
+                if message is not None:
+                    _ = self.ws_manager.send_to_connection(websocket, message)
+                    sent += 1
+        self.row_messages += sent
+        return sent
+
+    def notify_ops(self, instance_name: str, ops: list[dict[str, Any]] | None) -> int:
+        """按一条增量（如其他节点复制来的记录）推送变化的行，ops 为 None 表示整体替换"""
+        if instance_name not in self._windows:
+            return 0
+        schema = self.schema_manager.get(instance_name)
+        if schema is None:
+            return 0
+        if ops is None:
+            return self.notify(instance_name, windowed_table_keys(schema))
+        _, changed = self.filter_ops(instance_name, ops)
+        return self.notify(instance_name, changed)
+
+    def _rows(self, instance_name: str, field_key: str) -> list[Any] | None:
+        schema = self.schema_manager.get(instance_name)
+        if schema is None:
+            return None
+        rows = schema.state.params.get(field_key)
+        return rows if isinstance(rows, list) else None
+
+    @staticmethod
+    def _ordered(rows: list[Any], sort_by: str | None, descending: bool) -> list[Any]:
+        if sort_by is None:
+            return rows[::-1] if descending else rows
+        return sorted(
+            rows,
+            key=lambda row: _sort_value(row.get(sort_by) if isinstance(row, dict) else None),
+            reverse=descending
+        )
+
+    @staticmethod
+    def _fill(window: _Window, ordered: list[Any]) -> None:
+        window.total = len(ordered)
+        window.rows = to_jsonable_python(ordered[window.offset:window.offset + window.limit], by_alias=True)
+
+    def _diff(
+        self,
+        instance_name: str,
+        field_key: str,
+        window: _Window,
+        ordered: list[Any],
+        version: int
+    ) -> dict[str, Any] | None:
+        """重新计算窗口并与上次发送的行比较，没有变化时返回 None"""
+        previous_total, previous_rows = window.total, window.rows
+        self._fill(window, ordered)
+        changed = [
+            {"index": index, "row": row}
+            for index, row in enumerate(window.rows)
+            if index >= len(previous_rows) or previous_rows[index] != row
+        ]
+        if not changed and window.total == previous_total and len(window.rows) == len(previous_rows):
+            return None
+        return {
+            "type": "table_rows",
+            "instance_name": instance_name,
+            "fieldKey": field_key,
+            "offset": window.offset,
+            "total": window.total,
+            "length": len(window.rows),
+            "rows": changed,
+            "version": version
+        }
@@ -0,0 +1,227 @@
+"""模板编译器 - 将 ${...} 模板编译为可复用的渲染对象
+
+action 点击时 render_template / render_dict_template 等会对同一批模板
+（如 append_to_list 的 value 模板）反复渲染。编译后：
+- 字符串模板拆分为「字面量片段 + 路径访问器」，渲染时不再做正则匹配
+- 字典模板预先展开为节点树，渲染时不再判断每个值的类型
+- 字符串模板按 schema 修订号（UISchema.revision）缓存最近一次渲染结果，
+  schema 未修改时重复渲染直接返回
+
+缓存：
+- 字符串模板按字符串值缓存（LRU）
+- 字典模板按对象标识缓存（LRU，缓存项持有模板引用以保证 id 不被复用）。
+  模板字典来自 action 配置 / Patch 值，修改时整体替换而不是原地修改；
+  原地修改模板字典后需调用 clear_template_cache()
+"""
+
+import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any
+
+from ..models import UISchema
+from .path_accessor import CompiledPath, compile_path
+
+# 字符串模板缓存容量（按不同模板字符串计）
+TEMPLATE_CACHE_SIZE = 4096
+# 字典模板缓存容量（按不同模板对象计）
+STRUCTURE_CACHE_SIZE = 1024
+
+# 渲染模式（对应 render_dict_template / render_block_template / render_field_template）
+MODE_DICT = "dict"
+MODE_BLOCK = "block"
+MODE_FIELD = "field"
+
+# 匹配 ${path} 格式的占位符
+_PLACEHOLDER_PATTERN = re.compile(r'\$\{([^}]+)\}')
+
+# 节点类型
+_NODE_LITERAL = 0
+_NODE_TEMPLATE = 1
+_NODE_DICT = 2
+_NODE_LIST = 3
+
+_NO_MEMO: tuple[int, str] = (-1, "")
+
+
+class CompiledTemplate:
+    """已编译的字符串模板
+
+    Attributes:
+        template: 原始模板字符串
+        parts: 字面量字符串与 CompiledPath 交替组成的片段
+        is_static: 模板中没有占位符
+    """
+
+    __slots__ = ("template", "parts", "is_static", "_memo")
+
+    def __init__(self, template: str) -> None:
+        self.template: str = template
+        parts: list[str | CompiledPath] = []
+        last = 0
+        for match in _PLACEHOLDER_PATTERN.finditer(template):
+            if match.start() > last:
+                parts.append(template[last:match.start()])
+            parts.append(compile_path(match.group(1)))
+            last = match.end()
+        if last < len(template):
+            parts.append(template[last:])
+        self.parts: tuple[str | CompiledPath, ...] = tuple(parts)
+        self.is_static: bool = not any(isinstance(part, CompiledPath) for part in parts)
+        # (schema 修订号, 渲染结果)
+        self._memo: tuple[int, str] = _NO_MEMO
+
+    def __repr__(self) -> str:
+        return f"CompiledTemplate({self.template!r})"
+
+    def render(self, schema: UISchema) -> str:
+        """渲染模板
+
+        Args:
+            schema: 当前 schema
+
+        Returns:
+            渲染后的字符串（占位符取不到值时替换为空字符串）
+        """
+        if self.is_static:
+            return self.template
+
+        revision = schema.revision
+        memo = self._memo
+        if memo[0] == revision:
+            return memo[1]
+
+        result = "".join(
+            part if isinstance(part, str) else str(part.get(schema, ""))
+            for part in self.parts
+        )
+        self._memo = (revision, result)
+        return result
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def compile_template(template: str) -> CompiledTemplate:
+    """编译字符串模板（带 LRU 缓存）
+
+    Args:
+        template: 模板字符串，如 "表单已提交！姓名: ${state.params.name}"
+
+    Returns:
+        CompiledTemplate 对象
+    """
+    return CompiledTemplate(template)
+
+
+def _compile_value(value: Any) -> tuple[int, Any]:
+    """编译 render_dict_template 语义下的单个值"""
+    if isinstance(value, str):
+        return (_NODE_TEMPLATE, compile_template(value))
+    if isinstance(value, dict):
+        return (_NODE_DICT, _compile_dict(value, MODE_DICT))
+    if isinstance(value, list):
+        return (_NODE_LIST, tuple(
+            (_NODE_TEMPLATE, compile_template(item)) if isinstance(item, str)
+            else (_NODE_DICT, _compile_dict(item, MODE_DICT)) if isinstance(item, dict)
+            else (_NODE_LITERAL, item)
+            for item in value
+        ))
+    return (_NODE_LITERAL, value)
+
+
+def _compile_dict(template_dict: dict[str, Any], mode: str) -> tuple[tuple[str, tuple[int, Any]], ...]:
+    """按渲染模式编译字典模板为 (key, 节点) 序列"""
+    entries: list[tuple[str, tuple[int, Any]]] = []
+    for key, value in template_dict.items():
+        if mode != MODE_DICT and key == "value":
+            # field 的 value 不渲染，保留模板表达式
+            entries.append((key, (_NODE_LITERAL, value)))
+        elif mode == MODE_BLOCK and isinstance(value, dict):
+            if key == "fields":
+                # 与 render_block_template 一致：对 dict 形式的 fields 逐项保留
+                entries.append((key, (_NODE_LIST, tuple(
+                    (_NODE_DICT, _compile_dict(field, MODE_FIELD)) if isinstance(field, dict)
+                    else (_NODE_LITERAL, field)
+                    for field in value
+                ))))
+            else:
+                entries.append((key, (_NODE_DICT, _compile_dict(value, MODE_DICT))))
+        elif mode == MODE_BLOCK and isinstance(value, list):
+            entries.append((key, (_NODE_LIST, tuple(
+                (_NODE_DICT, _compile_dict(item, MODE_BLOCK)) if isinstance(item, dict)
+                else (_NODE_TEMPLATE, compile_template(item)) if isinstance(item, str)
+                else (_NODE_LITERAL, item)
+                for item in value
+            ))))
+        else:
+            entries.append((key, _compile_value(value)))
+    return tuple(entries)
+
+
+def _render_node(node: tuple[int, Any], schema: UISchema) -> Any:
+    """渲染单个节点"""
+    kind, payload = node
+    if kind == _NODE_TEMPLATE:
+        return payload.render(schema)
+    if kind == _NODE_DICT:
+        return {key: _render_node(child, schema) for key, child in payload}
+    if kind == _NODE_LIST:
+        return [_render_node(child, schema) for child in payload]
+    return payload
+
+
+class CompiledStructure:
+    """已编译的字典模板
+
+    每次 render 都返回新的字典/列表（调用方可以安全地修改结果），
+    非模板的叶子值与原模板共享同一对象，与逐层递归渲染的行为一致。
+    """
+
+    __slots__ = ("mode", "entries")
+
+    def __init__(self, template_dict: dict[str, Any], mode: str) -> None:
+        self.mode: str = mode
+        self.entries: tuple[tuple[str, tuple[int, Any]], ...] = _compile_dict(template_dict, mode)
+
+    def render(self, schema: UISchema) -> dict[str, Any]:
+        """渲染字典模板
+
+        Args:
+            schema: 当前 schema
+
+        Returns:
+            渲染后的新字典
+        """
+        return {key: _render_node(node, schema) for key, node in self.entries}
+
+
+# (id(模板字典), 模式) -> (模板字典, 编译结果)
+_structure_cache: "OrderedDict[tuple[int, str], tuple[dict[str, Any], CompiledStructure]]" = OrderedDict()
+
+
+def compile_structure(template_dict: dict[str, Any], mode: str = MODE_DICT) -> CompiledStructure:
+    """编译字典模板（按对象标识缓存）
+
+    Args:
+        template_dict: 包含模板的字典
+        mode: 渲染模式（MODE_DICT / MODE_BLOCK / MODE_FIELD）
+
+    Returns:
+        CompiledStructure 对象
+    """
+    cache_key = (id(template_dict), mode)
+    entry = _structure_cache.get(cache_key)
+    if entry is not None and entry[0] is template_dict:
+        _structure_cache.move_to_end(cache_key)
+        return entry[1]
+
+    compiled = CompiledStructure(template_dict, mode)
+    _structure_cache[cache_key] = (template_dict, compiled)
+    if len(_structure_cache) > STRUCTURE_CACHE_SIZE:
+        _ = _structure_cache.popitem(last=False)
+    return compiled
+
+
+def clear_template_cache() -> None:
+    """清空模板编译缓存"""
+    compile_template.cache_clear()
+    _structure_cache.clear()
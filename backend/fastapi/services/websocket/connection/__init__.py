@@ -2,5 +2,6 @@
 
 from .pool import ConnectionPool
 from .monitor import ConnectionMonitor
+from .outbox import ConnectionOutbox, SLOW_CONSUMER_POLICIES
 
-__all__ = ["ConnectionPool", "ConnectionMonitor"]
\ No newline at end of file
+__all__ = ["ConnectionPool", "ConnectionMonitor", "ConnectionOutbox", "SLOW_CONSUMER_POLICIES"]
\ No newline at end of file
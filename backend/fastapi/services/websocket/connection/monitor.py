@@ -1,16 +1,96 @@
-"""WebSocket 连接监控器 - 提供连接统计和监控功能"""
+"""WebSocket 连接监控器 - 提供连接统计、心跳和监控功能"""
 
+import asyncio
 import logging
 from .pool import ConnectionPool
+from .outbox import CLOSE_CODE_IDLE_TIMEOUT
 from typing import Any
 logger = logging.getLogger(__name__)
 
 
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    """最近秩法百分位（输入已排序且非空）"""
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
 class ConnectionMonitor:
-    """连接监控器：提供连接统计和健康检查"""
+    """连接监控器：提供连接统计、心跳探活和健康检查"""
 
     def __init__(self, connection_pool: ConnectionPool):
         self._pool = connection_pool
+        self._heartbeat_task: asyncio.Task[None] | None = None
+        # 因心跳超时被清理的连接数
+        self.reaped: int = 0
+
+    def start_heartbeat(self, interval: float, timeout: float) -> None:
+        """启动心跳任务：每 interval 秒向所有连接发送 ping，
+        超过 timeout 秒没有收到客户端任何消息（包括 pong）的连接被关闭
+
+        Args:
+            interval: 心跳间隔（秒），0 表示不启动
+            timeout: 空闲超时（秒）
+        """
+        if interval <= 0 or self._heartbeat_task is not None:
+            return
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop(interval, timeout))
+
+    async def stop_heartbeat(self) -> None:
+        """停止心跳任务"""
+        if self._heartbeat_task is None:
+            return
+        _ = self._heartbeat_task.cancel()
+        try:
+            await self._heartbeat_task
+        except asyncio.CancelledError:
+            pass
+        self._heartbeat_task = None
+
+    async def _heartbeat_loop(self, interval: float, timeout: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            _ = await self.heartbeat(timeout)
+
+    async def heartbeat(self, timeout: float) -> int:
+        """执行一轮心跳：清理超时连接，向其余连接发送 ping
+
+        Args:
+            timeout: 空闲超时（秒）
+
+        Returns:
+            本轮清理的连接数
+        """
+        reaped = 0
+        for instance_name in self._pool.get_all_instances():
+            for outbox in self._pool.get_outboxes(instance_name):
+                if outbox.idle_for() > timeout:
+                    logger.info(
+                        f"[ConnectionMonitor] 实例 '{instance_name}' 的连接 {outbox.idle_for():.1f}s 无响应，关闭连接"
+                    )
+                    await outbox.close_with_code(CLOSE_CODE_IDLE_TIMEOUT)
+                    reaped += 1
+                else:
+                    _ = outbox.ping()
+        self.reaped += reaped
+        return reaped
+
+    def get_latency_stats(self) -> dict[str, Any]:
+        """心跳往返延迟百分位（毫秒），取所有连接最近的样本"""
+        samples = sorted(
+            latency
+            for instance_name in self._pool.get_all_instances()
+            for outbox in self._pool.get_outboxes(instance_name)
+            for latency in outbox.latencies
+        )
+        if not samples:
+            return {"samples": 0, "p50": None, "p90": None, "p99": None, "max": None}
+        return {
+            "samples": len(samples),
+            "p50": round(_percentile(samples, 0.50) * 1000, 3),
+            "p90": round(_percentile(samples, 0.90) * 1000, 3),
+            "p99": round(_percentile(samples, 0.99) * 1000, 3),
+            "max": round(samples[-1] * 1000, 3),
+        }
 
     def get_stats(self) -> dict[str, Any]:
         """获取连接统计信息
@@ -22,15 +102,22 @@ class ConnectionMonitor:
         instance_stats = []
 
         for instance_name in instances:
+            outboxes = self._pool.get_outboxes(instance_name)
             instance_stats.append({
                 "instance_name": instance_name,
-                "connections": self._pool.count(instance_name)
+                "connections": self._pool.count(instance_name),
+                "queued": sum(len(outbox) for outbox in outboxes),
+                "dropped": sum(outbox.dropped for outbox in outboxes),
+                "bytes_sent": sum(outbox.bytes_sent for outbox in outboxes),
+                "messages_sent": sum(outbox.sent for outbox in outboxes)
             })
 
         return {
             "total_connections": self._pool.count_all(),
             "total_instances": len(instances),
-            "instances": instance_stats
+            "instances": instance_stats,
+            "latency_ms": self.get_latency_stats(),
+            "reaped": self.reaped
         }
 
     def get_instance_stats(self, instance_name: str) -> dict[str, Any]:
@@ -45,7 +132,8 @@ class ConnectionMonitor:
         return {
             "instance_name": instance_name,
             "connections": self._pool.count(instance_name),
-            "has_connections": self._pool.has_instance(instance_name)
+            "has_connections": self._pool.has_instance(instance_name),
+            "connection_records": [outbox.get_stats() for outbox in self._pool.get_outboxes(instance_name)]
         }
 
     def health_check(self) -> dict[str, Any]:
@@ -0,0 +1,286 @@
+"""WebSocket 发送队列 - 每个连接一个有界队列和独立的写任务
+
+发布方只把消息放入队列即可返回，由连接自己的写任务按顺序发送，
+单个慢连接不会拖慢其他连接，也不会阻塞触发修改的 HTTP 请求。
+
+队列满时的慢消费者策略：
+- snapshot：丢弃队列中的所有消息，改为在轮到发送时推送一次最新的完整快照
+- disconnect：关闭连接（客户端重连后会重新加载 Schema）
+- coalesce：把队列中连续的增量消息合并为一条（ops 顺序拼接），仍然放不下时退化为 snapshot
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+from fastapi import WebSocket
+
+from ..encoding import EncodedFrames, FORMAT_JSON
+
+logger = logging.getLogger(__name__)
+
+POLICY_SNAPSHOT = "snapshot"
+POLICY_DISCONNECT = "disconnect"
+POLICY_COALESCE = "coalesce"
+SLOW_CONSUMER_POLICIES = (POLICY_SNAPSHOT, POLICY_DISCONNECT, POLICY_COALESCE)
+
+# 关闭慢连接时使用的关闭码（1013 Try Again Later）
+CLOSE_CODE_SLOW_CONSUMER = 1013
+# 心跳超时关闭码（应用自定义 4000-4999 段）
+CLOSE_CODE_IDLE_TIMEOUT = 4000
+
+# 每个连接保留的心跳往返延迟样本数
+LATENCY_SAMPLES = 100
+
+# 队列中的占位消息：发送时生成最新快照
+_SNAPSHOT_MARKER: dict[str, Any] = {"type": "__snapshot__"}
+
+# 队列元素：(消息, 共享的编码结果)，为 None 时在发送前编码
+QueuedMessage = tuple[dict[str, Any], EncodedFrames | None]
+
+SnapshotProvider = Callable[[str], "dict[str, Any] | None"]
+
+
+def merge_patch_messages(first: dict[str, Any], second: dict[str, Any]) -> dict[str, Any] | None:
+    """合并两条相邻的版本化增量消息，无法合并时返回 None"""
+    if first.get("type") != "patch" or second.get("type") != "patch":
+        return None
+    if first.get("ops") is None or second.get("ops") is None:
+        return None
+    if first.get("version") != second.get("baseVersion"):
+        return None
+    merged_patch: dict[str, Any] | None = None
+    if first.get("patch") is not None or second.get("patch") is not None:
+        merged_patch = {**(first.get("patch") or {}), **(second.get("patch") or {})}
+    return {
+        **second,
+        "baseVersion": first.get("baseVersion"),
+        "patch": merged_patch,
+        "ops": [*first["ops"], *second["ops"]],
+        "highlight": second.get("highlight") or first.get("highlight"),
+    }
+
+
+class ConnectionOutbox:
+    """单个 WebSocket 连接的发送队列，同时记录连接的活跃信息
+
+    Attributes:
+        websocket: 连接对象
+        instance_name: 连接所属实例
+        max_size: 队列上限
+        policy: 慢消费者策略
+        wire_format: 线路格式（json / deflate / msgpack）
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        instance_name: str,
+        max_size: int = 256,
+        policy: str = POLICY_SNAPSHOT,
+        snapshot_provider: SnapshotProvider | None = None,
+        on_closed: Callable[["ConnectionOutbox"], None] | None = None,
+        wire_format: str = FORMAT_JSON
+    ) -> None:
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.websocket: WebSocket = websocket
+        self.instance_name: str = instance_name
+        self.max_size: int = max_size
+        self.policy: str = policy
+        self.wire_format: str = wire_format
+        self._snapshot_provider: SnapshotProvider | None = snapshot_provider
+        self._on_closed: Callable[["ConnectionOutbox"], None] | None = on_closed
+        self._queue: deque[QueuedMessage] = deque()
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self._closed: bool = False
+        # 已发送的快照或增量覆盖到的版本，之后不再发送版本不高于它的增量
+        self._covered_version: int = -1
+
+        # 统计信息
+        self.sent: int = 0
+        self.bytes_sent: int = 0
+        self.dropped: int = 0
+        self.overflows: int = 0
+
+        # 活跃信息：connected_at 为墙上时间，last_seen 为单调时钟（最近一次收到客户端消息）
+        self.connected_at: float = time.time()
+        self.last_seen: float = time.monotonic()
+        self.latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._ping_seq: int = 0
+        # ping 序号 -> 实际发出的时间
+        self._pings_in_flight: dict[int, float] = {}
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def start(self) -> None:
+        """启动写任务"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._writer())
+
+    def close(self) -> None:
+        """停止写任务并丢弃未发送的消息"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.clear()
+        if self._task is not None and self._task is not asyncio.current_task():
+            _ = self._task.cancel()
+        if self._on_closed is not None:
+            self._on_closed(self)
+
+    def put(self, message: dict[str, Any], frames: EncodedFrames | None = None) -> bool:
+        """放入一条消息（不等待发送）
+
+        Args:
+            message: 消息字典
+            frames: 共享的编码结果（向多个连接推送同一消息时每种格式只编码一次）
+
+        Returns:
+            连接仍然可用时返回 True
+        """
+        if self._closed:
+            return False
+        if len(self._queue) >= self.max_size:
+            self.overflows += 1
+            if not self._handle_overflow((message, frames)):
+                return False
+        else:
+            self._queue.append((message, frames))
+        self._wakeup.set()
+        return True
+
+    def _handle_overflow(self, item: QueuedMessage) -> bool:
+        """按策略处理队列溢出，返回连接是否仍然可用"""
+        if self.policy == POLICY_DISCONNECT:
+            logger.warning(
+                f"[ConnectionOutbox] 实例 '{self.instance_name}' 的连接积压 {len(self._queue)} 条消息，断开连接"
+            )
+            self.dropped += len(self._queue)
+            self._queue.clear()
+            _ = asyncio.create_task(self._close_slow_consumer())
+            return False
+
+        if self.policy == POLICY_COALESCE:
+            self._queue.append(item)
+            self._coalesce()
+            if len(self._queue) <= self.max_size:
+                return True
+
+        # snapshot（以及 coalesce 合并后仍然放不下）：用一次完整快照替换积压的消息
+        self.dropped += len(self._queue)
+        self._queue.clear()
+        self._queue.append((_SNAPSHOT_MARKER, None))
+        return True
+
+    def _coalesce(self) -> None:
+        """合并队列中相邻的增量消息"""
+        merged: deque[QueuedMessage] = deque()
+        for message, frames in self._queue:
+            if merged:
+                combined = merge_patch_messages(merged[-1][0], message)
+                if combined is not None:
+                    # 合并后的消息需要重新编码
+                    merged[-1] = (combined, None)
+                    self.dropped += 1
+                    continue
+            merged.append((message, frames))
+        self._queue = merged
+
+    async def _close_slow_consumer(self) -> None:
+        await self.close_with_code(CLOSE_CODE_SLOW_CONSUMER)
+
+    async def close_with_code(self, code: int) -> None:
+        """停止写任务并关闭底层连接"""
+        self.close()
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+    def touch(self) -> None:
+        """记录收到客户端消息"""
+        self.last_seen = time.monotonic()
+
+    def idle_for(self) -> float:
+        """距最近一次收到客户端消息的秒数"""
+        return time.monotonic() - self.last_seen
+
+    def ping(self) -> bool:
+        """放入一条心跳 ping（发出时记录时间，收到 pong 后计算往返延迟）"""
+        self._ping_seq += 1
+        return self.put({"type": "ping", "id": self._ping_seq})
+
+    def record_pong(self, ping_id: Any) -> float | None:
+        """记录 pong，返回往返延迟（秒）；未知的 ping 返回 None"""
+        self.touch()
+        sent_at = self._pings_in_flight.pop(ping_id, None) if isinstance(ping_id, int) else None
+        if sent_at is None:
+            return None
+        latency = time.monotonic() - sent_at
+        self.latencies.append(latency)
+        return latency
+
+    async def _writer(self) -> None:
+        try:
+            while not self._closed:
+                if not self._queue:
+                    self._wakeup.clear()
+                    _ = await self._wakeup.wait()
+                    continue
+                message, frames = self._queue.popleft()
+                if message is _SNAPSHOT_MARKER:
+                    snapshot = self._snapshot_provider(self.instance_name) if self._snapshot_provider else None
+                    if snapshot is None:
+                        continue
+                    message = snapshot
+                if message.get("type") == "schema_update" and isinstance(message.get("version"), int):
+                    self._covered_version = message["version"]
+                elif message.get("type") == "patch" and isinstance(message.get("version"), int):
+                    # 快照或之前补发的增量已包含该增量
+                    if message["version"] <= self._covered_version:
+                        continue
+                    self._covered_version = message["version"]
+                if frames is None or frames.message is not message:
+                    frames = EncodedFrames(message)
+                frame = frames.get(self.wire_format)
+                if message.get("type") == "ping":
+                    # 只保留最近的几个未回应 ping
+                    if len(self._pings_in_flight) >= 8:
+                        self._pings_in_flight.clear()
+                    self._pings_in_flight[message["id"]] = time.monotonic()
+                if isinstance(frame, str):
+                    await self.websocket.send_text(frame)
+                else:
+                    await self.websocket.send_bytes(frame)
+                self.sent += 1
+                self.bytes_sent += frames.size(self.wire_format)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"[ConnectionOutbox] 发送失败，关闭实例 '{self.instance_name}' 的连接: {e}")
+            self.close()
+
+    def get_stats(self) -> dict[str, Any]:
+        """获取连接记录：连接时间、活跃信息、发送统计和队列深度"""
+        return {
+            "connected_at": self.connected_at,
+            "idle_seconds": round(self.idle_for(), 3),
+            "latency_ms": round(self.latencies[-1] * 1000, 3) if self.latencies else None,
+            "queued": len(self._queue),
+            "sent": self.sent,
+            "bytes_sent": self.bytes_sent,
+            "dropped": self.dropped,
+            "overflows": self.overflows,
+            "policy": self.policy,
+            "format": self.wire_format,
+        }
@@ -3,21 +3,33 @@
 from fastapi import WebSocket
 from typing import Any
 
+from .outbox import ConnectionOutbox
+
 
 class ConnectionPool:
-    """连接池：按 instanceId 分组存储 WebSocket 连接"""
+    """连接池：按 instanceId 分组存储 WebSocket 连接，并维护主题订阅"""
 
     def __init__(self):
         self._connections: dict[str, set[WebSocket]] = {}
+        # 连接 -> 发送队列
+        self._outboxes: dict[WebSocket, ConnectionOutbox] = {}
+        # 主题 -> 订阅的连接；连接 -> 订阅的主题（用于移除连接时清理）
+        self._topics: dict[str, set[WebSocket]] = {}
+        self._subscriptions: dict[WebSocket, set[str]] = {}
 
-    def add(self, websocket: WebSocket, instance_name: str) -> None:
+    def add(self, websocket: WebSocket, instance_name: str, outbox: ConnectionOutbox | None = None) -> None:
         """添加连接到指定实例组"""
         if instance_name not in self._connections:
             self._connections[instance_name] = set()
         self._connections[instance_name].add(websocket)
+        if outbox is not None:
+            self._outboxes[websocket] = outbox
 
     def remove(self, websocket: WebSocket, instance_name: str) -> None:
         """从指定实例组移除连接"""
+        _ = self._outboxes.pop(websocket, None)
+        for topic in self._subscriptions.pop(websocket, set()):
+            self._discard_subscriber(topic, websocket)
         if instance_name in self._connections:
             self._connections[instance_name].discard(websocket)
             # 如果组为空，删除该组
@@ -28,6 +40,46 @@ class ConnectionPool:
         """获取指定实例的所有连接"""
         return self._connections.get(instance_name, set()).copy()
 
+    def subscribe(self, websocket: WebSocket, topic: str) -> None:
+        """连接订阅主题"""
+        self._topics.setdefault(topic, set()).add(websocket)
+        self._subscriptions.setdefault(websocket, set()).add(topic)
+
+    def unsubscribe(self, websocket: WebSocket, topic: str) -> None:
+        """连接取消订阅主题"""
+        self._discard_subscriber(topic, websocket)
+        topics = self._subscriptions.get(websocket)
+        if topics is not None:
+            topics.discard(topic)
+            if not topics:
+                del self._subscriptions[websocket]
+
+    def _discard_subscriber(self, topic: str, websocket: WebSocket) -> None:
+        subscribers = self._topics.get(topic)
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self._topics[topic]
+
+    def get_subscribers(self, topic: str) -> set[WebSocket]:
+        """获取订阅了主题的所有连接"""
+        return self._topics.get(topic, set()).copy()
+
+    def get_topics(self, websocket: WebSocket) -> set[str]:
+        """获取连接订阅的主题"""
+        return self._subscriptions.get(websocket, set()).copy()
+
+    def get_outbox(self, websocket: WebSocket) -> ConnectionOutbox | None:
+        """获取连接的发送队列"""
+        return self._outboxes.get(websocket)
+
+    def get_outboxes(self, instance_name: str) -> list[ConnectionOutbox]:
+        """获取指定实例所有连接的发送队列"""
+        return [
+            self._outboxes[ws] for ws in self._connections.get(instance_name, set())
+            if ws in self._outboxes
+        ]
+
     def has_instance(self, instance_name: str) -> bool:
         """检查实例是否有活跃连接"""
         return instance_name in self._connections and len(self._connections[instance_name]) > 0
@@ -47,9 +99,15 @@ class ConnectionPool:
         """
         if instance_name:
             if instance_name in self._connections:
-                del self._connections[instance_name]
+                for websocket in self._connections.pop(instance_name):
+                    _ = self._outboxes.pop(websocket, None)
+                    for topic in self._subscriptions.pop(websocket, set()):
+                        self._discard_subscriber(topic, websocket)
         else:
             self._connections.clear()
+            self._outboxes.clear()
+            self._topics.clear()
+            self._subscriptions.clear()
 
     def get_all_instances(self) -> list[Any]:
         """获取所有有连接的实例 ID 列表"""
@@ -0,0 +1,133 @@
+"""WebSocket 消息编码 - 每条消息只序列化一次
+
+向多个连接推送同一条消息时，先编码一次，再把同一个帧发给所有连接
+（WebSocket.send_json 会为每个连接重复序列化）。安装了 orjson 时使用 orjson。
+
+线路格式（连接时通过 ?format= 或子协议 ui-<format> 协商，默认 json）：
+- json：JSON 文本帧
+- deflate：raw deflate 压缩的 JSON（二进制帧，浏览器可用 DecompressionStream('deflate-raw') 解压）
+- msgpack：MessagePack 二进制帧（需要安装 msgpack）
+
+客户端发给服务端的消息（如 resync）始终为 JSON 文本。
+"""
+
+import json
+import zlib
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson 是可选依赖
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack 是可选依赖
+    msgpack = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+FORMAT_JSON = "json"
+FORMAT_DEFLATE = "deflate"
+FORMAT_MSGPACK = "msgpack"
+WIRE_FORMATS = (FORMAT_JSON, FORMAT_DEFLATE, FORMAT_MSGPACK)
+
+# 子协议名前缀：Sec-WebSocket-Protocol: ui-deflate
+SUBPROTOCOL_PREFIX = "ui-"
+
+# deflate 压缩级别（推送在事件循环中完成，取速度与压缩率的折中）
+DEFLATE_LEVEL = 6
+
+
+def encode_message(message: dict[str, Any]) -> str:
+    """把消息编码为 JSON 文本（与 WebSocket.send_json 的输出格式一致）
+
+    Args:
+        message: 消息字典
+
+    Returns:
+        紧凑格式的 JSON 文本
+    """
+    if orjson is not None:
+        return orjson.dumps(message).decode("utf-8")
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+def available_formats() -> list[str]:
+    """当前环境支持的线路格式"""
+    return [fmt for fmt in WIRE_FORMATS if fmt != FORMAT_MSGPACK or msgpack is not None]
+
+
+def negotiate_format(requested: str | None, subprotocols: list[str]) -> tuple[str, str | None] | None:
+    """协商连接的线路格式
+
+    查询参数优先；否则取客户端提供的第一个可用的 ui-<format> 子协议。
+
+    Args:
+        requested: 查询参数 format 的值
+        subprotocols: 客户端请求的子协议列表
+
+    Returns:
+        (格式, 需要回应的子协议)；请求了不支持的格式时返回 None
+    """
+    formats = available_formats()
+    accepted_subprotocol: str | None = None
+    for subprotocol in subprotocols:
+        fmt = subprotocol.removeprefix(SUBPROTOCOL_PREFIX)
+        if subprotocol.startswith(SUBPROTOCOL_PREFIX) and fmt in formats:
+            accepted_subprotocol = subprotocol
+            break
+
+    if requested:
+        if requested not in formats:
+            return None
+        # 子协议与查询参数一致时才回应子协议
+        if accepted_subprotocol != f"{SUBPROTOCOL_PREFIX}{requested}":
+            accepted_subprotocol = None
+        return requested, accepted_subprotocol
+
+    if accepted_subprotocol is not None:
+        return accepted_subprotocol.removeprefix(SUBPROTOCOL_PREFIX), accepted_subprotocol
+    return FORMAT_JSON, None
+
+
+class EncodedFrames:
+    """一条消息在各线路格式下的编码结果（按需编码，每种格式只编码一次）"""
+
+    __slots__ = ("message", "_frames", "_sizes")
+
+    def __init__(self, message: dict[str, Any], text: str | None = None) -> None:
+        self.message: dict[str, Any] = message
+        self._frames: dict[str, str | bytes] = {}
+        self._sizes: dict[str, int] = {}
+        if text is not None:
+            self._frames[FORMAT_JSON] = text
+
+    def get(self, fmt: str) -> str | bytes:
+        """获取指定格式的帧：json 为文本，其余为二进制"""
+        frame = self._frames.get(fmt)
+        if frame is None:
+            frame = self._encode(fmt)
+            self._frames[fmt] = frame
+        return frame
+
+    def size(self, fmt: str) -> int:
+        """指定格式的帧字节数（文本帧按 UTF-8 计算）"""
+        size = self._sizes.get(fmt)
+        if size is None:
+            frame = self.get(fmt)
+            size = len(frame.encode("utf-8")) if isinstance(frame, str) else len(frame)
+            self._sizes[fmt] = size
+        return size
+
+    def _encode(self, fmt: str) -> str | bytes:
+        if fmt == FORMAT_JSON:
+            return encode_message(self.message)
+        if fmt == FORMAT_DEFLATE:
+            text = self.get(FORMAT_JSON)
+            assert isinstance(text, str)
+            compressor = zlib.compressobj(DEFLATE_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+            return compressor.compress(text.encode("utf-8")) + compressor.flush()
+        if fmt == FORMAT_MSGPACK and msgpack is not None:
+            return msgpack.packb(self.message, use_bin_type=True)
+        raise ValueError(f"Unsupported wire format: {fmt}")
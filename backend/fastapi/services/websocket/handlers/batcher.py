@@ -0,0 +1,105 @@
+"""增量批量推送 - 按实例在一个时间窗口内合并版本化增量
+
+Agent 连续调用 patch_ui_state 或表格快速编辑时，每次修改都会发布一条增量，
+客户端每收到一条就重新渲染一次。批量推送的处理方式：
+- 修改仍然立即应用并记录版本（WAL、断线续传不受影响），只推迟推送
+- 同一实例在窗口（interval）内的增量合并为一条消息，baseVersion / version 覆盖合并的版本范围
+- immediate 增量连同之前积压的增量立即发送（延迟敏感的操作，如按钮点击的结果）
+- 向实例发送其他消息之前先发送积压的增量，保持消息顺序
+"""
+
+import asyncio
+from typing import Any
+
+from ..connection.outbox import merge_patch_messages
+from .dispatcher import MessageDispatcher
+
+
+class PatchBatcher:
+    """按实例合并待推送的增量消息
+
+    每个实例的积压是若干段（segment），每段是一条合并后的增量消息。
+    通常只有一段；seal 之后的增量另起一段，避免与已经单独发给某个连接的快照或补发消息部分重叠。
+
+    Attributes:
+        interval: 合并窗口（秒），0 表示不合并
+        merged: 被合并（未单独发送）的增量数
+        flushes: 发送积压的次数
+    """
+
+    def __init__(self, dispatcher: MessageDispatcher, interval: float = 0.0) -> None:
+        self._dispatcher: MessageDispatcher = dispatcher
+        self.interval: float = interval
+        self.merged: int = 0
+        self.flushes: int = 0
+        # 实例 ID -> 待发送的合并消息
+        self._pending: dict[str, list[dict[str, Any]]] = {}
+        # 下一条增量需要另起一段的实例
+        self._sealed: set[str] = set()
+        # 实例 ID -> 延迟发送任务
+        self._timers: dict[str, asyncio.Task[None]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    def pending_count(self, instance_name: str | None = None) -> int:
+        """待发送的消息段数"""
+        if instance_name is not None:
+            return len(self._pending.get(instance_name, ()))
+        return sum(len(segments) for segments in self._pending.values())
+
+    async def add(self, instance_name: str, message: dict[str, Any], immediate: bool = False) -> None:
+        """加入一条增量消息
+
+        Args:
+            instance_name: 实例 ID
+            message: 版本化增量消息
+            immediate: 是否立即发送（连同之前积压的增量）
+        """
+        segments = self._pending.setdefault(instance_name, [])
+        combined = None
+        if segments and instance_name not in self._sealed:
+            combined = merge_patch_messages(segments[-1], message)
+        if combined is not None:
+            segments[-1] = combined
+            self.merged += 1
+        else:
+            segments.append(message)
+        self._sealed.discard(instance_name)
+
+        if immediate or not self.enabled:
+            await self.flush(instance_name)
+        elif instance_name not in self._timers:
+            self._timers[instance_name] = asyncio.create_task(self._flush_later(instance_name))
+
+    def seal(self, instance_name: str) -> None:
+        """之后的增量不再合并进当前积压（已向某个连接单独发送了当前版本的快照或补发消息）"""
+        if instance_name in self._pending:
+            self._sealed.add(instance_name)
+
+    async def _flush_later(self, instance_name: str) -> None:
+        try:
+            await asyncio.sleep(self.interval)
+        except asyncio.CancelledError:
+            return
+        _ = self._timers.pop(instance_name, None)
+        await self.flush(instance_name)
+
+    async def flush(self, instance_name: str) -> None:
+        """立即发送实例积压的增量"""
+        timer = self._timers.pop(instance_name, None)
+        if timer is not None and timer is not asyncio.current_task():
+            _ = timer.cancel()
+        self._sealed.discard(instance_name)
+        segments = self._pending.pop(instance_name, None)
+        if not segments:
+            return
+        self.flushes += 1
+        for message in segments:
+            _ = await self._dispatcher.send_to_instance(instance_name, message)
+
+    async def flush_all(self) -> None:
+        """发送所有实例积压的增量（广播前、关闭应用时）"""
+        for instance_name in list(self._pending):
+            await self.flush(instance_name)
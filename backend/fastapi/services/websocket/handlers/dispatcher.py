@@ -1,46 +1,105 @@
 """WebSocket 消息分发器 - 负责向连接发送消息"""
 
 import logging
+from collections.abc import Callable
 from fastapi import WebSocket
 from typing import Any
 
 from ..connection.pool import ConnectionPool
+from ..encoding import EncodedFrames, FORMAT_JSON
 
 logger = logging.getLogger(__name__)
 
 
+def build_patch_message(
+    instance_name: str,
+    patch: dict[str, Any] | None,
+    patch_id: int | None = None,
+    base_version: int | None = None,
+    version: int | None = None,
+    ops: list[dict[str, Any]] | None = None,
+    highlight: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    """构造 Patch 消息（参数含义见 MessageDispatcher.send_patch）"""
+    return {
+        "type": "patch",
+        "instance_name": instance_name,
+        "patch_id": patch_id,
+        "baseVersion": base_version,
+        "version": version,
+        "patch": patch,
+        "ops": ops,
+        "highlight": highlight
+    }
+
+
 class MessageDispatcher:
     """消息分发器：处理向 WebSocket 连接发送消息的逻辑"""
 
     def __init__(self, connection_pool: ConnectionPool):
         self._pool = connection_pool
+        # 多 worker 部署时把推送转发给其他节点（见 services/cluster.py），参数为转发信封
+        self.relay: Callable[[dict[str, Any]], None] | None = None
+
+    def deliver_relayed(self, envelope: dict[str, Any]) -> None:
+        """投递其他节点转发来的推送（只发给本节点的连接，不再转发）
+
+        Args:
+            envelope: {"target": "instance" | "topic" | "all", "name", "message", "exclude_instance"}
+        """
+        message = envelope["message"]
+        frames = EncodedFrames(message)
+        if envelope["target"] == "topic":
+            _ = self._send_to_topic_local(envelope["name"], message, envelope.get("exclude_instance"), frames)
+            return
+        names = [envelope["name"]] if envelope["target"] == "instance" else self._pool.get_all_instances()
+        for instance_name in names:
+            self._send_to_instance_local(instance_name, message, frames)
 
     async def send_to_instance(
         self,
         instance_name: str,
         message: dict[str, Any],
-        auto_cleanup: bool = True
+        auto_cleanup: bool = True,
+        frames: EncodedFrames | None = None,
+        relay: bool = True
     ) -> bool:
         """向指定实例的所有连接发送消息
 
+        每种线路格式只编码一次，所有连接共用同一个帧；消息只放入每个连接的发送队列，
+        由连接各自的写任务发送，不等待任何连接发送完成（慢连接不会阻塞调用方和其他连接）。
+
         Args:
             instance_name: 实例 ID
             message: 要发送的消息字典
             auto_cleanup: 是否自动清理断开的连接
+            frames: 共享的编码结果（不传时在这里创建）
+            relay: 是否同时转发给其他节点
 
         Returns:
-            是否有活跃连接接收到消息
+            本节点是否有活跃连接接收到消息
         """
+        if relay and self.relay is not None:
+            self.relay({"target": "instance", "name": instance_name, "message": message})
+
         if not self._pool.has_instance(instance_name):
             logger.warning(f"[MessageDispatcher] 实例 '{instance_name}' 没有活跃连接")
             return False
 
         connections = self._pool.get_all(instance_name)
         disconnected: set[WebSocket] = set()
+        if frames is None:
+            frames = EncodedFrames(message)
 
         for websocket in connections:
+            outbox = self._pool.get_outbox(websocket)
+            if outbox is not None:
+                if not outbox.put(message, frames):
+                    disconnected.add(websocket)
+                continue
+            # 没有发送队列的连接（直接加入连接池的）仍然直接发送
             try:
-                await websocket.send_json(message)
+                await websocket.send_text(str(frames.get(FORMAT_JSON)))
                 logger.debug(f"[MessageDispatcher] 发送消息到实例 '{instance_name}': {message}")
             except Exception as e:
                 logger.error(f"[MessageDispatcher] 发送失败: {e}")
@@ -55,36 +114,96 @@ class MessageDispatcher:
 
         return self._pool.has_instance(instance_name)
 
+    def _send_to_instance_local(self, instance_name: str, message: dict[str, Any], frames: EncodedFrames) -> None:
+        """只入队到本节点连接的发送队列"""
+        for websocket in self._pool.get_all(instance_name):
+            outbox = self._pool.get_outbox(websocket)
+            if outbox is not None and not outbox.put(message, frames):
+                self._pool.remove(websocket, instance_name)
+
+    def send_to_connection(self, websocket: WebSocket, message: dict[str, Any]) -> bool:
+        """向单个连接发送消息（经由该连接的发送队列，保证与推送消息的顺序）
+
+        Args:
+            websocket: WebSocket 连接对象
+            message: 要发送的消息字典
+
+        Returns:
+            连接是否仍然可用
+        """
+        outbox = self._pool.get_outbox(websocket)
+        if outbox is None:
+            return False
+        return outbox.put(message)
+
     async def send_patch(
         self,
         instance_name: str,
-        patch: dict[str, Any],
+        patch: dict[str, Any] | None,
         patch_id: int | None = None,
-        base_version: int | None = None
+        base_version: int | None = None,
+        version: int | None = None,
+        ops: list[dict[str, Any]] | None = None,
+        highlight: dict[str, Any] | None = None
     ) -> bool:
         """发送 Patch 消息到指定实例
 
+        携带 version/ops 时即为版本化增量消息：客户端只有在本地版本等于
+        baseVersion 时才能应用 ops，否则应通过 resync 请求完整快照。
+
         Args:
             instance_name: 实例 ID
-            patch: Patch 数据
+            patch: Patch 数据（点分隔路径格式，兼容旧客户端）
             patch_id: Patch ID
-            base_version: 基础版本号
+            base_version: 基础版本号（应用本增量前客户端应处于的版本）
+            version: 应用本增量后的版本号
+            ops: RFC 6902 风格的增量操作列表
+            highlight: 高亮提示信息
 
         Returns:
             是否有活跃连接接收到消息
         """
-        message = {
-            "type": "patch",
-            "instance_name": instance_name,
-            "patch_id": patch_id,
-            "baseVersion": base_version,
-            "patch": patch
-        }
-
+        message = build_patch_message(instance_name, patch, patch_id, base_version, version, ops, highlight)
         return await self.send_to_instance(instance_name, message)
 
+    def send_to_topic(
+        self,
+        topic: str,
+        message: dict[str, Any],
+        exclude_instance: str | None = None
+    ) -> int:
+        """向订阅了主题的连接发送消息（只入队，不等待发送）
+
+        Args:
+            topic: 主题
+            message: 要发送的消息字典
+            exclude_instance: 跳过已连接到该实例的订阅者
+
+        Returns:
+            接收到消息的连接数
+        """
+        if self.relay is not None:
+            self.relay({"target": "topic", "name": topic, "message": message, "exclude_instance": exclude_instance})
+        return self._send_to_topic_local(topic, message, exclude_instance, EncodedFrames(message))
+
+    def _send_to_topic_local(
+        self,
+        topic: str,
+        message: dict[str, Any],
+        exclude_instance: str | None,
+        frames: EncodedFrames
+    ) -> int:
+        delivered = 0
+        for websocket in self._pool.get_subscribers(topic):
+            outbox = self._pool.get_outbox(websocket)
+            if outbox is None or outbox.instance_name == exclude_instance:
+                continue
+            if outbox.put(message, frames):
+                delivered += 1
+        return delivered
+
     async def broadcast(self, message: dict[str, Any]) -> int:
-        """向所有实例广播消息
+        """向所有实例广播消息（O(所有连接)，定向消息应使用 send_to_instance / send_to_topic）
 
         Args:
             message: 要广播的消息
@@ -94,9 +213,12 @@ class MessageDispatcher:
         """
         instances = self._pool.get_all_instances()
         success_count = 0
+        frames = EncodedFrames(message)
+        if self.relay is not None:
+            self.relay({"target": "all", "name": None, "message": message})
 
         for instance_name in instances:
-            result = await self.send_to_instance(instance_name, message)
+            result = await self.send_to_instance(instance_name, message, frames=frames, relay=False)
             if result:
                 success_count += 1
 
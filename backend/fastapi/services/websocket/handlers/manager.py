@@ -1,32 +1,90 @@
 """WebSocket 连接管理器 - 整合所有 WebSocket 功能"""
 
+from collections.abc import Callable
 from typing import Any
 import logging
 from fastapi import WebSocket
 from ..connection.pool import ConnectionPool
-from .dispatcher import MessageDispatcher
+from .dispatcher import MessageDispatcher, build_patch_message
+from .batcher import PatchBatcher
 from ..connection.monitor import ConnectionMonitor
+from ..connection.outbox import ConnectionOutbox, SnapshotProvider, POLICY_SNAPSHOT, SLOW_CONSUMER_POLICIES
+from ..encoding import FORMAT_JSON
 
 logger = logging.getLogger(__name__)
 
+# 控制频道：跟随 Agent 操作（切换实例、定位 block）的连接订阅该主题
+TOPIC_CONTROL = "control"
+
 
 class WebSocketManager:
-    """WebSocket 连接管理器：整合连接池、消息分发和监控功能"""
+    """WebSocket 连接管理器：整合连接池、消息分发和监控功能
+
+    Args:
+        send_queue_size: 每个连接发送队列的上限
+        slow_consumer_policy: 队列满时的处理策略（snapshot / disconnect / coalesce）
+        flush_interval: 增量合并推送的窗口（秒），0 表示每条增量立即推送
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        send_queue_size: int = 256,
+        slow_consumer_policy: str = POLICY_SNAPSHOT,
+        flush_interval: float = 0.0
+    ):
+        if slow_consumer_policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {slow_consumer_policy}")
         self._pool = ConnectionPool()
         self._dispatcher = MessageDispatcher(self._pool)
         self._monitor = ConnectionMonitor(self._pool)
+        self._batcher = PatchBatcher(self._dispatcher, flush_interval)
+        self.send_queue_size: int = send_queue_size
+        self.slow_consumer_policy: str = slow_consumer_policy
+        self._snapshot_provider: SnapshotProvider | None = None
 
-    async def connect(self, websocket: WebSocket, instance_name: str) -> None:
+    def set_snapshot_provider(self, provider: SnapshotProvider) -> None:
+        """设置快照生成函数（发送队列溢出时用完整快照代替积压的增量）
+
+        Args:
+            provider: 接收实例 ID、返回 schema_update 消息的函数
+        """
+        self._snapshot_provider = provider
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        instance_name: str,
+        wire_format: str = FORMAT_JSON,
+        subprotocol: str | None = None,
+        initial_messages: Callable[[], list[dict[str, Any]]] | None = None
+    ) -> None:
         """接受连接并添加到指定实例组
 
         Args:
             websocket: WebSocket 连接对象
             instance_name: 实例 ID
+            wire_format: 协商好的线路格式
+            subprotocol: 需要回应给客户端的子协议
+            initial_messages: 返回连接建立后首先发送的消息（如断线重连补发的增量）；
+                在连接加入实例组之前调用，之后的推送不会排到这些消息前面，也不会与之重复
         """
-        await websocket.accept()
-        self._pool.add(websocket, instance_name)
+        await websocket.accept(subprotocol=subprotocol)
+        outbox = ConnectionOutbox(
+            websocket,
+            instance_name,
+            max_size=self.send_queue_size,
+            policy=self.slow_consumer_policy,
+            snapshot_provider=self._snapshot_provider,
+            on_closed=lambda closed: self._pool.remove(closed.websocket, closed.instance_name),
+            wire_format=wire_format
+        )
+        if initial_messages is not None:
+            for message in initial_messages():
+                _ = outbox.put(message)
+            # 补发的消息已覆盖到当前版本，积压中之后的增量另起一段
+            self._batcher.seal(instance_name)
+        self._pool.add(websocket, instance_name, outbox)
+        outbox.start()
         logger.info(
             f"[WSManager] 新连接加入实例 '{instance_name}'，"+
             f"当前该实例连接数: {self._pool.count(instance_name)}"
@@ -39,7 +97,10 @@ class WebSocketManager:
             websocket: WebSocket 连接对象
             instance_name: 实例 ID
         """
+        outbox = self._pool.get_outbox(websocket)
         self._pool.remove(websocket, instance_name)
+        if outbox is not None:
+            outbox.close()
         logger.info(
             f"[WSManager] 连接断开实例 '{instance_name}'，"+
             f"剩余连接数: {self._pool.count(instance_name)}"
@@ -61,6 +122,7 @@ class WebSocketManager:
         Returns:
             是否有活跃连接接收到消息
         """
+        await self._batcher.flush(instance_name)
         return await self._dispatcher.send_patch(instance_name, patch, patch_id, None)
 
     async def send_patch_with_version(
@@ -81,8 +143,52 @@ class WebSocketManager:
         Returns:
             是否有活跃连接接收到消息
         """
+        await self._batcher.flush(instance_name)
         return await self._dispatcher.send_patch(instance_name, patch, patch_id, base_version)
 
+    async def send_delta(
+        self,
+        instance_name: str,
+        ops: list[dict[str, Any]],
+        version: int,
+        base_version: int,
+        patch: dict[Any, Any] | None = None,
+        patch_id: int | None = None,
+        highlight: dict[str, Any] | None = None,
+        immediate: bool = False
+    ) -> bool:
+        """向指定实例发送版本化增量
+
+        启用合并推送时增量先进入积压，窗口结束时与同一实例的其他增量合并为一条消息发送。
+
+        Args:
+            instance_name: 实例 ID
+            ops: RFC 6902 风格的增量操作列表
+            version: 应用增量后的版本号
+            base_version: 应用增量前的版本号
+            patch: 原始 Patch 数据（可选，兼容旧客户端）
+            patch_id: Patch ID
+            highlight: 高亮提示信息
+            immediate: 不等待合并窗口，立即发送（连同之前积压的增量）
+
+        Returns:
+            是否有活跃连接（将会）接收到消息
+        """
+        message = build_patch_message(instance_name, patch, patch_id, base_version, version, ops, highlight)
+        await self._batcher.add(instance_name, message, immediate)
+        return self._pool.has_instance(instance_name)
+
+    async def flush_pending(self, instance_name: str | None = None) -> None:
+        """立即发送积压的增量
+
+        Args:
+            instance_name: 实例 ID，None 表示所有实例
+        """
+        if instance_name is None:
+            await self._batcher.flush_all()
+        else:
+            await self._batcher.flush(instance_name)
+
     async def send_message(self, instance_name: str, message: dict[Any,Any]) -> bool:
         """向指定实例发送自定义消息
 
@@ -93,8 +199,114 @@ class WebSocketManager:
         Returns:
             是否有活跃连接接收到消息
         """
+        # 先发送积压的增量，保持与增量的先后顺序（如先创建 block 再定位）
+        await self._batcher.flush(instance_name)
         return await self._dispatcher.send_to_instance(instance_name, message)
 
+    def record_client_message(self, websocket: WebSocket, message: Any) -> bool:
+        """记录收到客户端消息（刷新连接活跃时间）
+
+        Args:
+            websocket: WebSocket 连接对象
+            message: 收到的消息
+
+        Returns:
+            消息是心跳 pong（已处理，调用方无需再处理）时返回 True
+        """
+        outbox = self._pool.get_outbox(websocket)
+        if outbox is None:
+            return False
+        if isinstance(message, dict) and message.get("type") == "pong":
+            _ = outbox.record_pong(message.get("id"))
+            return True
+        outbox.touch()
+        return False
+
+    def start_heartbeat(self, interval: float, timeout: float) -> None:
+        """启动心跳任务（需在事件循环中调用）
+
+        Args:
+            interval: 心跳间隔（秒），0 表示不启动
+            timeout: 空闲超时（秒）
+        """
+        self._monitor.start_heartbeat(interval, timeout)
+
+    async def stop_heartbeat(self) -> None:
+        """停止心跳任务"""
+        await self._monitor.stop_heartbeat()
+
+    def send_to_connection(self, websocket: WebSocket, message: dict[Any, Any]) -> bool:
+        """向单个连接发送消息（与推送消息共用发送队列，保持顺序）
+
+        Args:
+            websocket: WebSocket 连接对象
+            message: 消息内容
+
+        Returns:
+            连接是否仍然可用
+        """
+        outbox = self._pool.get_outbox(websocket)
+        if outbox is not None and message.get("type") == "schema_update":
+            # 该连接已拿到当前版本的快照，积压中之后的增量另起一段
+            self._batcher.seal(outbox.instance_name)
+        return self._dispatcher.send_to_connection(websocket, message)
+
+    def subscribe(self, websocket: WebSocket, topics: list[str]) -> None:
+        """连接订阅主题
+
+        Args:
+            websocket: WebSocket 连接对象
+            topics: 主题列表
+        """
+        if self._pool.get_outbox(websocket) is None:
+            return
+        for topic in topics:
+            self._pool.subscribe(websocket, topic)
+
+    def unsubscribe(self, websocket: WebSocket, topics: list[str]) -> None:
+        """连接取消订阅主题
+
+        Args:
+            websocket: WebSocket 连接对象
+            topics: 主题列表
+        """
+        for topic in topics:
+            self._pool.unsubscribe(websocket, topic)
+
+    def set_relay(self, relay: Callable[[dict[str, Any]], None] | None) -> None:
+        """设置推送转发函数（多 worker 部署时把推送发给其他节点）
+
+        Args:
+            relay: 接收转发信封的函数，None 表示不转发
+        """
+        self._dispatcher.relay = relay
+
+    def deliver_relayed(self, envelope: dict[str, Any]) -> None:
+        """投递其他节点转发来的推送（只发给本节点的连接）
+
+        Args:
+            envelope: 转发信封
+        """
+        self._dispatcher.deliver_relayed(envelope)
+
+    def send_to_topic(
+        self,
+        topic: str,
+        message: dict[Any, Any],
+        exclude_instance: str | None = None
+    ) -> int:
+        """向订阅了主题的连接发送消息
+
+        Args:
+            topic: 主题
+            message: 消息内容
+            exclude_instance: 跳过已连接到该实例的订阅者
+
+        Returns:
+            接收到消息的连接数
+        """
+        return self._dispatcher.send_to_topic(topic, message, exclude_instance)
+
     async def broadcast(self, message: dict[Any,Any]) -> int:
         """向所有实例广播消息
 
@@ -104,6 +316,7 @@ class WebSocketManager:
         Returns:
             接收到消息的实例数量
         """
+        await self._batcher.flush_all()
         return await self._dispatcher.broadcast(message)
 
     def get_connection_count(self, instance_name: str) -> int:
@@ -131,7 +344,14 @@ class WebSocketManager:
         Returns:
             统计信息字典
         """
-        return self._monitor.get_stats()
+        stats = self._monitor.get_stats()
+        stats["batching"] = {
+            "flush_interval_ms": self._batcher.interval * 1000,
+            "pending": self._batcher.pending_count(),
+            "merged": self._batcher.merged,
+            "flushes": self._batcher.flushes
+        }
+        return stats
 
     def get_instance_stats(self, instance_name: str) -> dict[Any,Any]:
         """获取指定实例的统计信息
@@ -107,6 +107,7 @@ field 包含以下键:
     - "showHeader": 布尔值,默认 true,显示表头
     - "showPagination": 布尔值,默认 false,显示分页
     - "pageSize": 数字,默认 10,每页显示条数
+    - "serverWindow": 布尔值,默认 false,服务端窗口模式(数据量大时使用,客户端只接收当前页的行)
     - "maxHeight": 字符串|None,最大高度
     - "compact": 布尔值,默认 false,紧凑模式
     - "rowSelection": 布尔值,默认 false,行选择
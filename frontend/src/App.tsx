@@ -30,7 +30,7 @@ import "./index.css";
 
 
 export default function App() {
-  const { currentInstanceId, schema: initialSchema, loading, error, loadingText } = useSchema();
+  const { currentInstanceId, schema: initialSchema, version: initialVersion, loading, error, loadingText } = useSchema();
   const { schema: storeSchema, setSchema, applyPatch, setInstanceId, highlightBlockId, highlightFieldKey, highlightActionId, highlightBlock } = useSchemaStore();
   const { setInstance: setMultiInstance } = useMultiInstanceStore();
   const { emitInstanceSwitch } = useEventEmitter();
@@ -43,13 +43,13 @@ export default function App() {
     if (initialSchema) {
       console.log('[App] 从后端加载的 Schema:', initialSchema);
       console.log('[App] Schema.state:', initialSchema.state);
-      setSchema(initialSchema);
+      setSchema(initialSchema, undefined, initialVersion);
       // 同时保存到多实例 store，供嵌入渲染使用
       if (currentInstanceId) {
         setMultiInstance(currentInstanceId, initialSchema);
       }
     }
-  }, [initialSchema, setSchema, currentInstanceId, setMultiInstance]);
+  }, [initialSchema, initialVersion, setSchema, currentInstanceId, setMultiInstance]);
   
   // 当实例ID变化时更新 Store
   useEffect(() => {
@@ -113,6 +113,10 @@ export default function App() {
     // 处理 block 高亮
     (blockId) => {
       highlightBlock(blockId);
+    },
+    // 增量已由 store 应用，刷新 Patch 历史记录
+    () => {
+      loadPatches(currentInstanceId);
     }
   );
 
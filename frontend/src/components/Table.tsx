@@ -3,6 +3,7 @@
 import { useState, useMemo, useEffect } from 'react';
 import { useEventEmitter } from '../utils/eventEmitter';
 import { useFieldPatch } from '../store/schemaStore';
+import { useTableWindow } from '../store/tableWindowStore';
 import ImageModal from './ImageModal';
 import { renderTemplate } from '../utils/template';
 import type { FieldConfig, TableColumn } from '../types/schema';
@@ -39,7 +40,7 @@ interface MixedComponent {
 }
 
 interface TableProps {
-  field: Pick<FieldConfig, 'key' | 'label' | 'columns' | 'rowKey' | 'bordered' | 'striped' | 'hover' | 'emptyText' | 'showHeader' | 'compact' | 'maxHeight' | 'showPagination' | 'pageSize' | 'tableEditable' | 'rowSelection'>;
+  field: Pick<FieldConfig, 'key' | 'label' | 'columns' | 'rowKey' | 'bordered' | 'striped' | 'hover' | 'emptyText' | 'showHeader' | 'compact' | 'maxHeight' | 'showPagination' | 'pageSize' | 'serverWindow' | 'tableEditable' | 'rowSelection'>;
   value: any[];
 }
 
@@ -56,7 +57,20 @@ export default function Table({ field, value }: TableProps) {
   const fieldPatch = useFieldPatch();
 
   const columns: Column[] = (field.columns as Column[]) || [];
-  const data = Array.isArray(value) ? value : [];
+  const serverWindow = field.serverWindow || false;
+  const pageSize = field.pageSize || 10;
+
+  // 服务端窗口模式：state 中不含表格数据，按当前页和排序订阅可见的行
+  const tableWindow = useTableWindow(
+    field.key,
+    serverWindow,
+    (currentPage - 1) * pageSize,
+    pageSize,
+    sortConfig?.key ?? null,
+    sortConfig?.direction ?? 'asc'
+  );
+
+  const data = serverWindow ? (tableWindow?.rows ?? []) : (Array.isArray(value) ? value : []);
   const rowKey = field.rowKey || 'id';
   const bordered = field.bordered !== false;
   const striped = field.striped !== false;
@@ -66,8 +80,8 @@ export default function Table({ field, value }: TableProps) {
   const compact = field.compact || false;
   const maxHeight = field.maxHeight;
   const showPagination = field.showPagination !== false;
-  const pageSize = field.pageSize || 10;
-  const tableEditable = field.tableEditable || false;
+  // 窗口模式下只有可见的行，不支持整表回写的单元格编辑
+  const tableEditable = (field.tableEditable || false) && !serverWindow;
   const rowSelection = field.rowSelection || false;
 
   // 排序处理
@@ -112,7 +126,8 @@ export default function Table({ field, value }: TableProps) {
 
   // 排序数据
   const sortedData = useMemo(() => {
-    if (!sortConfig) return data;
+    // 窗口模式由服务端排序
+    if (!sortConfig || serverWindow) return data;
 
     return [...data].sort((a, b) => {
       const aValue = a[sortConfig.key];
@@ -126,13 +141,14 @@ export default function Table({ field, value }: TableProps) {
 
       return sortConfig.direction === 'desc' ? -comparison : comparison;
     });
-  }, [data, sortConfig]);
+  }, [data, sortConfig, serverWindow]);
 
   // 分页逻辑
-  const totalPages = Math.ceil(sortedData.length / pageSize);
+  const totalCount = serverWindow ? (tableWindow?.total ?? 0) : sortedData.length;
+  const totalPages = Math.ceil(totalCount / pageSize);
   const startIndex = (currentPage - 1) * pageSize;
   const endIndex = startIndex + pageSize;
-  const paginatedData = sortedData.slice(startIndex, endIndex);
+  const paginatedData = serverWindow ? sortedData : sortedData.slice(startIndex, endIndex);
 
   // 检查是否全选
   const isAllSelected = paginatedData.length > 0 && paginatedData.every((record: any) => selectedRows.has(record[rowKey]));
@@ -148,7 +164,7 @@ export default function Table({ field, value }: TableProps) {
   // 当排序或数据变化时，重置到第一页
   useMemo(() => {
     setCurrentPage(1);
-  }, [data.length]);
+  }, [serverWindow ? sortConfig : data.length]);
 
   // 处理单元格编辑
   const handleCellEdit = (rowIndex: number, columnKey: string, newValue: any) => {
@@ -801,7 +817,7 @@ export default function Table({ field, value }: TableProps) {
     return String(val);
   };
 
-  if (!data || data.length === 0) {
+  if (totalCount === 0) {
     return (
       <div style={{ marginBottom: '16px' }}>
         <label style={{ display: 'block', marginBottom: '8px', fontWeight: 'bold' }}>
@@ -1062,7 +1078,7 @@ export default function Table({ field, value }: TableProps) {
           </tbody>
         </table>
       </div>
-      {showPagination && sortedData.length > 0 && (
+      {showPagination && totalCount > 0 && (
         <div style={{
           marginTop: '12px',
           padding: '12px',
@@ -1073,7 +1089,7 @@ export default function Table({ field, value }: TableProps) {
           borderRadius: '4px'
         }}>
           <span style={{ fontSize: '14px', color: '#666' }}>
-            共 {sortedData.length} 条记录，第 {currentPage} / {totalPages} 页
+            共 {totalCount} 条记录，第 {currentPage} / {totalPages} 页
           </span>
           <div style={{ display: 'flex', gap: '8px', alignItems: 'center' }}>
             <button
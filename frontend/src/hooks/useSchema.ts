@@ -8,6 +8,7 @@ import { getInstanceIdFromUrl } from '../utils/url';
 export function useSchema() {
   const [currentInstanceId, setCurrentInstanceId] = useState<string>(() => getInstanceIdFromUrl());
   const [schema, setSchema] = useState<UISchema | null>(null);
+  const [version, setVersion] = useState<number | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [loadingText, setLoadingText] = useState<string>('加载中...');
@@ -108,6 +109,7 @@ export function useSchema() {
       console.log('[前端] Schema API 响应:', data);
 
       if (data.status === 'success' && data.schema) {
+        setVersion(typeof data.version === 'number' ? data.version : null);
         setSchema(data.schema);
         console.log('[前端] Schema 加载成功:', data.schema);
 
@@ -153,6 +155,7 @@ export function useSchema() {
   return {
     currentInstanceId,
     schema,
+    version,
     loading,
     error,
     loadingText,
@@ -6,26 +6,53 @@
 
 import { useEffect, useRef, useState, useCallback } from 'react';
 import { useSchema } from './useSchema';
+import { useSchemaStore } from '../store/schemaStore';
+import type { DeltaOp } from '../utils/patch';
+import { setEventSocket, releaseEventSocket, resolveEventAck } from '../utils/api';
+import { useTableWindowStore } from '../store/tableWindowStore';
 
 interface WSMessage {
   highlight: any;
-  type: 'patch' | 'switch_instance' | 'highlight_block' | 'schema_update' | 'access_instance';
+  type: 'patch' | 'switch_instance' | 'highlight_block' | 'schema_update' | 'access_instance' | 'ping' | 'ack' | 'table_window' | 'table_rows';
   instance_name: string;
   block_id?: string;
   patch_id?: number;
   patch?: Record<string, any>;
+  // 版本化增量：客户端版本等于 baseVersion 时应用 ops，否则请求 resync
+  version?: number;
+  baseVersion?: number;
+  ops?: DeltaOp[];
   schema?: Record<string, any> & { highlight?: any };
   redirect_url?: string;
+  // 心跳 ping 序号（原样通过 pong 返回），或 ack 对应的事件请求 ID
+  id?: number;
+  // 事件 ack 的处理结果
+  result?: any;
 }
 
-export function useWebSocket(onPatch: (patch: Record<string, any>) => void, onSwitchInstance?: (instanceId: string, schema?: Record<string, any>) => void, onHighlightBlock?: (blockId: string) => void) {
+// WebSocket 线路格式：deflate 需要浏览器支持 DecompressionStream，否则退回 json
+const WS_FORMAT = import.meta.env.VITE_WS_FORMAT === 'deflate' && typeof DecompressionStream !== 'undefined'
+  ? 'deflate'
+  : 'json';
+
+/** 解码一帧：json 为文本帧，deflate 为 raw deflate 压缩的 JSON 二进制帧 */
+async function decodeFrame(data: string | ArrayBuffer): Promise<string> {
+  if (typeof data === 'string') return data;
+  const stream = new Blob([data]).stream().pipeThrough(new DecompressionStream('deflate-raw'));
+  return new Response(stream).text();
+}
+
+export function useWebSocket(onPatch: (patch: Record<string, any>) => void, onSwitchInstance?: (instanceId: string, schema?: Record<string, any>) => void, onHighlightBlock?: (blockId: string) => void, onDeltaApplied?: () => void) {
   const { currentInstanceId } = useSchema();
   const wsRef = useRef<WebSocket | null>(null);
   const onSwitchInstanceRef = useRef(onSwitchInstance);
   const onHighlightBlockRef = useRef(onHighlightBlock);
+  const onDeltaAppliedRef = useRef(onDeltaApplied);
   const reconnectTimerRef = useRef<number | null>(null);
   const onPatchRef = useRef(onPatch);
   const instanceIdRef = useRef(currentInstanceId);
+  // 二进制帧异步解压，用 Promise 链保证按接收顺序处理
+  const decodeChainRef = useRef<Promise<void>>(Promise.resolve());
   const [connected, setConnected] = useState(false);
 
   // 始终保持 ref 的最新值
@@ -33,7 +60,8 @@ export function useWebSocket(onPatch: (patch: Record<string, any>) => void, onSw
     onPatchRef.current = onPatch;
     onSwitchInstanceRef.current = onSwitchInstance;
     onHighlightBlockRef.current = onHighlightBlock;
-  }, [onPatch, onSwitchInstance, onHighlightBlock]);
+    onDeltaAppliedRef.current = onDeltaApplied;
+  }, [onPatch, onSwitchInstance, onHighlightBlock, onDeltaApplied]);
 
   // 连接函数
   const connect = useCallback(() => {
@@ -53,16 +81,29 @@ export function useWebSocket(onPatch: (patch: Record<string, any>) => void, onSw
 
     // 连接到 WebSocket
     const protocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-    const wsUrl = `${protocol}//${window.location.host}/ui/ws/${currentInstanceId}`;
+    // 订阅控制频道：接收 Agent 的切换实例 / 定位 block 指令
+    const query = new URLSearchParams({ subscribe: 'control' });
+    if (WS_FORMAT !== 'json') query.set('format', WS_FORMAT);
+    // 同一实例断线重连：带上本地版本，服务端只补发缺失的增量（过旧时回复完整快照），无需重新拉取 schema
+    const localVersion = useSchemaStore.getState().version;
+    if (instanceIdRef.current === currentInstanceId && localVersion !== null) {
+      query.set('last_seen_version', String(localVersion));
+    }
+    const wsUrl = `${protocol}//${window.location.host}/ui/ws/${currentInstanceId}?${query}`;
     console.log('[WS] 连接到:', wsUrl);
 
     // 使用快速连接模式
     wsRef.current = new WebSocket(wsUrl);
+    wsRef.current.binaryType = 'arraybuffer';
     instanceIdRef.current = currentInstanceId;
 
+    const socket = wsRef.current;
     wsRef.current.onopen = () => {
       console.log('[WS] 已连接到服务器');
       setConnected(true);
+      // 之后的事件通过该连接发送；窗口表格的订阅属于连接，重连后重新订阅
+      setEventSocket(socket);
+      useTableWindowStore.getState().resubscribeAll();
       // 清除重连定时器
       if (reconnectTimerRef.current) {
         clearTimeout(reconnectTimerRef.current);
@@ -71,11 +112,49 @@ export function useWebSocket(onPatch: (patch: Record<string, any>) => void, onSw
     };
 
     wsRef.current.onmessage = (event) => {
+      decodeChainRef.current = decodeChainRef.current
+        .then(() => decodeFrame(event.data))
+        .then(handleMessage)
+        .catch((err) => console.error('[WS] 解码消息失败:', err));
+    };
+
+    const handleMessage = (data: string) => {
       try {
-        const message: WSMessage = JSON.parse(event.data);
+        const message: WSMessage = JSON.parse(data);
+        if (message.type === 'ping') {
+          // 心跳：不回应的连接会被服务端关闭
+          wsRef.current?.send(JSON.stringify({ type: 'pong', id: message.id }));
+          return;
+        }
+        if (message.type === 'ack' && message.id !== undefined) {
+          resolveEventAck(message.id, message.result);
+          return;
+        }
+        if (message.type === 'table_window') {
+          useTableWindowStore.getState().applyWindow(message);
+          return;
+        }
+        if (message.type === 'table_rows') {
+          useTableWindowStore.getState().applyRows(message);
+          return;
+        }
         console.log('[WS] 收到消息:', message);
 
-        if (message.type === 'patch' && message.patch) {
+        if (message.type === 'patch' && message.ops && message.version !== undefined) {
+          const localVersion = useSchemaStore.getState().version;
+          if (localVersion !== null && message.version <= localVersion) {
+            // 本地已包含该增量（快照或补发的增量之后到达的合并推送）
+            return;
+          }
+          if (localVersion !== message.baseVersion) {
+            // 版本不连续（丢消息或本地 schema 过期），请求完整快照
+            console.warn(`[WS] 版本缺口: 本地 v${localVersion}, 增量基于 v${message.baseVersion}，请求 resync`);
+            wsRef.current?.send(JSON.stringify({ type: 'resync' }));
+            return;
+          }
+          useSchemaStore.getState().applyDelta(message.ops, message.version, message.highlight);
+          onDeltaAppliedRef.current?.();
+        } else if (message.type === 'patch' && message.patch) {
           console.log('[WS] 应用 Patch:', message.patch);
           onPatchRef.current(message.patch);
         } else if (message.type === 'schema_update' && message.schema) {
@@ -85,6 +164,9 @@ export function useWebSocket(onPatch: (patch: Record<string, any>) => void, onSw
             const schemaWithHighlight = { ...message.schema, highlight: message.highlight };
             onSwitchInstanceRef.current(instanceIdRef.current, schemaWithHighlight);
           }
+          if (message.version !== undefined) {
+            useSchemaStore.getState().setVersion(message.version);
+          }
 
           // 检查是否有跳转链接
           if (message.redirect_url) {
@@ -122,6 +204,7 @@ export function useWebSocket(onPatch: (patch: Record<string, any>) => void, onSw
     wsRef.current.onclose = () => {
       console.log('[WS] 连接已断开');
       setConnected(false);
+      releaseEventSocket(socket);
 
       // 如果不是主动切换实例，则快速重连
       if (instanceIdRef.current === currentInstanceId) {
@@ -3,12 +3,15 @@
 import { create } from 'zustand';
 import { subscribeWithSelector } from 'zustand/middleware';
 import type { UISchema } from '../types/schema';
+import { applyJsonPatchOps, type DeltaOp } from '../utils/patch';
 
 interface SchemaStore {
     // Schema 唯一真源
     schema: UISchema | null;
     // 当前实例ID
     instanceId: string | null;
+    // 当前 schema 对应的后端版本号（用于校验 WebSocket 增量的连续性）
+    version: number | null;
     // 需要高亮的 block ID
     highlightBlockId: string | null;
     // 需要高亮的 field key
@@ -17,7 +20,9 @@ interface SchemaStore {
     highlightActionId: string | null;
 
     // Actions
-    setSchema: (schema: UISchema, highlight?: any) => void;
+    setSchema: (schema: UISchema, highlight?: any, version?: number | null) => void;
+    setVersion: (version: number | null) => void;
+    applyDelta: (ops: DeltaOp[], version: number, highlight?: any) => void;
     setInstanceId: (instanceId: string) => void;
     applyPatch: (patch: Record<string, any>, isExternal?: boolean, isAddSet?: boolean) => void;
     highlightBlock: (blockId: string) => void;
@@ -30,14 +35,20 @@ export const useSchemaStore = create<SchemaStore>()(
     subscribeWithSelector((set) => ({
         schema: null,
         instanceId: null,
+        version: null,
         highlightBlockId: null,
         highlightFieldKey: null,
         highlightActionId: null,
 
-        setSchema: (schema, highlight) => {
+        setSchema: (schema, highlight, version) => {
             // Deep clone to ensure new reference
             const clonedSchema = JSON.parse(JSON.stringify(schema));
-            set({ schema: clonedSchema });
+            // 未提供版本号时保留原值（例如本地乐观更新）
+            if (version !== undefined) {
+                set({ schema: clonedSchema, version });
+            } else {
+                set({ schema: clonedSchema });
+            }
 
             // Handle highlight if provided
             if (highlight) {
@@ -57,6 +68,26 @@ export const useSchemaStore = create<SchemaStore>()(
 
         setInstanceId: (instanceId) => set({ instanceId }),
 
+        setVersion: (version) => set({ version }),
+
+        applyDelta: (ops, version, highlight) => {
+            const { schema, highlightBlock, highlightField, highlightAction } = useSchemaStore.getState();
+            if (!schema) return;
+
+            console.log(`[SchemaStore] applyDelta -> v${version}, ops:`, ops);
+            set({ schema: applyJsonPatchOps(schema, ops), version });
+
+            if (highlight) {
+                if (highlight.type === "field" && highlight.key) {
+                    highlightField(highlight.key);
+                } else if (highlight.type === "action" && highlight.id) {
+                    highlightAction(highlight.id);
+                } else if (highlight.type === "block" && highlight.id) {
+                    highlightBlock(highlight.id);
+                }
+            }
+        },
+
         highlightBlock: (blockId) => {
             set({ highlightBlockId: blockId });
             setTimeout(() => {
@@ -416,7 +447,7 @@ export const useSchemaStore = create<SchemaStore>()(
             return { schema: newSchema };
         }),
 
-        reset: () => set({ schema: null, instanceId: null, highlightBlockId: null, highlightFieldKey: null, highlightActionId: null })
+        reset: () => set({ schema: null, instanceId: null, version: null, highlightBlockId: null, highlightFieldKey: null, highlightActionId: null })
     }))
 );
 
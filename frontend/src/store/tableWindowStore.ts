@@ -0,0 +1,126 @@
+/** 窗口表格 Store - 服务端窗口模式（serverWindow）表格的可见行 */
+
+import { useEffect } from 'react';
+import { create } from 'zustand';
+import { sendSocketMessage } from '../utils/api';
+
+export interface TableWindowRequest {
+  fieldKey: string;
+  offset: number;
+  limit: number;
+  sortBy?: string | null;
+  sortOrder?: 'asc' | 'desc';
+}
+
+export interface TableWindow {
+  offset: number;
+  total: number;
+  rows: any[];
+  error?: string;
+}
+
+interface TableWindowStore {
+  // fieldKey -> 当前订阅（重连后重新发送）
+  requests: Record<string, TableWindowRequest>;
+  // fieldKey -> 服务端下发的可见行
+  windows: Record<string, TableWindow>;
+
+  subscribe: (request: TableWindowRequest) => void;
+  unsubscribe: (fieldKey: string) => void;
+  resubscribeAll: () => void;
+  applyWindow: (message: any) => void;
+  applyRows: (message: any) => void;
+}
+
+export const useTableWindowStore = create<TableWindowStore>((set, get) => ({
+  requests: {},
+  windows: {},
+
+  subscribe: (request) => {
+    set((state) => ({ requests: { ...state.requests, [request.fieldKey]: request } }));
+    // 连接尚未建立时在连接建立后由 resubscribeAll 发送
+    sendSocketMessage({ type: 'table_subscribe', ...request });
+  },
+
+  unsubscribe: (fieldKey) => {
+    set((state) => {
+      const { [fieldKey]: _request, ...requests } = state.requests;
+      const { [fieldKey]: _window, ...windows } = state.windows;
+      return { requests, windows };
+    });
+    sendSocketMessage({ type: 'table_unsubscribe', fieldKey });
+  },
+
+  resubscribeAll: () => {
+    Object.values(get().requests).forEach((request) => {
+      sendSocketMessage({ type: 'table_subscribe', ...request });
+    });
+  },
+
+  applyWindow: (message) => {
+    set((state) => ({
+      windows: {
+        ...state.windows,
+        [message.fieldKey]: {
+          offset: message.offset ?? 0,
+          total: message.total ?? 0,
+          rows: message.rows ?? [],
+          error: message.error,
+        },
+      },
+    }));
+  },
+
+  applyRows: (message) => {
+    set((state) => {
+      const current = state.windows[message.fieldKey];
+      if (!current) return state;
+      // 行级增量：按窗口内下标替换变化的行，再截断到新的长度
+      const rows = current.rows.slice(0, message.length);
+      for (const { index, row } of message.rows ?? []) {
+        rows[index] = row;
+      }
+      return {
+        windows: {
+          ...state.windows,
+          [message.fieldKey]: { ...current, offset: message.offset, total: message.total, rows },
+        },
+      };
+    });
+  },
+}));
+
+/**
+ * 订阅服务端窗口表格的一页数据
+ * @param fieldKey - 表格字段 key
+ * @param enabled - 是否启用（field.serverWindow）
+ * @param offset - 起始行
+ * @param limit - 行数
+ * @param sortBy - 排序列
+ * @param sortOrder - 排序方向
+ * @returns 当前窗口；尚未收到服务端回复时为 undefined
+ */
+export function useTableWindow(
+  fieldKey: string,
+  enabled: boolean,
+  offset: number,
+  limit: number,
+  sortBy?: string | null,
+  sortOrder?: 'asc' | 'desc'
+): TableWindow | undefined {
+  const subscribe = useTableWindowStore((state) => state.subscribe);
+  const unsubscribe = useTableWindowStore((state) => state.unsubscribe);
+  const tableWindow = useTableWindowStore((state) => state.windows[fieldKey]);
+
+  useEffect(() => {
+    if (!enabled) return;
+    subscribe({ fieldKey, offset, limit, sortBy, sortOrder });
+  }, [enabled, fieldKey, offset, limit, sortBy, sortOrder, subscribe]);
+
+  useEffect(() => {
+    if (!enabled) return;
+    return () => unsubscribe(fieldKey);
+  }, [enabled, fieldKey, unsubscribe]);
+
+  return enabled ? tableWindow : undefined;
+}
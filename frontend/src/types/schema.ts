@@ -100,6 +100,7 @@ export interface FieldConfig extends PictureConfig {
   showHeader?: boolean;
   showPagination?: boolean;
   pageSize?: number;
+  serverWindow?: boolean;  // 服务端窗口模式：数据保留在服务端，按页订阅可见的行
   maxHeight?: string;
   compact?: boolean;
   rowSelection?: boolean;  // 行选择
@@ -7,6 +7,20 @@ import { useMultiInstanceStore } from '../store/multiInstanceStore';
 const schemaCache = new Map<string, any>();
 const CACHE_TTL = 5 * 60 * 1000; // 5分钟缓存
 const cacheTimestamps = new Map<string, number>();
+// Schema 版本号缓存，与 schemaCache 一一对应，用于 WebSocket 增量的版本校验
+const schemaVersionCache = new Map<string, number>();
+// Schema ETag 缓存：缓存过期后带 If-None-Match 重新验证，未修改时服务端返回 304 而不是完整 Schema
+const schemaEtagCache = new Map<string, string>();
+
+/**
+ * 把响应外层的当前时间写回 runtime.timestamp（服务端缓存的 Schema 中不含每次请求都变化的值）
+ */
+function withRuntimeTimestamp(schema: any, timestamp?: string) {
+  if (timestamp && schema?.state) {
+    schema.state.runtime = { ...(schema.state.runtime || {}), timestamp };
+  }
+  return schema;
+}
 
 /**
  * 加载 Schema（带缓存）
@@ -24,6 +38,7 @@ export async function loadSchema(instanceId: string) {
     return {
       status: 'success',
       instance_name: instanceId,
+      version: schemaVersionCache.get(instanceId),
       schema: cachedSchema
     };
   }
@@ -37,16 +52,27 @@ export async function loadSchema(instanceId: string) {
     const controller = new AbortController();
     const timeoutId = setTimeout(() => controller.abort(), 3000); // 3秒超时
 
-    const response = await fetch(url, {
-      signal: controller.signal,
-      headers: {
-        'Cache-Control': 'no-cache',
-      }
-    });
+    const headers: Record<string, string> = { 'Cache-Control': 'no-cache' };
+    const etag = schemaEtagCache.get(instanceId);
+    if (cachedSchema && etag) {
+      headers['If-None-Match'] = etag;
+    }
+    const response = await fetch(url, { signal: controller.signal, headers });
     clearTimeout(timeoutId);
 
     console.log(`[API] 响应状态: ${response.status}`);
 
+    // 服务端 Schema 未变化，继续使用缓存
+    if (response.status === 304 && cachedSchema) {
+      cacheTimestamps.set(instanceId, now);
+      return {
+        status: 'success',
+        instance_name: instanceId,
+        version: schemaVersionCache.get(instanceId),
+        schema: withRuntimeTimestamp(cachedSchema, new Date().toLocaleString('sv-SE'))
+      };
+    }
+
     if (!response.ok) {
       console.error(`[API] 响应错误: ${response.status} ${response.statusText}`);
       throw new Error(`HTTP error! status: ${response.status}`);
@@ -57,8 +83,16 @@ export async function loadSchema(instanceId: string) {
 
     // 更新缓存
     if (data.status === 'success' && data.schema) {
+      withRuntimeTimestamp(data.schema, data.timestamp);
       schemaCache.set(instanceId, data.schema);
+      const responseEtag = response.headers.get('ETag');
+      if (responseEtag) {
+        schemaEtagCache.set(instanceId, responseEtag);
+      }
       cacheTimestamps.set(instanceId, now);
+      if (typeof data.version === 'number') {
+        schemaVersionCache.set(instanceId, data.version);
+      }
     }
 
     return data;
@@ -70,6 +104,7 @@ export async function loadSchema(instanceId: string) {
       return {
         status: 'success',
         instance_name: instanceId,
+        version: schemaVersionCache.get(instanceId),
         schema: cachedSchema,
         cached: true // 标记为缓存数据
       };
@@ -117,12 +152,63 @@ export function clearSchemaCache(instanceId?: string) {
   if (instanceId) {
     schemaCache.delete(instanceId);
     cacheTimestamps.delete(instanceId);
+    schemaVersionCache.delete(instanceId);
+    schemaEtagCache.delete(instanceId);
   } else {
     schemaCache.clear();
     cacheTimestamps.clear();
+    schemaVersionCache.clear();
+    schemaEtagCache.clear();
   }
 }
 
+// 事件通道：WebSocket 已连接时事件通过该连接发送（请求 ID + ack），否则使用 POST /ui/event
+let eventSocket: WebSocket | null = null;
+let nextEventId = 0;
+const pendingEvents = new Map<number, { resolve: (result: any) => void; reject: (error: Error) => void }>();
+
+/**
+ * 设置用于发送事件的 WebSocket（连接建立时由 useWebSocket 调用）
+ * @param socket - 已打开的 WebSocket
+ */
+export function setEventSocket(socket: WebSocket) {
+  eventSocket = socket;
+}
+
+/**
+ * 连接关闭时释放事件通道，未收到 ack 的事件以错误结束（事件可能已执行，不自动重发）
+ * @param socket - 已关闭的 WebSocket
+ */
+export function releaseEventSocket(socket: WebSocket) {
+  if (eventSocket !== socket) return;
+  eventSocket = null;
+  pendingEvents.forEach(({ reject }) => reject(new Error('WebSocket 连接已断开')));
+  pendingEvents.clear();
+}
+
+/**
+ * 处理服务端的事件 ack
+ * @param id - 请求 ID
+ * @param result - 事件响应（与 POST /ui/event 的响应相同）
+ */
+export function resolveEventAck(id: number, result: any) {
+  const pending = pendingEvents.get(id);
+  if (!pending) return;
+  pendingEvents.delete(id);
+  pending.resolve(result);
+}
+
+/**
+ * 通过已连接的 WebSocket 发送消息
+ * @param message - 消息对象
+ * @returns 连接未就绪时返回 false
+ */
+export function sendSocketMessage(message: Record<string, any>): boolean {
+  if (!eventSocket || eventSocket.readyState !== WebSocket.OPEN) return false;
+  eventSocket.send(JSON.stringify(message));
+  return true;
+}
+
 /**
  * 发送事件
  * @param eventType - 事件类型
@@ -131,14 +217,23 @@ export function clearSchemaCache(instanceId?: string) {
  * @returns 事件响应
  */
 export async function emitEvent(eventType: string, instanceId: string, payload: any) {
+  const event = {
+    type: eventType,
+    pageKey: instanceId,
+    payload,
+  };
+  const socket = eventSocket;
+  if (socket && socket.readyState === WebSocket.OPEN) {
+    const id = ++nextEventId;
+    return new Promise<any>((resolve, reject) => {
+      pendingEvents.set(id, { resolve, reject });
+      socket.send(JSON.stringify({ type: 'event', id, event }));
+    });
+  }
   const response = await fetch('/ui/event', {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({
-      type: eventType,
-      pageKey: instanceId,
-      payload,
-    }),
+    body: JSON.stringify(event),
   });
   return await response.json();
 }
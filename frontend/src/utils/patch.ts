@@ -67,3 +67,76 @@ function setNestedValue(obj: any, path: string, value: any): void {
   const lastKey = keys[keys.length - 1];
   current[lastKey] = value;
 }
+
+/** 后端推送的增量操作（RFC 6902 子集） */
+export interface DeltaOp {
+  op: 'add' | 'replace' | 'remove';
+  path: string;
+  value?: any;
+}
+
+/**
+ * 解析 JSON Pointer（RFC 6901）
+ * @param pointer - 如 "/state/params/count"
+ * @returns 路径片段
+ */
+function parseJsonPointer(pointer: string): string[] {
+  if (!pointer) return [];
+  return pointer
+    .slice(1)
+    .split('/')
+    .map((token) => token.replace(/~1/g, '/').replace(/~0/g, '~'));
+}
+
+/**
+ * 应用后端推送的增量操作到 schema
+ *
+ * 只复制操作路径上的对象和数组，其余部分与原 schema 共用（列表的元素级增量不再复制整个列表之外的内容）。
+ * 数组路径支持下标和 "-"（追加）：add 插入元素，replace 替换元素，remove 删除元素。
+ * @param schema - 原始 schema
+ * @param ops - 增量操作列表
+ * @returns 更新后的 schema（新引用）
+ */
+export function applyJsonPatchOps(schema: UISchema, ops: DeltaOp[]): UISchema {
+  // 本次已复制过的容器，同一批操作中不重复复制
+  const copied = new Set<any>();
+  const copy = (value: any): any => {
+    if (copied.has(value)) return value;
+    const cloned = Array.isArray(value) ? [...value] : { ...value };
+    copied.add(cloned);
+    return cloned;
+  };
+
+  const result = copy(schema);
+
+  for (const { op, path, value } of ops) {
+    const tokens = parseJsonPointer(path);
+    if (tokens.length === 0) continue;
+
+    let parent: any = result;
+    for (let i = 0; i < tokens.length - 1; i++) {
+      const token = tokens[i];
+      const child = parent[token];
+      parent[token] = child === undefined || child === null || typeof child !== 'object' ? {} : copy(child);
+      parent = parent[token];
+    }
+
+    const lastToken = tokens[tokens.length - 1];
+    if (Array.isArray(parent)) {
+      const index = lastToken === '-' ? parent.length : Number(lastToken);
+      if (op === 'remove') {
+        parent.splice(index, 1);
+      } else if (op === 'add') {
+        parent.splice(index, 0, value);
+      } else {
+        parent[index] = value;
+      }
+    } else if (op === 'remove') {
+      delete parent[lastToken];
+    } else {
+      parent[lastToken] = value;
+    }
+  }
+
+  return result;
+}
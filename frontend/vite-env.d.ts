@@ -4,6 +4,8 @@ interface ImportMetaEnv {
   
   readonly VITE_API_URL?: string
   readonly VITE_API_PORT?: string
+  // WebSocket 线路格式：json（默认）或 deflate（压缩的二进制帧）
+  readonly VITE_WS_FORMAT?: string
   // Vite 内置的 DEV, MODE, PROD, SSR 等属性已经在 vite/client 中定义
 }
 
@@ -0,0 +1,79 @@
+"""并发负载测试：同一实例的并发 increment 必须串行化且结果精确
+
+通过 ASGI 直接调用应用，CLIENTS 个并发任务各自向 /ui/patch 发送 increment，
+同时向另一实例发送 field:change 事件。检查：
+- 计数器最终值精确等于发送的 increment 次数
+- 每次修改都发布了一个版本（版本号连续，没有交错写入导致的丢失）
+
+运行方式（仓库根目录）：
+    python -m tests.bench_concurrent_increment
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+
+import httpx
+
+from backend.fastapi.main import app, schema_manager
+from backend.core.defaults import get_default_instances
+
+CLIENTS = 50
+INCREMENTS_PER_CLIENT = 20
+OTHER_INSTANCE = "bench_other"
+
+# 没有 WebSocket 连接时推送会记录警告，负载测试中屏蔽
+logging.disable(logging.WARNING)
+
+
+async def main() -> tuple[int, int, float]:
+    """运行负载，返回 (计数器最终值, 发布的版本数, 耗时)"""
+    schema_manager.set(OTHER_INSTANCE, get_default_instances()["demo"])
+    demo = schema_manager.get("demo")
+    assert demo is not None
+    demo.state.params["counter"] = 0
+    base_version = schema_manager.get_version("demo")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def increment_client() -> None:
+            for _ in range(INCREMENTS_PER_CLIENT):
+                response = await client.post("/ui/patch", json={
+                    "instance_name": "demo",
+                    "patches": [{"op": "increment", "path": "state.params.counter", "value": 1}]
+                })
+                assert response.json()["status"] == "success", response.json()
+
+        async def other_instance_client(client_id: int) -> None:
+            for i in range(INCREMENTS_PER_CLIENT):
+                response = await client.post("/ui/event", json={
+                    "type": "field:change",
+                    "pageKey": OTHER_INSTANCE,
+                    "payload": {"fieldKey": f"field_{client_id}", "value": i}
+                })
+                assert response.json()["status"] == "success", response.json()
+
+        start = time.perf_counter()
+        _ = await asyncio.gather(
+            *(increment_client() for _ in range(CLIENTS)),
+            *(other_instance_client(i) for i in range(CLIENTS)),
+        )
+        elapsed = time.perf_counter() - start
+
+    published = schema_manager.get_version("demo") - base_version
+    return demo.state.params["counter"], published, elapsed
+
+
+with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+    counter, published, elapsed = asyncio.run(main())
+
+expected = CLIENTS * INCREMENTS_PER_CLIENT
+print(f"{CLIENTS} clients x {INCREMENTS_PER_CLIENT} increments (+ same load on '{OTHER_INSTANCE}')")
+print(f"counter: {counter} (expected {expected})")
+print(f"versions published for 'demo': {published} (expected {expected})")
+print(f"throughput: {2 * expected / elapsed:.0f} req/s")
+assert counter == expected
+assert published == expected
@@ -0,0 +1,130 @@
+"""外部 API action 基准：同步 httpx.Client vs 共享 AsyncClient
+
+本地启动一个每次响应延迟 DELAY 秒的桩服务器（独立线程），并发触发
+CONCURRENCY 个 api action，同时在事件循环中运行一个 10ms 周期的心跳任务，
+统计心跳的最大延迟（事件循环被阻塞的时间）。
+
+运行方式（仓库根目录）：
+    python -m tests.bench_external_api
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import httpx
+
+from backend.core import SchemaManager
+from backend.fastapi.models import UISchema, ActionConfig, ActionType
+from backend.fastapi.models.patch_models import ExternalApiConfig
+from backend.fastapi.services import InstanceService
+from backend.fastapi.services.http_client import ExternalApiClient
+
+DELAY = 0.2
+CONCURRENCY = 20
+TICK = 0.01
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        time.sleep(DELAY)
+        payload = json.dumps({"echo": json.loads(body or b"{}")}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        _ = self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    # 默认 backlog 为 5，并发连接会触发 SYN 重传
+    request_queue_size = 128
+
+
+def start_stub_server() -> str:
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/echo"
+
+
+def build_service(url: str) -> InstanceService:
+    manager = SchemaManager()
+    schema = UISchema(
+        page_key="bench",
+        actions=[ActionConfig(
+            id="call",
+            label="Call",
+            action_type=ActionType.API,
+            api=ExternalApiConfig(
+                url=url,
+                body_template={"name": "${state.params.name}"},
+                response_mappings={"state.runtime.echo": "echo.name"},
+            ),
+        )],
+    )
+    schema.state.params["name"] = "bench"
+    manager.set("bench", schema)
+    # 同一主机放开并发限制，对比的是阻塞与否
+    return InstanceService(manager, ExternalApiClient(per_host_limit=CONCURRENCY))
+
+
+async def legacy_call(url: str) -> dict[str, Any]:
+    """改造前的调用方式：在协程中使用同步客户端"""
+    with httpx.Client(timeout=30) as client:
+        response = client.post(url, json={"name": "bench"})
+    return {"state.runtime.echo": response.json()["echo"]["name"]}
+
+
+async def measure(calls: list[Any]) -> tuple[float, float]:
+    """并发执行调用，返回 (总耗时, 心跳最大延迟)"""
+    max_lag = 0.0
+    done = False
+
+    async def ticker() -> None:
+        nonlocal max_lag
+        while not done:
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            max_lag = max(max_lag, time.perf_counter() - start - TICK)
+
+    tick_task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK)
+    start = time.perf_counter()
+    results = await asyncio.gather(*calls)
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick_task
+    assert all(result for result in results)
+    return elapsed, max_lag
+
+
+async def main() -> None:
+    url = start_stub_server()
+    service = build_service(url)
+
+    # 预热：创建共享客户端（SSL 上下文等一次性开销）
+    _ = await service.handle_action("bench", "call", {})
+
+    legacy = await measure([legacy_call(url) for _ in range(CONCURRENCY)])
+    pooled = await measure([service.handle_action("bench", "call", {}) for _ in range(CONCURRENCY)])
+    assert service.schema_manager.get("bench").state.runtime["echo"] == "bench"
+    await service.http_client.aclose()
+
+    print(f"{CONCURRENCY} concurrent api actions, stub delay {DELAY * 1000:.0f}ms")
+    print(f"{'client':24s} {'total ms':>10s} {'max loop lag ms':>16s}")
+    for name, (elapsed, lag) in (("sync httpx.Client", legacy), ("shared AsyncClient", pooled)):
+        print(f"{name:24s} {elapsed * 1000:10.1f} {lag * 1000:16.1f}")
+
+
+asyncio.run(main())
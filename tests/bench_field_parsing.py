@@ -0,0 +1,105 @@
+"""字段解析基准：创建包含 FIELDS 个字段的实例
+
+对比：
+- 原实现：每个字段新建一次 TypeAdapter(FieldConfig)（smart union 逐个尝试字段模型）
+- 逐个解析：模块级判别式联合 TypeAdapter，每个字段调用一次
+- 批量解析：parse_field_configs，整个列表一次验证（InstanceService.create_instance 使用）
+
+运行方式（仓库根目录）：
+    python -m tests.bench_field_parsing
+"""
+
+import contextlib
+import copy
+import os
+import time
+from typing import Any, Union
+
+from pydantic import TypeAdapter
+
+from backend.core.manager import SchemaManager
+from backend.fastapi.models import (
+    SchemaPatch, BaseFieldConfig, SelectableFieldConfig, TagFieldConfig,
+    ImageFieldConfig, TableFieldConfig, ComponentFieldConfig
+)
+from backend.fastapi.services.instance_service import InstanceService
+from backend.fastapi.services.patch import parse_field_config, parse_field_configs
+
+FIELDS = 5000
+BLOCKS = 50
+
+# 原来的 FieldConfig（非判别式联合）
+SmartFieldConfig = Union[
+    BaseFieldConfig, SelectableFieldConfig, TagFieldConfig,
+    ImageFieldConfig, TableFieldConfig, ComponentFieldConfig
+]
+
+
+def make_field(i: int) -> dict[str, Any]:
+    kind = i % 5
+    if kind == 0:
+        return {"key": f"f{i}", "label": f"F{i}", "type": "text"}
+    if kind == 1:
+        return {"key": f"f{i}", "label": f"F{i}", "type": "select", "options": [{"label": "A", "value": "a"}]}
+    if kind == 2:
+        return {"key": f"f{i}", "label": f"F{i}", "type": "table", "columns": [{"key": "id", "title": "ID"}]}
+    if kind == 3:
+        return {"key": f"f{i}", "label": f"F{i}", "type": "tag", "color": "blue"}
+    return {"key": f"f{i}", "label": f"F{i}", "type": "image", "imageFit": "cover"}
+
+
+fields = [make_field(i) for i in range(FIELDS)]
+per_block = FIELDS // BLOCKS
+blocks = [
+    {"id": f"block_{b}", "layout": "form", "props": {"fields": fields[b * per_block:(b + 1) * per_block]}}
+    for b in range(BLOCKS)
+]
+
+
+def timed(func: Any, data: Any, repeat: int = 5) -> float:
+    """计时，取多轮中的最小值（输入数据每轮事先复制，解析会原地补全默认值）"""
+    best = float("inf")
+    for _ in range(repeat):
+        copied = copy.deepcopy(data)
+        start = time.perf_counter()
+        func(copied)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def old_parse(data: list[dict[str, Any]]) -> None:
+    for field in data:
+        _ = TypeAdapter(SmartFieldConfig).validate_python(field)
+
+
+def single_parse(data: list[dict[str, Any]]) -> None:
+    for field in data:
+        _ = parse_field_config(field)
+
+
+def bulk_parse(data: list[dict[str, Any]]) -> None:
+    _ = parse_field_configs(data)
+
+
+def create_instance(data: list[dict[str, Any]]) -> None:
+    service = InstanceService(SchemaManager())
+    patches = [
+        SchemaPatch(op="set", path="page_key", value="bench"),
+        SchemaPatch(op="set", path="blocks", value=data),
+    ]
+    ok, error = service.create_instance("bench", patches)
+    assert ok, error
+
+
+# 预热（构建 pydantic 验证器）
+bulk_parse(copy.deepcopy(fields))
+print(f"{FIELDS} fields in {BLOCKS} blocks")
+with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+    results = [
+        ("per-field TypeAdapter (old)", timed(old_parse, fields, repeat=1)),
+        ("module adapter, per field", timed(single_parse, fields)),
+        ("module adapter, bulk list", timed(bulk_parse, fields)),
+        ("InstanceService.create_instance", timed(create_instance, blocks)),
+    ]
+for name, elapsed in results:
+    print(f"{name:>32s} {elapsed:9.1f} ms")
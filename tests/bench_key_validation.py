@@ -0,0 +1,56 @@
+"""key 唯一性验证微基准：全量扫描 vs 增量检查
+
+场景：修改单个字段属性（blocks.X.props.fields.Y.label）后的唯一性验证。
+
+运行方式（仓库根目录）：
+    python -m tests.bench_key_validation
+"""
+
+import timeit
+
+from backend.fastapi.models import UISchema, Block, BlockProps, ActionConfig, BaseFieldConfig
+from backend.fastapi.services.patch import validate_key_uniqueness, validate_touched_keys
+from backend.fastapi.services.schema_index import get_schema_index
+
+
+def build_schema(block_count: int) -> UISchema:
+    blocks = [
+        Block(
+            id=f"block_{i}",
+            layout="form",
+            props=BlockProps(
+                fields=[BaseFieldConfig(key=f"f_{i}_{j}", label=f"F{j}", type="text") for j in range(10)],
+                actions=[ActionConfig(id=f"a_{i}_{j}", label=f"A{j}") for j in range(3)],
+            ),
+        )
+        for i in range(block_count)
+    ]
+    return UISchema(page_key="bench", blocks=blocks, actions=[])
+
+
+N = 2_000
+print(f"{'blocks':>7s} {'full scan us/op':>16s} {'incremental us/op':>18s} {'speedup':>8s}")
+for block_count in (10, 100, 500):
+    schema = build_schema(block_count)
+    index = get_schema_index(schema)
+    touched = {block_count // 2}
+
+    # 正确性：制造重复后两种方式都能发现
+    schema.blocks[block_count // 2].props.fields[0].key = "f_0_0"
+    index.reindex_block(block_count // 2)
+    for check in (lambda: validate_key_uniqueness(schema), lambda: validate_touched_keys(schema, touched, False)):
+        try:
+            check()
+            raise AssertionError("duplicate not detected")
+        except ValueError:
+            pass
+    schema.blocks[block_count // 2].props.fields[0].key = f"f_{block_count // 2}_0"
+    index.reindex_block(block_count // 2)
+
+    def incremental() -> None:
+        index.reindex_block(block_count // 2)
+        validate_touched_keys(schema, touched, False)
+
+    before = timeit.timeit(lambda: validate_key_uniqueness(schema), number=N) / N * 1e6
+    after = timeit.timeit(incremental, number=N) / N * 1e6
+    print(f"{block_count:7d} {before:16.2f} {after:18.2f} {before / after:7.1f}x")
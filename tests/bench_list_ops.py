@@ -0,0 +1,76 @@
+"""列表操作基准：构造新列表并整体下发 vs 原地修改并下发元素级增量
+
+50,000 行的 state.params.tasks 上分别测量 append_to_list、remove_last、
+update_list_item（按 id）、prepend_to_list，每次操作包括执行操作（apply_unified_patch）
+和计算发布的增量（build_delta_ops），并统计增量序列化后的字节数。
+
+「整体」一列在每次操作前把列表替换为新对象，列表需要先复制、增量退回整个列表，
+与原来每次构造新列表、下发整个列表的开销相同。
+
+运行方式（仓库根目录）：
+    python -m tests.bench_list_ops
+"""
+
+import contextlib
+import os
+import time
+from typing import Any
+
+from pydantic_core import to_json
+
+from backend.core import SchemaManager
+from backend.fastapi.models import UISchema, SchemaPatch
+from backend.fastapi.services.delta import build_delta_ops
+from backend.fastapi.services.instance_service import InstanceService
+
+ROWS = 50_000
+
+schema = UISchema(
+    page_key="bench",
+    state={"params": {"tasks": [{"id": i, "title": f"Task {i}", "done": False} for i in range(ROWS)]}},
+)
+manager = SchemaManager()
+manager.set("bench", schema)
+service = InstanceService(manager)
+
+
+def run_op(patch: SchemaPatch, whole: bool) -> int:
+    """执行一次操作并计算增量，返回增量的字节数"""
+    if whole:
+        schema.state.params["tasks"] = list(schema.state.params["tasks"])
+    result = service.apply_unified_patch(schema, patch)
+    assert result["success"], result
+    return len(to_json(build_delta_ops(schema, [patch.path])))
+
+
+def measure(patch: SchemaPatch, whole: bool, number: int) -> tuple[float, int]:
+    """返回 (平均耗时 us, 平均增量字节数)"""
+    size = 0
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        _ = run_op(patch, whole)
+        start = time.perf_counter()
+        for _ in range(number):
+            size += run_op(patch, whole)
+        elapsed = time.perf_counter() - start
+    return elapsed / number * 1e6, size // number
+
+
+cases: list[tuple[str, dict[str, Any]]] = [
+    ("append", {"op": "append_to_list", "path": "state.params.tasks", "value": {"id": -1, "title": "New", "done": False}}),
+    ("remove_last", {"op": "remove_last", "path": "state.params.tasks"}),
+    ("update by id", {
+        "op": "update_list_item", "path": "state.params.tasks",
+        "value": {"key": "id", "value": ROWS // 2, "updates": {"done": True}}
+    }),
+    ("prepend", {"op": "prepend_to_list", "path": "state.params.tasks", "value": {"id": -2, "title": "First", "done": False}}),
+]
+
+print(f"{ROWS} rows; per op: time (whole list -> in place), delta bytes")
+for name, raw in cases:
+    patch = SchemaPatch.model_validate(raw)
+    whole_us, whole_bytes = measure(patch, True, 20)
+    inplace_us, inplace_bytes = measure(patch, False, 1_000)
+    print(
+        f"{name:>13s} {whole_us:10.0f} us -> {inplace_us:7.1f} us ({whole_us / inplace_us:6.0f}x)"
+        f"   {whole_bytes:>9,d} B -> {inplace_bytes:>4d} B"
+    )
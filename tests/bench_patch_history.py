@@ -0,0 +1,32 @@
+"""Patch 历史微基准：无界列表线性查找 vs 环形缓冲区
+
+运行方式（仓库根目录）：
+    python -m tests.bench_patch_history
+"""
+
+import timeit
+
+from backend.core.history import PatchHistoryManager
+
+N = 2_000
+print(f"{'entries':>8s} {'get_by_id linear us':>20s} {'ring us':>9s} {'page(100) us':>13s}")
+for entries in (1_000, 10_000, 100_000):
+    history = PatchHistoryManager(max_entries=entries)
+    for i in range(entries):
+        _ = history.save("bench", {"state.params.counter": i})
+    records = history.get_all("bench")
+    target = entries // 2
+
+    # 正确性：与线性查找结果一致
+    assert history.get_by_id("bench", target) is next(r for r in records if r["id"] == target)
+
+    linear = timeit.timeit(lambda: next(r for r in records if r["id"] == target), number=N) / N * 1e6
+    ring = timeit.timeit(lambda: history.get_by_id("bench", target), number=N) / N * 1e6
+    page = timeit.timeit(lambda: history.get_page("bench", after=target, limit=100), number=N) / N * 1e6
+    print(f"{entries:8d} {linear:20.2f} {ring:9.2f} {page:13.2f}")
+
+# 有界：写入超过上限后内存占用保持不变
+history = PatchHistoryManager(max_entries=1_000)
+for i in range(50_000):
+    _ = history.save("bench", {"state.params.counter": i})
+print(f"\nafter 50000 saves with max_entries=1000: {history.get_stats('bench')}")
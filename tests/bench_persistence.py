@@ -0,0 +1,80 @@
+"""持久化基准：持续 Patch 吞吐量（不持久化 / WAL 不 fsync / WAL + 组提交 fsync）
+
+CLIENTS 个并发任务各自连续执行 field:change 式的 Patch（应用 + 发布增量），
+统计总吞吐量和 fsync 次数（组提交会让并发的发布共用一次 fsync）。
+最后从磁盘恢复并校验状态与内存一致。
+
+运行方式（仓库根目录）：
+    python -m tests.bench_persistence
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import tempfile
+import time
+
+from backend.core import SchemaManager, PersistenceEngine, get_default_instances
+from backend.fastapi.services import SchemaSyncService, apply_patch_to_schema
+from backend.fastapi.services.websocket.handlers.manager import WebSocketManager
+
+CLIENTS = 32
+PATCHES_PER_CLIENT = 100
+
+# 没有 WebSocket 连接时推送会记录警告，基准中屏蔽
+logging.disable(logging.WARNING)
+
+
+def build_manager() -> SchemaManager:
+    manager = SchemaManager()
+    for instance_name, schema in get_default_instances().items():
+        manager.set(instance_name, schema)
+    return manager
+
+
+async def run_clients(manager: SchemaManager) -> float:
+    sync = SchemaSyncService(manager, WebSocketManager())
+    schema = manager.get("demo")
+    assert schema is not None
+
+    async def client(client_id: int) -> None:
+        for i in range(PATCHES_PER_CLIENT):
+            patch = {f"state.params.client_{client_id}": i}
+            apply_patch_to_schema(schema, patch)
+            _ = await sync.publish("demo", patch.keys(), patch=patch)
+
+    start = time.perf_counter()
+    _ = await asyncio.gather(*(client(i) for i in range(CLIENTS)))
+    return time.perf_counter() - start
+
+
+def run(mode: str) -> tuple[float, int]:
+    """返回 (patches/s, fsync 次数)"""
+    manager = build_manager()
+    engine: PersistenceEngine | None = None
+    with tempfile.TemporaryDirectory() as data_dir:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            if mode != "memory":
+                engine = PersistenceEngine(data_dir, fsync=(mode == "wal+fsync"))
+                _ = engine.recover()
+                engine.start()
+                manager.attach_persistence(engine)
+
+            elapsed = asyncio.run(run_clients(manager))
+            if engine is not None:
+                engine.close()
+                # 恢复后的状态与内存一致
+                recovered = SchemaManager()
+                recovered.load_state(PersistenceEngine(data_dir).recover())
+                assert recovered.export_state() == manager.export_state()
+
+    commits = engine.commits if engine is not None and engine.fsync else 0
+    return CLIENTS * PATCHES_PER_CLIENT / elapsed, commits
+
+
+print(f"{CLIENTS} clients x {PATCHES_PER_CLIENT} patches")
+print(f"{'mode':12s} {'patches/s':>10s} {'fsyncs':>8s}")
+for mode in ("memory", "wal", "wal+fsync"):
+    throughput, fsyncs = run(mode)
+    print(f"{mode:12s} {throughput:10.0f} {fsyncs:8d}")
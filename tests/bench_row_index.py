@@ -0,0 +1,108 @@
+"""表格行索引基准：逐行比较 vs 按 rowKey 的行索引
+
+50,000 行的表格（state.params.tasks，rowKey="id"）上测量按 id 定位行的操作：
+- update_list_item：随机更新一行
+- remove_from_list：随机删除一行，再追加一行保持行数
+- 混合：追加、开头插入、删除、更新交替进行（索引随每次修改增量维护）
+
+每次操作包括执行操作（apply_unified_patch）和计算发布的增量（build_delta_ops）。
+
+运行方式（仓库根目录）：
+    python -m tests.bench_row_index
+"""
+
+import contextlib
+import os
+import random
+import time
+from collections.abc import Callable
+
+from backend.config import settings
+from backend.core import SchemaManager
+from backend.fastapi.models import UISchema, SchemaPatch
+from backend.fastapi.services.delta import build_delta_ops
+from backend.fastapi.services.instance_service import InstanceService
+
+ROWS = 50_000
+PATH = "state.params.tasks"
+
+
+def build_service() -> tuple[UISchema, InstanceService]:
+    schema = UISchema.model_validate({
+        "page_key": "bench",
+        "state": {"params": {"tasks": [{"id": i, "title": f"Task {i}", "done": False} for i in range(ROWS)]}},
+        "blocks": [{
+            "id": "table_block", "layout": "form", "title": "Tasks",
+            "props": {"fields": [{
+                "key": "tasks", "label": "Tasks", "type": "table", "rowKey": "id",
+                "columns": [{"key": "id", "title": "ID"}, {"key": "title", "title": "Title"}]
+            }]}
+        }]
+    })
+    manager = SchemaManager()
+    manager.set("bench", schema)
+    return schema, InstanceService(manager)
+
+
+def apply(schema: UISchema, service: InstanceService, raw: dict[str, object]) -> None:
+    result = service.apply_unified_patch(schema, SchemaPatch.model_validate(raw))
+    assert result["success"], result
+    _ = build_delta_ops(schema, [PATH])
+
+
+def random_id(schema: UISchema, rng: random.Random) -> object:
+    return rng.choice(schema.state.params["tasks"])["id"]
+
+
+def update_op(schema: UISchema, service: InstanceService, rng: random.Random, step: int) -> None:
+    apply(schema, service, {
+        "op": "update_list_item", "path": PATH,
+        "value": {"key": "id", "value": random_id(schema, rng), "updates": {"done": True}}
+    })
+
+
+def remove_op(schema: UISchema, service: InstanceService, rng: random.Random, step: int) -> None:
+    apply(schema, service, {"op": "remove_from_list", "path": PATH, "value": {"key": "id", "value": random_id(schema, rng)}})
+    apply(schema, service, {"op": "append_to_list", "path": PATH, "value": {"id": ROWS + step, "title": "New", "done": False}})
+
+
+def mixed_op(schema: UISchema, service: InstanceService, rng: random.Random, step: int) -> None:
+    kind = step % 4
+    if kind == 0:
+        apply(schema, service, {"op": "append_to_list", "path": PATH, "value": {"id": ROWS + step, "title": "New", "done": False}})
+    elif kind == 1:
+        apply(schema, service, {"op": "prepend_to_list", "path": PATH, "value": {"id": -step, "title": "First", "done": False}})
+    elif kind == 2:
+        apply(schema, service, {"op": "remove_from_list", "path": PATH, "value": {"key": "id", "value": random_id(schema, rng)}})
+    else:
+        update_op(schema, service, rng, step)
+
+
+def measure(indexed: bool, number: int, op: Callable[[UISchema, InstanceService, random.Random, int], None]) -> float:
+    """返回平均耗时（us）"""
+    settings.table_row_index = indexed
+    schema, service = build_service()
+    rng = random.Random(42)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        # 第一次修改复制列表（见 list_journal.py），第二次构建索引
+        op(schema, service, rng, 0)
+        op(schema, service, rng, 1)
+        start = time.perf_counter()
+        for step in range(2, number + 2):
+            op(schema, service, rng, step)
+        elapsed = time.perf_counter() - start
+    return elapsed / number * 1e6
+
+
+cases: list[tuple[str, Callable[[UISchema, InstanceService, random.Random, int], None]]] = [
+    ("update by id", update_op),
+    ("remove by id", remove_op),
+    ("mixed", mixed_op),
+]
+
+print(f"{ROWS} rows; us per op (linear scan -> row index)")
+for name, op in cases:
+    linear = measure(False, 30, op)
+    indexed = measure(True, 2_000, op)
+    print(f"{name:>13s} {linear:10.0f} -> {indexed:7.1f} ({linear / indexed:5.0f}x)")
+settings.table_row_index = True
@@ -0,0 +1,57 @@
+"""GET /ui/schema 基准：每次请求重新序列化 vs 按版本缓存编码后的 JSON vs 304
+
+demo 实例的 tasks 表格填入 ROWS 行，连续请求 REQUESTS 次（schema 不变）。
+- 无缓存：每次请求前 touch() 使缓存失效，相当于原来每次都 model_dump
+- 缓存：直接返回缓存的字节
+- 304：客户端带 If-None-Match，不返回 body
+
+运行方式（仓库根目录）：
+    python -m tests.bench_schema_cache
+"""
+
+import asyncio
+import contextlib
+import os
+import time
+
+import httpx
+
+from backend.fastapi.main import app, schema_manager
+
+ROWS = 2000
+REQUESTS = 200
+
+
+async def run(mode: str) -> tuple[float, int]:
+    """返回 (每次请求耗时 ms, 每次请求的响应字节数)"""
+    schema = schema_manager.get("demo")
+    assert schema is not None
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        first = await client.get("/ui/schema", params={"instanceId": "demo"})
+        headers = {"If-None-Match": first.headers["etag"]} if mode == "304" else {}
+        size = 0
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            if mode == "uncached":
+                _ = schema.touch()
+            response = await client.get("/ui/schema", params={"instanceId": "demo"}, headers=headers)
+            size = len(response.content)
+        elapsed = time.perf_counter() - start
+    return elapsed / REQUESTS * 1000, size
+
+
+schema = schema_manager.get("demo")
+assert schema is not None
+schema.state.params["tasks"] = [
+    {"id": str(i), "name": f"task {i}", "status": "todo", "priority": i % 5, "assignee": f"user {i % 17}"}
+    for i in range(ROWS)
+]
+_ = schema.touch()
+
+print(f"GET /ui/schema x {REQUESTS}, tasks = {ROWS} rows")
+print(f"{'mode':>10s} {'ms/req':>8s} {'bytes':>9s}")
+for mode in ("uncached", "cached", "304"):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        per_request, size = asyncio.run(run(mode))
+    print(f"{mode:>10s} {per_request:8.3f} {size:9d}")
@@ -0,0 +1,67 @@
+"""Schema 索引微基准：线性扫描 vs SchemaIndex
+
+在包含数百个 block 的 schema 上查找 block 内 action、全局 action 和 block id。
+
+运行方式（仓库根目录）：
+    python -m tests.bench_schema_index
+"""
+
+import timeit
+
+from backend.fastapi.models import UISchema, Block, BlockProps, ActionConfig, BaseFieldConfig
+from backend.fastapi.services.schema_index import get_schema_index
+
+
+def build_schema(block_count: int) -> UISchema:
+    blocks = [
+        Block(
+            id=f"block_{i}",
+            layout="form",
+            props=BlockProps(
+                fields=[BaseFieldConfig(key=f"f_{i}_{j}", label=f"F{j}", type="text") for j in range(5)],
+                actions=[ActionConfig(id=f"a_{j}", label=f"A{j}") for j in range(3)],
+            ),
+        )
+        for i in range(block_count)
+    ]
+    actions = [ActionConfig(id=f"global_{i}", label=f"G{i}") for i in range(50)]
+    return UISchema(page_key="bench", blocks=blocks, actions=actions)
+
+
+def linear_find_action(schema: UISchema, action_id: str, block_id: str | None) -> ActionConfig | None:
+    """改造前 handle_action 的查找方式"""
+    if block_id:
+        for block in schema.blocks:
+            if block.id == block_id and block.props and block.props.actions:
+                for action in block.props.actions:
+                    if action.id == action_id:
+                        return action
+    for action in schema.actions:
+        if action.id == action_id:
+            return action
+    return None
+
+
+N = 20_000
+print(f"{'blocks':>7s} {'lookup':28s} {'linear us/op':>13s} {'index us/op':>12s} {'speedup':>8s}")
+for block_count in (50, 200, 500):
+    schema = build_schema(block_count)
+    index = get_schema_index(schema)
+    last_block = f"block_{block_count - 1}"
+
+    cases = [
+        ("block action (last block)",
+         lambda: linear_find_action(schema, "a_2", last_block),
+         lambda: index.find_action("a_2", last_block)),
+        ("global action",
+         lambda: linear_find_action(schema, "global_49", None),
+         lambda: index.find_action("global_49")),
+        ("block id exists",
+         lambda: last_block in [block.id for block in schema.blocks],
+         lambda: index.has_block(last_block)),
+    ]
+    for name, linear, indexed in cases:
+        assert linear() == indexed() or (linear() is True and indexed() is True)
+        before = timeit.timeit(linear, number=N) / N * 1e6
+        after = timeit.timeit(indexed, number=N) / N * 1e6
+        print(f"{block_count:7d} {name:28s} {before:13.2f} {after:12.2f} {before / after:7.1f}x")
@@ -0,0 +1,90 @@
+"""窗口表格基准：每次列表修改下发整个列表 vs 按订阅下发变化的行
+
+ROWS 行的表格，CONNECTIONS 个客户端各自订阅一页（PAGE 行）。
+连续 EDITS 次 update_list_item 修改可见页中的一行，统计发送的字节数和 CPU 时间。
+
+运行方式（仓库根目录）：
+    python -m tests.bench_table_window
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+
+from backend.core import get_default_instances
+from backend.core.manager import SchemaManager
+from backend.fastapi.services.schema_index import get_schema_index
+from backend.fastapi.services.sync_service import SchemaSyncService
+from backend.fastapi.services.table_window import TableWindowService
+from backend.fastapi.services.websocket.handlers.manager import WebSocketManager
+
+ROWS = 10_000
+CONNECTIONS = 20
+PAGE = 20
+EDITS = 50
+
+logging.disable(logging.WARNING)
+
+
+class FakeWebSocket:
+    """统计收到的消息数和字节数"""
+
+    def __init__(self) -> None:
+        self.messages: int = 0
+        self.bytes: int = 0
+
+    async def accept(self, subprotocol: str | None = None) -> None:
+        pass
+
+    async def send_text(self, data: str) -> None:
+        self.messages += 1
+        self.bytes += len(data.encode("utf-8"))
+
+
+async def run(windowed: bool) -> tuple[int, float]:
+    """返回 (总字节数, CPU 时间)"""
+    schema_manager = SchemaManager()
+    schema = get_default_instances()["demo"]
+    block_index, field_index = get_schema_index(schema).field_keys["tasks"]
+    schema.blocks[block_index].props.fields[field_index].server_window = windowed
+    schema.state.params["tasks"] = [
+        {"id": str(i), "name": f"task {i}", "status": "todo", "priority": i % 5}
+        for i in range(ROWS)
+    ]
+    schema_manager.set("demo", schema)
+    ws_manager = WebSocketManager(send_queue_size=EDITS + 2)
+    table_windows = TableWindowService(schema_manager, ws_manager)
+    sync = SchemaSyncService(schema_manager, ws_manager, table_windows)
+    connections: list[FakeWebSocket] = []
+    for _ in range(CONNECTIONS):
+        websocket = FakeWebSocket()
+        await ws_manager.connect(websocket, "demo")  # pyright: ignore[reportArgumentType]
+        if windowed:
+            _ = ws_manager.send_to_connection(
+                websocket,  # pyright: ignore[reportArgumentType]
+                table_windows.subscribe(websocket, "demo", "tasks", 0, PAGE)  # pyright: ignore[reportArgumentType]
+            )
+        connections.append(websocket)
+    await asyncio.sleep(0.05)
+    baseline = sum(websocket.bytes for websocket in connections)
+
+    start = time.process_time()
+    for i in range(EDITS):
+        async with schema_manager.lock("demo"):
+            tasks = schema.state.params["tasks"]
+            tasks[i % PAGE] = {**tasks[i % PAGE], "status": f"done {i}"}
+            _ = await sync.publish("demo", ["state.params.tasks"], immediate=True)
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.05)
+    elapsed = time.process_time() - start
+    return sum(websocket.bytes for websocket in connections) - baseline, elapsed
+
+
+print(f"{ROWS} rows, {CONNECTIONS} connections x {PAGE}-row page, {EDITS} row edits")
+print(f"{'mode':>10s} {'bytes':>12s} {'bytes/edit':>11s} {'cpu ms':>8s}")
+for windowed in (False, True):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        size, elapsed = asyncio.run(run(windowed))
+    print(f"{'window' if windowed else 'full':>10s} {size:12d} {size // EDITS:11d} {elapsed * 1000:8.1f}")
@@ -0,0 +1,96 @@
+"""模板渲染微基准：正则逐次替换 vs 预编译模板
+
+场景：append_to_list 的 value 模板在 action 点击时被反复渲染。
+
+运行方式（仓库根目录）：
+    python -m tests.bench_template
+"""
+
+import re
+import timeit
+from typing import Any
+
+from backend.core.defaults import get_default_instances
+from backend.fastapi.services.patch import (
+    get_nested_value, render_template, render_dict_template, render_block_template
+)
+
+
+def legacy_render_template(schema: Any, template: str) -> str:
+    """改造前的实现：每次调用都正则匹配（去掉日志输出）"""
+    def replace_match(match):
+        return str(get_nested_value(schema, match.group(1), ""))
+    return re.sub(r'\$\{([^}]+)\}', replace_match, template)
+
+
+def legacy_render_dict_template(schema: Any, template_dict: dict[str, Any]) -> dict[str, Any]:
+    """改造前的实现：每次调用都递归判断类型"""
+    result: dict[str, Any] = {}
+    for key, value in template_dict.items():
+        if isinstance(value, str):
+            result[key] = legacy_render_template(schema, value)
+        elif isinstance(value, dict):
+            result[key] = legacy_render_dict_template(schema, value)
+        elif isinstance(value, list):
+            result[key] = [
+                legacy_render_template(schema, item) if isinstance(item, str)
+                else legacy_render_dict_template(schema, item) if isinstance(item, dict)
+                else item
+                for item in value
+            ]
+        else:
+            result[key] = value
+    return result
+
+
+schema = get_default_instances()['demo']
+schema.state.params["next_id"] = 7
+schema.state.runtime["timestamp"] = "2024-01-01 00:00:00"
+schema.touch()
+
+value_template = {
+    "id": "${state.params.next_id}",
+    "name": "新项目",
+    "added_at": "${state.runtime.timestamp}",
+    "tags": ["${state.params.next_id}", 1, {"by": "${state.runtime.missing}"}],
+}
+string_template = "表单已提交！编号: ${state.params.next_id}，时间: ${state.runtime.timestamp}"
+block_template = {"id": "b_${state.params.next_id}", "value": "${keep}",
+                  "children": [{"label": "${state.params.next_id}", "value": "${keep}"}]}
+
+# 正确性：与改造前输出一致
+assert render_template(schema, string_template) == legacy_render_template(schema, string_template)
+assert render_dict_template(schema, value_template) == legacy_render_dict_template(schema, value_template)
+rendered_block = render_block_template(schema, block_template)
+assert rendered_block["value"] == "${keep}" and rendered_block["children"][0]["value"] == "${keep}"
+assert rendered_block["children"][0]["label"] == "7"
+
+# schema 修改后缓存失效
+schema.state.params["next_id"] = 8
+schema.touch()
+assert render_dict_template(schema, value_template)["id"] == "8"
+
+N = 10_000
+cases = [
+    ("string template", lambda: legacy_render_template(schema, string_template),
+     lambda: render_template(schema, string_template)),
+    ("append_to_list value", lambda: legacy_render_dict_template(schema, value_template),
+     lambda: render_dict_template(schema, value_template)),
+]
+
+
+def bump_and_render() -> None:
+    # 每次渲染前 schema 都发生变化（最坏情况，缓存全部失效）
+    schema.touch()
+    render_dict_template(schema, value_template)
+
+
+print(f"{'case':32s} {'legacy us/op':>13s} {'compiled us/op':>15s} {'speedup':>8s}")
+for name, legacy, compiled in cases:
+    before = timeit.timeit(legacy, number=N) / N * 1e6
+    after = timeit.timeit(compiled, number=N) / N * 1e6
+    print(f"{name:32s} {before:13.2f} {after:15.2f} {before / after:7.2f}x")
+
+before = timeit.timeit(lambda: (schema.touch(), legacy_render_dict_template(schema, value_template)), number=N) / N * 1e6
+after = timeit.timeit(bump_and_render, number=N) / N * 1e6
+print(f"{'value (schema changes each time)':32s} {before:13.2f} {after:15.2f} {before / after:7.2f}x")
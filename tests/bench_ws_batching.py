@@ -0,0 +1,70 @@
+"""增量合并推送基准：每条增量立即推送 vs 按实例窗口合并
+
+Agent 连续发出 BURST 次 patch_ui_state，CONNECTIONS 个客户端连接在同一实例上。
+统计客户端收到的消息数（每条消息触发一次重新渲染）、发送的字节数和 CPU 时间。
+
+运行方式（仓库根目录）：
+    python -m tests.bench_ws_batching
+"""
+
+import asyncio
+import logging
+import time
+
+from backend.core import get_default_instances
+from backend.core.manager import SchemaManager
+from backend.fastapi.services.sync_service import SchemaSyncService
+from backend.fastapi.services.websocket.handlers.manager import WebSocketManager
+
+CONNECTIONS = 200
+BURST = 30
+
+logging.disable(logging.WARNING)
+
+
+class FakeWebSocket:
+    """统计收到的消息数和字节数"""
+
+    def __init__(self) -> None:
+        self.messages: int = 0
+        self.bytes: int = 0
+
+    async def accept(self, subprotocol: str | None = None) -> None:
+        pass
+
+    async def send_text(self, data: str) -> None:
+        self.messages += 1
+        self.bytes += len(data.encode("utf-8"))
+
+
+async def run(interval_ms: float) -> tuple[int, int, float]:
+    """返回 (每个客户端收到的消息数, 总字节数, CPU 时间)"""
+    schema_manager = SchemaManager()
+    schema_manager.set("demo", get_default_instances()["demo"])
+    ws_manager = WebSocketManager(send_queue_size=BURST + 1, flush_interval=interval_ms / 1000)
+    sync = SchemaSyncService(schema_manager, ws_manager)
+    connections: list[FakeWebSocket] = []
+    for _ in range(CONNECTIONS):
+        websocket = FakeWebSocket()
+        await ws_manager.connect(websocket, "demo")  # pyright: ignore[reportArgumentType]
+        connections.append(websocket)
+    schema = schema_manager.get("demo")
+    assert schema is not None
+
+    start = time.process_time()
+    for i in range(BURST):
+        async with schema_manager.lock("demo"):
+            schema.state.params["counter"] = i
+            _ = await sync.publish("demo", ["state.params.counter"])
+        # Agent 两次调用之间的间隔（HTTP 往返）
+        await asyncio.sleep(0.001)
+    await asyncio.sleep(interval_ms / 1000 + 0.05)
+    elapsed = time.process_time() - start
+    return connections[0].messages, sum(websocket.bytes for websocket in connections), elapsed
+
+
+print(f"{CONNECTIONS} connections, burst of {BURST} agent patches")
+print(f"{'window':>8s} {'msgs/client':>11s} {'bytes':>10s} {'cpu ms':>8s}")
+for interval_ms in (0, 16, 50):
+    messages, size, elapsed = asyncio.run(run(interval_ms))
+    print(f"{interval_ms:6.0f}ms {messages:11d} {size:10d} {elapsed * 1000:8.1f}")
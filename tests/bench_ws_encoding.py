@@ -0,0 +1,114 @@
+"""WebSocket 广播编码基准：每个连接各自序列化 vs 只编码一次
+
+向 N 个连接推送同一条 schema_update（demo 实例 / 大 Schema），统计推送
+ROUNDS 次并全部发送完成所消耗的 CPU 时间：
+- per-connection：原实现，对每个连接调用 send_json（每次都重新 json.dumps）
+- encode-once：WebSocketManager 编码一次，所有连接共用同一个文本帧
+
+运行方式（仓库根目录）：
+    python -m tests.bench_ws_encoding
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any
+
+from backend.core import get_default_instances
+from backend.fastapi.models import UISchema, Block, BlockProps, ActionConfig, BaseFieldConfig
+from backend.fastapi.services.websocket.encoding import JSON_BACKEND
+from backend.fastapi.services.websocket.handlers.manager import WebSocketManager
+
+ROUNDS = 3
+CONNECTIONS = (1, 10, 100, 1000)
+INSTANCE = "demo"
+
+logging.disable(logging.WARNING)
+
+
+class FakeWebSocket:
+    """发送开销只有序列化本身的 WebSocket"""
+
+    def __init__(self) -> None:
+        self.messages: int = 0
+
+    async def accept(self, subprotocol: str | None = None) -> None:
+        pass
+
+    async def send_json(self, data: Any) -> None:
+        # 与 starlette WebSocket.send_json 相同的序列化
+        _ = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        self.messages += 1
+
+    async def send_text(self, data: str) -> None:
+        self.messages += 1
+
+
+def build_large_schema(block_count: int = 200) -> UISchema:
+    blocks = [
+        Block(
+            id=f"block_{i}",
+            layout="form",
+            props=BlockProps(
+                fields=[BaseFieldConfig(key=f"f_{i}_{j}", label=f"F{j}", type="text") for j in range(10)],
+                actions=[ActionConfig(id=f"a_{i}_{j}", label=f"A{j}") for j in range(3)],
+            ),
+        )
+        for i in range(block_count)
+    ]
+    return UISchema(page_key="bench", blocks=blocks, actions=[])
+
+
+def snapshot_message(schema: UISchema) -> dict[str, Any]:
+    return {
+        "type": "schema_update",
+        "instance_name": INSTANCE,
+        "version": 1,
+        "schema": schema.model_dump(by_alias=True, mode="json"),
+        "highlight": None
+    }
+
+
+async def per_connection(message: dict[str, Any], count: int) -> float:
+    connections = [FakeWebSocket() for _ in range(count)]
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        for websocket in connections:
+            await websocket.send_json(message)
+    return time.process_time() - start
+
+
+async def encode_once(message: dict[str, Any], count: int) -> float:
+    manager = WebSocketManager(send_queue_size=ROUNDS + 1)
+    connections = [FakeWebSocket() for _ in range(count)]
+    for websocket in connections:
+        await manager.connect(websocket, INSTANCE)  # pyright: ignore[reportArgumentType]
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        _ = await manager.send_message(INSTANCE, message)
+    # 等所有写任务发送完成
+    while any(websocket.messages < ROUNDS for websocket in connections):
+        await asyncio.sleep(0)
+    elapsed = time.process_time() - start
+    for websocket in connections:
+        manager.disconnect(websocket, INSTANCE)  # pyright: ignore[reportArgumentType]
+    return elapsed
+
+
+schemas = {
+    "demo": get_default_instances()["demo"],
+    "large (200 blocks)": build_large_schema(),
+}
+print(f"JSON backend: {JSON_BACKEND}, {ROUNDS} broadcasts per run")
+print(f"{'schema':20s} {'size':>8s} {'conns':>6s} {'per-conn ms':>12s} {'encode-once ms':>15s} {'speedup':>8s}")
+for name, schema in schemas.items():
+    message = snapshot_message(schema)
+    size = len(json.dumps(message, separators=(",", ":")))
+    for count in CONNECTIONS:
+        before = asyncio.run(per_connection(message, count))
+        after = asyncio.run(encode_once(message, count))
+        print(
+            f"{name:20s} {size // 1024:6d}KB {count:6d} {before * 1000:12.1f} {after * 1000:15.1f} "
+            f"{before / max(after, 1e-9):7.1f}x"
+        )
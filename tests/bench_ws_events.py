@@ -0,0 +1,94 @@
+"""事件往返延迟基准：POST /ui/event vs WebSocket 连接上的事件 + ack
+
+在本进程内启动 uvicorn，客户端依次发送 ROUNDS 次 action:click（demo 实例的 +1 按钮），
+分别统计 HTTP（keep-alive 连接）和 WebSocket 事件的往返延迟百分位。
+WebSocket 事件的往返包括先于 ack 到达的增量推送。
+
+运行方式（仓库根目录）：
+    python -m tests.bench_ws_events
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import socket
+import statistics
+import time
+
+import httpx
+import uvicorn
+import websockets
+
+from backend.fastapi.main import app
+
+ROUNDS = 500
+
+EVENT = {
+    "type": "action:click",
+    "pageKey": "demo",
+    "payload": {"actionId": "inc", "blockId": "counter_block", "params": {}},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentiles(samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p50 = statistics.median(ordered)
+    p99 = ordered[int(len(ordered) * 0.99) - 1]
+    return f"p50 {p50 * 1000:6.2f} ms  p99 {p99 * 1000:6.2f} ms  mean {statistics.fmean(ordered) * 1000:6.2f} ms"
+
+
+async def bench_http(port: int) -> list[float]:
+    samples: list[float] = []
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}") as client:
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            response = await client.post("/ui/event", json=EVENT)
+            assert response.json()["status"] == "success"
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def bench_websocket(port: int) -> list[float]:
+    samples: list[float] = []
+    async with websockets.connect(f"ws://127.0.0.1:{port}/ui/ws/demo") as ws:
+        for request_id in range(ROUNDS):
+            start = time.perf_counter()
+            await ws.send(json.dumps({"type": "event", "id": request_id, "event": EVENT}))
+            while True:
+                message = json.loads(await ws.recv())
+                if message.get("type") == "ack" and message.get("id") == request_id:
+                    break
+            assert message["result"]["status"] == "success"
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def main() -> None:
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    # 路由的调试输出不计入结果
+    with contextlib.redirect_stdout(io.StringIO()):
+        _ = await bench_http(port)  # 预热
+        http_samples = await bench_http(port)
+        ws_samples = await bench_websocket(port)
+
+    server.should_exit = True
+    await serve_task
+
+    print(f"{ROUNDS} sequential action:click round-trips")
+    print(f"http      {percentiles(http_samples)}")
+    print(f"websocket {percentiles(ws_samples)}")
+
+
+asyncio.run(main())
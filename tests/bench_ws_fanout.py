@@ -0,0 +1,132 @@
+"""WebSocket 推送基准：一个慢连接对发布方和其他连接的影响
+
+FAST_CLIENTS 个正常连接 + 1 个每条消息耗时 SLOW_SEND_DELAY 的慢连接，
+连续发布 PUBLISHES 个增量。对比：
+- sequential：原实现，发布方依次 await 每个连接的 send_json
+- outbox：每个连接一个发送队列和写任务，发布方只入队
+
+再分别用三种慢消费者策略跑一遍，检查慢连接最终收到的内容。
+
+运行方式（仓库根目录）：
+    python -m tests.bench_ws_fanout
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any
+
+from backend.fastapi.services.websocket.handlers.manager import WebSocketManager
+
+FAST_CLIENTS = 100
+PUBLISHES = 50
+SLOW_SEND_DELAY = 0.02
+QUEUE_SIZE = 16
+INSTANCE = "demo"
+
+logging.disable(logging.WARNING)
+
+
+class FakeWebSocket:
+    """只记录收到的消息的 WebSocket"""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay: float = delay
+        self.received: list[dict[str, Any]] = []
+        self.received_at: list[float] = []
+        self.closed: bool = False
+
+    async def accept(self, subprotocol: str | None = None) -> None:
+        pass
+
+    async def send_json(self, message: dict[str, Any]) -> None:
+        await self.send_text(json.dumps(message))
+
+    async def send_text(self, text: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.received.append(json.loads(text))
+        self.received_at.append(time.perf_counter())
+
+    async def close(self, code: int = 1000) -> None:
+        self.closed = True
+
+
+def delta(version: int) -> dict[str, Any]:
+    return {
+        "type": "patch", "instance_name": INSTANCE, "patch_id": version,
+        "baseVersion": version - 1, "version": version,
+        "patch": {"state.params.counter": version},
+        "ops": [{"op": "replace", "path": "/state/params/counter", "value": version}],
+        "highlight": None
+    }
+
+
+def snapshot(instance_name: str) -> dict[str, Any]:
+    return {"type": "schema_update", "instance_name": instance_name, "version": PUBLISHES, "schema": {}}
+
+
+async def run_sequential() -> tuple[float, float]:
+    """原实现：返回 (发布总耗时, 正常连接收到最后一条消息的延迟)"""
+    fast = [FakeWebSocket() for _ in range(FAST_CLIENTS)]
+    connections = [FakeWebSocket(SLOW_SEND_DELAY), *fast]
+    start = time.perf_counter()
+    for version in range(1, PUBLISHES + 1):
+        for websocket in connections:
+            await websocket.send_json(delta(version))
+    elapsed = time.perf_counter() - start
+    return elapsed, max(ws.received_at[-1] for ws in fast) - start
+
+
+async def run_outbox(policy: str) -> tuple[float, float, FakeWebSocket, int]:
+    """每连接发送队列：返回 (发布总耗时, 正常连接延迟, 慢连接, 掉线的慢连接数)"""
+    manager = WebSocketManager(send_queue_size=QUEUE_SIZE, slow_consumer_policy=policy)
+    manager.set_snapshot_provider(snapshot)
+    slow = FakeWebSocket(SLOW_SEND_DELAY)
+    fast = [FakeWebSocket() for _ in range(FAST_CLIENTS)]
+    for websocket in (slow, *fast):
+        await manager.connect(websocket, INSTANCE)  # pyright: ignore[reportArgumentType]
+
+    start = time.perf_counter()
+    for version in range(1, PUBLISHES + 1):
+        _ = await manager.send_delta(
+            INSTANCE, delta(version)["ops"], version, version - 1,
+            patch=delta(version)["patch"], patch_id=version
+        )
+        # 让出事件循环，模拟发布之间的间隔
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+
+    while any(len(ws.received) < PUBLISHES for ws in fast):
+        await asyncio.sleep(0.001)
+    fast_latency = max(ws.received_at[-1] for ws in fast) - start
+    # 等慢连接发送完
+    await asyncio.sleep(SLOW_SEND_DELAY * (QUEUE_SIZE + 2))
+    dropped = 1 if slow.closed else 0
+    for websocket in (slow, *fast):
+        manager.disconnect(websocket, INSTANCE)  # pyright: ignore[reportArgumentType]
+    return elapsed, fast_latency, slow, dropped
+
+
+def describe(slow: FakeWebSocket) -> str:
+    kinds = [m["type"] for m in slow.received]
+    last = slow.received[-1] if slow.received else {}
+    return (
+        f"{kinds.count('patch')} patch + {kinds.count('schema_update')} snapshot, "
+        f"final version {last.get('version')}, closed={slow.closed}"
+    )
+
+
+print(f"{FAST_CLIENTS} fast clients + 1 slow ({SLOW_SEND_DELAY * 1000:.0f}ms/msg), {PUBLISHES} publishes")
+print(f"{'mode':22s} {'publish total':>14s} {'fast delivered':>15s}")
+publish_time, fast_latency = asyncio.run(run_sequential())
+print(f"{'sequential':22s} {publish_time * 1000:12.1f}ms {fast_latency * 1000:13.1f}ms")
+
+for policy in ("snapshot", "coalesce", "disconnect"):
+    publish_time, fast_latency, slow, _ = asyncio.run(run_outbox(policy))
+    print(f"{'outbox/' + policy:22s} {publish_time * 1000:12.1f}ms {fast_latency * 1000:13.1f}ms   slow: {describe(slow)}")
+    if policy == "disconnect":
+        assert slow.closed
+    else:
+        assert slow.received[-1]["version"] == PUBLISHES
@@ -0,0 +1,57 @@
+"""WebSocket 线路格式基准：完整快照在 json / deflate / msgpack 下的帧大小和编解码耗时
+
+场景：demo 实例，以及 tasks 表格扩充到 TABLE_ROWS 行的表格密集实例。
+msgpack 未安装时跳过。
+
+运行方式（仓库根目录）：
+    python -m tests.bench_ws_formats
+"""
+
+import json
+import timeit
+import zlib
+from typing import Any
+
+from backend.core import get_default_instances
+from backend.fastapi.services.websocket.encoding import EncodedFrames, available_formats, msgpack
+
+TABLE_ROWS = 5000
+N = 20
+
+
+def snapshot_message(schema_dump: dict[str, Any]) -> dict[str, Any]:
+    return {"type": "schema_update", "instance_name": "demo", "version": 1, "schema": schema_dump, "highlight": None}
+
+
+def decode(fmt: str, frame: str | bytes) -> Any:
+    if fmt == "json":
+        return json.loads(frame)
+    if fmt == "deflate":
+        assert isinstance(frame, bytes)
+        return json.loads(zlib.decompress(frame, -zlib.MAX_WBITS))
+    assert msgpack is not None
+    return msgpack.unpackb(frame, raw=False)
+
+
+demo = get_default_instances()["demo"].model_dump(by_alias=True, mode="json")
+table_heavy = get_default_instances()["demo"].model_dump(by_alias=True, mode="json")
+table_heavy["state"]["params"]["tasks"] = [
+    {"id": i, "name": f"任务 {i}", "status": "active", "progress": {"current": i % 100, "total": 100},
+     "assignee": "张三", "priority": "high"}
+    for i in range(TABLE_ROWS)
+]
+
+print(f"formats: {available_formats()}")
+print(f"{'instance':14s} {'format':8s} {'size':>10s} {'ratio':>6s} {'encode ms':>10s} {'decode ms':>10s}")
+for name, schema_dump in (("demo", demo), (f"tasks x{TABLE_ROWS}", table_heavy)):
+    message = snapshot_message(schema_dump)
+    json_text = EncodedFrames(message).get("json")
+    assert isinstance(json_text, str)
+    json_size = len(json_text.encode("utf-8"))
+    for fmt in available_formats():
+        frame = EncodedFrames(message).get(fmt)
+        assert decode(fmt, frame) == message
+        size = len(frame.encode("utf-8") if isinstance(frame, str) else frame)
+        encode_ms = timeit.timeit(lambda: EncodedFrames(message).get(fmt), number=N) / N * 1000
+        decode_ms = timeit.timeit(lambda: decode(fmt, frame), number=N) / N * 1000
+        print(f"{name:14s} {fmt:8s} {size:10d} {size / json_size:6.2f} {encode_ms:10.2f} {decode_ms:10.2f}")
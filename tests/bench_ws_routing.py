@@ -0,0 +1,75 @@
+"""定向推送基准：switch_instance / highlight_block 全局广播 vs 按主题和实例路由
+
+CONNECTIONS 个连接平均分布在 INSTANCES 个实例上，其中 FOLLOWERS 个订阅了控制频道。
+模拟 Agent 连续编辑 EDITS 次（每次 patch_ui_state 之后切换到被编辑的实例并定位 block），
+统计发出的消息数和 CPU 时间：
+- broadcast：原实现，两条消息都发给所有连接
+- targeted：switch_instance 只发给不在目标实例上的控制频道订阅者，highlight_block 只发给目标实例
+
+运行方式（仓库根目录）：
+    python -m tests.bench_ws_routing
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+from backend.fastapi.services.websocket.handlers.manager import WebSocketManager, TOPIC_CONTROL
+
+CONNECTIONS = 1000
+INSTANCES = 100
+EDITS = 200
+
+logging.disable(logging.WARNING)
+
+
+class FakeWebSocket:
+    """只统计收到消息数的 WebSocket"""
+
+    def __init__(self) -> None:
+        self.messages: int = 0
+
+    async def accept(self, subprotocol: str | None = None) -> None:
+        pass
+
+    async def send_text(self, data: str) -> None:
+        self.messages += 1
+
+
+async def run(mode: str, followers: int) -> tuple[int, float]:
+    """返回 (发出的消息数, CPU 时间)"""
+    manager = WebSocketManager(send_queue_size=EDITS * 2 + 1)
+    connections: list[FakeWebSocket] = []
+    for i in range(CONNECTIONS):
+        websocket = FakeWebSocket()
+        await manager.connect(websocket, f"instance_{i % INSTANCES}")  # pyright: ignore[reportArgumentType]
+        if i < followers:
+            manager.subscribe(websocket, [TOPIC_CONTROL])  # pyright: ignore[reportArgumentType]
+        connections.append(websocket)
+
+    start = time.process_time()
+    for edit in range(EDITS):
+        target = f"instance_{edit % INSTANCES}"
+        switch: dict[str, Any] = {"type": "switch_instance", "instance_name": target}
+        highlight: dict[str, Any] = {"type": "highlight_block", "block_id": "block_0"}
+        if mode == "broadcast":
+            _ = await manager.broadcast(switch)
+            _ = await manager.broadcast(highlight)
+        else:
+            _ = manager.send_to_topic(TOPIC_CONTROL, switch, exclude_instance=target)
+            _ = await manager.send_message(target, highlight)
+            _ = manager.send_to_topic(TOPIC_CONTROL, highlight, exclude_instance=target)
+        # 让写任务发送
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.05)
+    elapsed = time.process_time() - start
+    return sum(websocket.messages for websocket in connections), elapsed
+
+
+print(f"{CONNECTIONS} connections over {INSTANCES} instances, {EDITS} agent edits (switch + highlight)")
+print(f"{'followers':>9s} {'mode':10s} {'messages':>9s} {'cpu ms':>8s}")
+for followers in (10, CONNECTIONS):
+    for mode in ("broadcast", "targeted"):
+        messages, elapsed = asyncio.run(run(mode, followers))
+        print(f"{followers:9d} {mode:10s} {messages:9d} {elapsed * 1000:8.1f}")
@@ -0,0 +1,43 @@
+"""测试公共夹具：按 main.py 的方式组装一套独立的运行时服务（不加载默认实例、不启用持久化和集群）"""
+
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+
+from backend.core import SchemaManager, PatchHistoryManager
+from backend.fastapi.routes.event_routes import EventHandler, register_event_routes
+from backend.fastapi.services.coalescer import FieldChangeCoalescer
+from backend.fastapi.services.instance_service import InstanceService
+from backend.fastapi.services.sync_service import SchemaSyncService
+from backend.fastapi.services.table_window import TableWindowService
+from backend.fastapi.services.websocket.handlers.manager import WebSocketManager
+
+
+class Runtime:
+    """一套运行时服务及注册好的 /ui/event 处理函数"""
+
+    def __init__(self, coalesce_window: float = 0.0, flush_interval: float = 0.0) -> None:
+        self.app: FastAPI = FastAPI()
+        self.schema_manager: SchemaManager = SchemaManager()
+        self.instance_service: InstanceService = InstanceService(self.schema_manager)
+        self.patch_history: PatchHistoryManager = PatchHistoryManager()
+        self.ws_manager: WebSocketManager = WebSocketManager(flush_interval=flush_interval)
+        self.table_windows: TableWindowService = TableWindowService(self.schema_manager, self.ws_manager)
+        self.schema_sync: SchemaSyncService = SchemaSyncService(self.schema_manager, self.ws_manager, self.table_windows)
+        self.field_coalescer: FieldChangeCoalescer = FieldChangeCoalescer(
+            self.schema_manager, self.patch_history, self.schema_sync, window=coalesce_window
+        )
+        self.handle_event: EventHandler = register_event_routes(
+            self.app, self.schema_manager, self.instance_service, self.patch_history,
+            self.ws_manager, "demo", self.schema_sync, self.field_coalescer
+        )
+
+    async def event(self, instance_name: str, event_type: str, **payload: Any) -> dict[str, Any]:
+        """发送一个 /ui/event 事件"""
+        return await self.handle_event({"type": event_type, "pageKey": instance_name, "payload": payload})
+
+
+@pytest.fixture
+def runtime() -> Runtime:
+    return Runtime()
@@ -0,0 +1,158 @@
+"""增量批量推送测试（PatchBatcher）
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_batcher.py
+"""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from backend.fastapi.services.websocket.handlers.batcher import PatchBatcher
+from backend.fastapi.services.websocket.handlers.dispatcher import MessageDispatcher, build_patch_message
+from backend.fastapi.services.websocket.handlers.manager import WebSocketManager
+
+
+class RecordingDispatcher:
+    """记录发给实例的消息"""
+
+    def __init__(self) -> None:
+        self.sent: list[tuple[str, dict[str, Any]]] = []
+
+    async def send_to_instance(self, instance_name: str, message: dict[str, Any]) -> bool:
+        self.sent.append((instance_name, message))
+        return True
+
+
+def delta(base_version: int, version: int, key: str = "count") -> dict[str, Any]:
+    return build_patch_message(
+        "demo", {f"state.params.{key}": version}, version, base_version, version,
+        [{"op": "replace", "path": f"/state/params/{key}", "value": version}]
+    )
+
+
+def versions(sent: list[tuple[str, dict[str, Any]]]) -> list[tuple[int, int]]:
+    return [(message["baseVersion"], message["version"]) for _, message in sent]
+
+
+def make_batcher(interval: float) -> tuple[PatchBatcher, RecordingDispatcher]:
+    dispatcher = RecordingDispatcher()
+    batcher = PatchBatcher(dispatcher, interval)  # type: ignore[arg-type]
+    return batcher, dispatcher
+
+
+async def test_deltas_within_interval_merge_into_one_message() -> None:
+    batcher, dispatcher = make_batcher(0.05)
+    for version in range(1, 4):
+        await batcher.add("demo", delta(version - 1, version, key=f"k{version}"))
+    assert dispatcher.sent == []
+    assert batcher.pending_count("demo") == 1
+
+    await asyncio.sleep(0.12)
+    assert versions(dispatcher.sent) == [(0, 3)]
+    [(_, message)] = dispatcher.sent
+    assert [op["path"] for op in message["ops"]] == ["/state/params/k1", "/state/params/k2", "/state/params/k3"]
+    assert message["patch"] == {"state.params.k1": 1, "state.params.k2": 2, "state.params.k3": 3}
+    assert message["patch_id"] == 3
+    assert (batcher.merged, batcher.flushes) == (2, 1)
+    assert batcher.pending_count() == 0
+
+
+async def test_instances_are_batched_separately() -> None:
+    batcher, dispatcher = make_batcher(0.05)
+    await batcher.add("demo", delta(0, 1))
+    await batcher.add("other", {**delta(4, 5), "instance_name": "other"})
+    await batcher.add("demo", delta(1, 2))
+    await batcher.flush_all()
+    assert sorted((name, message["baseVersion"], message["version"]) for name, message in dispatcher.sent) == [
+        ("demo", 0, 2), ("other", 4, 5)
+    ]
+
+
+async def test_immediate_flushes_backlog() -> None:
+    batcher, dispatcher = make_batcher(60.0)
+    await batcher.add("demo", delta(0, 1))
+    await batcher.add("demo", delta(1, 2))
+    assert dispatcher.sent == []
+
+    await batcher.add("demo", delta(2, 3), immediate=True)
+    assert versions(dispatcher.sent) == [(0, 3)]
+    assert batcher.pending_count() == 0
+    # 定时任务已随立即发送取消
+    assert batcher._timers == {}
+
+
+async def test_disabled_batcher_sends_each_delta() -> None:
+    batcher, dispatcher = make_batcher(0.0)
+    assert not batcher.enabled
+    await batcher.add("demo", delta(0, 1))
+    await batcher.add("demo", delta(1, 2))
+    assert versions(dispatcher.sent) == [(0, 1), (1, 2)]
+    assert batcher.merged == 0
+
+
+async def test_seal_starts_new_segment() -> None:
+    batcher, dispatcher = make_batcher(60.0)
+    await batcher.add("demo", delta(0, 1))
+    await batcher.add("demo", delta(1, 2))
+    # 某个连接单独拿到了 v2 的快照：之后的增量不能与 v0 -> v2 合并
+    batcher.seal("demo")
+    await batcher.add("demo", delta(2, 3))
+    await batcher.add("demo", delta(3, 4))
+    assert batcher.pending_count("demo") == 2
+
+    await batcher.flush("demo")
+    assert versions(dispatcher.sent) == [(0, 2), (2, 4)]
+
+
+async def test_seal_without_backlog_is_ignored() -> None:
+    batcher, dispatcher = make_batcher(60.0)
+    batcher.seal("demo")
+    await batcher.add("demo", delta(0, 1))
+    await batcher.add("demo", delta(1, 2))
+    await batcher.flush("demo")
+    assert versions(dispatcher.sent) == [(0, 2)]
+
+
+async def test_gap_is_not_merged() -> None:
+    batcher, dispatcher = make_batcher(60.0)
+    await batcher.add("demo", delta(0, 1))
+    await batcher.add("demo", delta(5, 6))
+    await batcher.flush("demo")
+    assert versions(dispatcher.sent) == [(0, 1), (5, 6)]
+
+
+@pytest.fixture
+def manager(monkeypatch: pytest.MonkeyPatch) -> tuple[WebSocketManager, list[tuple[str, dict[str, Any]]]]:
+    ws_manager = WebSocketManager(flush_interval=60.0)
+    sent: list[tuple[str, dict[str, Any]]] = []
+    dispatcher: MessageDispatcher = ws_manager._dispatcher
+
+    async def send_to_instance(instance_name: str, message: dict[str, Any]) -> bool:
+        sent.append((instance_name, message))
+        return True
+
+    monkeypatch.setattr(dispatcher, "send_to_instance", send_to_instance)
+    return ws_manager, sent
+
+
+async def test_non_patch_send_flushes_pending_deltas(manager: tuple[WebSocketManager, list[tuple[str, dict[str, Any]]]]) -> None:
+    ws_manager, sent = manager
+    _ = await ws_manager.send_delta("demo", [{"op": "add", "path": "/blocks/-", "value": {"id": "new"}}], 1, 0)
+    _ = await ws_manager.send_delta("demo", [{"op": "replace", "path": "/state/params/count", "value": 1}], 2, 1)
+    assert sent == []
+
+    # 定位到新 block 的消息必须在创建它的增量之后到达
+    _ = await ws_manager.send_message("demo", {"type": "highlight", "blockId": "new"})
+    assert [(message["type"], message.get("version")) for _, message in sent] == [("patch", 2), ("highlight", None)]
+    assert sent[0][1]["baseVersion"] == 0
+
+
+async def test_flush_pending_targets_instance(manager: tuple[WebSocketManager, list[tuple[str, dict[str, Any]]]]) -> None:
+    ws_manager, sent = manager
+    _ = await ws_manager.send_delta("demo", [{"op": "replace", "path": "/state/params/count", "value": 1}], 1, 0)
+    await ws_manager.flush_pending("other")
+    assert sent == []
+    await ws_manager.flush_pending()
+    assert [message["version"] for _, message in sent] == [1]
@@ -0,0 +1,196 @@
+"""集群同步测试：副本增量应用与写请求转发
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_cluster.py
+"""
+
+import contextlib
+import io
+from typing import Any
+
+import httpx
+import pytest
+
+from backend.core import InProcessBackplane, InProcessHub
+from backend.core.backplane import rendezvous_owner
+from backend.fastapi.models import UISchema, SchemaPatch
+from backend.fastapi.routes.patch_routes import handle_add_operation, handle_remove_operation
+from backend.fastapi.routes.schema_routes import register_schema_routes
+from backend.fastapi.services.cluster import ClusterSync, OwnershipMiddleware
+from backend.fastapi.services.delta import apply_delta_ops, build_delta_ops, snapshot_param_keys
+from backend.fastapi.services.patch import apply_patch_to_schema
+from backend.fastapi.services.schema_index import get_schema_index
+
+from conftest import Runtime
+
+NODES = ["node-a", "node-b"]
+
+
+def build_schema(page_key: str = "cluster") -> UISchema:
+    return UISchema.model_validate({
+        "page_key": page_key,
+        "state": {"params": {"rows": [{"id": i, "name": f"row {i}"} for i in range(4)], "count": 0}},
+        "blocks": [{
+            "id": "form", "layout": "form", "title": "Form",
+            "props": {"fields": [
+                {"key": "rows", "label": "Rows", "type": "table", "rowKey": "id", "columns": [{"key": "name", "title": "Name"}]},
+                {"key": "count", "label": "Count", "type": "number"},
+            ]}
+        }],
+        "actions": [{"id": "inc", "label": "Inc", "patches": [{"op": "increment", "path": "state.params.count", "value": 1}]}],
+    })
+
+
+def dump(schema: UISchema) -> dict[str, Any]:
+    return schema.model_dump(by_alias=True, mode="json")
+
+
+def owned_instance(owner: str) -> str:
+    """找一个属主为指定节点的实例名"""
+    return next(name for name in (f"inst-{i}" for i in range(100)) if rendezvous_owner(name, NODES) == owner)
+
+
+@pytest.fixture(autouse=True)
+def quiet() -> Any:
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+class Replica:
+    """属主 schema 与只通过 apply_delta_ops 更新的副本"""
+
+    def __init__(self) -> None:
+        self.owner: UISchema = build_schema()
+        self.replica: UISchema = UISchema.model_validate(dump(self.owner))
+        # 副本上已建立的二级索引和行索引需要随增量维护
+        _ = get_schema_index(self.replica).find_block_index("form")
+        self.params_before: set[str] = snapshot_param_keys(self.owner)
+        self.runtime: Runtime = Runtime()
+
+    def sync(self, paths: list[str]) -> list[dict[str, Any]]:
+        ops = build_delta_ops(self.owner, paths, self.params_before)
+        apply_delta_ops(self.replica, ops)
+        self.params_before = snapshot_param_keys(self.owner)
+        assert dump(self.replica) == dump(self.owner)
+        return ops
+
+    def patch(self, schema: UISchema, raw: dict[str, Any]) -> list[str]:
+        result = self.runtime.instance_service.apply_unified_patch(schema, SchemaPatch.model_validate(raw))
+        assert result["success"], result
+        return [raw["path"]]
+
+
+def test_replica_follows_owner_deltas() -> None:
+    state = Replica()
+    owner = state.owner
+
+    # 元素级列表操作（第一次整体下发，之后按元素）
+    _ = state.sync(state.patch(owner, {"op": "append_to_list", "path": "state.params.rows", "value": {"id": 4, "name": "row 4"}}))
+    ops = state.sync(state.patch(owner, {"op": "prepend_to_list", "path": "state.params.rows", "value": {"id": -1, "name": "first"}}))
+    assert ops == [{"op": "add", "path": "/state/params/rows/0", "value": {"id": -1, "name": "first"}}]
+    ops = state.sync(state.patch(owner, {
+        "op": "update_list_item", "path": "state.params.rows", "value": {"key": "id", "value": 2, "updates": {"name": "two"}}
+    }))
+    assert [op["op"] for op in ops] == ["replace"]
+    _ = state.sync(state.patch(owner, {"op": "remove_from_list", "path": "state.params.rows", "value": {"key": "id", "value": 0}}))
+    _ = state.sync(state.patch(owner, {"op": "remove_last", "path": "state.params.rows"}))
+
+    # 普通参数
+    _ = state.sync(state.patch(owner, {"op": "increment", "path": "state.params.count", "value": 3}))
+    apply_patch_to_schema(owner, {"state.runtime.step": 1})
+    _ = state.sync(["state.runtime.step"])
+
+    # block / field / layout
+    apply_patch_to_schema(owner, {"blocks.0.props.fields.1.label": "Total"})
+    _ = state.sync(["blocks.0.props.fields.1.label"])
+    assert handle_add_operation(owner, "blocks", {
+        "id": "extra", "layout": "form", "title": "Extra",
+        "props": {"fields": [{"key": "email", "label": "Email", "type": "text"}]}
+    })["success"]
+    _ = state.sync(["blocks"])
+    apply_patch_to_schema(owner, {"layout.columns": 2})
+    _ = state.sync(["layout.columns"])
+
+    # action
+    assert handle_add_operation(owner, "actions", {"id": "reset", "label": "Reset"})["success"]
+    _ = state.sync(["actions"])
+    apply_patch_to_schema(owner, {"actions.0.label": "Increment"})
+    _ = state.sync(["actions.0.label"])
+
+    assert handle_remove_operation(owner, "blocks", {"id": "extra"})["success"]
+    _ = state.sync(["blocks.1"])
+
+    # 副本的索引与属主一致
+    replica_index, owner_index = get_schema_index(state.replica), get_schema_index(owner)
+    for block_id in ("form", "extra"):
+        assert replica_index.find_block_index(block_id) == owner_index.find_block_index(block_id)
+    for action_id in ("inc", "reset"):
+        assert replica_index.find_action_index(action_id) == owner_index.find_action_index(action_id)
+    assert replica_index.find_field("count") == owner_index.find_field("count")
+
+    # 副本成为属主后，按行索引的修改与原属主结果一致
+    for schema in (owner, state.replica):
+        _ = state.patch(schema, {
+            "op": "update_list_item", "path": "state.params.rows", "value": {"key": "id", "value": 3, "updates": {"name": "three"}}
+        })
+    assert dump(state.replica) == dump(owner)
+
+
+def build_node(hub: InProcessHub, node_id: str, instances: list[str]) -> tuple[Runtime, ClusterSync, httpx.AsyncClient]:
+    runtime = Runtime()
+    for name in instances:
+        runtime.schema_manager.set(name, build_schema(name))
+    register_schema_routes(runtime.app, runtime.schema_manager, "demo", runtime.ws_manager)
+    cluster = ClusterSync(InProcessBackplane(hub, node_id), runtime.schema_manager, runtime.ws_manager, runtime.app)
+    runtime.app.add_middleware(OwnershipMiddleware, cluster=cluster, default_instance_name="demo")
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=runtime.app), base_url="http://node")
+    return runtime, cluster, client
+
+
+async def test_middleware_forwards_only_to_other_owner() -> None:
+    local, remote = owned_instance("node-a"), owned_instance("node-b")
+    hub = InProcessHub()
+    node_a, cluster_a, client_a = build_node(hub, "node-a", [local, remote])
+    node_b, cluster_b, client_b = build_node(hub, "node-b", [local, remote])
+    await cluster_a.start()
+    await cluster_b.start()
+
+    def click(instance_name: str) -> dict[str, Any]:
+        return {"type": "action:click", "pageKey": instance_name, "payload": {"actionId": "inc", "params": {}}}
+
+    try:
+        # 本节点是属主：直接执行
+        response = await client_a.post("/ui/event", json=click(local))
+        assert response.json()["status"] == "success"
+        assert (cluster_a.forwarded, cluster_b.forwarded) == (0, 0)
+        assert node_a.schema_manager.get(local).state.params["count"] == 1
+
+        # 属主是其他节点：转发执行，原样返回属主的响应
+        response = await client_a.post("/ui/event", json=click(remote))
+        assert response.status_code == 200
+        assert response.json()["status"] == "success"
+        assert (cluster_a.forwarded, cluster_b.forwarded) == (1, 0)
+        assert node_b.patch_history.count(remote) == 1
+        assert node_a.patch_history.count(remote) == 0
+
+        # 读请求和非属主路由不转发
+        response = await client_a.get("/ui/schema", params={"instance_name": remote})
+        assert response.status_code == 200
+        response = await client_a.get("/ui/patches", params={"instanceId": local})
+        assert cluster_a.forwarded == 1
+
+        # 复制记录到达后两个节点的状态一致
+        await cluster_a._outgoing.join()
+        await cluster_b._outgoing.join()
+        for name in (local, remote):
+            # runtime.timestamp 由 action 执行时刷新，不属于发布的增量
+            on_a, on_b = dump(node_a.schema_manager.get(name)), dump(node_b.schema_manager.get(name))
+            for document in (on_a, on_b):
+                _ = document["state"].pop("runtime")
+            assert on_a == on_b
+            assert node_a.schema_manager.get_version(name) == node_b.schema_manager.get_version(name)
+    finally:
+        await client_a.aclose()
+        await client_b.aclose()
+        await cluster_a.close()
+        await cluster_b.close()
@@ -0,0 +1,117 @@
+"""field:change 合并器测试
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_coalescer.py
+"""
+
+import asyncio
+import contextlib
+import io
+from typing import Any
+
+import pytest
+
+from backend.fastapi.models import UISchema
+
+from conftest import Runtime
+
+
+class Published:
+    """记录 SchemaSyncService 推送的增量消息"""
+
+    def __init__(self, runtime: Runtime, monkeypatch: pytest.MonkeyPatch) -> None:
+        self.messages: list[dict[str, Any]] = []
+        send_delta = runtime.ws_manager.send_delta
+
+        async def record(instance_name: str, ops: list[dict[str, Any]], version: int, base_version: int, **kwargs: Any) -> bool:
+            self.messages.append({"instance": instance_name, "ops": ops, "version": version, "baseVersion": base_version, **kwargs})
+            return await send_delta(instance_name, ops, version, base_version, **kwargs)
+
+        monkeypatch.setattr(runtime.ws_manager, "send_delta", record)
+
+
+def build_schema() -> UISchema:
+    return UISchema.model_validate({"page_key": "form", "state": {"params": {"name": "", "email": ""}}})
+
+
+@pytest.fixture(autouse=True)
+def quiet() -> Any:
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+async def test_changes_within_window_publish_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    runtime = Runtime(coalesce_window=0.05)
+    runtime.schema_manager.set("form", build_schema())
+    published = Published(runtime, monkeypatch)
+
+    for value in ["A", "Al", "Ali", "Alice"]:
+        result = await runtime.event("form", "field:change", fieldKey="name", value=value)
+        assert result["status"] == "success" and result["patch_id"] is None
+        # 修改立即应用，推送和历史记录等到窗口结束
+        assert runtime.schema_manager.get("form").state.params["name"] == value
+    assert published.messages == []
+    assert runtime.patch_history.count("form") == 0
+    assert runtime.field_coalescer.coalesced == 3
+
+    await asyncio.sleep(0.15)
+
+    assert [entry["patch"] for entry in runtime.patch_history.get_all("form")] == [{"state.params.name": "Alice"}]
+    [message] = published.messages
+    assert message["ops"] == [{"op": "add", "path": "/state/params/name", "value": "Alice"}]
+    assert message["patch"] == {"state.params.name": "Alice"}
+    assert message["patch_id"] == 1
+    assert (message["baseVersion"], message["version"]) == (1, 2)
+
+
+async def test_keys_are_coalesced_separately(monkeypatch: pytest.MonkeyPatch) -> None:
+    runtime = Runtime(coalesce_window=0.05)
+    runtime.schema_manager.set("form", build_schema())
+    published = Published(runtime, monkeypatch)
+
+    _ = await runtime.event("form", "field:change", fieldKey="name", value="Al")
+    _ = await runtime.event("form", "field:change", fieldKey="email", value="a@")
+    _ = await runtime.event("form", "field:change", fieldKey="name", value="Alice")
+    await asyncio.sleep(0.15)
+
+    assert runtime.patch_history.count("form") == 2
+    assert sorted(op["value"] for message in published.messages for op in message["ops"]) == ["Alice", "a@"]
+
+
+async def test_flush_all_publishes_pending_keys(monkeypatch: pytest.MonkeyPatch) -> None:
+    runtime = Runtime(coalesce_window=60.0)
+    runtime.schema_manager.set("form", build_schema())
+    runtime.schema_manager.set("other", build_schema())
+    published = Published(runtime, monkeypatch)
+
+    _ = await runtime.event("form", "field:change", fieldKey="name", value="Alice")
+    _ = await runtime.event("form", "field:change", fieldKey="email", value="alice@example.com")
+    _ = await runtime.event("other", "field:change", fieldKey="name", value="Bob")
+    assert published.messages == []
+
+    await runtime.field_coalescer.flush_all()
+
+    assert {(message["instance"], op["path"], op["value"]) for message in published.messages for op in message["ops"]} == {
+        ("form", "/state/params/name", "Alice"),
+        ("form", "/state/params/email", "alice@example.com"),
+        ("other", "/state/params/name", "Bob"),
+    }
+    assert runtime.patch_history.count("form") == 2
+    assert runtime.patch_history.count("other") == 1
+    # 定时任务已取消，之后不会重复发布
+    assert runtime.field_coalescer._timers == {}
+    await runtime.field_coalescer.flush_all()
+    assert len(published.messages) == 3
+
+
+async def test_deleted_instance_is_not_published(monkeypatch: pytest.MonkeyPatch) -> None:
+    runtime = Runtime(coalesce_window=60.0)
+    runtime.schema_manager.set("form", build_schema())
+    published = Published(runtime, monkeypatch)
+
+    _ = await runtime.event("form", "field:change", fieldKey="name", value="Alice")
+    assert runtime.schema_manager.delete("form")
+    await runtime.field_coalescer.flush_all()
+
+    assert published.messages == []
+    assert runtime.patch_history.count("form") == 0
@@ -0,0 +1,177 @@
+"""版本化增量测试：build_delta_ops 的输出应用到客户端文档后与服务端 schema 一致
+
+客户端文档用 model_dump 的 JSON 副本表示，增量用 apply_json_ops（与 WAL 重放相同）应用。
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_delta.py
+"""
+
+import contextlib
+import io
+import random
+from typing import Any
+
+import pytest
+
+from backend.core import SchemaManager
+from backend.core.persistence import apply_json_ops
+from backend.fastapi.models import UISchema, SchemaPatch
+from backend.fastapi.routes.patch_routes import handle_add_operation, handle_remove_operation
+from backend.fastapi.services.delta import build_delta_ops, snapshot_param_keys
+from backend.fastapi.services.instance_service import InstanceService
+from backend.fastapi.services.patch import apply_patch_to_schema
+
+
+def build_schema() -> UISchema:
+    return UISchema.model_validate({
+        "page_key": "delta",
+        "state": {"params": {"tasks": [{"id": i, "done": False} for i in range(5)], "count": 0, "a/b~c": "x"}},
+        "blocks": [{
+            "id": "form", "layout": "form", "title": "Form",
+            "props": {"fields": [
+                {"key": "tasks", "label": "Tasks", "type": "table", "rowKey": "id", "columns": [{"key": "id", "title": "ID"}]},
+                {"key": "count", "label": "Count", "type": "number"},
+            ]}
+        }],
+        "actions": [{"id": "inc", "label": "Inc", "patches": [{"op": "increment", "path": "state.params.count", "value": 1}]}],
+    })
+
+
+def dump(schema: UISchema) -> dict[str, Any]:
+    return schema.model_dump(by_alias=True, mode="json")
+
+
+class Client:
+    """持有 schema 的 JSON 副本，只通过增量更新"""
+
+    def __init__(self, schema: UISchema) -> None:
+        self.schema: UISchema = schema
+        self.document: dict[str, Any] = dump(schema)
+        self.params_before: set[str] = snapshot_param_keys(schema)
+
+    def sync(self, paths: list[str]) -> list[dict[str, Any]]:
+        ops = build_delta_ops(self.schema, paths, self.params_before)
+        apply_json_ops(self.document, ops)
+        self.params_before = snapshot_param_keys(self.schema)
+        return ops
+
+
+@pytest.fixture
+def client() -> Client:
+    return Client(build_schema())
+
+
+@pytest.fixture(autouse=True)
+def quiet() -> Any:
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def test_deep_paths_coarsen_to_block(client: Client) -> None:
+    apply_patch_to_schema(client.schema, {"blocks.0.props.fields.1.label": "Total", "blocks.0.title": "Edited"})
+    ops = client.sync(["blocks.0.props.fields.1.label", "blocks.0.title"])
+    assert [op["path"] for op in ops] == ["/blocks/0"]
+    assert client.document == dump(client.schema)
+
+
+def test_child_paths_are_covered_by_parent(client: Client) -> None:
+    assert handle_add_operation(client.schema, "blocks", {"id": "extra", "layout": "form", "title": "Extra"})["success"]
+    ops = client.sync(["blocks.1.title", "blocks", "blocks.1"])
+    assert [op["path"] for op in ops] == ["/blocks"]
+    assert client.document == dump(client.schema)
+
+
+def test_out_of_range_block_index_falls_back_to_array(client: Client) -> None:
+    assert handle_remove_operation(client.schema, "blocks", {"id": "form"})["success"]
+    ops = client.sync(["blocks.0"])
+    assert [op["path"] for op in ops if op["path"].startswith("/blocks")] == ["/blocks"]
+    assert client.document == dump(client.schema)
+
+
+def test_implicit_param_changes_from_block_add_and_remove(client: Client) -> None:
+    assert handle_add_operation(client.schema, "blocks", {
+        "id": "more", "layout": "form", "title": "More",
+        "props": {"fields": [{"key": "email", "label": "Email", "type": "text"}]}
+    })["success"]
+    ops = client.sync(["blocks"])
+    assert {"op": "add", "path": "/state/params/email", "value": client.schema.state.params["email"]} in ops
+    assert client.document == dump(client.schema)
+
+    assert handle_remove_operation(client.schema, "blocks", {"id": "more"})["success"]
+    ops = client.sync(["blocks"])
+    assert {"op": "remove", "path": "/state/params/email"} in ops
+    assert client.document == dump(client.schema)
+
+
+def test_pointer_tokens_are_escaped(client: Client) -> None:
+    apply_patch_to_schema(client.schema, {"state.params.a/b~c": "y"})
+    ops = client.sync(["state.params.a/b~c"])
+    assert ops == [{"op": "add", "path": "/state/params/a~1b~0c", "value": "y"}]
+    assert client.document == dump(client.schema)
+
+
+def test_history_keys_coarsen_to_their_path(client: Client) -> None:
+    service = InstanceService(SchemaManager())
+    patch = SchemaPatch.model_validate({"op": "append_to_list", "path": "state.params.tasks", "value": {"id": 9}})
+    assert service.apply_unified_patch(client.schema, patch)["success"]
+    ops = client.sync(["append_to_list:state.params.tasks"])
+    assert all(op["path"].startswith("/state/params/tasks") for op in ops)
+    assert client.document == dump(client.schema)
+
+
+def test_random_patches_rebuild_the_same_document(client: Client) -> None:
+    rng = random.Random(7)
+    schema = client.schema
+    service = InstanceService(SchemaManager())
+
+    def unified(raw: dict[str, Any]) -> list[str]:
+        result = service.apply_unified_patch(schema, SchemaPatch.model_validate(raw))
+        assert result["success"], result
+        return [raw["path"]]
+
+    for step in range(600):
+        tasks = schema.state.params["tasks"]
+        kind = rng.randrange(14)
+        if kind == 0:
+            paths = unified({"op": "append_to_list", "path": "state.params.tasks", "value": {"id": 100 + step, "done": False}})
+        elif kind == 1:
+            paths = unified({"op": "prepend_to_list", "path": "state.params.tasks", "value": [{"id": -step}, {"id": -step - 10_000}]})
+        elif kind == 2 and tasks:
+            paths = unified({"op": "remove_from_list", "path": "state.params.tasks", "value": {"key": "id", "value": rng.choice(tasks)["id"]}})
+        elif kind == 3 and tasks:
+            paths = unified({"op": "remove_last", "path": "state.params.tasks"})
+        elif kind == 4 and tasks:
+            paths = unified({
+                "op": "update_list_item", "path": "state.params.tasks",
+                "value": {"key": "id", "value": rng.choice(tasks)["id"], "updates": {"done": True}}
+            })
+        elif kind == 5:
+            paths = unified({"op": "filter_list", "path": "state.params.tasks", "value": {"key": "done", "value": False}})
+        elif kind == 6:
+            paths = unified({"op": "increment", "path": "state.params.count", "value": 2})
+        elif kind == 7:
+            apply_patch_to_schema(schema, {"blocks.0.props.fields.1.label": f"Count {step}"})
+            paths = ["blocks.0.props.fields.1.label"]
+        elif kind == 8:
+            assert handle_add_operation(schema, "blocks", {
+                "id": f"b{step}", "layout": "form", "title": "B",
+                "props": {"fields": [{"key": f"f{step}", "label": "F", "type": "text", "value": step}]}
+            })["success"]
+            paths = ["blocks"]
+        elif kind == 9 and len(schema.blocks) > 1:
+            assert handle_remove_operation(schema, "blocks", {"id": schema.blocks[-1].id})["success"]
+            paths = [f"blocks.{len(schema.blocks)}"]
+        elif kind == 10:
+            assert handle_add_operation(schema, "actions", {"id": f"a{step}", "label": "A"})["success"]
+            paths = ["actions"]
+        elif kind == 11:
+            apply_patch_to_schema(schema, {"layout.columns": rng.randint(1, 12)})
+            paths = ["layout.columns"]
+        elif kind == 12:
+            apply_patch_to_schema(schema, {"state.runtime.tick": step, "state.params.a/b~c": str(step)})
+            paths = ["state.runtime.tick", "state.params.a/b~c"]
+        else:
+            paths = []
+
+        _ = client.sync(paths)
+        assert client.document == dump(schema), (step, kind)
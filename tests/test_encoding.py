@@ -0,0 +1,92 @@
+"""WebSocket 消息编码测试：各线路格式的编码 / 解码往返
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_encoding.py
+"""
+
+import json
+import zlib
+from typing import Any
+
+import pytest
+
+from backend.fastapi.services.websocket import encoding
+from backend.fastapi.services.websocket.encoding import (
+    FORMAT_DEFLATE,
+    FORMAT_JSON,
+    FORMAT_MSGPACK,
+    EncodedFrames,
+    available_formats,
+    encode_message,
+    negotiate_format,
+)
+
+MESSAGE: dict[str, Any] = {
+    "type": "patch",
+    "instance_name": "demo",
+    "patch_id": 7,
+    "baseVersion": 3,
+    "version": 4,
+    "patch": {"state.params.name": "张三"},
+    "ops": [
+        {"op": "replace", "path": "/state/params/name", "value": "张三"},
+        {"op": "add", "path": "/state/params/rows/-", "value": {"id": 1, "score": 9.5, "tags": ["a", "b"], "done": None}},
+    ],
+    "highlight": None,
+}
+
+
+def test_json_round_trip() -> None:
+    frames = EncodedFrames(MESSAGE)
+    frame = frames.get(FORMAT_JSON)
+    assert isinstance(frame, str)
+    assert json.loads(frame) == MESSAGE
+    # 非 ASCII 字符不转义，大小按 UTF-8 计算
+    assert "张三" in frame
+    assert frames.size(FORMAT_JSON) == len(frame.encode("utf-8"))
+    assert frame == encode_message(MESSAGE)
+
+
+def test_deflate_round_trip() -> None:
+    frames = EncodedFrames(MESSAGE)
+    frame = frames.get(FORMAT_DEFLATE)
+    assert isinstance(frame, bytes)
+    # raw deflate（无 zlib 头），与浏览器 DecompressionStream('deflate-raw') 一致
+    text = zlib.decompress(frame, -zlib.MAX_WBITS).decode("utf-8")
+    assert json.loads(text) == MESSAGE
+    assert text == frames.get(FORMAT_JSON)
+    assert frames.size(FORMAT_DEFLATE) == len(frame)
+
+
+def test_msgpack_round_trip() -> None:
+    msgpack = pytest.importorskip("msgpack")
+    frames = EncodedFrames(MESSAGE)
+    frame = frames.get(FORMAT_MSGPACK)
+    assert isinstance(frame, bytes)
+    assert msgpack.unpackb(frame, raw=False) == MESSAGE
+    assert frames.size(FORMAT_MSGPACK) == len(frame)
+    assert FORMAT_MSGPACK in available_formats()
+
+
+def test_each_format_is_encoded_once() -> None:
+    frames = EncodedFrames(MESSAGE, text=encode_message(MESSAGE))
+    for fmt in available_formats():
+        assert frames.get(fmt) is frames.get(fmt)
+
+
+def test_without_msgpack(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(encoding, "msgpack", None)
+    assert available_formats() == [FORMAT_JSON, FORMAT_DEFLATE]
+    # 明确请求时拒绝握手，子协议中的 msgpack 被跳过
+    assert negotiate_format(FORMAT_MSGPACK, []) is None
+    assert negotiate_format(None, ["ui-msgpack", "ui-deflate"]) == (FORMAT_DEFLATE, "ui-deflate")
+    with pytest.raises(ValueError):
+        _ = EncodedFrames(MESSAGE).get(FORMAT_MSGPACK)
+
+
+def test_negotiate_format() -> None:
+    assert negotiate_format(None, []) == (FORMAT_JSON, None)
+    assert negotiate_format(FORMAT_DEFLATE, ["ui-deflate"]) == (FORMAT_DEFLATE, "ui-deflate")
+    # 子协议与查询参数不一致时不回应子协议
+    assert negotiate_format(FORMAT_JSON, ["ui-deflate"]) == (FORMAT_JSON, None)
+    assert negotiate_format("xml", []) is None
@@ -0,0 +1,86 @@
+"""实例锁测试：api 类型的 action 等待外部响应期间释放实例锁
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_event_lock.py
+"""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from backend.fastapi.models import UISchema
+
+from conftest import Runtime
+
+
+def build_schema() -> UISchema:
+    return UISchema.model_validate({
+        "page_key": "lock",
+        "state": {"params": {"name": "", "result": ""}},
+        "actions": [{
+            "id": "slow_api", "label": "Slow", "action_type": "api",
+            "api": {"url": "http://example.invalid/slow", "response_mappings": {"state.params.result": "data"}}
+        }],
+    })
+
+
+async def test_event_completes_while_api_action_waits(runtime: Runtime, monkeypatch: pytest.MonkeyPatch) -> None:
+    runtime.schema_manager.set("lock", build_schema())
+    started = asyncio.Event()
+    respond = asyncio.Event()
+
+    async def slow_api(schema: UISchema, api_config: dict[str, Any]) -> dict[str, Any]:
+        started.set()
+        await respond.wait()
+        return {"state.params.result": "done"}
+
+    monkeypatch.setattr(runtime.instance_service, "_handle_external_api", slow_api)
+
+    action = asyncio.create_task(runtime.event("lock", "action:click", actionId="slow_api"))
+    await asyncio.wait_for(started.wait(), 1)
+
+    try:
+        # 外部 API 尚未返回，同一实例上的其他事件不被阻塞
+        result = await asyncio.wait_for(runtime.event("lock", "field:change", fieldKey="name", value="Alice"), 1)
+        assert result["status"] == "success"
+        assert not action.done()
+        assert runtime.schema_manager.get("lock").state.params["name"] == "Alice"
+    finally:
+        respond.set()
+    result = await asyncio.wait_for(action, 1)
+    assert result["status"] == "success"
+    assert runtime.schema_manager.get("lock").state.params["result"] == "done"
+    assert not runtime.schema_manager.lock("lock").locked()
+
+
+async def test_cancel_while_reacquiring_lock_keeps_lock_consistent(runtime: Runtime, monkeypatch: pytest.MonkeyPatch) -> None:
+    runtime.schema_manager.set("lock", build_schema())
+    lock = runtime.schema_manager.lock("lock")
+    started = asyncio.Event()
+    respond = asyncio.Event()
+
+    async def api(schema: UISchema, api_config: dict[str, Any]) -> dict[str, Any]:
+        started.set()
+        await respond.wait()
+        return {}
+
+    monkeypatch.setattr(runtime.instance_service, "_handle_external_api", api)
+
+    # 外部 API 返回时锁被其他请求持有，action 停在重新获取锁处，此时取消它
+    action = asyncio.create_task(runtime.event("lock", "action:click", actionId="slow_api"))
+    await asyncio.wait_for(started.wait(), 1)
+    try:
+        await asyncio.wait_for(lock.acquire(), 1)
+    finally:
+        respond.set()
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert not action.done()
+    _ = action.cancel()
+    await asyncio.sleep(0)
+    lock.release()
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(action, 1)
+    assert not lock.locked()
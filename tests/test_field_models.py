@@ -0,0 +1,139 @@
+"""字段模型测试：FieldConfig 判别式联合的模型选择与序列化结果
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_field_models.py
+"""
+
+from typing import Any, Union
+
+import pytest
+from pydantic import TypeAdapter
+
+from backend.fastapi.models import (
+    BaseFieldConfig,
+    ComponentFieldConfig,
+    FieldType,
+    ImageFieldConfig,
+    SelectableFieldConfig,
+    TableFieldConfig,
+    TagFieldConfig,
+)
+from backend.fastapi.models.field_models import FIELD_CONFIG_ADAPTER, FIELD_CONFIG_LIST_ADAPTER
+from backend.fastapi.services.patch import parse_field_config, parse_field_configs
+
+# 改为判别式联合之前的 FieldConfig（smart union，逐个尝试）
+SMART_UNION: TypeAdapter[Any] = TypeAdapter(Union[
+    BaseFieldConfig, SelectableFieldConfig, TagFieldConfig,
+    ImageFieldConfig, TableFieldConfig, ComponentFieldConfig
+])
+
+OPTIONS = [{"label": "A", "value": "a"}, {"label": "B", "value": "b", "disabled": True}]
+COLUMNS = [{"key": "id", "title": "ID"}, {"key": "name", "title": "Name", "renderType": "tag"}]
+BLOCK = {"id": "nested", "layout": "form", "title": "Nested", "props": {"fields": []}}
+
+
+def field(field_type: str, **extra: Any) -> dict[str, Any]:
+    return {"label": field_type.title(), "key": f"{field_type}_field", "type": field_type, **extra}
+
+
+SAMPLES: list[dict[str, Any]] = [
+    field("text", value="hello", placeholder="..."),
+    field("number", value=3, required=True),
+    field("json", value={"a": [1, 2]}),
+    field("select", options=OPTIONS, multiple=True),
+    field("radio", options=OPTIONS, value="a"),
+    field("multiselect", options=OPTIONS, value=["a"]),
+    field("select"),
+    field("tag", options=OPTIONS, color="red"),
+    field("badge", size="small"),
+    field("progress", value=40),
+    field("image", value="/a.png", showFullscreen=False, imageFit="cover"),
+    field("table", columns=COLUMNS, pageSize=5, serverWindow=True, value=[{"id": 1}]),
+    field("table"),
+    field("component", blockConfig=BLOCK),
+    field("component"),
+]
+
+
+@pytest.mark.parametrize(("field_type", "extra", "expected"), [
+    (FieldType.TEXT, {}, BaseFieldConfig),
+    (FieldType.NUMBER, {}, BaseFieldConfig),
+    (FieldType.SELECT, {"options": OPTIONS}, SelectableFieldConfig),
+    (FieldType.RADIO, {"options": OPTIONS}, SelectableFieldConfig),
+    (FieldType.MULTISELECT, {"options": OPTIONS}, SelectableFieldConfig),
+    (FieldType.TAG, {}, TagFieldConfig),
+    (FieldType.BADGE, {}, TagFieldConfig),
+    (FieldType.PROGRESS, {}, TagFieldConfig),
+    (FieldType.IMAGE, {}, ImageFieldConfig),
+    (FieldType.TABLE, {"columns": COLUMNS}, TableFieldConfig),
+    (FieldType.COMPONENT, {"blockConfig": BLOCK}, ComponentFieldConfig),
+    (FieldType.COMPONENT, {"block_config": BLOCK}, ComponentFieldConfig),
+])
+def test_type_selects_concrete_model(field_type: FieldType, extra: dict[str, Any], expected: type) -> None:
+    parsed = FIELD_CONFIG_ADAPTER.validate_python(field(field_type.value, **extra))
+    assert type(parsed) is expected
+    assert parsed.type == field_type
+
+
+@pytest.mark.parametrize("field_type", [FieldType.SELECT, FieldType.RADIO, FieldType.TABLE, FieldType.COMPONENT])
+def test_missing_required_keys_fall_back_to_base(field_type: FieldType) -> None:
+    parsed = FIELD_CONFIG_ADAPTER.validate_python(field(field_type.value))
+    assert type(parsed) is BaseFieldConfig
+    assert parsed.type == field_type
+
+
+def test_unknown_type_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        _ = FIELD_CONFIG_ADAPTER.validate_python(field("unknown"))
+
+
+@pytest.mark.parametrize("data", SAMPLES, ids=lambda data: f"{data['type']}-{len(data)}")
+def test_dump_matches_smart_union(data: dict[str, Any]) -> None:
+    expected = SMART_UNION.validate_python(dict(data))
+    parsed = FIELD_CONFIG_ADAPTER.validate_python(dict(data))
+    assert type(parsed) is type(expected)
+    assert parsed.model_dump(by_alias=True) == expected.model_dump(by_alias=True)
+
+
+def legacy_parse_field_config(field_data: dict[str, Any]) -> Any:
+    """改为判别式联合之前 parse_field_config 的 if 链"""
+    field_type = field_data.get("type", "text")
+    if field_type == FieldType.TABLE:
+        if field_data.get("columns") is None:
+            field_data["columns"] = []
+        return TableFieldConfig(**field_data)
+    elif field_type in [FieldType.SELECT, FieldType.RADIO, FieldType.MULTISELECT]:
+        if field_data.get("options") is None:
+            field_data["options"] = []
+        return SelectableFieldConfig(**field_data)
+    elif field_type in [FieldType.TAG, FieldType.BADGE, FieldType.PROGRESS]:
+        if field_data.get("options") is None:
+            field_data["options"] = []
+        return TagFieldConfig(**field_data)
+    elif field_type == FieldType.IMAGE:
+        return ImageFieldConfig(**field_data)
+    elif field_type == FieldType.COMPONENT:
+        return ComponentFieldConfig(**field_data)
+    else:
+        return BaseFieldConfig(**field_data)
+
+
+# 缺少 blockConfig 的 component 在原来的 if 链中直接报错，不参与比较
+@pytest.mark.parametrize("data", [data for data in SAMPLES if data != field("component")],
+                         ids=lambda data: f"{data['type']}-{len(data)}")
+def test_parse_field_config_matches_legacy(data: dict[str, Any]) -> None:
+    expected = legacy_parse_field_config(dict(data))
+    parsed = parse_field_config(dict(data))
+    assert type(parsed) is type(expected)
+    assert parsed.model_dump(by_alias=True) == expected.model_dump(by_alias=True)
+
+
+def test_bulk_parse_keeps_models_and_order() -> None:
+    existing = TagFieldConfig(label="Tag", key="tag", type=FieldType.TAG, color="blue")
+    fields = parse_field_configs([field("text"), existing, field("table"), field("select", options=OPTIONS)])
+    assert [type(item) for item in fields] == [BaseFieldConfig, TagFieldConfig, TableFieldConfig, SelectableFieldConfig]
+    assert fields[1] is existing
+
+    # 已构造的模型按类选择，不会被重新解析成别的模型
+    models = FIELD_CONFIG_LIST_ADAPTER.validate_python([existing, BaseFieldConfig(label="T", key="t", type=FieldType.TAG)])
+    assert [type(item) for item in models] == [TagFieldConfig, BaseFieldConfig]
@@ -0,0 +1,86 @@
+"""Patch 历史测试：环形缓冲区的淘汰、ID 范围与游标分页
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_history.py
+"""
+
+from backend.core import PatchHistoryManager
+
+
+def ids(records: "list[dict[str, object]]") -> list[object]:
+    return [record["id"] for record in records]
+
+
+def filled(count: int, max_entries: int = 5) -> PatchHistoryManager:
+    history = PatchHistoryManager(max_entries=max_entries)
+    for index in range(1, count + 1):
+        assert history.save("demo", {"state.params.count": index}) == index
+    return history
+
+
+def test_overflow_evicts_oldest() -> None:
+    history = filled(12)
+    # 保留 8..12，槽位已绕回缓冲区开头
+    assert history.get_bounds("demo") == (8, 12)
+    assert history.count("demo") == 5
+    assert ids(history.get_all("demo")) == [8, 9, 10, 11, 12]
+    assert history.get_by_id("demo", 7) is None
+    assert history.get_by_id("demo", 13) is None
+    record = history.get_by_id("demo", 8)
+    assert record is not None and record["patch"] == {"state.params.count": 8}
+    stats = history.get_stats("demo")
+    assert (stats["count"], stats["first_id"], stats["last_id"], stats["evicted"]) == (5, 8, 12, 7)
+
+
+def test_page_after_cursor() -> None:
+    history = filled(12)
+    assert ids(history.get_page("demo", after=8, limit=3)) == [9, 10, 11]
+    # 跨过缓冲区末尾的区间
+    assert ids(history.get_page("demo", after=9, limit=10)) == [10, 11, 12]
+    # 游标早于保留范围时从最旧的记录开始
+    assert ids(history.get_page("demo", after=2, limit=3)) == [8, 9, 10]
+    assert history.get_page("demo", after=12) == []
+    assert ids(history.get_page("demo", after=8, before=11)) == [9, 10]
+
+    pages: list[list[object]] = []
+    cursor = 0
+    while page := history.get_page("demo", after=cursor, limit=2):
+        pages.append(ids(page))
+        cursor = page[-1]["id"]  # type: ignore[assignment]
+    assert pages == [[8, 9], [10, 11], [12]]
+
+
+def test_page_before_cursor() -> None:
+    history = filled(12)
+    assert ids(history.get_page("demo", limit=3)) == [10, 11, 12]
+    assert ids(history.get_page("demo", before=12, limit=3)) == [9, 10, 11]
+    # 区间被截断到保留范围
+    assert ids(history.get_page("demo", before=10, limit=3)) == [8, 9]
+    assert history.get_page("demo", before=8) == []
+    assert ids(history.get_page("demo", before=99, limit=2)) == [11, 12]
+    # limit 被限制在 [1, MAX_PAGE_SIZE]
+    assert ids(history.get_page("demo", limit=0)) == [12]
+
+
+def test_byte_limit_keeps_latest() -> None:
+    history = PatchHistoryManager(max_entries=100, max_bytes=60)
+    for index in range(1, 6):
+        _ = history.save("demo", {"value": "x" * 20, "index": index})
+    first_id, last_id = history.get_bounds("demo")
+    assert last_id == 5 and first_id > 1
+    assert history.get_stats("demo")["bytes"] <= 60  # type: ignore[operator]
+
+    # 单条超过上限时至少保留刚写入的一条
+    _ = history.save("demo", {"value": "x" * 200})
+    assert history.get_bounds("demo") == (6, 6)
+
+
+def test_empty_and_cleared_history() -> None:
+    history = PatchHistoryManager(max_entries=5)
+    assert history.get_bounds("demo") == (1, 0)
+    assert history.get_page("demo") == []
+
+    history = filled(7)
+    history.clear("demo")
+    assert history.get_bounds("demo") == (1, 0)
+    assert history.save("demo", {"state.params.count": 0}) == 1
@@ -0,0 +1,43 @@
+"""state.params 列表原地修改测试（ListJournal）
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_list_journal.py
+"""
+
+import pytest
+
+from backend.core import SchemaManager
+from backend.fastapi.models import UISchema, SchemaPatch
+from backend.fastapi.services.delta import build_delta_ops
+from backend.fastapi.services.instance_service import InstanceService
+
+
+@pytest.fixture
+def service() -> tuple[UISchema, InstanceService]:
+    schema = UISchema.model_validate({"page_key": "lists", "state": {"params": {"tasks": None}}})
+    manager = SchemaManager()
+    manager.set("lists", schema)
+    return schema, InstanceService(manager)
+
+
+@pytest.mark.parametrize("op", ["append_to_list", "prepend_to_list"])
+def test_add_to_none_param_creates_list(service: tuple[UISchema, InstanceService], op: str) -> None:
+    schema, instance_service = service
+    result = instance_service.apply_unified_patch(schema, SchemaPatch.model_validate({
+        "op": op, "path": "state.params.tasks", "value": {"id": 1}
+    }))
+    assert result["success"], result
+    assert schema.state.params["tasks"] == [{"id": 1}]
+    # 第一次修改复制了列表，整体下发
+    assert build_delta_ops(schema, ["state.params.tasks"]) == [
+        {"op": "add", "path": "/state/params/tasks", "value": [{"id": 1}]}
+    ]
+
+
+def test_add_to_missing_param_creates_list(service: tuple[UISchema, InstanceService]) -> None:
+    schema, instance_service = service
+    result = instance_service.apply_unified_patch(schema, SchemaPatch.model_validate({
+        "op": "append_to_list", "path": "state.params.other", "value": [{"id": 1}, {"id": 2}]
+    }))
+    assert result["success"], result
+    assert schema.state.params["other"] == [{"id": 1}, {"id": 2}]
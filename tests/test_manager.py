@@ -0,0 +1,137 @@
+"""SchemaManager 测试：断线续传的增量窗口与实例锁
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_manager.py
+"""
+
+import asyncio
+from typing import Any
+
+from backend.core import SchemaManager
+from backend.fastapi.models import UISchema
+
+
+def build_schema() -> UISchema:
+    return UISchema.model_validate({"page_key": "resume", "state": {"params": {"count": 0}}})
+
+
+def publish(manager: SchemaManager, count: int, instance_name: str = "demo", patch_id: int | None = None) -> int:
+    """模拟 SchemaSyncService.publish：推进版本并记录增量"""
+    version = manager.bump_version(instance_name)
+    ops: list[dict[str, Any]] = [{"op": "replace", "path": "/state/params/count", "value": count}]
+    _ = manager.log_delta(instance_name, version, ops, patch_id)
+    return version
+
+
+def test_current_version_returns_empty_list() -> None:
+    manager = SchemaManager()
+    manager.set("demo", build_schema())
+    assert manager.deltas_since("demo", 1) == []
+    _ = publish(manager, 1)
+    assert manager.deltas_since("demo", 2) == []
+
+
+def test_missing_deltas_within_window() -> None:
+    manager = SchemaManager(delta_window=4)
+    manager.set("demo", build_schema())
+    for count in range(1, 4):
+        _ = publish(manager, count)
+
+    records = manager.deltas_since("demo", 2)
+    assert records is not None
+    assert [record["version"] for record in records] == [3, 4]
+    assert [record["ops"][0]["value"] for record in records] == [2, 3]
+
+
+def test_gap_older_than_window_returns_none() -> None:
+    manager = SchemaManager(delta_window=3)
+    manager.set("demo", build_schema())
+    for count in range(1, 7):
+        _ = publish(manager, count)
+
+    # 保留 v5..v7：从 v4 续传仍可补发，从 v3 续传缺少 v4
+    records = manager.deltas_since("demo", 4)
+    assert records is not None and [record["version"] for record in records] == [5, 6, 7]
+    assert manager.deltas_since("demo", 3) is None
+    # 客户端版本高于服务端（服务端重启后版本回退等）或版本未知
+    assert manager.deltas_since("demo", 8) is None
+    assert manager.deltas_since("demo") is None
+
+
+def test_set_clears_window() -> None:
+    manager = SchemaManager()
+    manager.set("demo", build_schema())
+    _ = publish(manager, 1)
+    _ = publish(manager, 2)
+    assert manager.deltas_since("demo", 1) is not None
+
+    # 整体替换无法用增量表示，替换之前的版本都不能续传
+    manager.set("demo", build_schema())
+    assert manager.get_version("demo") == 4
+    assert manager.deltas_since("demo", 4) == []
+    assert manager.deltas_since("demo", 3) is None
+    assert manager.deltas_since("demo", 1) is None
+
+    # 替换之后的增量重新开始记录
+    _ = publish(manager, 3)
+    records = manager.deltas_since("demo", 4)
+    assert records is not None and [record["version"] for record in records] == [5]
+
+
+def test_lookup_by_patch_id() -> None:
+    manager = SchemaManager()
+    manager.set("demo", build_schema())
+    _ = publish(manager, 1, patch_id=10)
+    _ = publish(manager, 2)
+    _ = publish(manager, 3, patch_id=11)
+
+    records = manager.deltas_since("demo", patch_id=10)
+    assert records is not None and [record["version"] for record in records] == [3, 4]
+    assert manager.deltas_since("demo", patch_id=11) == []
+    # 不在窗口内的 Patch ID 无法确定客户端版本
+    assert manager.deltas_since("demo", patch_id=9) is None
+    # 同时指定时以 version 为准
+    records = manager.deltas_since("demo", version=3, patch_id=10)
+    assert records is not None and [record["version"] for record in records] == [4]
+
+
+def test_disabled_window_never_resumes() -> None:
+    manager = SchemaManager(delta_window=0)
+    manager.set("demo", build_schema())
+    _ = publish(manager, 1)
+    assert manager.deltas_since("demo", 2) == []
+    assert manager.deltas_since("demo", 1) is None
+
+
+def test_delete_drops_unheld_lock() -> None:
+    manager = SchemaManager()
+    manager.set("demo", build_schema())
+    first = manager.lock("demo")
+    assert manager.delete("demo")
+    assert "demo" not in manager._locks
+
+    # 重建的实例使用新的锁
+    manager.set("demo", build_schema())
+    assert manager.lock("demo") is not first
+
+
+async def test_delete_keeps_held_lock() -> None:
+    manager = SchemaManager()
+    manager.set("demo", build_schema())
+    instance_lock = manager.lock("demo")
+
+    async with instance_lock:
+        assert manager.delete("demo")
+        # 持有者退出之前重建实例的请求仍然与它互斥
+        assert manager.lock("demo") is instance_lock
+
+    # 锁刚释放但等待者尚未恢复运行时同样保留
+    manager.set("demo", build_schema())
+    await instance_lock.acquire()
+    waiter = asyncio.create_task(instance_lock.acquire())
+    await asyncio.sleep(0)
+    instance_lock.release()
+    assert manager.delete("demo")
+    assert manager.lock("demo") is instance_lock
+    _ = await asyncio.wait_for(waiter, 1)
+    instance_lock.release()
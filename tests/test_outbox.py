@@ -0,0 +1,183 @@
+"""WebSocket 发送队列测试：队列上限、慢消费者策略与增量合并
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_outbox.py
+"""
+
+import asyncio
+import json
+from typing import Any
+
+import pytest
+
+from backend.fastapi.services.websocket.connection.outbox import (
+    CLOSE_CODE_SLOW_CONSUMER,
+    POLICY_COALESCE,
+    POLICY_DISCONNECT,
+    POLICY_SNAPSHOT,
+    ConnectionOutbox,
+    merge_patch_messages,
+)
+
+
+class BlockingWebSocket:
+    """发送在 release 之前一直阻塞的 WebSocket（模拟慢消费者）"""
+
+    def __init__(self) -> None:
+        self.sent: list[dict[str, Any]] = []
+        self.close_codes: list[int] = []
+        self.gate: asyncio.Event = asyncio.Event()
+
+    async def send_text(self, text: str) -> None:
+        _ = await self.gate.wait()
+        self.sent.append(json.loads(text))
+
+    async def send_bytes(self, data: bytes) -> None:
+        raise AssertionError("json 格式不应发送二进制帧")
+
+    async def close(self, code: int = 1000) -> None:
+        self.close_codes.append(code)
+
+    def release(self) -> None:
+        self.gate.set()
+
+
+def patch(base_version: int, version: int, key: str = "count") -> dict[str, Any]:
+    return {
+        "type": "patch", "instance_name": "demo", "baseVersion": base_version, "version": version,
+        "patch": {f"state.params.{key}": version}, "patch_id": version,
+        "ops": [{"op": "replace", "path": f"/state/params/{key}", "value": version}],
+    }
+
+
+def snapshot(version: int) -> dict[str, Any]:
+    return {"type": "schema_update", "instance_name": "demo", "version": version, "schema": {}}
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def blocked_outbox(policy: str, max_size: int = 3, **options: Any) -> tuple[ConnectionOutbox, BlockingWebSocket]:
+    """启动一个写任务正阻塞在第一条消息（v0 -> v1）上的发送队列"""
+    websocket = BlockingWebSocket()
+    outbox = ConnectionOutbox(websocket, "demo", max_size=max_size, policy=policy, **options)  # type: ignore[arg-type]
+    outbox.start()
+    assert outbox.put(patch(0, 1))
+    await settle()
+    assert len(outbox) == 0
+    return outbox, websocket
+
+
+async def drain(outbox: ConnectionOutbox, websocket: BlockingWebSocket) -> None:
+    websocket.release()
+    await settle()
+    assert len(outbox) == 0
+    outbox.close()
+
+
+async def test_queue_is_bounded() -> None:
+    outbox, websocket = await blocked_outbox(POLICY_SNAPSHOT, snapshot_provider=lambda name: snapshot(9))
+    for version in range(2, 5):
+        assert outbox.put(patch(version - 1, version))
+    assert len(outbox) == 3
+    assert outbox.overflows == 0
+
+    assert outbox.put(patch(4, 5))
+    assert len(outbox) == 1
+    assert outbox.overflows == 1
+    await drain(outbox, websocket)
+
+
+async def test_snapshot_policy_replaces_backlog() -> None:
+    requested: list[str] = []
+
+    def provider(instance_name: str) -> dict[str, Any]:
+        requested.append(instance_name)
+        return snapshot(5)
+
+    outbox, websocket = await blocked_outbox(POLICY_SNAPSHOT, snapshot_provider=provider)
+    for version in range(2, 6):
+        assert outbox.put(patch(version - 1, version))
+    assert outbox.dropped == 3
+
+    websocket.release()
+    await settle()
+    # 快照在轮到发送时才生成
+    assert requested == ["demo"]
+    assert [(message["type"], message["version"]) for message in websocket.sent] == [("patch", 1), ("schema_update", 5)]
+
+    # 快照已覆盖的增量（如溢出前已排入其他段的推送）不再发送，之后的增量照常发送
+    assert outbox.put(patch(4, 5))
+    assert outbox.put(patch(5, 6))
+    await settle()
+    assert [message["version"] for message in websocket.sent] == [1, 5, 6]
+    outbox.close()
+
+
+async def test_disconnect_policy_closes_with_code() -> None:
+    closed: list[ConnectionOutbox] = []
+    outbox, websocket = await blocked_outbox(POLICY_DISCONNECT, on_closed=closed.append)
+    for version in range(2, 5):
+        assert outbox.put(patch(version - 1, version))
+
+    assert not outbox.put(patch(4, 5))
+    await settle()
+    assert outbox.closed
+    assert closed == [outbox]
+    assert websocket.close_codes == [CLOSE_CODE_SLOW_CONSUMER]
+    assert outbox.dropped == 3
+    assert not outbox.put(patch(5, 6))
+
+    websocket.release()
+    await settle()
+    # 写任务已取消，阻塞中的消息也不再发送
+    assert websocket.sent == []
+
+
+async def test_coalesce_policy_merges_backlog() -> None:
+    outbox, websocket = await blocked_outbox(POLICY_COALESCE)
+    for version in range(2, 5):
+        assert outbox.put(patch(version - 1, version, key=f"k{version}"))
+    assert outbox.put(patch(4, 5, key="k5"))
+    assert len(outbox) == 1
+    assert outbox.dropped == 3
+
+    await drain(outbox, websocket)
+    first, merged = websocket.sent
+    assert first["version"] == 1
+    assert (merged["baseVersion"], merged["version"]) == (1, 5)
+    assert [op["path"] for op in merged["ops"]] == [f"/state/params/k{version}" for version in range(2, 6)]
+    assert merged["patch"] == {f"state.params.k{version}": version for version in range(2, 6)}
+
+
+async def test_coalesce_falls_back_to_snapshot() -> None:
+    outbox, websocket = await blocked_outbox(POLICY_COALESCE, snapshot_provider=lambda name: snapshot(4))
+    # 非增量消息把增量隔开，合并后仍然超过上限
+    assert outbox.put(patch(1, 2))
+    assert outbox.put({"type": "highlight", "blockId": "a"})
+    assert outbox.put(patch(2, 3))
+    assert outbox.put({"type": "highlight", "blockId": "b"})
+    assert len(outbox) == 1
+
+    await drain(outbox, websocket)
+    assert [message["type"] for message in websocket.sent] == ["patch", "schema_update"]
+
+
+def test_merge_patch_messages_covers_version_range() -> None:
+    merged = merge_patch_messages(patch(3, 4, key="a"), patch(4, 5, key="b"))
+    assert merged is not None
+    assert (merged["baseVersion"], merged["version"], merged["patch_id"]) == (3, 5, 5)
+    assert merged["ops"] == patch(3, 4, key="a")["ops"] + patch(4, 5, key="b")["ops"]
+    assert merged["patch"] == {"state.params.a": 4, "state.params.b": 5}
+
+    # 版本不连续、不是增量或缺少 ops 时不合并
+    assert merge_patch_messages(patch(3, 4), patch(5, 6)) is None
+    assert merge_patch_messages(snapshot(4), patch(4, 5)) is None
+    assert merge_patch_messages({**patch(3, 4), "ops": None}, patch(4, 5)) is None
+
+
+def test_unknown_policy_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        _ = ConnectionOutbox(BlockingWebSocket(), "demo", policy="drop")  # type: ignore[arg-type]
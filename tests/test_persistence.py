@@ -0,0 +1,183 @@
+"""持久化引擎测试：WAL 写入、快照与恢复
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_persistence.py
+"""
+
+import contextlib
+import io
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from backend.core import SchemaManager
+from backend.core.persistence import PersistenceEngine, RECORD_DELETE, RECORD_DELTA, RECORD_PUT
+from backend.fastapi.models import UISchema, SchemaPatch
+
+from conftest import Runtime
+
+
+def build_schema(page_key: str = "persist") -> dict[str, Any]:
+    return UISchema.model_validate({
+        "page_key": page_key,
+        "state": {"params": {"tasks": [{"id": 1}], "count": 0}},
+    }).model_dump(by_alias=True, mode="json")
+
+
+def open_engine(data_dir: Path, **options: Any) -> tuple[PersistenceEngine, dict[str, Any]]:
+    """新建引擎并恢复（模拟进程启动）"""
+    engine = PersistenceEngine(data_dir, fsync=False, **options)
+    return engine, engine.recover()
+
+
+def delta(instance: str, version: int, ops: list[dict[str, Any]]) -> dict[str, Any]:
+    return {"kind": RECORD_DELTA, "instance": instance, "version": version, "ops": ops}
+
+
+def wal_segments(data_dir: Path) -> list[Path]:
+    return sorted(data_dir.glob("wal-*.log"))
+
+
+@pytest.fixture(autouse=True)
+def quiet() -> Any:
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def test_write_close_recover_round_trip(tmp_path: Path) -> None:
+    engine, state = open_engine(tmp_path)
+    assert state == {"instances": {}, "versions": {}}
+    engine.start()
+    _ = engine.append({"kind": RECORD_PUT, "instance": "a", "version": 1, "schema": build_schema("a")})
+    _ = engine.append({"kind": RECORD_PUT, "instance": "b", "version": 1, "schema": build_schema("b")})
+    _ = engine.append(delta("a", 2, [{"op": "replace", "path": "/state/params/count", "value": 5}]))
+    _ = engine.append({"kind": RECORD_DELETE, "instance": "b"})
+    engine.close()
+    assert engine.records_written == 4
+
+    engine, state = open_engine(tmp_path)
+    expected = build_schema("a")
+    expected["state"]["params"]["count"] = 5
+    assert state["instances"] == {"a": expected}
+    assert state["versions"] == {"a": 2, "b": 1}
+
+    # 恢复后从下一个序号继续写入
+    engine.start()
+    _ = engine.append(delta("a", 3, [{"op": "replace", "path": "/state/params/count", "value": 6}]))
+    engine.close()
+    _, state = open_engine(tmp_path)
+    assert state["instances"]["a"]["state"]["params"]["count"] == 6
+    assert state["versions"]["a"] == 3
+
+
+def test_torn_last_line_is_truncated_and_later_segments_dropped(tmp_path: Path) -> None:
+    engine, _ = open_engine(tmp_path)
+    engine.start()
+    _ = engine.append({"kind": RECORD_PUT, "instance": "a", "version": 1, "schema": build_schema("a")})
+    _ = engine.append(delta("a", 2, [{"op": "replace", "path": "/state/params/count", "value": 1}]))
+    engine.close()
+    [segment] = wal_segments(tmp_path)
+    valid_size = segment.stat().st_size
+
+    # 最后一行写到一半时进程崩溃，之后又产生了一个新段
+    with open(segment, "ab") as file:
+        _ = file.write(b"0badc0de\t{\"seq\":3,\"kind\":\"delta\"")
+    later = tmp_path / f"wal-{4:020d}.log"
+    _ = later.write_bytes(segment.read_bytes()[:valid_size])
+
+    engine, state = open_engine(tmp_path)
+    assert state["instances"]["a"]["state"]["params"]["count"] == 1
+    assert state["versions"] == {"a": 2}
+    assert segment.stat().st_size == valid_size
+    assert not later.exists()
+
+    # 截断后继续写入的记录可以正常恢复
+    engine.start()
+    _ = engine.append(delta("a", 3, [{"op": "replace", "path": "/state/params/count", "value": 2}]))
+    engine.close()
+    _, state = open_engine(tmp_path)
+    assert state["instances"]["a"]["state"]["params"]["count"] == 2
+    assert state["versions"] == {"a": 3}
+
+
+def test_corrupted_checksum_stops_replay(tmp_path: Path) -> None:
+    engine, _ = open_engine(tmp_path)
+    engine.start()
+    _ = engine.append({"kind": RECORD_PUT, "instance": "a", "version": 1, "schema": build_schema("a")})
+    _ = engine.append(delta("a", 2, [{"op": "replace", "path": "/state/params/count", "value": 1}]))
+    _ = engine.append(delta("a", 3, [{"op": "replace", "path": "/state/params/count", "value": 2}]))
+    engine.close()
+    [segment] = wal_segments(tmp_path)
+    lines = segment.read_bytes().splitlines(keepends=True)
+    _ = segment.write_bytes(lines[0] + lines[1].replace(b":1}", b":9}") + lines[2])
+
+    _, state = open_engine(tmp_path)
+    assert state["instances"]["a"]["state"]["params"]["count"] == 0
+    assert state["versions"] == {"a": 1}
+    assert segment.read_bytes() == lines[0]
+
+
+async def test_recover_from_snapshot_plus_wal_tail(tmp_path: Path) -> None:
+    engine, _ = open_engine(tmp_path, snapshot_interval=3)
+    engine.start()
+    manager = SchemaManager()
+    manager.attach_persistence(engine)
+    manager.set("a", UISchema.model_validate(build_schema("a")))
+    for _ in range(3):
+        schema = manager.get("a")
+        assert schema is not None
+        version = manager.bump_version("a")
+        schema.state.params["count"] = version
+        _ = manager.log_delta("a", version, [{"op": "replace", "path": "/state/params/count", "value": version}])
+    manager.set("b", UISchema.model_validate(build_schema("b")))
+    engine.close()
+
+    # 第 3 条记录之后写了快照，只剩快照之后的 WAL 段
+    [snapshot] = sorted(tmp_path.glob("snapshot-*.json"))
+    assert snapshot.name == f"snapshot-{3:020d}.json"
+    assert [path.name for path in wal_segments(tmp_path)] == [f"wal-{4:020d}.log"]
+    assert engine.snapshots_written == 2
+
+    _, state = open_engine(tmp_path)
+    assert state == manager.export_state()
+
+    restored = SchemaManager()
+    restored.load_state(state)
+    assert restored.get_version("a") == 4
+    assert restored.export_state() == manager.export_state()
+
+
+async def test_element_level_list_ops_replay(tmp_path: Path) -> None:
+    runtime = Runtime()
+    manager = runtime.schema_manager
+    engine, _ = open_engine(tmp_path)
+    engine.start()
+    manager.attach_persistence(engine)
+    manager.set("lists", UISchema.model_validate(build_schema("lists")))
+    schema = manager.get("lists")
+    assert schema is not None
+
+    async def patch(raw: dict[str, Any]) -> None:
+        result = runtime.instance_service.apply_unified_patch(schema, SchemaPatch.model_validate(raw))
+        assert result["success"], result
+        _ = await runtime.schema_sync.publish("lists", [raw["path"]])
+
+    try:
+        # 第一次修改整体下发，之后是元素级操作
+        await patch({"op": "append_to_list", "path": "state.params.tasks", "value": {"id": 2}})
+        await patch({"op": "append_to_list", "path": "state.params.tasks", "value": [{"id": 3}, {"id": 4}]})
+        await patch({"op": "prepend_to_list", "path": "state.params.tasks", "value": {"id": 0}})
+        await patch({"op": "update_list_item", "path": "state.params.tasks", "value": {"key": "id", "value": 3, "updates": {"done": True}}})
+        await patch({"op": "remove_from_list", "path": "state.params.tasks", "value": {"key": "id", "value": 2}})
+        await patch({"op": "remove_last", "path": "state.params.tasks"})
+    finally:
+        engine.close()
+
+    records = [line.split(b"\t", 1)[1] for path in wal_segments(tmp_path) for line in path.read_bytes().splitlines()]
+    assert any(b'"path":"/state/params/tasks/-"' in record for record in records)
+    assert any(b'"path":"/state/params/tasks/0"' in record for record in records)
+
+    _, state = open_engine(tmp_path)
+    assert state["instances"]["lists"]["state"]["params"]["tasks"] == [{"id": 0}, {"id": 1}, {"id": 3, "done": True}]
+    assert state == manager.export_state()
@@ -0,0 +1,73 @@
+"""表格行索引回归测试：绕过 patch 引擎追加的行仍然可以按 rowKey 更新和删除
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_row_index.py
+"""
+
+from typing import Any
+
+import pytest
+
+from backend.core import SchemaManager
+from backend.fastapi.models import UISchema, SchemaPatch
+from backend.fastapi.routes.patch_routes import handle_add_operation
+from backend.fastapi.services.instance_service import InstanceService
+
+PATH = "state.params.tasks"
+
+
+@pytest.fixture
+def table() -> tuple[UISchema, InstanceService]:
+    schema = UISchema.model_validate({
+        "page_key": "rows",
+        "state": {"params": {"tasks": [{"id": i, "name": f"Task {i}"} for i in range(5)]}},
+        "blocks": [{
+            "id": "table_block", "layout": "form", "title": "Tasks",
+            "props": {"fields": [{
+                "key": "tasks", "label": "Tasks", "type": "table", "rowKey": "id",
+                "columns": [{"key": "id", "title": "ID"}, {"key": "name", "title": "Name"}]
+            }]}
+        }]
+    })
+    manager = SchemaManager()
+    manager.set("rows", schema)
+    return schema, InstanceService(manager)
+
+
+def apply(schema: UISchema, service: InstanceService, op: str, value: Any) -> None:
+    result = service.apply_unified_patch(schema, SchemaPatch.model_validate({"op": op, "path": PATH, "value": value}))
+    assert result["success"], result
+
+
+def rows_by_id(schema: UISchema) -> dict[Any, dict[str, Any]]:
+    return {row["id"]: row for row in schema.state.params["tasks"]}
+
+
+def test_update_and_remove_row_added_by_add_operation(table: tuple[UISchema, InstanceService]) -> None:
+    schema, service = table
+    # 前两次更新复制列表并构建行索引
+    apply(schema, service, "update_list_item", {"key": "id", "value": 1, "updates": {"name": "one"}})
+    apply(schema, service, "update_list_item", {"key": "id", "value": 2, "updates": {"name": "two"}})
+    assert handle_add_operation(schema, PATH, {"id": 99, "name": "added"})["success"]
+
+    apply(schema, service, "update_list_item", {"key": "id", "value": 99, "updates": {"name": "updated"}})
+    assert rows_by_id(schema)[99]["name"] == "updated"
+
+    apply(schema, service, "remove_from_list", {"key": "id", "value": 99})
+    assert 99 not in rows_by_id(schema)
+    assert rows_by_id(schema)[2]["name"] == "two"
+
+
+def test_index_miss_falls_back_to_scan_for_rows_appended_in_place(table: tuple[UISchema, InstanceService]) -> None:
+    schema, service = table
+    apply(schema, service, "update_list_item", {"key": "id", "value": 1, "updates": {"name": "one"}})
+    apply(schema, service, "update_list_item", {"key": "id", "value": 2, "updates": {"name": "two"}})
+    # 直接修改持有的列表，行索引没有收到这一行
+    schema.state.params["tasks"].append({"id": 42, "name": "direct"})
+
+    apply(schema, service, "update_list_item", {"key": "id", "value": 42, "updates": {"name": "updated"}})
+    assert rows_by_id(schema)[42]["name"] == "updated"
+
+    apply(schema, service, "remove_from_list", {"key": "id", "value": 42})
+    assert 42 not in rows_by_id(schema)
+    assert len(schema.state.params["tasks"]) == 5
@@ -0,0 +1,109 @@
+"""GET /ui/schema 缓存测试：ETag / 304 与只读语义
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_schema_cache.py
+"""
+
+import contextlib
+import io
+from collections.abc import AsyncIterator
+from typing import Any
+
+import httpx
+import pytest
+
+from backend.fastapi.models import BaseFieldConfig, FieldType, UISchema
+from backend.fastapi.routes.schema_routes import register_schema_routes
+from backend.fastapi.services.patch import apply_patch_to_schema
+
+from conftest import Runtime
+
+
+def build_schema() -> UISchema:
+    schema = UISchema.model_validate({
+        "page_key": "cached",
+        "state": {"params": {"count": 0}},
+        "blocks": [{"id": "form", "layout": "form", "title": "Form", "props": {"fields": []}}],
+    })
+    # 与默认实例一样使用字段模型对象
+    schema.blocks[0].props.fields = [
+        BaseFieldConfig(label="Count", key="count", type=FieldType.NUMBER),
+        BaseFieldConfig(label="Name", key="name", type=FieldType.TEXT, value="Alice"),
+    ]
+    return schema
+
+
+@pytest.fixture(autouse=True)
+def quiet() -> Any:
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+@pytest.fixture
+async def client(runtime: Runtime) -> AsyncIterator[httpx.AsyncClient]:
+    runtime.schema_manager.set("cached", build_schema())
+    register_schema_routes(runtime.app, runtime.schema_manager, "cached", runtime.ws_manager, runtime.table_windows)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=runtime.app), base_url="http://test") as http:
+        yield http
+
+
+async def get_schema(client: httpx.AsyncClient, etag: str | None = None) -> httpx.Response:
+    headers = {"If-None-Match": etag} if etag else {}
+    return await client.get("/ui/schema", params={"instanceId": "cached"}, headers=headers)
+
+
+async def test_etag_cycle(runtime: Runtime, client: httpx.AsyncClient) -> None:
+    first = await get_schema(client)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.json()["version"] == 1
+    assert etag.startswith('"v1-')
+
+    cached = await get_schema(client, etag)
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+
+    # 发布一次增量后 ETag 变化，旧 ETag 不再命中
+    schema = runtime.schema_manager.get("cached")
+    assert schema is not None
+    apply_patch_to_schema(schema, {"state.params.count": 5})
+    _ = await runtime.schema_sync.publish("cached", ["state.params.count"])
+
+    changed = await get_schema(client, etag)
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert changed.json()["version"] == 2
+    assert changed.json()["schema"]["state"]["params"]["count"] == 5
+
+    again = await get_schema(client, changed.headers["ETag"])
+    assert again.status_code == 304
+
+
+async def test_unpublished_change_invalidates_cache(runtime: Runtime, client: httpx.AsyncClient) -> None:
+    etag = (await get_schema(client)).headers["ETag"]
+    schema = runtime.schema_manager.get("cached")
+    assert schema is not None
+    # 修订号变化（版本号不变）时重新序列化，内容不同则 ETag 不同
+    apply_patch_to_schema(schema, {"blocks.0.title": "Edited"})
+    response = await get_schema(client, etag)
+    assert response.status_code == 200
+    assert response.json()["schema"]["blocks"][0]["title"] == "Edited"
+    assert response.headers["ETag"] != etag
+
+
+async def test_get_does_not_modify_schema(runtime: Runtime, client: httpx.AsyncClient) -> None:
+    schema = runtime.schema_manager.get("cached")
+    assert schema is not None
+    # 设置实例时已用字段的 value 初始化 state.params（包含在同一个版本里）
+    assert schema.state.params == {"count": 0, "name": "Alice"}
+
+    # 之后绕过 Patch 删除的参数不会被 GET 悄悄补回
+    del schema.state.params["name"]
+    _ = schema.touch()
+    revision = schema.revision
+    response = await get_schema(client)
+    assert response.status_code == 200
+    assert "name" not in response.json()["schema"]["state"]["params"]
+    assert schema.revision == revision
+    assert runtime.schema_manager.get_version("cached") == 1
@@ -0,0 +1,180 @@
+"""窗口表格测试：快照与增量中去掉表格数据、订阅者只收到各自窗口的行
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_table_window.py
+"""
+
+import contextlib
+import io
+from typing import Any
+
+import pytest
+
+from backend.fastapi.models import SchemaPatch, UISchema
+
+from conftest import Runtime
+
+
+class FakeWebSocket:
+    """只用作订阅的键"""
+
+
+class Sent:
+    """记录推送的增量和发给单个连接的消息"""
+
+    def __init__(self, runtime: Runtime, monkeypatch: pytest.MonkeyPatch) -> None:
+        self.deltas: list[list[dict[str, Any]]] = []
+        self.messages: list[tuple[Any, dict[str, Any]]] = []
+
+        async def send_delta(instance_name: str, ops: list[dict[str, Any]], version: int, base_version: int, **kwargs: Any) -> bool:
+            self.deltas.append(ops)
+            return True
+
+        def send_to_connection(websocket: Any, message: dict[str, Any]) -> bool:
+            self.messages.append((websocket, message))
+            return True
+
+        monkeypatch.setattr(runtime.ws_manager, "send_delta", send_delta)
+        monkeypatch.setattr(runtime.ws_manager, "send_to_connection", send_to_connection)
+
+    def rows_for(self, websocket: Any) -> list[dict[str, Any]]:
+        return [message for target, message in self.messages if target is websocket]
+
+
+def build_schema() -> UISchema:
+    return UISchema.model_validate({
+        "page_key": "tables",
+        "state": {"params": {"tasks": [{"id": 1}, {"id": 2}, {"id": 3}], "users": [{"id": 9}], "count": 0}},
+        "blocks": [{
+            "id": "grid", "layout": "form", "title": "Grid",
+            "props": {"fields": [
+                {"label": "Tasks", "key": "tasks", "type": "table", "serverWindow": True,
+                 "columns": [{"key": "id", "title": "ID"}]},
+                {"label": "Users", "key": "users", "type": "table", "columns": [{"key": "id", "title": "ID"}]},
+            ]},
+        }],
+    })
+
+
+@pytest.fixture(autouse=True)
+def quiet() -> Any:
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+@pytest.fixture
+def runtime() -> Runtime:
+    runtime = Runtime()
+    runtime.schema_manager.set("tables", build_schema())
+    return runtime
+
+
+async def apply(runtime: Runtime, raw: dict[str, Any]) -> None:
+    schema = runtime.schema_manager.get("tables")
+    assert schema is not None
+    result = runtime.instance_service.apply_unified_patch(schema, SchemaPatch.model_validate(raw))
+    assert result["success"], result
+    _ = await runtime.schema_sync.publish("tables", [raw["path"]])
+
+
+def test_filter_ops_strips_windowed_data(runtime: Runtime) -> None:
+    ops = [
+        {"op": "replace", "path": "/state/params/tasks", "value": [{"id": 1}]},
+        {"op": "add", "path": "/state/params/tasks/-", "value": {"id": 4}},
+        {"op": "replace", "path": "/state/params/tasks/0", "value": {"id": 0}},
+        {"op": "remove", "path": "/state/params/tasks/1"},
+        {"op": "replace", "path": "/state/params/users", "value": [{"id": 8}]},
+        {"op": "replace", "path": "/state/params/count", "value": 1},
+        {"op": "replace", "path": "/state/params", "value": {"tasks": [{"id": 5}], "count": 2}},
+        {"op": "replace", "path": "/state", "value": {"params": {"tasks": [{"id": 6}], "count": 3}}},
+        {"op": "remove", "path": "/state/params/tasks"},
+    ]
+    filtered, changed = runtime.table_windows.filter_ops("tables", ops)
+    assert changed == {"tasks"}
+    assert filtered == [
+        {"op": "replace", "path": "/state/params/users", "value": [{"id": 8}]},
+        {"op": "replace", "path": "/state/params/count", "value": 1},
+        {"op": "replace", "path": "/state/params", "value": {"tasks": [], "count": 2}},
+        {"op": "replace", "path": "/state", "value": {"params": {"tasks": [], "count": 3}}},
+        # 删除整个键不携带数据，照常下发
+        {"op": "remove", "path": "/state/params/tasks"},
+    ]
+    # 原操作不被修改（WAL 和断线续传记录保存完整数据）
+    assert ops[6]["value"]["tasks"] == [{"id": 5}]
+
+    # 没有窗口表格的实例原样返回
+    runtime.schema_manager.set("plain", UISchema.model_validate({"page_key": "plain"}))
+    assert runtime.table_windows.filter_ops("plain", ops) == (ops, set())
+
+
+def test_snapshot_strips_windowed_rows(runtime: Runtime) -> None:
+    snapshot = runtime.schema_sync.snapshot_message("tables")
+    assert snapshot is not None
+    params = snapshot["schema"]["state"]["params"]
+    assert params == {"tasks": [], "users": [{"id": 9}], "count": 0}
+    # 服务端的 Schema 保留完整数据
+    schema = runtime.schema_manager.get("tables")
+    assert schema is not None and len(schema.state.params["tasks"]) == 3
+
+
+async def test_list_ops_are_stripped_from_deltas(runtime: Runtime, monkeypatch: pytest.MonkeyPatch) -> None:
+    sent = Sent(runtime, monkeypatch)
+    await apply(runtime, {"op": "append_to_list", "path": "state.params.tasks", "value": {"id": 4}})
+    await apply(runtime, {"op": "append_to_list", "path": "state.params.users", "value": {"id": 10}})
+    await apply(runtime, {"op": "set", "path": "state.params.count", "value": 1})
+
+    assert [op["path"] for ops in sent.deltas for op in ops] == ["/state/params/users", "/state/params/count"]
+    # 断线续传补发的增量同样不含窗口表格的数据
+    resumed = runtime.schema_sync.resume_messages("tables", last_seen_version=1)
+    assert [[op["path"] for op in message["ops"]] for message in resumed] == [
+        [], ["/state/params/users"], ["/state/params/count"]
+    ]
+    records = runtime.schema_manager.deltas_since("tables", 1)
+    assert records is not None and records[0]["ops"][0]["path"].startswith("/state/params/tasks")
+
+
+async def test_whole_key_remove_is_published(runtime: Runtime, monkeypatch: pytest.MonkeyPatch) -> None:
+    sent = Sent(runtime, monkeypatch)
+    schema = runtime.schema_manager.get("tables")
+    assert schema is not None
+    before = set(schema.state.params)
+    del schema.state.params["tasks"]
+    _ = await runtime.schema_sync.publish("tables", [], params_before=before)
+    assert sent.deltas == [[{"op": "remove", "path": "/state/params/tasks"}]]
+
+
+async def test_subscribers_receive_their_window(runtime: Runtime, monkeypatch: pytest.MonkeyPatch) -> None:
+    head, tail, top = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    windows = runtime.table_windows
+    first = windows.subscribe(head, "tables", "tasks", offset=0, limit=2)  # type: ignore[arg-type]
+    assert (first["total"], first["rows"]) == (3, [{"id": 1}, {"id": 2}])
+    second = windows.subscribe(tail, "tables", "tasks", offset=2, limit=2)  # type: ignore[arg-type]
+    assert second["rows"] == [{"id": 3}]
+    third = windows.subscribe(top, "tables", "tasks", limit=2, sort_by="id", sort_order="desc")  # type: ignore[arg-type]
+    assert third["rows"] == [{"id": 3}, {"id": 2}]
+    sent = Sent(runtime, monkeypatch)
+
+    await apply(runtime, {"op": "append_to_list", "path": "state.params.tasks", "value": {"id": 4}})
+    version = runtime.schema_manager.get_version("tables")
+    # 行没有变化的窗口只更新总数
+    [head_rows] = sent.rows_for(head)
+    assert (head_rows["type"], head_rows["total"], head_rows["length"], head_rows["rows"]) == ("table_rows", 4, 2, [])
+    assert head_rows["version"] == version
+    [tail_rows] = sent.rows_for(tail)
+    assert (tail_rows["offset"], tail_rows["length"], tail_rows["rows"]) == (2, 2, [{"index": 1, "row": {"id": 4}}])
+    [top_rows] = sent.rows_for(top)
+    assert top_rows["rows"] == [{"index": 0, "row": {"id": 4}}, {"index": 1, "row": {"id": 3}}]
+
+    # 只修改第一行：其他窗口没有变化，不发送消息
+    sent.messages.clear()
+    await apply(runtime, {"op": "update_list_item", "path": "state.params.tasks",
+                          "value": {"key": "id", "value": 1, "updates": {"done": True}}})
+    assert [target for target, _ in sent.messages] == [head]
+    assert sent.messages[0][1]["rows"] == [{"index": 0, "row": {"id": 1, "done": True}}]
+
+    # 取消订阅后不再推送
+    sent.messages.clear()
+    windows.unsubscribe(head, "tables")  # type: ignore[arg-type]
+    await apply(runtime, {"op": "prepend_to_list", "path": "state.params.tasks", "value": {"id": 0}})
+    assert [target for target, _ in sent.messages] == [tail, top]
+    assert windows.row_messages == 6
@@ -0,0 +1,74 @@
+"""WebSocket 事件测试：事件产生的增量与 ack 的先后顺序
+
+运行方式（仓库根目录）：
+    python -m pytest tests/test_ws_events.py
+"""
+
+import contextlib
+import io
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.fastapi.models import UISchema
+from backend.fastapi.routes.websocket_routes import register_websocket_routes
+
+from conftest import Runtime
+
+
+def connect(runtime: Runtime) -> TestClient:
+    runtime.schema_manager.set("ws", UISchema.model_validate({"page_key": "ws", "state": {"params": {"name": ""}}}))
+    register_websocket_routes(runtime.app, runtime.ws_manager, runtime.schema_sync, runtime.handle_event, runtime.table_windows)
+    return TestClient(runtime.app)
+
+
+def field_change(request_id: int, value: str) -> dict[str, Any]:
+    return {
+        "type": "event", "id": request_id,
+        "event": {"type": "field:change", "pageKey": "ws", "payload": {"fieldKey": "name", "value": value}}
+    }
+
+
+def receive_until(websocket: Any, message_type: str) -> list[dict[str, Any]]:
+    """接收消息直到收到指定类型的消息（包含该消息）"""
+    messages: list[dict[str, Any]] = []
+    while not messages or messages[-1].get("type") != message_type:
+        messages.append(websocket.receive_json())
+    return messages
+
+
+@pytest.fixture(autouse=True)
+def quiet() -> Any:
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def test_batched_delta_arrives_before_ack() -> None:
+    # 合并推送窗口远大于测试时长：不在回复 ack 前发送积压时，增量要等窗口结束才到达
+    runtime = Runtime(flush_interval=60.0)
+    with connect(runtime) as client, client.websocket_connect("/ui/ws/ws?last_seen_version=1") as websocket:
+        websocket.send_json(field_change(1, "Alice"))
+        messages = receive_until(websocket, "ack")
+
+    assert [message["type"] for message in messages] == ["patch", "ack"]
+    patch, ack = messages
+    assert patch["version"] == 2
+    assert patch["ops"] == [{"op": "add", "path": "/state/params/name", "value": "Alice"}]
+    assert ack["id"] == 1
+    assert ack["result"]["patch_id"] == patch["patch_id"]
+
+
+def test_coalesced_field_change_delta_follows_ack() -> None:
+    runtime = Runtime(coalesce_window=0.05)
+    with connect(runtime) as client, client.websocket_connect("/ui/ws/ws?last_seen_version=1") as websocket:
+        websocket.send_json(field_change(1, "A"))
+        websocket.send_json(field_change(2, "Al"))
+        acks = [websocket.receive_json(), websocket.receive_json()]
+        # 两个 ack 都先于增量到达，窗口结束后只发布一次最终值
+        patch = websocket.receive_json()
+
+    assert [(ack["type"], ack["id"], ack["result"]["patch_id"]) for ack in acks] == [("ack", 1, None), ("ack", 2, None)]
+    assert patch["type"] == "patch"
+    assert patch["ops"] == [{"op": "add", "path": "/state/params/name", "value": "Al"}]
+    assert patch["baseVersion"] == 1 and patch["version"] == 2